@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+"""Бенчмарк EffectSystem.update
+Сравнение стоимости кадра: расписание событий против полного обхода эффектов
+
+Запуск: python benchmarks/bench_effect_system.py [--effects 10000] [--frames 600]"""
+
+import argparse
+import logging
+import random
+import sys
+import time
+from pathlib import Path
+
+ROOT_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT_DIR))
+
+from src.systems.effects.effect_system import EffectSystem
+
+TEMPLATES = ["strength_buff", "speed_buff", "poison_debuff", "slow_debuff",
+             "heal_over_time", "magic_shield"]
+
+def full_scan_update(system: EffectSystem, current_time: float):
+    """Прежний алгоритм: обход всех эффектов всех сущностей каждый кадр"""
+    for entity_id, effects in list(system.active_effects.items()):
+        effects_to_remove = []
+        for active_effect in effects:
+            if not active_effect.is_active:
+                continue
+            if active_effect.expires_at and current_time >= active_effect.expires_at:
+                effects_to_remove.append(active_effect)
+                continue
+            system._process_effect_triggers(active_effect, current_time)
+        for effect_to_remove in effects_to_remove:
+            system.remove_effect(entity_id, effect_to_remove.effect.effect_id)
+
+def populate(effect_count: int, seed: int) -> EffectSystem:
+    """Система с effect_count активными эффектами на 1000 сущностях"""
+    rng = random.Random(seed)
+    system = EffectSystem()
+    system.initialize()
+    for index in range(effect_count):
+        # Уникальное имя снимает ограничение стаков NONE
+        template_id = TEMPLATES[index % len(TEMPLATES)]
+        system.effect_templates[template_id].name = f"{template_id}_{index}"
+        system.apply_effect(f"entity_{index % 1000}", template_id,
+                            duration=rng.uniform(5.0, 60.0))
+    return system
+
+def run(label: str, system: EffectSystem, frames: int, frame_time: float, update) -> float:
+    """Прогон кадров с виртуальным временем; возвращает среднее время кадра в мс"""
+    real_time = time.time
+    virtual_now = [real_time()]
+    time.time = lambda: virtual_now[0]
+    try:
+        start = time.perf_counter()
+        for _ in range(frames):
+            virtual_now[0] += frame_time
+            update(system, virtual_now[0])
+        elapsed = time.perf_counter() - start
+    finally:
+        time.time = real_time
+
+    per_frame_ms = elapsed / frames * 1000.0
+    remaining = len(system.effects_by_id)
+    print(f"{label:<14} {per_frame_ms:8.3f} мс/кадр  осталось эффектов: {remaining}")
+    return per_frame_ms
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--effects", type=int, default=10000)
+    parser.add_argument("--frames", type=int, default=600)
+    parser.add_argument("--fps", type=float, default=60.0)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    logging.disable(logging.CRITICAL)
+    frame_time = 1.0 / args.fps
+    print(f"Эффектов: {args.effects}, кадров: {args.frames} ({args.frames * frame_time:.1f} с игрового времени)")
+
+    scheduled = run("расписание", populate(args.effects, args.seed), args.frames, frame_time,
+                    lambda system, _: system.update(frame_time))
+    scanned = run("полный обход", populate(args.effects, args.seed), args.frames, frame_time,
+                  full_scan_update)
+    print(f"Ускорение: {scanned / scheduled:.1f}x")
+
+if __name__ == "__main__":
+    main()
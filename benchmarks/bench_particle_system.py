@@ -0,0 +1,60 @@
+#!/usr/bin/env python3
+"""Бенчмарк ParticleSystem в headless-режиме
+Стоимость кадра и пропускная способность (частиц в секунду) при постоянной
+эмиссии и периодических взрывах, без окна и без выгрузки геометрии
+
+Запуск: python benchmarks/bench_particle_system.py [--emitters 20] [--explosions 10] [--frames 600]"""
+
+import argparse
+import logging
+import statistics
+import sys
+import time
+from pathlib import Path
+
+ROOT_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT_DIR))
+
+from src.systems.particle_system import ParticleSystem
+
+def run(emitters: int, explosions: int, intensity: float, frames: int, dt: float):
+    """Кадры с заданным числом эмиттеров и взрывов за кадр"""
+    system = ParticleSystem(headless=True, seed=0)
+    system.initialize()
+    for index in range(emitters):
+        system.create_emitter(f"emitter_{index}", x=index, particle_count=200,
+                              emission_rate=60.0, particle_lifetime=2.0)
+
+    timings = []
+    simulated = 0
+    for frame in range(frames):
+        start = time.perf_counter()
+        for _ in range(explosions):
+            system.create_explosion(0.0, 0.0, 0.0, intensity)
+        system.update(dt)
+        timings.append((time.perf_counter() - start) * 1000.0)
+        simulated += system.particle_count
+
+    stats = system.get_stats()
+    total_time = sum(timings) / 1000.0
+    print(f"эмиттеров {emitters}, взрывов/кадр {explosions} (x{intensity}), кадров {frames}")
+    print(f"  частиц в конце: {stats['particles']}, емкость буферов: {stats['capacity']}, "
+          f"создано: {stats['spawned']}, угасло: {stats['expired']}, вытеснено: {stats['recycled']}")
+    print(f"  кадр: среднее {statistics.mean(timings):.3f} мс, медиана {statistics.median(timings):.3f} мс, "
+          f"максимум {max(timings):.3f} мс")
+    print(f"  пропускная способность: {simulated / total_time / 1e6:.2f} млн частиц-обновлений/с")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--emitters", type=int, default=20)
+    parser.add_argument("--explosions", type=int, default=10)
+    parser.add_argument("--intensity", type=float, default=2.0)
+    parser.add_argument("--frames", type=int, default=600)
+    parser.add_argument("--dt", type=float, default=1 / 60)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.WARNING)
+    run(args.emitters, args.explosions, args.intensity, args.frames, args.dt)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,263 @@
+#!/usr/bin/env python3
+"""Асинхронная загрузка ресурсов
+Ограниченный пул потоков ввода-вывода читает ресурсы в порядке классов
+приоритета (видимые раньше предзагрузки); повторные запросы того же пути
+получают уже существующий future. Обратные вызовы с результатом (прикрепление
+к графу сцены) выполняются в главном потоке из process_completions в пределах
+бюджета кадра"""
+
+from concurrent.futures import Future
+from enum import IntEnum
+from typing import Any, Callable, Dict, List, Optional, Tuple
+import asyncio
+import heapq
+import itertools
+import logging
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+class LoadPriority(IntEnum):
+    """Классы приоритета загрузки (меньше - раньше)"""
+    VISIBLE = 0    # Нужен в текущем кадре или на экране
+    NEARBY = 1     # Скоро понадобится
+    PREFETCH = 2   # Фоновая предзагрузка
+
+class LoadRequest:
+    """Запрос загрузки одного ресурса"""
+
+    __slots__ = ('key', 'kind', 'path', 'priority', 'future', 'callbacks', 'started', 'submitted_at')
+
+    def __init__(self, kind: str, path: str, priority: LoadPriority):
+        self.key = (kind, path)
+        self.kind = kind
+        self.path = path
+        self.priority = priority
+        self.future: Future = Future()
+        self.callbacks: List[Tuple[LoadPriority, Callable[[Any], None]]] = []
+        self.started = False
+        self.submitted_at = time.perf_counter()
+
+class LoadBatch:
+    """Группа запросов с общим прогрессом (для экрана загрузки)"""
+
+    def __init__(self, futures: List[Future]):
+        self.futures = futures
+
+    @property
+    def total(self) -> int:
+        return len(self.futures)
+
+    @property
+    def completed(self) -> int:
+        return sum(1 for future in self.futures if future.done())
+
+    @property
+    def progress(self) -> float:
+        return self.completed / self.total if self.futures else 1.0
+
+    @property
+    def done(self) -> bool:
+        return all(future.done() for future in self.futures)
+
+    @property
+    def failed(self) -> int:
+        return sum(1 for future in self.futures
+                   if future.done() and not future.cancelled() and future.exception() is not None)
+
+class AsyncAssetLoader:
+    """Фоновый загрузчик с приоритетами, дедупликацией и бюджетом завершений"""
+
+    def __init__(self, load_function: Callable[[str, str], Any], max_workers: int = 4,
+                 completion_budget: float = 0.004):
+        self.load_function = load_function
+        self.max_workers = max(1, max_workers)
+        self.completion_budget = completion_budget
+
+        self._lock = threading.Lock()
+        self._has_work = threading.Condition(self._lock)
+        self._pending: List[Tuple[int, int, LoadRequest]] = []
+        self._in_flight: Dict[Tuple[str, str], LoadRequest] = {}
+        self._sequence = itertools.count()
+        self._workers: List[threading.Thread] = []
+        self._running = False
+
+        # Готовые к прикреплению результаты: (приоритет, порядок, обратный вызов, результат)
+        self._completions: List[Tuple[int, int, Callable[[Any], None], Any]] = []
+
+        self.stats = {
+            'requested': 0,
+            'deduplicated': 0,
+            'loaded': 0,
+            'failed': 0,
+            'callbacks_run': 0,
+            'callbacks_deferred_frames': 0,
+            'load_time': 0.0
+        }
+
+    # - Жизненный цикл
+
+    def start(self):
+        with self._lock:
+            if self._running:
+                return
+            self._running = True
+        for index in range(self.max_workers):
+            worker = threading.Thread(target=self._worker_loop, name=f"AssetLoader-{index}", daemon=True)
+            worker.start()
+            self._workers.append(worker)
+
+    def shutdown(self, timeout: float = 2.0):
+        """Остановка потоков; ожидающие запросы отменяются"""
+        with self._lock:
+            self._running = False
+            pending = [request for _, _, request in self._pending if not request.started]
+            self._pending.clear()
+            for request in pending:
+                self._in_flight.pop(request.key, None)
+            self._has_work.notify_all()
+        for request in pending:
+            request.future.cancel()
+        for worker in self._workers:
+            worker.join(timeout)
+        self._workers.clear()
+        self._completions.clear()
+
+    # - Запросы
+
+    def load(self, kind: str, path: str, priority: LoadPriority = LoadPriority.VISIBLE,
+             on_ready: Optional[Callable[[Any], None]] = None) -> Future:
+        """Постановка загрузки; для пути в полете возвращается тот же future
+        on_ready(результат) вызывается в главном потоке из process_completions"""
+        if not self._running:
+            self.start()
+
+        with self._lock:
+            self.stats['requested'] += 1
+            request = self._in_flight.get((kind, path))
+            if request is None:
+                request = LoadRequest(kind, path, priority)
+                self._in_flight[request.key] = request
+                heapq.heappush(self._pending, (int(priority), next(self._sequence), request))
+                self._has_work.notify()
+            else:
+                self.stats['deduplicated'] += 1
+                if priority < request.priority and not request.started:
+                    # Повышение приоритета: новая запись в очереди, старая будет пропущена
+                    request.priority = priority
+                    heapq.heappush(self._pending, (int(priority), next(self._sequence), request))
+
+            if on_ready is not None:
+                if request.future.done():
+                    self._queue_completion(priority, on_ready, request.future)
+                else:
+                    request.callbacks.append((priority, on_ready))
+            return request.future
+
+    def load_batch(self, items: List[Tuple[str, str]], priority: LoadPriority = LoadPriority.VISIBLE) -> LoadBatch:
+        """Загрузка набора (тип, путь) с общим прогрессом"""
+        return LoadBatch([self.load(kind, path, priority) for kind, path in items])
+
+    def load_awaitable(self, kind: str, path: str, priority: LoadPriority = LoadPriority.VISIBLE,
+                       loop: Optional[asyncio.AbstractEventLoop] = None) -> "asyncio.Future":
+        """Та же загрузка в виде awaitable для asyncio"""
+        return asyncio.wrap_future(self.load(kind, path, priority), loop=loop)
+
+    # - Поток ввода-вывода
+
+    def _next_request(self) -> Optional[LoadRequest]:
+        with self._lock:
+            while self._running:
+                while self._pending:
+                    _, _, request = heapq.heappop(self._pending)
+                    # Дубликаты после повышения приоритета и отмененные запросы пропускаются
+                    if request.started or request.future.cancelled():
+                        continue
+                    request.started = True
+                    return request
+                self._has_work.wait()
+            return None
+
+    def _worker_loop(self):
+        while True:
+            request = self._next_request()
+            if request is None:
+                return
+            if not request.future.set_running_or_notify_cancel():
+                with self._lock:
+                    self._in_flight.pop(request.key, None)
+                continue
+
+            start = time.perf_counter()
+            try:
+                result = self.load_function(request.kind, request.path)
+            except Exception as e:
+                logger.error(f"Ошибка фоновой загрузки {request.kind} {request.path}: {e}")
+                self._finish(request, error=e)
+            else:
+                self._finish(request, result=result)
+            finally:
+                with self._lock:
+                    self.stats['load_time'] += time.perf_counter() - start
+
+    def _finish(self, request: LoadRequest, result: Any = None, error: Optional[Exception] = None):
+        with self._lock:
+            self._in_flight.pop(request.key, None)
+            callbacks = request.callbacks
+            request.callbacks = []
+            self.stats['loaded' if error is None else 'failed'] += 1
+
+        # Результат выставляется вне блокировки: обработчики future могут снова вызвать load()
+        if error is None:
+            request.future.set_result(result)
+        else:
+            request.future.set_exception(error)
+
+        with self._lock:
+            for priority, callback in callbacks:
+                self._queue_completion(priority, callback, request.future)
+
+    def _queue_completion(self, priority: LoadPriority, callback: Callable[[Any], None], future: Future):
+        """Постановка обратного вызова в очередь главного потока (под блокировкой)"""
+        # Обратные вызовы нужны только при успешной загрузке
+        if future.cancelled() or future.exception() is not None:
+            return
+        heapq.heappush(self._completions, (int(priority), next(self._sequence), callback, future.result()))
+
+    # - Главный поток
+
+    def process_completions(self, budget: Optional[float] = None) -> int:
+        """Выполнение обратных вызовов готовых загрузок в пределах бюджета (с)
+        Хотя бы один вызов выполняется всегда, чтобы очередь не стояла"""
+        budget = self.completion_budget if budget is None else budget
+        start = time.perf_counter()
+        processed = 0
+        while True:
+            with self._lock:
+                if not self._completions:
+                    break
+                if processed and time.perf_counter() - start >= budget:
+                    self.stats['callbacks_deferred_frames'] += 1
+                    break
+                _, _, callback, result = heapq.heappop(self._completions)
+            try:
+                callback(result)
+            except Exception as e:
+                logger.error(f"Ошибка обработки загруженного ресурса: {e}")
+            processed += 1
+        with self._lock:
+            self.stats['callbacks_run'] += processed
+        return processed
+
+    # - Информация
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                **self.stats,
+                'workers': len(self._workers),
+                'pending': sum(1 for _, _, request in self._pending if not request.started),
+                'in_flight': len(self._in_flight),
+                'completions_waiting': len(self._completions)
+            }
@@ -1,65 +1,56 @@
-from dataclasses import dataclass, field
-
-from enum import Enum
-
-from pathlib import Path
-
-from typing import *
-
-from typing import Any, Dict, Optional
-
-import logging
-
-import os
-
-import sys
+#!/usr/bin/env python3
+"""Entity Registry - Глобальный реестр сущностей
+Назначение: разрешение идентификаторов в объекты для обработчиков событий
+и поддержка общего пространственного индекса для запросов близости."""
 
 import threading
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from .spatial_index import get_spatial_index
+
+_lock = threading.RLock()
+_registry: Dict[str, Any] = {}
+
+def _extract_position(entity_obj: Any) -> Optional[Sequence[float]]:
+    """Позиция объекта сущности, если она у него есть"""
+    position = getattr(entity_obj, 'position', None)
+    if position is None and isinstance(entity_obj, dict):
+        position = entity_obj.get('position')
+    if position is None:
+        return None
+    try:
+        return (float(position[0]), float(position[1]), float(position[2]) if len(position) > 2 else 0.0)
+    except (TypeError, IndexError, ValueError):
+        return None
+
+def register_entity(entity_id: str, entity_obj: Any,
+                    position: Optional[Sequence[float]] = None) -> None:
+    with _lock:
+        _registry[entity_id] = entity_obj
+        position = position if position is not None else _extract_position(entity_obj)
+        if position is not None:
+            get_spatial_index().insert(entity_id, *position[:3])
+
+def unregister_entity(entity_id: str) -> None:
+    with _lock:
+        _registry.pop(entity_id, None)
+        get_spatial_index().remove(entity_id)
+
+def update_entity_position(entity_id: str, x: float, y: float, z: float = 0.0) -> None:
+    """Перемещение сущности в пространственном индексе"""
+    get_spatial_index().move(entity_id, x, y, z)
 
-import time
-
-#!/usr / bin / env python3
-"""Entity Regis try - Глобальный реестр сущностей
-Назначение: разрешение идентификаторов в объекты для обработчиков событий."""
-_lock= threading.RLock()
-_regis try: Dict[str, Any]= {}
-def regis ter_entity(entity_id: str, entity_obj: Any) -> None: with _lock: _regis try[entity_id]= entity_obj
-    pass
-pass
-pass
-pass
-pass
-pass
-pass
-def unregis ter_entity(entity_id: str) -> None: with _lock: if entity_idin _regis try: del _regis try[entity_id]
-    pass
-pass
-pass
-pass
-pass
-pass
-pass
 def get_entity(entity_id: str) -> Optional[Any]:
-    pass
-pass
-pass
-pass
-pass
-pass
-pass
-with _lock: return _regis try.get(entity_id)
-    pass
-pass
-pass
-pass
-pass
-pass
-pass
-def clear() -> None: with _lock: _regis try.clear()
-    pass
-pass
-pass
-pass
-pass
-pass
-pass
+    with _lock:
+        return _registry.get(entity_id)
+
+def find_entities_in_radius(x: float, y: float, radius: float,
+                            exclude: Optional[str] = None) -> List[Tuple[str, float]]:
+    """Зарегистрированные сущности в радиусе: (entity_id, расстояние)"""
+    return get_spatial_index().query_radius(x, y, radius, exclude=exclude)
+
+def clear() -> None:
+    with _lock:
+        for entity_id in _registry:
+            get_spatial_index().remove(entity_id)
+        _registry.clear()
@@ -5,8 +5,10 @@ import logging
 import time
 from dataclasses import dataclass, field
 from enum import Enum
-from typing import Dict, List, Optional, Any, Callable, Union
+from typing import Dict, List, Optional, Any, Callable, Tuple, Union
 from collections import defaultdict, deque
+import heapq
+import itertools
 import threading
 
 logger = logging.getLogger(__name__)
@@ -74,27 +76,36 @@ class EventSubscription:
     priority: EventPriority = EventPriority.NORMAL
     is_active: bool = True
     created_at: float = field(default_factory=time.time)
+    last_called: float = 0.0
+    call_count: int = 0
+    error_count: int = 0
 
 class EventSystem:
     """Система событий"""
     
     def __init__(self):
         self.event_handlers: Dict[str, List[EventHandler]] = defaultdict(list)
-        self.event_queue: deque = deque()
+        # Двоичная куча (-приоритет, порядковый номер, событие): FIFO внутри одного приоритета
+        self.event_queue: List[Tuple[int, int, Event]] = []
+        self._sequence = itertools.count()
+        # Списки подписок хранятся отсортированными и заменяются целиком при изменении
         self.subscriptions: Dict[str, List[EventSubscription]] = defaultdict(list)
-        self.event_history: List[Event] = []
         self.max_history_size = 1000
+        self.event_history: deque = deque(maxlen=self.max_history_size)
         self.is_running = False
         self.processing_thread = None
         self.lock = threading.Lock()
+        self.condition = threading.Condition(self.lock)
         
         # Статистика
         self.stats = {
             'events_processed': 0,
             'events_failed': 0,
             'handlers_registered': 0,
-            'subscriptions_active': 0
+            'subscriptions_active': 0,
+            'max_queue_depth': 0
         }
+        self.latency_samples: deque = deque(maxlen=1000)  # Задержка от emit до обработки, с
         
         logger.info("EventSystem инициализирована")
     
@@ -113,7 +124,9 @@ class EventSystem:
     def shutdown(self) -> bool:
         """Завершение работы системы событий"""
         try:
-            self.is_running = False
+            with self.condition:
+                self.is_running = False
+                self.condition.notify_all()
             if self.processing_thread and self.processing_thread.is_alive():
                 self.processing_thread.join(timeout=5.0)
             logger.info("EventSystem успешно завершена")
@@ -134,13 +147,16 @@ class EventSystem:
                 priority=priority
             )
             
-            with self.lock:
-                self.event_queue.append(event)
+            with self.condition:
+                heapq.heappush(self.event_queue, (-priority.value, next(self._sequence), event))
                 self.event_history.append(event)
                 
-                # Ограничиваем размер истории
-                if len(self.event_history) > self.max_history_size:
-                    self.event_history.pop(0)
+                queue_depth = len(self.event_queue)
+                if queue_depth > self.stats['max_queue_depth']:
+                    self.stats['max_queue_depth'] = queue_depth
+                
+                # Будим поток обработки вместо опроса очереди
+                self.condition.notify()
             
             logger.debug(f"Событие {event_type} добавлено в очередь от {source}")
             return True
@@ -161,7 +177,12 @@ class EventSystem:
             )
             
             with self.lock:
-                self.subscriptions[event_type].append(subscription)
+                # Вставка после подписок с приоритетом не ниже нового - порядок стабилен
+                current = self.subscriptions[event_type]
+                index = len(current)
+                while index > 0 and current[index - 1].priority.value < priority.value:
+                    index -= 1
+                self.subscriptions[event_type] = current[:index] + [subscription] + current[index:]
                 self.stats['subscriptions_active'] += 1
             
             logger.debug(f"Подписка на {event_type} от {subscriber_id}")
@@ -210,40 +231,47 @@ class EventSystem:
         """Основной цикл обработки событий"""
         while self.is_running:
             try:
-                if self.event_queue:
-                    with self.lock:
-                        if self.event_queue:
-                            # Обрабатываем событие с наивысшим приоритетом
-                            highest_priority_event = max(self.event_queue,
-                                                       key=lambda e: e.priority.value)
-                            self.event_queue.remove(highest_priority_event)
-                            
-                            if self._process_single_event(highest_priority_event):
-                                self.stats['events_processed'] += 1
-                            else:
-                                self.stats['events_failed'] += 1
+                with self.condition:
+                    # Поток спит на условной переменной, пока очередь пуста
+                    while self.is_running and not self.event_queue:
+                        self.condition.wait()
+                    if not self.is_running:
+                        break
+                    # Событие с наивысшим приоритетом - вершина кучи
+                    _, _, event = heapq.heappop(self.event_queue)
                 
-                time.sleep(0.001)  # Небольшая пауза
+                # Обработчики вызываются без блокировки, чтобы они могли отправлять события
+                self._dispatch_event(event)
                 
             except Exception as e:
                 logger.error(f"Ошибка в цикле обработки событий: {e}")
                 time.sleep(0.1)
     
+    def _dispatch_event(self, event: Event) -> bool:
+        """Обработка события с учетом статистики и задержки"""
+        latency = time.time() - event.timestamp
+        success = self._process_single_event(event)
+        with self.lock:
+            # Выборка сортируется в get_stats под той же блокировкой
+            self.latency_samples.append(latency)
+            if success:
+                self.stats['events_processed'] += 1
+            else:
+                self.stats['events_failed'] += 1
+        return success
+    
     def _process_single_event(self, event: Event) -> bool:
         """Обработка одного события"""
         try:
             event.state = EventState.PROCESSING
             
-            # Находим все подписки на этот тип события
+            # Находим все подписки на этот тип события (уже отсортированы по приоритету)
             subscriptions = self.subscriptions.get(event.event_type, [])
             
             if not subscriptions:
                 event.state = EventState.COMPLETED
                 return True
             
-            # Сортируем по приоритету (высокий приоритет первым)
-            subscriptions.sort(key=lambda s: s.priority.value, reverse=True)
-            
             success_count = 0
             for subscription in subscriptions:
                 if not subscription.is_active:
@@ -273,18 +301,32 @@ class EventSystem:
             logger.error(f"Ошибка обработки события {event.event_type}: {e}")
             return False
     
-    def process_events(self, max_events: int = 100) -> int:
-        """Обработка событий в текущем потоке (для тестов)"""
+    def process_events(self, max_events: Optional[int] = 100) -> int:
+        """Пакетная обработка событий в текущем потоке (max_events=None - вся очередь)"""
+        # Пакет забирается из кучи за одно взятие блокировки
+        with self.lock:
+            count = len(self.event_queue) if max_events is None else min(max_events, len(self.event_queue))
+            batch = [heapq.heappop(self.event_queue)[2] for _ in range(count)]
+        
         processed = 0
-        while self.event_queue and processed < max_events:
-            with self.lock:
-                if self.event_queue:
-                    event = self.event_queue.popleft()
-                    if self._process_single_event(event):
-                        processed += 1
+        for event in batch:
+            if self._dispatch_event(event):
+                processed += 1
         
         return processed
     
+    def _latency_percentiles(self) -> Dict[str, float]:
+        """Перцентили задержки обработки событий в миллисекундах (вызывается под self.lock)"""
+        samples = sorted(self.latency_samples)
+        if not samples:
+            return {'p50': 0.0, 'p95': 0.0, 'p99': 0.0}
+        
+        last = len(samples) - 1
+        return {
+            name: samples[min(last, int(round(fraction * last)))] * 1000.0
+            for name, fraction in (('p50', 0.50), ('p95', 0.95), ('p99', 0.99))
+        }
+    
     def get_stats(self) -> Dict[str, Any]:
         """Получение статистики системы"""
         with self.lock:
@@ -294,6 +336,9 @@ class EventSystem:
                 'handlers_registered': self.stats['handlers_registered'],
                 'subscriptions_active': self.stats['subscriptions_active'],
                 'queue_size': len(self.event_queue),
+                'queue_depth': len(self.event_queue),
+                'max_queue_depth': self.stats['max_queue_depth'],
+                'latency_ms': self._latency_percentiles(),
                 'history_size': len(self.event_history),
                 'is_running': self.is_running
             }
@@ -311,6 +356,6 @@ class EventSystem:
             if event_type:
                 filtered_events = [e for e in self.event_history if e.event_type == event_type]
             else:
-                filtered_events = self.event_history.copy()
+                filtered_events = list(self.event_history)
             
             return filtered_events[-limit:]
@@ -154,6 +154,9 @@ class GameEngine(ShowBase):
                 logger.error("Ошибка инициализации компонентов архитектуры")
                 return False
             
+            # Журналы репозиториев подключаются после создания базовых репозиториев
+            self._enable_repository_journaling()
+            
             logger.info("Новая архитектура инициализирована")
             return True
             
@@ -161,6 +164,20 @@ class GameEngine(ShowBase):
             logger.error(f"Ошибка инициализации новой архитектуры: {e}")
             return False
     
+    def _enable_repository_journaling(self):
+        """Журналирование репозиториев с восстановлением после сбоя
+        Настройки: repository_journaling (по умолчанию включено) и repository_journal_dir"""
+        settings = self.settings or {}
+        if not settings.get("repository_journaling", True):
+            logger.info("Журналирование репозиториев отключено настройками")
+            return
+        
+        try:
+            directory = settings.get("repository_journal_dir", "saves/repositories")
+            self.repository_manager.enable_journaling(directory)
+        except Exception as e:
+            logger.error(f"Ошибка включения журналирования репозиториев: {e}")
+    
     def _initialize_legacy_systems(self) -> bool:
         """Инициализация существующих систем для совместимости"""
         try:
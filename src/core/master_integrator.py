@@ -15,6 +15,8 @@ from collections import defaultdict, deque
 
 from src.core.component_types import BaseComponent, ComponentType, Priority, LifecycleState
 from src.core.state_manager import StateManager, StateType
+from src.core.system_scheduler import SystemScheduler
+from src.entities.entity_store import EntityStore, get_entity_store
 from src.systems.attributes.attribute_system import AttributeSystem, AttributeSet, AttributeModifier, StatModifier, BaseAttribute, DerivedStat
 
 # Импорты всех систем
@@ -81,6 +83,8 @@ class IntegrationConfig:
     enable_error_recovery: bool = True
     max_integration_retries: int = 3
     integration_timeout: float = 5.0
+    enable_system_scheduling: bool = True
+    frame_budget: float = 0.012  # Бюджет кадра на обновление систем, с
 
 class MasterIntegrator(BaseComponent):
     """Главный координатор всех систем"""
@@ -109,6 +113,12 @@ class MasterIntegrator(BaseComponent):
         # Конфигурация
         self.integration_config = IntegrationConfig()
         
+        # Планировщик тиков систем
+        self.system_scheduler = SystemScheduler(frame_budget=self.integration_config.frame_budget)
+        
+        # Колоночное хранилище сущностей: один векторный проход за кадр
+        self.entity_store: EntityStore = get_entity_store()
+        
         # Производительность и мониторинг
         self.performance_metrics: Dict[str, Dict[str, float]] = {}
         self.error_counts: Dict[str, int] = defaultdict(int)
@@ -123,7 +133,9 @@ class MasterIntegrator(BaseComponent):
             'cross_system_modifiers': 0,
             'integration_errors': 0,
             'recovery_attempts': 0,
-            'update_time': 0.0
+            'update_time': 0.0,
+            'scheduled_ticks': 0,
+            'deferred_systems': 0
         }
         
         # Callbacks
@@ -188,6 +200,9 @@ class MasterIntegrator(BaseComponent):
             if not self._initialize_systems_in_order():
                 return False
             
+            # Регистрация систем в планировщике
+            self._register_system_schedules()
+            
             # Интеграция систем с системой атрибутов
             if self.integration_config.auto_integrate_attributes:
                 self._integrate_systems_with_attributes()
@@ -214,6 +229,9 @@ class MasterIntegrator(BaseComponent):
             if not self._start_all_systems():
                 return False
             
+            # Движение, регенерацию и стойкость сущностей выполняет проход хранилища
+            self.entity_store.batch_updates = True
+            
             self._state = LifecycleState.RUNNING
             logger.info("MasterIntegrator запущен успешно")
             return True
@@ -234,6 +252,9 @@ class MasterIntegrator(BaseComponent):
             # Обновление всех систем
             self._update_all_systems(delta_time)
             
+            # Один проход по всем сущностям вместо построчных обновлений
+            self._update_entity_store(delta_time)
+            
             # Обновление интеграций
             self._update_integrations(delta_time)
             
@@ -266,6 +287,9 @@ class MasterIntegrator(BaseComponent):
             # Остановка всех систем
             self._stop_all_systems()
             
+            # Без прохода хранилища сущности снова обновляют свои строки сами
+            self.entity_store.batch_updates = False
+            
             self._state = LifecycleState.STOPPED
             logger.info("MasterIntegrator остановлен успешно")
             return True
@@ -281,6 +305,7 @@ class MasterIntegrator(BaseComponent):
             
             # Уничтожение всех систем
             self._destroy_all_systems()
+            self.entity_store.batch_updates = False
             
             self.systems.clear()
             self.system_integrations.clear()
@@ -289,6 +314,7 @@ class MasterIntegrator(BaseComponent):
             self.attribute_integrations.clear()
             self.cross_system_modifiers.clear()
             self.performance_metrics.clear()
+            self.system_scheduler.schedules.clear()
             self.error_counts.clear()
             self.recovery_attempts.clear()
             
@@ -562,16 +588,33 @@ class MasterIntegrator(BaseComponent):
             logger.error(f"Ошибка запуска систем: {e}")
             return False
     
+    def _register_system_schedules(self):
+        """Регистрация систем в планировщике в порядке инициализации"""
+        try:
+            ordered = list(self.system_initialization_order)
+            ordered += [name for name in self.systems if name not in ordered]
+            for system_name in ordered:
+                if system_name in self.systems:
+                    self.system_scheduler.register(system_name, self.systems[system_name])
+            
+        except Exception as e:
+            logger.error(f"Ошибка регистрации систем в планировщике: {e}")
+    
+    def set_system_schedule(self, system_name: str, tick_rate: Optional[float] = None,
+                            budget: Optional[float] = None, priority: Optional[Priority] = None) -> bool:
+        """Изменение частоты тиков, бюджета или приоритета системы"""
+        return self.system_scheduler.configure(system_name, tick_rate=tick_rate, budget=budget, priority=priority)
+    
     def _update_all_systems(self, delta_time: float):
         """Обновление всех систем"""
         try:
-            for system_name, system in self.systems.items():
-                try:
-                    system.update(delta_time)
-                except Exception as e:
-                    logger.error(f"Ошибка обновления системы {system_name}: {e}")
-                    self.error_counts[system_name] += 1
-                    self.system_stats['integration_errors'] += 1
+            if self.integration_config.enable_system_scheduling and self.system_scheduler.schedules:
+                ticked = self.system_scheduler.run_frame(delta_time, self._update_system)
+                self.system_stats['scheduled_ticks'] += len(ticked)
+                self.system_stats['deferred_systems'] = self.system_scheduler.get_stats()['deferred_systems']
+            else:
+                for system_name in self.systems:
+                    self._update_system(system_name, delta_time)
             
             # Обновляем статистику активных систем
             active_systems = sum(1 for system in self.systems.values() 
@@ -581,6 +624,23 @@ class MasterIntegrator(BaseComponent):
         except Exception as e:
             logger.error(f"Ошибка обновления систем: {e}")
     
+    def _update_system(self, system_name: str, delta_time: float):
+        """Обновление одной системы"""
+        try:
+            self.systems[system_name].update(delta_time)
+        except Exception as e:
+            logger.error(f"Ошибка обновления системы {system_name}: {e}")
+            self.error_counts[system_name] += 1
+            self.system_stats['integration_errors'] += 1
+    
+    def _update_entity_store(self, delta_time: float):
+        """Векторный проход хранилища сущностей: движение, регенерация, стойкость"""
+        try:
+            self.entity_store.update(delta_time)
+        except Exception as e:
+            logger.error(f"Ошибка обновления хранилища сущностей: {e}")
+            self.system_stats['integration_errors'] += 1
+    
     def _update_integrations(self, delta_time: float):
         """Обновление интеграций между системами"""
         try:
@@ -626,6 +686,11 @@ class MasterIntegrator(BaseComponent):
                         'state': info.get('state', 'unknown'),
                         'priority': info.get('priority', 'normal')
                     }
+                
+                # Время тиков из планировщика
+                tick_metrics = self.system_scheduler.get_system_metrics(system_name)
+                if tick_metrics:
+                    self.performance_metrics.setdefault(system_name, {}).update(tick_metrics)
             
         except Exception as e:
             logger.error(f"Ошибка обновления метрик производительности: {e}")
@@ -725,8 +790,11 @@ class MasterIntegrator(BaseComponent):
             'cross_system_modifiers': len(self.cross_system_modifiers),
             'integration_errors': 0,
             'recovery_attempts': 0,
-            'update_time': 0.0
+            'update_time': 0.0,
+            'scheduled_ticks': 0,
+            'deferred_systems': 0
         }
+        self.system_scheduler.reset_stats()
     
     def get_system_info(self) -> Dict[str, Any]:
         """Получение информации о системе"""
@@ -741,7 +809,9 @@ class MasterIntegrator(BaseComponent):
             'cross_system_modifiers': self.system_stats['cross_system_modifiers'],
             'integration_errors': self.system_stats['integration_errors'],
             'recovery_attempts': self.system_stats['recovery_attempts'],
-            'update_time': self.system_stats['update_time']
+            'update_time': self.system_stats['update_time'],
+            'scheduler': self.system_scheduler.get_stats(),
+            'entity_store': self.entity_store.get_stats()
         }
 
     def run(self):
@@ -0,0 +1,237 @@
+#!/usr/bin/env python3
+"""Кэш процедурных ресурсов
+Геометрия и текстуры, построенные по параметрам, кэшируются по ключу
+(примитив, размеры, цветовая схема, текстура). Сущности получают инстансы:
+собственный узел-держатель с общим GeomNode, поэтому вершинные данные одной
+формы существуют в памяти один раз. Кэш ограничен по памяти, вытеснение - LRU"""
+
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Optional, Tuple
+import logging
+import threading
+
+import numpy as np
+
+from panda3d.core import (Geom, GeomNode, GeomTriangles, GeomVertexData, GeomVertexFormat,
+                          GeomVertexWriter, NodePath, Texture)
+
+logger = logging.getLogger(__name__)
+
+# Множители яркости граней для схемы "shaded": (нормаль, множитель)
+SHADED_FACES = (
+    ((0, 1, 0), 1.0),    # Передняя
+    ((0, -1, 0), 0.7),   # Задняя
+    ((-1, 0, 0), 0.8),   # Левая
+    ((1, 0, 0), 0.6),    # Правая
+    ((0, 0, 1), 1.2),    # Верхняя
+    ((0, 0, -1), 0.4),   # Нижняя
+)
+
+def _round_key(values) -> Tuple:
+    """Нормализация чисел в ключе, чтобы 0.1 + 0.2 и 0.3 давали один ключ"""
+    return tuple(round(float(value), 5) for value in values)
+
+def geometry_size_bytes(node_path: NodePath) -> int:
+    """Объем вершинных и индексных данных в поддереве узла"""
+    total = 0
+    for geom_np in node_path.findAllMatches("**/+GeomNode"):
+        geom_node = geom_np.node()
+        for index in range(geom_node.getNumGeoms()):
+            geom = geom_node.getGeom(index)
+            vdata = geom.getVertexData()
+            total += sum(vdata.getArray(i).getDataSizeBytes() for i in range(vdata.getNumArrays()))
+            for p in range(geom.getNumPrimitives()):
+                vertices = geom.getPrimitive(p).getVertices()
+                if vertices is not None:
+                    total += vertices.getDataSizeBytes()
+    return total
+
+class CachedAsset:
+    """Запись кэша"""
+
+    __slots__ = ('key', 'asset', 'size_bytes', 'instances')
+
+    def __init__(self, key: Hashable, asset: Any, size_bytes: int):
+        self.key = key
+        self.asset = asset
+        self.size_bytes = size_bytes
+        self.instances = 0
+
+class ProceduralAssetCache:
+    """LRU-кэш процедурной геометрии и текстур с учетом памяти"""
+
+    def __init__(self, max_bytes: int = 64 * 1024 * 1024):
+        self.max_bytes = max_bytes
+        self._entries: "OrderedDict[Hashable, CachedAsset]" = OrderedDict()
+        self._lock = threading.RLock()
+        self.memory_bytes = 0
+        self.stats = {
+            'hits': 0,
+            'misses': 0,
+            'evictions': 0,
+            'instances': 0
+        }
+
+        # Построители примитивов: имя -> функция(размеры, цвет, схема) -> NodePath
+        self.builders: Dict[str, Callable[..., NodePath]] = {
+            'box': build_box
+        }
+
+    # - Общий доступ
+
+    def _get_or_create(self, key: Hashable, factory: Callable[[], Any],
+                       measure: Callable[[Any], int]) -> CachedAsset:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self.stats['hits'] += 1
+                return entry
+
+            self.stats['misses'] += 1
+            asset = factory()
+            entry = CachedAsset(key, asset, measure(asset))
+            self._entries[key] = entry
+            self.memory_bytes += entry.size_bytes
+            self._evict(keep=key)
+            return entry
+
+    def _evict(self, keep: Hashable = None):
+        """Вытеснение давно не использованных записей сверх лимита памяти
+        Уже выданные инстансы держат свои Geom/Texture сами и не ломаются"""
+        while self.memory_bytes > self.max_bytes and len(self._entries) > 1:
+            key, entry = next(iter(self._entries.items()))
+            if key == keep:
+                break
+            del self._entries[key]
+            self.memory_bytes -= entry.size_bytes
+            self.stats['evictions'] += 1
+            logger.debug(f"Процедурный ресурс {key} вытеснен из кэша")
+
+    # - Геометрия
+
+    @staticmethod
+    def geometry_key(primitive: str, dimensions: Tuple[float, ...], color: Tuple[float, ...],
+                     color_scheme: str, texture_name: Optional[str]) -> Tuple:
+        return ('geometry', primitive, _round_key(dimensions), _round_key(color), color_scheme, texture_name)
+
+    def _get_geometry_entry(self, primitive: str, dimensions: Tuple[float, ...], color: Tuple[float, ...],
+                            color_scheme: str, texture_name: Optional[str]) -> CachedAsset:
+        def factory():
+            builder = self.builders.get(primitive)
+            if builder is None:
+                raise ValueError(f"Неизвестный примитив: {primitive}")
+            return builder(dimensions, color, color_scheme)
+
+        key = self.geometry_key(primitive, dimensions, color, color_scheme, texture_name)
+        return self._get_or_create(key, factory, geometry_size_bytes)
+
+    def get_geometry(self, primitive: str, dimensions: Tuple[float, ...],
+                     color: Tuple[float, ...] = (1, 1, 1, 1), color_scheme: str = "flat",
+                     texture_name: Optional[str] = None) -> NodePath:
+        """Прототип геометрии (общий для всех инстансов, не изменять)"""
+        return self._get_geometry_entry(primitive, dimensions, color, color_scheme, texture_name).asset
+
+    def instance_geometry(self, parent: NodePath, name: str, primitive: str,
+                          dimensions: Tuple[float, ...], color: Tuple[float, ...] = (1, 1, 1, 1),
+                          color_scheme: str = "flat", texture_name: Optional[str] = None) -> NodePath:
+        """Инстанс геометрии: новый узел-держатель под parent с общим GeomNode
+        Трансформации, цвет и прозрачность задаются на держателе"""
+        entry = self._get_geometry_entry(primitive, dimensions, color, color_scheme, texture_name)
+        holder = parent.attachNewNode(name)
+        entry.asset.instanceTo(holder)
+        with self._lock:
+            entry.instances += 1
+            self.stats['instances'] += 1
+        return holder
+
+    # - Текстуры
+
+    def get_solid_texture(self, width: int, height: int, color: Tuple[int, ...]) -> Texture:
+        """Общая текстура, залитая одним цветом (компоненты 0-255, RGBA)"""
+        key = ('texture', 'solid', int(width), int(height), tuple(int(c) for c in color))
+        return self._get_or_create(key, lambda: build_solid_texture(width, height, color),
+                                   lambda texture: texture.getExpectedRamImageSize()).asset
+
+    # - Информация
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.memory_bytes = 0
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Память, попадания и вытеснения кэша"""
+        with self._lock:
+            lookups = self.stats['hits'] + self.stats['misses']
+            return {
+                **self.stats,
+                'entries': len(self._entries),
+                'memory_bytes': self.memory_bytes,
+                'max_bytes': self.max_bytes,
+                'hit_rate': self.stats['hits'] / lookups if lookups else 0.0,
+                # От давно использованных к недавним
+                'lru_order': [str(key) for key in self._entries]
+            }
+
+def build_box(dimensions: Tuple[float, ...], color: Tuple[float, ...], color_scheme: str = "flat") -> NodePath:
+    """Параллелепипед (ширина, глубина, высота) с центром в начале координат
+    Один Geom на 24 вершины: у каждой грани свои вершины, чтобы цвет грани не смешивался"""
+    width, depth, height = dimensions
+    half = np.array([width, depth, height], dtype=np.float32) / 2.0
+    base = np.asarray(color, dtype=np.float32)
+
+    vdata = GeomVertexData('box', GeomVertexFormat.getV3n3c4(), Geom.UHStatic)
+    vdata.uncleanSetNumRows(24)
+    vertex = GeomVertexWriter(vdata, 'vertex')
+    normal_writer = GeomVertexWriter(vdata, 'normal')
+    color_writer = GeomVertexWriter(vdata, 'color')
+
+    for normal, shade in SHADED_FACES:
+        normal = np.array(normal, dtype=np.float32)
+        # Касательные u, v с u x v = normal: обход вершин против часовой стрелки снаружи
+        axis = int(np.flatnonzero(normal)[0])
+        u = np.roll(np.array([1, 0, 0], dtype=np.float32), (axis + 1) % 3)
+        v = np.cross(normal, u)
+        face_color = base.copy()
+        if color_scheme == "shaded":
+            face_color[:3] = np.minimum(face_color[:3] * shade, 1.0)
+        for sign_u, sign_v in ((-1, -1), (1, -1), (1, 1), (-1, 1)):
+            vertex.setData3(*((normal + sign_u * u + sign_v * v) * half))
+            normal_writer.setData3(*normal)
+            color_writer.setData4(*face_color)
+
+    triangles = GeomTriangles(Geom.UHStatic)
+    for face in range(6):
+        start = face * 4
+        triangles.addVertices(start, start + 1, start + 2)
+        triangles.addVertices(start, start + 2, start + 3)
+
+    geom = Geom(vdata)
+    geom.addPrimitive(triangles)
+    node = GeomNode('box')
+    node.addGeom(geom)
+    return NodePath(node)
+
+def build_solid_texture(width: int, height: int, color: Tuple[int, ...]) -> Texture:
+    """Текстура, заполненная одним цветом одной записью буфера"""
+    texture = Texture(f"solid_{width}x{height}")
+    texture.setup2dTexture(width, height, Texture.TUnsignedByte, Texture.FRgba)
+    # Panda3D хранит RGBA как BGRA
+    r, g, b, a = (list(color) + [255])[:4]
+    pixels = np.empty((height * width, 4), dtype=np.uint8)
+    pixels[:] = (b, g, r, a)
+    texture.setRamImage(pixels.tobytes())
+    return texture
+
+_asset_cache: Optional[ProceduralAssetCache] = None
+_asset_cache_lock = threading.Lock()
+
+def get_asset_cache() -> ProceduralAssetCache:
+    """Общий кэш процедурных ресурсов"""
+    global _asset_cache
+    if _asset_cache is None:
+        with _asset_cache_lock:
+            if _asset_cache is None:
+                _asset_cache = ProceduralAssetCache()
+    return _asset_cache
@@ -1,1134 +1,711 @@
-from .architecture import BaseComponent, ComponentType, Pri or ity, Event
+#!/usr/bin/env python3
+"""Система репозиториев - централизованное управление данными и их хранением"""
 
 from abc import abstractmethod
+from dataclasses import dataclass, field
+from enum import Enum
+from pathlib import Path
+from typing import *
+from typing import Dict, List, Optional, Any, Type, TypeVar, Generic, Callable
+import copy
+import json
+import logging
+import os
+import pickle
+import threading
+import time
 
-from dataclasses import dataclass, field: pass # Добавлен pass в пустой блок
+from .architecture import BaseComponent, ComponentType, Priority
+from .repository_index import QueryPlanner, get_field_value, matches_filter
+from .repository_journal import JournalWriter, RepositoryJournal
 
-from enum import Enum
+logger = logging.getLogger(__name__)
 
-from pathlib import Path
+# = ТИПЫ ДАННЫХ
 
-from typing import *
+class DataType(Enum):
+    """Типы данных"""
+    ENTITY = "entity"
+    ENTITY_DATA = "entity_data"
+    SYSTEM_DATA = "system_data"
+    ITEM = "item"
+    SKILL = "skill"
+    EFFECT = "effect"
+    CONFIG = "config"
+    CONFIGURATION = "configuration"
+    SAVE = "save"
+    TEMPLATE = "template"
+    STATISTICS = "statistics"
+    DYNAMIC_DATA = "dynamic_data"
+    HISTORY = "history"
 
-from typing import Dict, Lis t, Optional, Any, Type, TypeVar, Generic, Callable
+class StorageType(Enum):
+    """Типы хранения"""
+    MEMORY = "memory"
+    FILE = "file"
+    DATABASE = "database"
+    CACHE = "cache"
 
-import copy
+# = БАЗОВЫЕ КЛАССЫ РЕПОЗИТОРИЕВ
 
-import json
+@dataclass
+class DataRecord:
+    """Запись данных"""
+    id: str
+    data_type: DataType
+    data: Any
+    created_at: float
+    updated_at: float
+    version: int
+    metadata: Dict[str, Any] = field(default_factory=dict)
 
-import logging
+@dataclass
+class QueryFilter:
+    """Фильтр для запросов"""
+    field: str
+    operator: str  # eq, ne, gt, lt, gte, lte, in, not_in, contains, prefix, regex
+    value: Any
 
-import os
+@dataclass
+class QuerySort:
+    """Сортировка для запросов"""
+    field: str
+    direction: str  # asc, desc
 
-import pickle
+@dataclass
+class QueryOptions:
+    """Опции запроса"""
+    limit: Optional[int] = None
+    offset: int = 0
+    filters: List[QueryFilter] = field(default_factory=list)
+    sort: List[QuerySort] = field(default_factory=list)
 
-import re
+T = TypeVar('T')
 
-import sys
+class IRepository(Generic[T]):
+    """Интерфейс репозитория"""
 
-import threading
+    @property
+    @abstractmethod
+    def repository_id(self) -> str:
+        """Идентификатор репозитория"""
+        pass
 
-import time
+    @property
+    @abstractmethod
+    def data_type(self) -> DataType:
+        """Тип данных"""
+        pass
+
+    @abstractmethod
+    def create(self, id: str, data: T, metadata: Dict[str, Any] = None) -> bool:
+        """Создание записи"""
+        pass
+
+    @abstractmethod
+    def read(self, id: str) -> Optional[T]:
+        """Чтение записи"""
+        pass
+
+    @abstractmethod
+    def update(self, id: str, data: T, metadata: Dict[str, Any] = None) -> bool:
+        """Обновление записи"""
+        pass
+
+    @abstractmethod
+    def delete(self, id: str) -> bool:
+        """Удаление записи"""
+        pass
+
+    @abstractmethod
+    def exists(self, id: str) -> bool:
+        """Проверка существования записи"""
+        pass
+
+    @abstractmethod
+    def query(self, options: QueryOptions) -> List[T]:
+        """Запрос данных"""
+        pass
+
+    @abstractmethod
+    def count(self, options: QueryOptions = None) -> int:
+        """Подсчет записей"""
+        pass
+
+    @abstractmethod
+    def clear(self) -> bool:
+        """Очистка репозитория"""
+        pass
+
+    @abstractmethod
+    def backup(self) -> Dict[str, Any]:
+        """Создание резервной копии"""
+        pass
+
+    @abstractmethod
+    def restore(self, backup: Dict[str, Any]) -> bool:
+        """Восстановление из резервной копии"""
+        pass
+
+class BaseRepository(BaseComponent, IRepository[T]):
+    """Базовая реализация репозитория"""
+
+    def __init__(self, repository_id: str, data_type: DataType,
+                 storage_type: StorageType = StorageType.MEMORY):
+        super().__init__(repository_id, ComponentType.REPOSITORY, Priority.NORMAL)
+        self._data_type = data_type
+        self._storage_type = storage_type
+        self._records: Dict[str, DataRecord] = {}
+        self._planner = QueryPlanner(data_getter=lambda record: record.data)
+        self._lock = threading.RLock()
+        self._auto_save = False
+        self._auto_save_interval = 300.0  # 5 минут
+        self._last_save = 0.0
+        self._storage_path = Path("saves") / "repositories" / f"{repository_id}.pkl"
+        self._journal: Optional[RepositoryJournal] = None
+
+    @property
+    def repository_id(self) -> str:
+        return self.component_id
+
+    @property
+    def data_type(self) -> DataType:
+        return self._data_type
+
+    def create(self, id: str, data: T, metadata: Dict[str, Any] = None) -> bool:
+        """Создание записи"""
+        with self._lock:
+            if id in self._records:
+                logger.warning(f"Запись {id} уже существует в репозитории {self.repository_id}")
+                return False
+
+            current_time = time.time()
+            record = DataRecord(
+                id=id,
+                data_type=self._data_type,
+                data=copy.deepcopy(data),
+                created_at=current_time,
+                updated_at=current_time,
+                version=1,
+                metadata=metadata or {}
+            )
+            self._records[id] = record
+            self._update_indexes(id, record)
+            self._journal_record("create", record)
+
+            logger.debug(f"Создана запись {id} в репозитории {self.repository_id}")
+            return True
+
+    def read(self, id: str) -> Optional[T]:
+        """Чтение записи"""
+        with self._lock:
+            record = self._records.get(id)
+            if record:
+                return copy.deepcopy(record.data)
+            return None
+
+    def update(self, id: str, data: T, metadata: Dict[str, Any] = None) -> bool:
+        """Обновление записи"""
+        with self._lock:
+            if id not in self._records:
+                logger.warning(f"Запись {id} не найдена в репозитории {self.repository_id}")
+                return False
+
+            record = self._records[id]
+            record.data = copy.deepcopy(data)
+            record.updated_at = time.time()
+            record.version += 1
+            if metadata:
+                record.metadata.update(metadata)
+
+            self._update_indexes(id, record)
+            self._journal_record("update", record)
+
+            logger.debug(f"Обновлена запись {id} в репозитории {self.repository_id}")
+            return True
+
+    def delete(self, id: str) -> bool:
+        """Удаление записи"""
+        with self._lock:
+            if id not in self._records:
+                return False
+
+            record = self._records[id]
+            self._remove_from_indexes(id, record)
+            del self._records[id]
+            if self._journal:
+                self._journal.record("delete", id)
+
+            logger.debug(f"Удалена запись {id} из репозитория {self.repository_id}")
+            return True
+
+    def exists(self, id: str) -> bool:
+        """Проверка существования записи"""
+        with self._lock:
+            return id in self._records
+
+    def query(self, options: QueryOptions) -> List[T]:
+        """Запрос данных через планировщик индексов"""
+        with self._lock:
+            ids = self._query_ids(options)
+            return [copy.deepcopy(self._records[id].data) for id in ids]
+
+    def count(self, options: QueryOptions = None) -> int:
+        """Подсчет записей (по индексам, когда фильтры ими покрываются)"""
+        with self._lock:
+            if not options or not options.filters:
+                return len(self._records)
+
+            plan = self._planner.plan(options.filters, [], len(self._records))
+            return self._planner.count(plan, self._records)
+
+    def explain(self, options: QueryOptions) -> Dict[str, Any]:
+        """План выполнения запроса (выбранные индексы и остаточные фильтры)"""
+        with self._lock:
+            return self._planner.plan(options.filters, options.sort, len(self._records)).describe()
+
+    def clear(self) -> bool:
+        """Очистка репозитория"""
+        with self._lock:
+            self._records.clear()
+            self._planner.clear()
+            if self._journal:
+                self._journal.record("clear")
+            logger.info(f"Репозиторий {self.repository_id} очищен")
+            return True
+
+    def backup(self) -> Dict[str, Any]:
+        """Создание резервной копии"""
+        with self._lock:
+            backup = {
+                "repository_id": self.repository_id,
+                "data_type": self._data_type.value,
+                "storage_type": self._storage_type.value,
+                "records": {},
+                "indexes": [list(fields) for fields in self._planner.indexes],
+                "timestamp": time.time()
+            }
+
+            for id, record in self._records.items():
+                backup["records"][id] = {
+                    "id": record.id,
+                    "data_type": record.data_type.value,
+                    "data": record.data,
+                    "created_at": record.created_at,
+                    "updated_at": record.updated_at,
+                    "version": record.version,
+                    "metadata": dict(record.metadata)
+                }
+
+            return backup
+
+    def restore(self, backup: Dict[str, Any]) -> bool:
+        """Восстановление из резервной копии"""
+        with self._lock:
+            try:
+                self._records.clear()
+                self._planner.clear()
+
+                for id, record_data in backup.get("records", {}).items():
+                    record = DataRecord(
+                        id=record_data["id"],
+                        data_type=DataType(record_data["data_type"]),
+                        data=copy.deepcopy(record_data["data"]),
+                        created_at=record_data["created_at"],
+                        updated_at=record_data["updated_at"],
+                        version=record_data["version"],
+                        metadata=record_data.get("metadata", {})
+                    )
+                    self._records[id] = record
+
+                for fields in backup.get("indexes", []):
+                    self.add_composite_index(fields)
+                for id, record in self._records.items():
+                    self._update_indexes(id, record)
+
+                if self._journal:
+                    self._journal.request_snapshot(self.backup())
+
+                logger.info(f"Репозиторий {self.repository_id} восстановлен: {len(self._records)} записей")
+                return True
+
+            except Exception as e:
+                logger.error(f"Ошибка восстановления репозитория {self.repository_id}: {e}")
+                return False
+
+    # = ИНДЕКСЫ
+
+    def add_index(self, field: str) -> bool:
+        """Добавление сортированного индекса по полю"""
+        return self.add_composite_index([field])
+
+    def add_composite_index(self, fields: List[str]) -> bool:
+        """Добавление составного индекса (равенства по первым полям, диапазон по следующему)"""
+        with self._lock:
+            fields = tuple(fields)
+            if fields in self._planner.indexes:
+                return True
+
+            self._planner.add_index(fields, ((id, record.data) for id, record in self._records.items()))
+            logger.info(f"Добавлен индекс {','.join(fields)} в репозиторий {self.repository_id}")
+            return True
+
+    def remove_index(self, field: Union[str, List[str]]) -> bool:
+        """Удаление индекса"""
+        with self._lock:
+            fields = [field] if isinstance(field, str) else field
+            if self._planner.remove_index(fields):
+                logger.info(f"Удален индекс {','.join(fields)} из репозитория {self.repository_id}")
+                return True
+            return False
+
+    def _update_indexes(self, id: str, record: DataRecord) -> None:
+        """Обновление индексов для записи (старые ключи снимаются)"""
+        try:
+            self._planner.index_record(id, record.data)
+        except Exception as e:
+            logger.warning(f"Ошибка обновления индексов записи {id}: {e}")
+
+    def _remove_from_indexes(self, id: str, record: DataRecord) -> None:
+        """Удаление записи из индексов"""
+        self._planner.unindex_record(id)
+
+    def _get_field_value(self, data: Any, field: str) -> Any:
+        """Получение значения поля из данных"""
+        return get_field_value(data, field)
+
+    def _matches_filter(self, data: Any, filter_obj: QueryFilter) -> bool:
+        """Проверка соответствия фильтру"""
+        return matches_filter(data, filter_obj.field, filter_obj.operator, filter_obj.value)
+
+    def _query_ids(self, options: QueryOptions) -> List[str]:
+        """Фильтрация, сортировка и пагинация по плану запроса"""
+        plan = self._planner.plan(options.filters, options.sort, len(self._records))
+        return self._planner.execute(plan, self._records, options.sort,
+                                     options.limit, options.offset)
+
+    # = ЖУРНАЛ
+
+    def attach_journal(self, journal: RepositoryJournal) -> bool:
+        """Подключение журнала с восстановлением: снимок плюс записи журнала после него"""
+        with self._lock:
+            try:
+                snapshot, entries = journal.load()
+                if snapshot is not None:
+                    self.restore(snapshot)
+                for entry in entries:
+                    self._apply_journal_entry(entry)
+
+                self._journal = journal
+                logger.info(f"Журнал репозитория {self.repository_id} подключен: "
+                            f"{len(self._records)} записей, {len(entries)} из журнала")
+                return True
+
+            except Exception as e:
+                logger.error(f"Ошибка восстановления журнала репозитория {self.repository_id}: {e}")
+                return False
+
+    def detach_journal(self) -> Optional[RepositoryJournal]:
+        with self._lock:
+            journal, self._journal = self._journal, None
+            return journal
+
+    def checkpoint(self) -> bool:
+        """Постановка снимка в очередь писателя (сериализация и запись - в фоне)"""
+        with self._lock:
+            if self._journal is None:
+                return False
+            self._journal.request_snapshot(self.backup())
+            return True
+
+    def _journal_record(self, operation: str, record: DataRecord):
+        # Данные записи не изменяются на месте (update заменяет их копией), метаданные - копируются
+        if self._journal:
+            self._journal.record(operation, record.id, record.data, dict(record.metadata),
+                                 record.version, record.updated_at)
+
+    def _apply_journal_entry(self, entry: tuple):
+        """Применение записи журнала без повторного журналирования"""
+        _, operation, id, data, metadata, version, timestamp = entry
+        if operation == "clear":
+            self._records.clear()
+            self._planner.clear()
+            return
+        if operation == "delete":
+            record = self._records.pop(id, None)
+            if record is not None:
+                self._remove_from_indexes(id, record)
+            return
+
+        record = self._records.get(id)
+        if record is None:
+            record = DataRecord(id=id, data_type=self._data_type, data=data, created_at=timestamp,
+                                updated_at=timestamp, version=version, metadata=metadata or {})
+            self._records[id] = record
+        else:
+            record.data = data
+            record.updated_at = timestamp
+            record.version = version
+            record.metadata = metadata or {}
+        self._update_indexes(id, record)
+
+    # = СОХРАНЕНИЕ
+
+    def _on_update(self, delta_time: float) -> bool:
+        """Обновление - автосохранение (при подключенном журнале не требуется)"""
+        if self._journal is None and self._auto_save and time.time() - self._last_save > self._auto_save_interval:
+            self._save_data()
+            self._last_save = time.time()
+        return True
+
+    def _save_data(self) -> bool:
+        """Сохранение данных"""
+        if self._storage_type == StorageType.FILE:
+            return self._save_to_file()
+        return True
+
+    def _save_to_file(self) -> bool:
+        """Сохранение в файл"""
+        try:
+            self._storage_path.parent.mkdir(parents=True, exist_ok=True)
+            temp_path = self._storage_path.with_suffix(".tmp")
+            with open(temp_path, "wb") as file:
+                pickle.dump(self.backup(), file, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(temp_path, self._storage_path)
+            return True
+
+        except Exception as e:
+            logger.error(f"Ошибка сохранения репозитория {self.repository_id}: {e}")
+            return False
+
+# = МЕНЕДЖЕР РЕПОЗИТОРИЕВ
+
+class RepositoryManager(BaseComponent):
+    """Менеджер репозиториев"""
+
+    def __init__(self):
+        super().__init__("repository_manager", ComponentType.MANAGER, Priority.HIGH)
+        self._repositories: Dict[str, IRepository] = {}
+        self._repository_factories: Dict[DataType, Callable] = {}
+        self._lock = threading.RLock()
+
+        # Журналирование: общий фоновый писатель и поток уплотнения
+        self._journal_writer: Optional[JournalWriter] = None
+        self._journal_directory: Optional[str] = None
+        self._compact_threshold = 5000
+        self._compact_interval = 30.0
+        self._compactor_thread: Optional[threading.Thread] = None
+        self._compactor_stop = threading.Event()
+
+    def register_repository(self, repository: IRepository) -> bool:
+        """Регистрация репозитория"""
+        with self._lock:
+            if repository.repository_id in self._repositories:
+                logger.warning(f"Репозиторий {repository.repository_id} уже зарегистрирован")
+                return False
+
+            self._repositories[repository.repository_id] = repository
+            logger.info(f"Репозиторий {repository.repository_id} зарегистрирован")
+            return True
+
+    def unregister_repository(self, repository_id: str) -> bool:
+        """Отмена регистрации репозитория"""
+        with self._lock:
+            if repository_id not in self._repositories:
+                return False
+
+            del self._repositories[repository_id]
+            logger.info(f"Репозиторий {repository_id} отменен")
+            return True
+
+    def get_repository(self, repository_id: str) -> Optional[IRepository]:
+        """Получение репозитория по ID"""
+        with self._lock:
+            return self._repositories.get(repository_id)
+
+    def get_repositories_by_type(self, data_type: DataType) -> List[IRepository]:
+        """Получение репозиториев по типу данных"""
+        with self._lock:
+            return [repo for repo in self._repositories.values() if repo.data_type == data_type]
+
+    def create_repository(self, repository_id: str, data_type: DataType,
+                          storage_type: StorageType = StorageType.MEMORY) -> Optional[IRepository]:
+        """Создание нового репозитория"""
+        with self._lock:
+            if repository_id in self._repositories:
+                logger.warning(f"Репозиторий {repository_id} уже существует")
+                return self._repositories[repository_id]
+
+            repository = BaseRepository(repository_id, data_type, storage_type)
+            self._repositories[repository_id] = repository
+            logger.info(f"Создан репозиторий {repository_id} для типа {data_type.value}")
+            return repository
+
+    def backup_all(self) -> Dict[str, Any]:
+        """Создание резервной копии всех репозиториев"""
+        with self._lock:
+            backup = {
+                "timestamp": time.time(),
+                "repositories": {}
+            }
+
+            for repository_id, repository in self._repositories.items():
+                try:
+                    backup["repositories"][repository_id] = repository.backup()
+                except Exception as e:
+                    logger.error(f"Ошибка резервного копирования репозитория {repository_id}: {e}")
+
+            return backup
+
+    def restore_all(self, backup: Dict[str, Any]) -> bool:
+        """Восстановление всех репозиториев"""
+        with self._lock:
+            try:
+                success = True
+                for repository_id, repository_backup in backup.get("repositories", {}).items():
+                    repository = self._repositories.get(repository_id)
+                    if repository is None:
+                        repository = self.create_repository(
+                            repository_id,
+                            DataType(repository_backup["data_type"]),
+                            StorageType(repository_backup.get("storage_type", StorageType.MEMORY.value))
+                        )
+                    success = repository.restore(repository_backup) and success
+                return success
+
+            except Exception as e:
+                logger.error(f"Ошибка восстановления репозиториев: {e}")
+                return False
+
+    # = ЖУРНАЛИРОВАНИЕ
+
+    def enable_journaling(self, directory: str = "saves/repositories",
+                          repository_ids: Optional[List[str]] = None,
+                          compact_threshold: int = 5000, compact_interval: float = 30.0,
+                          max_pending: int = 10000) -> int:
+        """Подключение журналов к репозиториям с восстановлением их содержимого
+        Возвращает число подключенных репозиториев"""
+        with self._lock:
+            if self._journal_writer is None:
+                self._journal_writer = JournalWriter(max_pending=max_pending)
+                self._journal_writer.start()
+            self._journal_directory = directory
+            self._compact_threshold = compact_threshold
+            self._compact_interval = compact_interval
+
+            attached = 0
+            for repository_id, repository in self._repositories.items():
+                if repository_ids is not None and repository_id not in repository_ids:
+                    continue
+                if not isinstance(repository, BaseRepository) or repository._journal is not None:
+                    continue
+                journal = RepositoryJournal(directory, repository_id, self._journal_writer)
+                if repository.attach_journal(journal):
+                    attached += 1
+
+            if self._compactor_thread is None or not self._compactor_thread.is_alive():
+                self._compactor_stop.clear()
+                self._compactor_thread = threading.Thread(target=self._compaction_loop,
+                                                          name="RepositoryCompactor", daemon=True)
+                self._compactor_thread.start()
+
+            logger.info(f"Журналирование включено для {attached} репозиториев в {directory}")
+            return attached
+
+    def checkpoint_all(self) -> int:
+        """Снимки всех журналируемых репозиториев (запись в фоне)"""
+        with self._lock:
+            repositories = list(self._repositories.values())
+        return sum(1 for repository in repositories
+                   if isinstance(repository, BaseRepository) and repository.checkpoint())
+
+    def flush_journals(self, timeout: Optional[float] = None) -> bool:
+        """Ожидание записи всех поставленных в очередь изменений"""
+        return self._journal_writer.flush(timeout) if self._journal_writer else True
+
+    def get_journal_stats(self) -> Dict[str, Any]:
+        if self._journal_writer is None:
+            return {}
+        return {**self._journal_writer.stats, 'pending': self._journal_writer.pending}
+
+    def _compaction_loop(self):
+        """Фоновое уплотнение: снимок репозитория, журнал которого вырос сверх порога"""
+        while not self._compactor_stop.wait(self._compact_interval):
+            try:
+                with self._lock:
+                    repositories = list(self._repositories.values())
+                for repository in repositories:
+                    journal = getattr(repository, "_journal", None)
+                    if journal is not None and journal.entries_since_snapshot >= self._compact_threshold:
+                        repository.checkpoint()
+            except Exception as e:
+                logger.error(f"Ошибка уплотнения журналов: {e}")
+
+    def _on_destroy(self) -> bool:
+        """Остановка журналирования: запись очереди и закрытие файлов"""
+        try:
+            self._compactor_stop.set()
+            if self._compactor_thread is not None:
+                self._compactor_thread.join(timeout=5.0)
+                self._compactor_thread = None
+
+            if self._journal_writer is not None:
+                self._journal_writer.stop()
+                for repository in self._repositories.values():
+                    journal = repository.detach_journal() if isinstance(repository, BaseRepository) else None
+                    if journal is not None:
+                        journal.close()
+                self._journal_writer = None
+            return True
+
+        except Exception as e:
+            logger.error(f"Ошибка остановки менеджера репозиториев: {e}")
+            return False
+
+    def _on_initialize(self) -> bool:
+        """Инициализация менеджера репозиториев"""
+        try:
+            # Создаем базовые репозитории
+            self._create_base_repositories()
+            return True
+
+        except Exception as e:
+            logger.error(f"Ошибка инициализации менеджера репозиториев: {e}")
+            return False
+
+    def _create_base_repositories(self) -> None:
+        """Создание базовых репозиториев"""
+        # Репозитории для игровых данных
+        self.create_repository("entities", DataType.ENTITY)
+        self.create_repository("items", DataType.ITEM)
+        self.create_repository("skills", DataType.SKILL)
+        self.create_repository("effects", DataType.EFFECT)
+        self.create_repository("templates", DataType.TEMPLATE)
+        self.create_repository("statistics", DataType.STATISTICS)
+
+        # Репозитории для конфигурации и сохранений
+        self.create_repository("configs", DataType.CONFIG, StorageType.FILE)
+        self.create_repository("saves", DataType.SAVE, StorageType.FILE)
+
+        logger.info("Базовые репозитории созданы")
+
+# = УТИЛИТЫ ДЛЯ РАБОТЫ С РЕПОЗИТОРИЯМИ
+
+def create_query_filter(field: str, operator: str, value: Any) -> QueryFilter:
+    """Создание фильтра запроса"""
+    return QueryFilter(field=field, operator=operator, value=value)
+
+def create_query_sort(field: str, direction: str = "asc") -> QuerySort:
+    """Создание сортировки запроса"""
+    return QuerySort(field=field, direction=direction)
 
-#!/usr / bin / env python3
-"""Система репозиториев - централизованное управление данными и их хранением"""import logging
-
-create_event
-logger= logging.getLogger(__name__)
-# = # ТИПЫ ДАННЫХ
-# = class DataType(Enum):"""Типы данных"""
-ENTITY= "entity"
-ENTITY_DATA= "entity_data"
-SYSTEM_DATA= "system_data"
-ITEM= "item"
-SKILL= "skill"
-EFFECT= "effect"
-CONFIG= "config"
-CONFIGURATION= "configuration"
-SAVE= "save"
-TEMPLATE= "template"
-STATISTICS= "statis tics"
-DYNAMIC_DATA= "dynamic_data"
-HISTORY= "his tory"class St or ageType(Enum):"""Типы хранения"""
-MEMORY= "mem or y"
-FILE= "file"
-DATABASE= "database"
-CACHE= "cache"# = # БАЗОВЫЕ КЛАССЫ РЕПОЗИТОРИЕВ
-# = @dataclass: pass  # Добавлен pass в пустой блок
-class DataRec or d:"""Запись данных"""id: str
-    pass
-pass
-pass
-pass
-pass
-pass
-pass
-data_type: DataType
-data: Any
-created_at: float
-updated_at: float
-version: int
-metadata: Dict[str, Any]= field(default_factor = dict):
-pass  # Добавлен pass в пустой блок
-@dataclass: pass  # Добавлен pass в пустой блок
-class QueryFilter:"""Фильтр для запросов"""field: str
-    pass
-pass
-pass
-pass
-pass
-pass
-pass
-operat or : str  # eq, ne, gt, lt, gte, lte, in, not_in , contain s, regex
-value: Any
-@dataclass: pass  # Добавлен pass в пустой блок
-class QueryS or t:"""Сортировка для запросов"""field: str
-    pass
-pass
-pass
-pass
-pass
-pass
-pass
-direction: str  # asc, desc
-@dataclass: pass  # Добавлен pass в пустой блок
-class QueryOptions:"""Опции запроса"""limit: Optional[in t]= None
-    pass
-pass
-pass
-pass
-pass
-pass
-pass
-offset: int= 0
-filters: Lis t[QueryFilter]= field(default_factor = list):
-pass  # Добавлен pass в пустой блок
-s or t: Lis t[QueryS or t]= field(default_factor = list):
-pass  # Добавлен pass в пустой блок
-T= TypeVar('T')
-class IReposit or y(Generic[T]):"""Интерфейс репозитория"""@property
-    pass
-pass
-pass
-pass
-pass
-pass
-pass
-@abstractmethod
-def reposit or y_id(self) -> str:"""Идентификатор репозитория"""pass
-    pass
-pass
-pass
-pass
-pass
-pass
-pass
-@property
-@abstractmethod
-def data_type(self) -> DataType:"""Тип данных"""pass
-    pass
-pass
-pass
-pass
-pass
-pass
-pass
-@abstractmethod
-def create(self, id: str, data: T, metadata: Dict[str
-    pass
-pass
-pass
-pass
-pass
-pass
-pass
-Any]= None) -> bool: pass  # Добавлен pass в пустой блок"""Создание записи"""pass
-@abstractmethod
-def read(self, id: str) -> Optional[T]:"""Чтение записи"""pass
-    pass
-pass
-pass
-pass
-pass
-pass
-pass
-@abstractmethod
-def update(self, id: str, data: T, metadata: Dict[str
-    pass
-pass
-pass
-pass
-pass
-pass
-pass
-Any]= None) -> bool: pass  # Добавлен pass в пустой блок"""Обновление записи"""pass
-@abstractmethod
-def delete(self, id: str) -> bool:"""Удаление записи"""pass
-    pass
-pass
-pass
-pass
-pass
-pass
-pass
-@abstractmethod
-def exis ts(self, id: str) -> bool:"""Проверка существования записи"""pass
-    pass
-pass
-pass
-pass
-pass
-pass
-pass
-@abstractmethod
-def query(self, options: QueryOptions) -> Lis t[T]:"""Запрос данных"""pass
-    pass
-pass
-pass
-pass
-pass
-pass
-pass
-@abstractmethod
-def count(self, options: QueryOptions= None) -> int:"""Подсчет записей"""pass
-    pass
-pass
-pass
-pass
-pass
-pass
-pass
-@abstractmethod
-def clear(self) -> bool:"""Очистка репозитория"""pass
-    pass
-pass
-pass
-pass
-pass
-pass
-pass
-@abstractmethod
-def backup(self) -> Dict[str, Any]:"""Создание резервной копии"""pass
-    pass
-pass
-pass
-pass
-pass
-pass
-pass
-@abstractmethod
-def rest or e(self, backup: Dict[str, Any]) -> bool:"""Восстановление из резервной копии"""pass
-    pass
-pass
-pass
-pass
-pass
-pass
-pass
-class BaseReposit or y(BaseComponent, IReposit or y[T]):"""Базовая реализация репозитория"""def __in it__(self, reposit or y_id: str, data_type: DataType
-    pass
-pass
-pass
-pass
-pass
-pass
-pass
-st or age_type: St or ageType= St or ageType.MEMORY):
-pass  # Добавлен pass в пустой блок
-super().__in it__(reposit or y_id, ComponentType.REPOSITORY
-Pri or ity.NORMAL)
-self._data_type= data_type
-self._st or age_type= st or age_type
-self._rec or ds: Dict[str, DataRec or d]= {}
-self._in dexes: Dict[str, Dict[Any, Lis t[str]]]= {}
-self._lock= threading.RLock()
-self._auto_save= False
-self._auto_save_in terval= 300.0  # 5 минут
-self._last_save= 0.0
-@property
-def reposit or y_id(self) -> str: return self.component_id
-    pass
-pass
-pass
-pass
-pass
-pass
-pass
-@property
-def data_type(self) -> DataType: return self._data_type
-    pass
-pass
-pass
-pass
-pass
-pass
-pass
-def create(self, id: str, data: T, metadata: Dict[str
-    pass
-pass
-pass
-pass
-pass
-pass
-pass
-Any]= None) -> bool: pass  # Добавлен pass в пустой блок"""Создание записи"""
-with self._lock: if idin self._rec or ds: logger.warning(f"Запись {id} уже существует в репозитории {self.reposit or y_id}")
-    pass
-pass
-pass
-pass
-pass
-pass
-pass
-return False
-current_time= time.time()
-rec or d= DataRec or d(
-i = id,
-data_typ = self._data_type,
-dat = copy.deepcopy(data),
-created_a = current_time,
-updated_a = current_time,
-versio = 1,
-metadat = metadata or {}
-)
-self._rec or ds[id]= rec or d
-self._update_in dexes(id, rec or d)
-logger.debug(f"Создана запись {id} в репозитории {self.reposit or y_id}")
-return True
-def read(self, id: str) -> Optional[T]:
-    pass
-pass
-pass
-pass
-pass
-pass
-pass
-"""Чтение записи"""with self._lock: rec or d= self._rec or ds.get(id)
-if rec or d: return copy.deepcopy(rec or d.data)
-    pass
-pass
-pass
-pass
-pass
-pass
-pass
-return None
-def update(self, id: str, data: T, metadata: Dict[str
-    pass
-pass
-pass
-pass
-pass
-pass
-pass
-Any]= None) -> bool: pass  # Добавлен pass в пустой блок"""Обновление записи"""
-with self._lock: if id notin self._rec or ds: logger.warning(f"Запись {id} не найдена в репозитории {self.reposit or y_id}")
-    pass
-pass
-pass
-pass
-pass
-pass
-pass
-return False
-rec or d= self._rec or ds[id]
-rec or d.data= copy.deepcopy(data)
-rec or d.updated_at= time.time()
-rec or d.version = 1
-if metadata: rec or d.metadata.update(metadata)
-    pass
-pass
-pass
-pass
-pass
-pass
-pass
-self._update_in dexes(id, rec or d)
-logger.debug(f"Обновлена запись {id} в репозитории {self.reposit or y_id}")
-return True
-def delete(self, id: str) -> bool: pass
-    pass
-pass
-pass
-pass
-pass
-pass
-"""Удаление записи"""
-with self._lock: if id notin self._rec or ds: return False
-    pass
-pass
-pass
-pass
-pass
-pass
-pass
-rec or d= self._rec or ds[id]
-self._remove_from_in dexes(id, rec or d)
-del self._rec or ds[id]
-logger.debug(f"Удалена запись {id} из репозитория {self.reposit or y_id}")
-return True
-def exis ts(self, id: str) -> bool: pass
-    pass
-pass
-pass
-pass
-pass
-pass
-"""Проверка существования записи"""with self._lock: return idin self._rec or ds
-def query(self, options: QueryOptions) -> Lis t[T]:"""Запрос данных"""with self._lock: pass
-    pass
-pass
-pass
-pass
-pass
-pass
-# Применяем фильтры
-filtered_ids= self._apply_filters(options.filters)
-# Применяем сортировку
-s or ted_ids= self._apply_s or ting(filtered_ids, options.s or t)
-# Применяем пагинацию
-pagin ated_ids= self._apply_pagin ation(s or ted_ids, options.limit
-options.offset)
-# Возвращаем данные
-return [copy.deepcopy(self._rec or ds[id].data) for idin pagin ated_ids]:
-pass  # Добавлен pass в пустой блок
-def count(self, options: QueryOptions= None) -> int:"""Подсчет записей"""with self._lock: if not options or not options.filters: return len(self._rec or ds)
-    pass
-pass
-pass
-pass
-pass
-pass
-pass
-filtered_ids= self._apply_filters(options.filters)
-return len(filtered_ids)
-def clear(self) -> bool:"""Очистка репозитория"""
-    pass
-pass
-pass
-pass
-pass
-pass
-pass
-with self._lock: self._rec or ds.clear()
-    pass
-pass
-pass
-pass
-pass
-pass
-pass
-self._in dexes.clear()
-logger.in fo(f"Репозиторий {self.reposit or y_id} очищен")
-return True
-def backup(self) -> Dict[str, Any]:
-    pass
-pass
-pass
-pass
-pass
-pass
-pass
-"""Создание резервной копии"""with self._lock: backup= {"reposit or y_id": self.reposit or y_id,
-"data_type": self._data_type.value,
-"st or age_type": self._st or age_type.value,
-"rec or ds": {},
-"in dexes": self._in dexes.copy(),
-"timestamp": time.time()
-}
-for id, rec or din self._rec or ds.items():
-    pass
-pass
-pass
-pass
-pass
-pass
-pass
-backup["rec or ds"][id]= {
-"id": rec or d.id,
-"data_type": rec or d.data_type.value,
-"data": rec or d.data,
-"created_at": rec or d.created_at,
-"updated_at": rec or d.updated_at,
-"version": rec or d.version,
-"metadata": rec or d.metadata
-}
-return backup
-def rest or e(self, backup: Dict[str, Any]) -> bool: pass
-    pass
-pass
-pass
-pass
-pass
-pass
-"""Восстановление из резервной копии"""
-with self._lock: try: pass
-    pass
-pass
-pass
-pass
-pass
-pass
-except Exception as e: pass
-pass
-pass
-logger.err or(f"Ошибка восстановления репозитория {self.reposit or y_id}: {e}")
-return False
-def add_in dex(self, field: str) -> bool: pass
-    pass
-pass
-pass
-pass
-pass
-pass
-"""Добавление индекса"""
-with self._lock: if fieldin self._in dexes: return True
-    pass
-pass
-pass
-pass
-pass
-pass
-pass
-self._in dexes[field]= {}
-# Строим индекс для существующих записей
-for id, rec or din self._rec or ds.items():
-    pass
-pass
-pass
-pass
-pass
-pass
-pass
-self._add_to_in dex(field, id, rec or d)
-logger.in fo(f"Добавлен индекс {field} в репозиторий {self.reposit or y_id}")
-return True
-def remove_in dex(self, field: str) -> bool: pass
-    pass
-pass
-pass
-pass
-pass
-pass
-"""Удаление индекса"""
-with self._lock: if fieldin self._in dexes: del self._in dexes[field]
-    pass
-pass
-pass
-pass
-pass
-pass
-pass
-logger.in fo(f"Удален индекс {field} из репозитория {self.reposit or y_id}")
-return True
-return False
-def _update_in dexes(self, id: str, rec or d: DataRec or d) -> None: pass
-    pass
-pass
-pass
-pass
-pass
-pass
-"""Обновление индексов для записи"""for fieldin self._in dexes: self._add_to_in dex(field, id, rec or d)
-def _remove_from_in dexes(self, id: str, rec or d: DataRec or d) -> None:"""Удаление записи из индексов"""for fieldin self._in dexes: self._remove_from_in dex(field, id, rec or d)
-    pass
-pass
-pass
-pass
-pass
-pass
-pass
-def _add_to_in dex(self, field: str, id: str, rec or d: DataRec or d) -> None:"""Добавление записи в индекс"""
-    pass
-pass
-pass
-pass
-pass
-pass
-pass
-try: value= self._get_field_value(rec or d.data, field)
-if valueis not None: if value notin self._in dexes[field]:
-    pass
-pass
-pass
-pass
-pass
-pass
-pass
-self._in dexes[field][value]= []
-if id notin self._in dexes[field][value]:
-    pass
-pass
-pass
-pass
-pass
-pass
-pass
-self._in dexes[field][value].append(id)
-except Exception as e: pass
-pass
-pass
-logger.warning(f"Ошибка добавления в индекс {field}: {e}")
-def _remove_from_in dex(self, field: str, id: str
-    pass
-pass
-pass
-pass
-pass
-pass
-pass
-rec or d: DataRec or d) -> None: pass  # Добавлен pass в пустой блок
-"""Удаление записи из индекса"""
-try: except Exception as e: pass
-pass
-pass
-logger.warning(f"Ошибка удаления из индекса {field}: {e}")
-def _get_field_value(self, data: Any, field: str) -> Any: pass
-    pass
-pass
-pass
-pass
-pass
-pass
-"""Получение значения поля из данных"""if isin stance(data, dict):
-return data.get(field)
-elif hasattr(data, field):
-    pass
-pass
-pass
-pass
-pass
-pass
-pass
-return getattr(data, field)
-else: return None
-    pass
-pass
-pass
-pass
-pass
-pass
-pass
-def _apply_filters(self, filters: Lis t[QueryFilter]) -> Lis t[str]:"""Применение фильтров"""
-    pass
-pass
-pass
-pass
-pass
-pass
-pass
-if not filters: return lis t(self._rec or ds.keys())
-    pass
-pass
-pass
-pass
-pass
-pass
-pass
-filtered_ids= set(self._rec or ds.keys())
-for filter_objin filters: if filter_obj.fieldin self._in dexes: pass
-    pass
-pass
-pass
-pass
-pass
-pass
-# Используем индекс
-if filter_obj.operator = "eq":
-    pass
-pass
-pass
-pass
-pass
-pass
-pass
-if filter_obj.valuein self._in dexes[filter_obj.field]:
-    pass
-pass
-pass
-pass
-pass
-pass
-pass
-filtered_ids = set(self._in dexes[filter_obj.field][filter_obj.value])
-else: filtered_ids.clear()
-    pass
-pass
-pass
-pass
-pass
-pass
-pass
-elif filter_obj.operator = "in ":
-    pass
-pass
-pass
-pass
-pass
-pass
-pass
-matching_ids= set()
-for valuein filter_obj.value: if valuein self._in dexes[filter_obj.field]:
-    pass
-pass
-pass
-pass
-pass
-pass
-pass
-matching_ids.update(self._in dexes[filter_obj.field][value])
-filtered_ids = matching_ids
-else: pass
-    pass
-pass
-pass
-pass
-pass
-pass
-# Фильтруем вручную
-matching_ids= set()
-for id, rec or din self._rec or ds.items():
-    pass
-pass
-pass
-pass
-pass
-pass
-pass
-if self._matches_filter(rec or d.data, filter_obj):
-    pass
-pass
-pass
-pass
-pass
-pass
-pass
-matching_ids.add(id)
-filtered_ids = matching_ids
-return lis t(filtered_ids)
-def _matches_filter(self, data: Any, filter_obj: QueryFilter) -> bool: pass
-    pass
-pass
-pass
-pass
-pass
-pass
-"""Проверка соответствия фильтру"""
-value= self._get_field_value(data, filter_obj.field)
-if filter_obj.operator = "eq":
-    pass
-pass
-pass
-pass
-pass
-pass
-pass
-return value = filter_obj.value
-elif filter_obj.operator = "ne":
-    pass
-pass
-pass
-pass
-pass
-pass
-pass
-return value != filter_obj.value
-elif filter_obj.operator = "gt":
-    pass
-pass
-pass
-pass
-pass
-pass
-pass
-return value > filter_obj.value
-elif filter_obj.operator = "lt":
-    pass
-pass
-pass
-pass
-pass
-pass
-pass
-return value < filter_obj.value
-elif filter_obj.operator = "gte":
-    pass
-pass
-pass
-pass
-pass
-pass
-pass
-return value >= filter_obj.value
-elif filter_obj.operator = "lte":
-    pass
-pass
-pass
-pass
-pass
-pass
-pass
-return value <= filter_obj.value
-elif filter_obj.operator = "in ":
-    pass
-pass
-pass
-pass
-pass
-pass
-pass
-return valuein filter_obj.value
-elif filter_obj.operator = "not_in ":
-    pass
-pass
-pass
-pass
-pass
-pass
-pass
-return value notin filter_obj.value
-elif filter_obj.operator = "contain s":
-    pass
-pass
-pass
-pass
-pass
-pass
-pass
-return filter_obj.valuein str(value)
-elif filter_obj.operator = "regex":
-    pass
-pass
-pass
-pass
-pass
-pass
-pass
-return bool(re.search(filter_obj.value, str(value)))
-return False
-def _apply_s or ting(self, ids: Lis t[str]
-    pass
-pass
-pass
-pass
-pass
-pass
-pass
-s or t: Lis t[QueryS or t]) -> Lis t[str]:
-pass  # Добавлен pass в пустой блок
-"""Применение сортировки"""
-if not s or t: return ids
-    pass
-pass
-pass
-pass
-pass
-pass
-pass
-def s or t_key(id: str) -> tuple: rec or d= self._rec or ds[id]
-    pass
-pass
-pass
-pass
-pass
-pass
-pass
-key_values= []
-for s or t_objin s or t: value= self._get_field_value(rec or d.data, s or t_obj.field)
-    pass
-pass
-pass
-pass
-pass
-pass
-pass
-if s or t_obj.direction = "desc":
-    pass
-pass
-pass
-pass
-pass
-pass
-pass
-value= (valueis None
-value)  # None в конец при сортировке по убыванию
-else: value= (valueis not None
-    pass
-pass
-pass
-pass
-pass
-pass
-pass
-value)  # None в начало при сортировке по возрастанию
-key_values.append(value)
-return tuple(key_values)
-return s or ted(ids, ke = sort_key)
-def _apply_pagin ation(self, ids: Lis t[str], limit: Optional[in t]
-    pass
-pass
-pass
-pass
-pass
-pass
-pass
-offset: int) -> Lis t[str]:
-pass  # Добавлен pass в пустой блок
-"""Применение пагинации"""if offset >= len(ids):
-return []
-end= offset + limit if limit else len(ids):
-pass  # Добавлен pass в пустой блок
-return ids[offset:end]
-def _update_impl(self, delta_time: float) -> bool:"""Обновление - автосохранение"""if self._auto_saveand time.time() - self._last_save > self._auto_save_in terval: self._save_data()
-    pass
-pass
-pass
-pass
-pass
-pass
-pass
-self._last_save= time.time()
-return True
-def _save_data(self) -> bool:"""Сохранение данных"""if self._st or age_type = St or ageType.FILE: return self._save_to_file()
-    pass
-pass
-pass
-pass
-pass
-pass
-pass
-return True
-def _save_to_file(self) -> bool:"""Сохранение в файл"""
-    pass
-pass
-pass
-pass
-pass
-pass
-pass
-try: except Exception as e: pass
-pass
-pass
-logger.err or(f"Ошибка сохранения репозитория {self.reposit or y_id}: {e}")
-return False
-# = # МЕНЕДЖЕР РЕПОЗИТОРИЕВ
-# = class Reposit or yManager(BaseComponent):
-"""Менеджер репозиториев"""
-def __in it__(self):
-    pass
-pass
-pass
-pass
-pass
-pass
-pass
-super().__in it__("reposit or y_manager", ComponentType.MANAGER, Pri or ity.HIGH)
-self._reposit or ies: Dict[str, IReposit or y]= {}
-self._reposit or y_fact or ies: Dict[DataType, Callable]= {}
-self._lock= threading.RLock()
-def regis ter_reposit or y(self, reposit or y: IReposit or y) -> bool: pass
-    pass
-pass
-pass
-pass
-pass
-pass
-"""Регистрация репозитория"""
-with self._lock: if reposit or y.reposit or y_idin self._reposit or ies: logger.warning(f"Репозиторий {reposit or y.reposit or y_id} уже зарегистрирован")
-    pass
-pass
-pass
-pass
-pass
-pass
-pass
-return False
-self._reposit or ies[reposit or y.reposit or y_id]= reposit or y
-logger.in fo(f"Репозиторий {reposit or y.reposit or y_id} зарегистрирован")
-return True
-def unregis ter_reposit or y(self, reposit or y_id: str) -> bool: pass
-    pass
-pass
-pass
-pass
-pass
-pass
-"""Отмена регистрации репозитория"""
-with self._lock: if reposit or y_id notin self._reposit or ies: return False
-    pass
-pass
-pass
-pass
-pass
-pass
-pass
-del self._reposit or ies[reposit or y_id]
-logger.in fo(f"Репозиторий {reposit or y_id} отменен")
-return True
-def get_reposit or y(self, reposit or y_id: str) -> Optional[IReposit or y]:
-    pass
-pass
-pass
-pass
-pass
-pass
-pass
-"""Получение репозитория по ID"""with self._lock: return self._reposit or ies.get(reposit or y_id)
-def get_reposit or ies_by_type(self
-    pass
-pass
-pass
-pass
-pass
-pass
-pass
-data_type: DataType) -> Lis t[IReposit or y]:
-pass  # Добавлен pass в пустой блок"""Получение репозиториев по типу данных"""with self._lock: return [repo for repoin self._reposit or ies.values() :
-if repo.data_type = data_type]:
-    pass
-pass
-pass
-pass
-pass
-pass
-pass
-pass  # Добавлен pass в пустой блок
-def create_reposit or y(self, reposit or y_id: str, data_type: DataType
-    pass
-pass
-pass
-pass
-pass
-pass
-pass
-st or age_type: St or ageType= St or ageType.MEMORY) -> Optional[IReposit or y]:
-pass  # Добавлен pass в пустой блок"""Создание нового репозитория"""
-with self._lock: if reposit or y_idin self._reposit or ies: logger.warning(f"Репозиторий {reposit or y_id} уже существует")
-    pass
-pass
-pass
-pass
-pass
-pass
-pass
-return self._reposit or ies[reposit or y_id]
-reposit or y= BaseReposit or y(reposit or y_id, data_type, st or age_type)
-self._reposit or ies[reposit or y_id]= reposit or y
-logger.in fo(f"Создан репозиторий {reposit or y_id} для типа {data_type.value}")
-return reposit or y
-def backup_all(self) -> Dict[str, Any]:
-    pass
-pass
-pass
-pass
-pass
-pass
-pass
-"""Создание резервной копии всех репозиториев"""with self._lock: backup= {"timestamp": time.time(),
-"reposit or ies": {}
-}
-for reposit or y_id, reposit or yin self._reposit or ies.items():
-    pass
-pass
-pass
-pass
-pass
-pass
-pass
-try: backup["reposit or ies"][reposit or y_id]= reposit or y.backup()
-except Exception as e: pass
-    pass
-pass
-pass
-pass
-pass
-pass
-pass
-pass
-pass
-logger.err or(f"Ошибка резервного копирования репозитория {reposit or y_id}: {e}")
-return backup
-def rest or e_all(self, backup: Dict[str, Any]) -> bool: pass
-    pass
-pass
-pass
-pass
-pass
-pass
-"""Восстановление всех репозиториев"""
-with self._lock: try: pass
-    pass
-pass
-pass
-pass
-pass
-pass
-except Exception as e: pass
-pass
-pass
-logger.err or(f"Ошибка восстановления репозиториев: {e}")
-return False
-def _in itialize_impl(self) -> bool: pass
-    pass
-pass
-pass
-pass
-pass
-pass
-"""Инициализация менеджера репозиториев"""
-try:
-# Создаем базовые репозитории
-self._create_base_reposit or ies()
-return True
-except Exception as e: pass
-pass
-pass
-logger.err or(f"Ошибка инициализации менеджера репозиториев: {e}")
-return False
-def _create_base_reposit or ies(self) -> None: pass
-    pass
-pass
-pass
-pass
-pass
-pass
-"""Создание базовых репозиториев"""
-# Репозитории для игровых данных
-self.create_reposit or y("entities", DataType.ENTITY)
-self.create_reposit or y("items", DataType.ITEM)
-self.create_reposit or y("skills", DataType.SKILL)
-self.create_reposit or y("effects", DataType.EFFECT)
-self.create_reposit or y("templates", DataType.TEMPLATE)
-self.create_reposit or y("statis tics", DataType.STATISTICS)
-# Репозитории для конфигурации и сохранений
-self.create_reposit or y("configs", DataType.CONFIG, St or ageType.FILE)
-self.create_reposit or y("saves", DataType.SAVE, St or ageType.FILE)
-logger.in fo("Базовые репозитории созданы")
-# = # УТИЛИТЫ ДЛЯ РАБОТЫ С РЕПОЗИТОРИЯМИ
-# = def create_query_filter(field: str, operat or : str, value: Any) -> QueryFilter:
-"""Создание фильтра запроса"""
-return QueryFilter(fiel = field, operato = operat or , valu = value)
-def create_query_s or t(field: str, direction: str= "asc") -> QueryS or t: pass
-    pass
-pass
-pass
-pass
-pass
-pass
-"""Создание сортировки запроса"""return QueryS or t(fiel = field, directio = direction)
-def create_query_options(limit: Optional[in t]= None, offset: int= 0,
-    pass
-pass
-pass
-pass
-pass
-pass
-pass
-filters: Lis t[QueryFilter]= None
-s or t: Lis t[QueryS or t]= None) -> QueryOptions: pass  # Добавлен pass в пустой блок"""Создание опций запроса"""
-return QueryOptions(
-limi = limit,
-offse = offset,
-filter = filters or [],
-sor = sort or []
-)
+def create_query_options(limit: Optional[int] = None, offset: int = 0,
+                         filters: List[QueryFilter] = None,
+                         sort: List[QuerySort] = None) -> QueryOptions:
+    """Создание опций запроса"""
+    return QueryOptions(
+        limit=limit,
+        offset=offset,
+        filters=filters or [],
+        sort=sort or []
+    )
@@ -0,0 +1,439 @@
+#!/usr/bin/env python3
+"""Вторичные индексы и планировщик запросов репозиториев
+Сортированные индексы по одному или нескольким полям поддерживают равенство,
+диапазоны и префиксы; планировщик выбирает самый селективный индекс,
+пересекает кандидатов и прекращает обход при достижении limit"""
+
+from bisect import bisect_left
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Mapping, Optional, Sequence, Set, Tuple
+import itertools
+import logging
+import re
+
+logger = logging.getLogger(__name__)
+
+# Операторы, которые индекс отвечает без проверки записей
+INDEXABLE_OPERATORS = {"eq", "in", "gt", "gte", "lt", "lte", "prefix"}
+
+# Ключ отсутствующего значения меньше ключей любых значений
+NONE_KEY = (-1,)
+
+# Символ больше любого символа BMP - верхняя граница диапазона префикса
+PREFIX_SENTINEL = "\uffff"
+
+# Операторы, которым нужен естественный порядок значений (числа и строки)
+RANGE_OPERATORS = {"gt", "gte", "lt", "lte", "prefix"}
+
+# Пересечение с индексом выгодно, пока он не больше текущих кандидатов в столько раз
+INTERSECT_FACTOR = 8
+
+def order_key(value: Any) -> Tuple:
+    """Ключ упорядочивания разнотипных значений: None, числа, строки, прочее"""
+    if value is None:
+        return NONE_KEY
+    if isinstance(value, (int, float)):
+        return (0, value)
+    if isinstance(value, str):
+        return (1, value)
+    return (2, type(value).__name__, repr(value))
+
+def get_field_value(data: Any, field_name: str) -> Any:
+    """Значение поля записи (словарь или объект); вложенные поля через точку"""
+    for part in field_name.split("."):
+        if isinstance(data, dict):
+            data = data.get(part)
+        else:
+            data = getattr(data, part, None)
+        if data is None:
+            return None
+    return data
+
+def matches_filter(data: Any, field_name: str, operator: str, expected: Any) -> bool:
+    """Проверка записи фильтром (полный набор операторов QueryFilter)"""
+    value = get_field_value(data, field_name)
+    try:
+        if operator == "eq":
+            return value == expected
+        elif operator == "ne":
+            return value != expected
+        elif operator == "gt":
+            return value is not None and value > expected
+        elif operator == "lt":
+            return value is not None and value < expected
+        elif operator == "gte":
+            return value is not None and value >= expected
+        elif operator == "lte":
+            return value is not None and value <= expected
+        elif operator == "in":
+            return value in expected
+        elif operator == "not_in":
+            return value not in expected
+        elif operator == "contains":
+            return expected in str(value)
+        elif operator == "prefix":
+            return isinstance(value, str) and value.startswith(expected)
+        elif operator == "regex":
+            return bool(re.search(expected, str(value)))
+    except TypeError:
+        return False
+    return False
+
+# = ИНДЕКСЫ
+
+class SortedIndex:
+    """Сортированный вторичный индекс по кортежу полей
+    Хранит упорядоченный список различных ключей и для каждого ключа множество id;
+    отсутствующие значения индексируются ключом NONE_KEY (в начале порядка)"""
+
+    def __init__(self, fields: Sequence[str]):
+        self.fields: Tuple[str, ...] = tuple(fields)
+        self.name = ",".join(self.fields)
+        self._keys: List[Tuple] = []
+        self._postings: Dict[Tuple, Set[str]] = {}
+        self._record_keys: Dict[str, Tuple] = {}
+
+    def __len__(self) -> int:
+        return len(self._record_keys)
+
+    @property
+    def is_composite(self) -> bool:
+        return len(self.fields) > 1
+
+    def make_key(self, data: Any) -> Tuple:
+        """Ключ записи: кортеж ключей упорядочивания полей"""
+        return tuple(order_key(get_field_value(data, field_name)) for field_name in self.fields)
+
+    # - Изменение
+
+    def add(self, record_id: str, data: Any):
+        """Индексация записи (старый ключ записи снимается)"""
+        self.remove(record_id)
+        key = self.make_key(data)
+        postings = self._postings.get(key)
+        if postings is None:
+            postings = self._postings[key] = set()
+            self._keys.insert(bisect_left(self._keys, key), key)
+        postings.add(record_id)
+        self._record_keys[record_id] = key
+
+    def remove(self, record_id: str):
+        key = self._record_keys.pop(record_id, None)
+        if key is None:
+            return
+
+        postings = self._postings[key]
+        postings.discard(record_id)
+        if not postings:
+            del self._postings[key]
+            del self._keys[bisect_left(self._keys, key)]
+
+    def clear(self):
+        self._keys.clear()
+        self._postings.clear()
+        self._record_keys.clear()
+
+    # - Диапазоны ключей
+
+    def _bounds(self, prefix: Tuple, operator: str, value: Any) -> Tuple[int, int]:
+        """Позиции [start, end) в списке ключей для условия на поле после префикса равенств
+        Ключи с префиксом prefix образуют непрерывный участок списка"""
+        keys = self._keys
+        depth = len(prefix)
+        # Кортеж короче ключа меньше всех ключей с тем же началом, а (..., (3,)) больше всех
+        low = bisect_left(keys, prefix)
+        high = bisect_left(keys, prefix + ((3,),)) if prefix else len(keys)
+
+        if operator is None:
+            return low, high
+
+        if operator == "prefix":
+            start = prefix + (order_key(value),)
+            return (bisect_left(keys, start, low, high),
+                    bisect_left(keys, prefix + ((1, value + PREFIX_SENTINEL),), low, high))
+
+        bound = prefix + (order_key(value),)
+        if operator == "eq":
+            if depth + 1 == len(self.fields):
+                position = bisect_left(keys, bound, low, high)
+                found = position < high and keys[position] == bound
+                return position, position + 1 if found else position
+            return bisect_left(keys, bound, low, high), bisect_left(keys, bound + ((3,),), low, high)
+
+        # Диапазоны допустимы только внутри одного типа значений
+        type_rank = bound[depth][0]
+        rank_low = bisect_left(keys, prefix + ((type_rank,),), low, high)
+        rank_high = bisect_left(keys, prefix + ((type_rank + 1,),), low, high)
+        after = bound + ((3,),)
+        if operator == "gt":
+            return bisect_left(keys, after, rank_low, rank_high), rank_high
+        if operator == "gte":
+            return bisect_left(keys, bound, rank_low, rank_high), rank_high
+        if operator == "lt":
+            return rank_low, bisect_left(keys, bound, rank_low, rank_high)
+        if operator == "lte":
+            return rank_low, bisect_left(keys, after, rank_low, rank_high)
+        return low, high
+
+    def lookup(self, prefix_values: Sequence[Any] = (), operator: Optional[str] = None,
+               value: Any = None) -> Set[str]:
+        """id записей с равенством по первым полям и условием на следующее поле"""
+        prefix = tuple(order_key(v) for v in prefix_values)
+        if operator == "in":
+            result: Set[str] = set()
+            for item in value:
+                result |= self.lookup(prefix_values, "eq", item)
+            return result
+
+        start, end = self._bounds(prefix, operator, value)
+        result = set()
+        for key in self._keys[start:end]:
+            result |= self._postings[key]
+        return result
+
+    def count(self, prefix_values: Sequence[Any] = (), operator: Optional[str] = None,
+              value: Any = None) -> int:
+        """Точное число записей, которое вернет lookup (без построения множества)"""
+        if operator == "in":
+            unique = {order_key(item): item for item in value}
+            return sum(self.count(prefix_values, "eq", item) for item in unique.values())
+        start, end = self._bounds(tuple(order_key(v) for v in prefix_values), operator, value)
+        return sum(len(self._postings[key]) for key in self._keys[start:end])
+
+    def estimate(self, prefix_values: Sequence[Any] = (), operator: Optional[str] = None,
+                 value: Any = None) -> int:
+        """Оценка числа записей для планировщика
+        Длинные диапазоны оцениваются по средней длине списка id без обхода ключей"""
+        if operator != "in":
+            start, end = self._bounds(tuple(order_key(v) for v in prefix_values), operator, value)
+            if end - start > 64:
+                return int((end - start) * len(self._record_keys) / max(1, len(self._keys)))
+        return self.count(prefix_values, operator, value)
+
+    def iter_ordered(self, descending: bool = False) -> Iterator[str]:
+        """Обход id в порядке ключа: None в начале по возрастанию и в конце по убыванию"""
+        keys = reversed(self._keys) if descending else self._keys
+        for key in list(keys):
+            postings = self._postings.get(key)
+            if postings:
+                yield from sorted(postings)
+
+# = ПЛАНИРОВЩИК
+
+@dataclass
+class IndexAccess:
+    """Способ ответа на часть фильтров через индекс"""
+    index: SortedIndex
+    filters: List[Any]
+    prefix_values: List[Any]
+    operator: Optional[str]
+    value: Any
+    estimate: int
+
+    def fetch(self) -> Set[str]:
+        return self.index.lookup(self.prefix_values, self.operator, self.value)
+
+@dataclass
+class QueryPlan:
+    """План запроса: индексы для кандидатов, остаточные фильтры и способ сортировки"""
+    accesses: List[IndexAccess] = field(default_factory=list)
+    residual_filters: List[Any] = field(default_factory=list)
+    sort_index: Optional[SortedIndex] = None
+    sort_descending: bool = False
+    estimated_rows: int = 0
+
+    def describe(self) -> Dict[str, Any]:
+        return {
+            "indexes": [access.index.name for access in self.accesses],
+            "estimates": [access.estimate for access in self.accesses],
+            "residual_filters": [f"{f.field} {f.operator}" for f in self.residual_filters],
+            "sort_index": self.sort_index.name if self.sort_index else None,
+            "estimated_rows": self.estimated_rows
+        }
+
+class QueryPlanner:
+    """Стоимостный планировщик запросов по набору SortedIndex
+    data_getter извлекает данные из хранимой записи (например, DataRecord.data)"""
+
+    def __init__(self, data_getter: Callable[[Any], Any] = lambda record: record):
+        self.data_getter = data_getter
+        self.indexes: Dict[Tuple[str, ...], SortedIndex] = {}
+        # Порядок добавления записей: кандидаты из индексов выдаются в нем, как при полном обходе
+        self._ranks: Dict[str, int] = {}
+        self._rank_counter = itertools.count()
+        self.stats = {
+            "planned_queries": 0,
+            "index_scans": 0,
+            "full_scans": 0,
+            "early_stops": 0
+        }
+
+    # - Управление индексами
+
+    def add_index(self, fields: Sequence[str], records: Iterable[Tuple[str, Any]] = ()) -> SortedIndex:
+        fields = tuple(fields)
+        index = self.indexes.get(fields)
+        if index is None:
+            index = self.indexes[fields] = SortedIndex(fields)
+            for record_id, data in records:
+                index.add(record_id, data)
+        return index
+
+    def remove_index(self, fields: Sequence[str]) -> bool:
+        return self.indexes.pop(tuple(fields), None) is not None
+
+    def index_record(self, record_id: str, data: Any):
+        if record_id not in self._ranks:
+            self._ranks[record_id] = next(self._rank_counter)
+        for index in self.indexes.values():
+            index.add(record_id, data)
+
+    def unindex_record(self, record_id: str):
+        self._ranks.pop(record_id, None)
+        for index in self.indexes.values():
+            index.remove(record_id)
+
+    def clear(self):
+        self._ranks.clear()
+        for index in self.indexes.values():
+            index.clear()
+
+    # - Планирование
+
+    def _access_paths(self, filters: List[Any]) -> List[IndexAccess]:
+        """Все способы ответа через индексы: поле индекса за полем, равенства на префиксе"""
+        # Прочие типы упорядочены в индексе по repr - диапазоны по ним проверяются по записям
+        indexable = [f for f in filters if f.operator in INDEXABLE_OPERATORS and f.value is not None
+                     and (f.operator != "prefix" or isinstance(f.value, str))
+                     and (f.operator not in RANGE_OPERATORS or order_key(f.value)[0] in (0, 1))]
+        accesses = []
+        for index in self.indexes.values():
+            used: List[Any] = []
+            prefix_values: List[Any] = []
+            operator, value = None, None
+            for field_name in index.fields:
+                equality = next((f for f in indexable if f.field == field_name and f.operator == "eq"), None)
+                if equality is not None:
+                    used.append(equality)
+                    prefix_values.append(equality.value)
+                    continue
+                condition = next((f for f in indexable if f.field == field_name), None)
+                if condition is not None:
+                    used.append(condition)
+                    operator, value = condition.operator, condition.value
+                break
+
+            if not used:
+                continue
+            if operator is None:
+                # Последнее равенство становится условием поиска
+                operator, value = "eq", prefix_values.pop()
+            accesses.append(IndexAccess(index, used, prefix_values, operator, value,
+                                        index.estimate(prefix_values, operator, value)))
+        return accesses
+
+    def plan(self, filters: List[Any], sort: List[Any], total_records: int) -> QueryPlan:
+        self.stats["planned_queries"] += 1
+        plan = QueryPlan(estimated_rows=total_records)
+        accesses = sorted(self._access_paths(filters), key=lambda access: access.estimate)
+
+        covered: List[Any] = []
+        for access in accesses:
+            if any(f is c for f in access.filters for c in covered):
+                continue
+            # Первый (самый селективный) индекс берется всегда, остальные - если дешевле проверки
+            if plan.accesses and access.estimate > plan.estimated_rows * INTERSECT_FACTOR:
+                break
+            plan.accesses.append(access)
+            covered.extend(access.filters)
+            plan.estimated_rows = min(plan.estimated_rows, access.estimate)
+
+        plan.residual_filters = [f for f in filters if not any(f is c for c in covered)]
+
+        # Сортировка по одному полю с индексом - обход индекса с ранней остановкой
+        if len(sort) == 1:
+            index = self.indexes.get((sort[0].field,))
+            if index is not None:
+                plan.sort_index = index
+                plan.sort_descending = sort[0].direction == "desc"
+        return plan
+
+    # - Выполнение
+
+    def execute(self, plan: QueryPlan, records: Mapping[str, Any], sort: List[Any],
+                limit: Optional[int], offset: int) -> List[str]:
+        """id записей по плану с учетом сортировки и пагинации"""
+        candidates: Optional[Set[str]] = None
+        for access in plan.accesses:
+            fetched = access.fetch()
+            candidates = fetched if candidates is None else candidates & fetched
+            if not candidates:
+                return []
+
+        if candidates is None:
+            self.stats["full_scans"] += 1
+        else:
+            self.stats["index_scans"] += 1
+
+        residual = plan.residual_filters
+        data_getter = self.data_getter
+
+        def accepted(record_id: str) -> bool:
+            data = data_getter(records[record_id])
+            return all(matches_filter(data, f.field, f.operator, f.value) for f in residual)
+
+        wanted = offset + limit if limit is not None else None
+
+        # Обход индекса сортировки выгоден, когда кандидатов много
+        if plan.sort_index is not None and (candidates is None or wanted is not None and
+                                            len(candidates) * 4 > len(records)):
+            ordered = plan.sort_index.iter_ordered(plan.sort_descending)
+            if candidates is not None:
+                ordered = (record_id for record_id in ordered if record_id in candidates)
+            matched = (record_id for record_id in ordered if accepted(record_id))
+            if wanted is not None:
+                result = list(itertools.islice(matched, wanted))
+                if len(result) == wanted:
+                    self.stats["early_stops"] += 1
+            else:
+                result = list(matched)
+            return result[offset:]
+
+        if candidates is None:
+            source = records.keys()
+        else:
+            # Множество кандидатов не упорядочено: восстанавливается порядок добавления
+            ranks = self._ranks
+            source = sorted(candidates, key=lambda record_id: ranks.get(record_id, -1))
+        if not sort:
+            matched = (record_id for record_id in source if accepted(record_id))
+            if wanted is not None:
+                result = list(itertools.islice(matched, wanted))
+                if len(result) == wanted:
+                    self.stats["early_stops"] += 1
+                return result[offset:]
+            return list(matched)[offset:]
+
+        matched_ids = [record_id for record_id in source if accepted(record_id)]
+        result = self.sort_ids(matched_ids, records, sort)
+        return result[offset:wanted]
+
+    def sort_ids(self, ids: List[str], records: Mapping[str, Any], sort: List[Any]) -> List[str]:
+        """Многоключевая сортировка: устойчивые проходы от младшего ключа к старшему
+        None - в начале по возрастанию и в конце по убыванию"""
+        result = sorted(ids)
+        for sort_obj in reversed(sort):
+            descending = sort_obj.direction == "desc"
+
+            def sort_key(record_id: str, field_name: str = sort_obj.field) -> Tuple:
+                return order_key(get_field_value(self.data_getter(records[record_id]), field_name))
+
+            result.sort(key=sort_key, reverse=descending)
+        return result
+
+    def count(self, plan: QueryPlan, records: Mapping[str, Any]) -> int:
+        """Подсчет по плану; один индексный доступ без остатка считается по длинам списков id"""
+        if len(plan.accesses) == 1 and not plan.residual_filters:
+            access = plan.accesses[0]
+            return access.index.count(access.prefix_values, access.operator, access.value)
+        return len(self.execute(plan, records, [], None, 0))
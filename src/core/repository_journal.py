@@ -0,0 +1,254 @@
+#!/usr/bin/env python3
+"""Журналирование репозиториев
+Изменения записей дописываются в журнал компактными записями, фоновое уплотнение
+периодически пишет снимок; восстановление - снимок плюс хвост журнала.
+Весь файловый ввод-вывод выполняет один фоновый писатель с ограниченной очередью"""
+
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+import logging
+import os
+import pickle
+import queue
+import struct
+import threading
+import time
+import zlib
+
+logger = logging.getLogger(__name__)
+
+# Заголовок записи журнала: длина полезной нагрузки и CRC32
+RECORD_HEADER = struct.Struct("<II")
+
+# Запись журнала: (seq, операция, id, данные, метаданные, версия, время)
+JournalEntry = Tuple[int, str, Optional[str], Any, Optional[Dict[str, Any]], int, float]
+
+class JournalWriter:
+    """Фоновый писатель журналов: ограниченная очередь и пакетная запись
+    Вызывающий поток только ставит задачу в очередь; при переполнении очереди
+    он ждет писателя (обратное давление), а не пишет сам"""
+
+    def __init__(self, max_pending: int = 10000, fsync_interval: float = 1.0):
+        self._queue: "queue.Queue[Tuple[str, Any, Any]]" = queue.Queue(maxsize=max_pending)
+        self.fsync_interval = fsync_interval
+        self._thread: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+        self._dirty: set = set()
+        self._last_fsync = time.time()
+        self.stats = {
+            'entries_written': 0,
+            'bytes_written': 0,
+            'batches': 0,
+            'snapshots_written': 0,
+            'queue_full_waits': 0,
+            'errors': 0
+        }
+
+    def start(self):
+        if self._thread is None or not self._thread.is_alive():
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="JournalWriter", daemon=True)
+            self._thread.start()
+
+    def stop(self, timeout: float = 5.0):
+        """Остановка после записи всех поставленных задач"""
+        if self._thread is None:
+            return
+        self.flush(timeout)
+        self._stop.set()
+        self._thread.join(timeout)
+        self._thread = None
+
+    def submit(self, kind: str, journal: "RepositoryJournal", payload: Any):
+        try:
+            self._queue.put_nowait((kind, journal, payload))
+        except queue.Full:
+            self.stats['queue_full_waits'] += 1
+            self._queue.put((kind, journal, payload))
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """Ожидание записи всего, что поставлено в очередь до вызова"""
+        if self._thread is None or not self._thread.is_alive():
+            return self._queue.empty()
+        done = threading.Event()
+        self.submit("barrier", None, done)
+        return done.wait(timeout)
+
+    @property
+    def pending(self) -> int:
+        return self._queue.qsize()
+
+    def _run(self):
+        """Цикл писателя: пакет задач из очереди, подряд идущие записи - одной операцией"""
+        while not self._stop.is_set() or not self._queue.empty():
+            try:
+                batch = [self._queue.get(timeout=0.1)]
+            except queue.Empty:
+                self._sync_if_due()
+                continue
+
+            while len(batch) < 1024:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+
+            try:
+                self._process(batch)
+            except Exception as e:
+                self.stats['errors'] += 1
+                logger.error(f"Ошибка записи журнала: {e}")
+            finally:
+                for _ in batch:
+                    self._queue.task_done()
+            self._sync_if_due()
+
+    def _process(self, batch: List[Tuple[str, Any, Any]]):
+        pending: Dict["RepositoryJournal", List[JournalEntry]] = {}
+        for kind, journal, payload in batch:
+            if kind == "append":
+                pending.setdefault(journal, []).append(payload)
+                continue
+
+            # Снимки и барьеры упорядочены относительно записей: сначала сбрасываем накопленное
+            self._write_pending(pending)
+            pending = {}
+            if kind == "snapshot":
+                journal.write_snapshot(payload)
+                self._dirty.discard(journal)
+                self.stats['snapshots_written'] += 1
+            elif kind == "barrier":
+                self._sync_all()
+                payload.set()
+        self._write_pending(pending)
+        self.stats['batches'] += 1
+
+    def _write_pending(self, pending: Dict["RepositoryJournal", List[JournalEntry]]):
+        for journal, entries in pending.items():
+            written = journal.write_entries(entries)
+            self._dirty.add(journal)
+            self.stats['entries_written'] += len(entries)
+            self.stats['bytes_written'] += written
+
+    def _sync_if_due(self):
+        if self._dirty and time.time() - self._last_fsync >= self.fsync_interval:
+            self._sync_all()
+
+    def _sync_all(self):
+        for journal in list(self._dirty):
+            journal.sync()
+        self._dirty.clear()
+        self._last_fsync = time.time()
+
+class RepositoryJournal:
+    """Журнал и снимок одного репозитория
+    Методы record и request_snapshot вызываются под блокировкой репозитория,
+    поэтому порядковые номера совпадают с порядком задач в очереди писателя"""
+
+    def __init__(self, directory: str, repository_id: str, writer: JournalWriter):
+        self.repository_id = repository_id
+        self.directory = Path(directory)
+        self.snapshot_path = self.directory / f"{repository_id}.snapshot"
+        self.journal_path = self.directory / f"{repository_id}.journal"
+        self.writer = writer
+        self.sequence = 0
+        self.entries_since_snapshot = 0
+        self._file = None
+
+    # - Поток вызывающего
+
+    def record(self, operation: str, record_id: Optional[str] = None, data: Any = None,
+               metadata: Optional[Dict[str, Any]] = None, version: int = 0, timestamp: float = 0.0):
+        """Постановка изменения в очередь записи (без ввода-вывода)"""
+        self.sequence += 1
+        self.entries_since_snapshot += 1
+        self.writer.submit("append", self,
+                           (self.sequence, operation, record_id, data, metadata, version, timestamp))
+
+    def request_snapshot(self, state: Dict[str, Any]):
+        """Постановка снимка в очередь; журнал до этого момента после записи снимка отбрасывается"""
+        state["journal_sequence"] = self.sequence
+        self.entries_since_snapshot = 0
+        self.writer.submit("snapshot", self, state)
+
+    # - Восстановление
+
+    def load(self) -> Tuple[Optional[Dict[str, Any]], List[JournalEntry]]:
+        """Снимок и записи журнала после него; поврежденный хвост журнала отбрасывается"""
+        snapshot = None
+        snapshot_sequence = 0
+        if self.snapshot_path.exists():
+            with open(self.snapshot_path, "rb") as file:
+                snapshot = pickle.load(file)
+            snapshot_sequence = snapshot.get("journal_sequence", 0)
+
+        entries: List[JournalEntry] = []
+        if self.journal_path.exists():
+            with open(self.journal_path, "rb") as file:
+                content = file.read()
+            offset = 0
+            while offset + RECORD_HEADER.size <= len(content):
+                length, checksum = RECORD_HEADER.unpack_from(content, offset)
+                start = offset + RECORD_HEADER.size
+                payload = content[start:start + length]
+                if len(payload) < length or zlib.crc32(payload) != checksum:
+                    logger.warning(f"Журнал {self.journal_path} поврежден с позиции {offset}, хвост отброшен")
+                    break
+                entry = pickle.loads(payload)
+                if entry[0] > snapshot_sequence:
+                    entries.append(entry)
+                offset = start + length
+
+            if offset < len(content):
+                # Мусор обрезается, иначе новые записи допишутся после него и потеряются при следующей загрузке
+                if offset + RECORD_HEADER.size > len(content):
+                    logger.warning(f"Журнал {self.journal_path} обрывается на позиции {offset}, хвост отброшен")
+                self.close()
+                os.truncate(self.journal_path, offset)
+
+        self.sequence = max([snapshot_sequence] + [entry[0] for entry in entries])
+        self.entries_since_snapshot = len(entries)
+        return snapshot, entries
+
+    # - Поток писателя
+
+    def write_entries(self, entries: List[JournalEntry]) -> int:
+        """Дозапись пакета записей одной операцией"""
+        chunks = []
+        for entry in entries:
+            payload = pickle.dumps(entry, protocol=pickle.HIGHEST_PROTOCOL)
+            chunks.append(RECORD_HEADER.pack(len(payload), zlib.crc32(payload)))
+            chunks.append(payload)
+        data = b"".join(chunks)
+
+        if self._file is None:
+            self.directory.mkdir(parents=True, exist_ok=True)
+            self._file = open(self.journal_path, "ab")
+        self._file.write(data)
+        self._file.flush()
+        return len(data)
+
+    def write_snapshot(self, state: Dict[str, Any]):
+        """Атомарная запись снимка и усечение журнала
+        При сбое между шагами записи журнала с номером до снимка пропускаются при загрузке"""
+        self.directory.mkdir(parents=True, exist_ok=True)
+        temp_path = self.snapshot_path.with_suffix(".tmp")
+        with open(temp_path, "wb") as file:
+            pickle.dump(state, file, protocol=pickle.HIGHEST_PROTOCOL)
+            file.flush()
+            os.fsync(file.fileno())
+        os.replace(temp_path, self.snapshot_path)
+
+        self.close()
+        with open(self.journal_path, "wb"):
+            pass
+        logger.debug(f"Снимок репозитория {self.repository_id} записан (seq {state.get('journal_sequence')})")
+
+    def sync(self):
+        if self._file is not None:
+            os.fsync(self._file.fileno())
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
@@ -1,584 +1,348 @@
-from .in terfaces import IResourceManager
+#!/usr/bin/env python3
+"""Resource Manager - Менеджер ресурсов для Panda3D
+Отвечает только за загрузку, кэширование и управление игровыми ресурсами"""
 
-from dataclasses import dataclass, field
+from concurrent.futures import Future
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+import logging
 
 from direct.showbase.Loader import Loader
+from panda3d.core import AudioSound, AudioManager
+from panda3d.core import GeomNode, Geom, GeomVertexData, GeomVertexFormat
+from panda3d.core import GeomVertexWriter, GeomTriangles
+from panda3d.core import Texture, NodePath
 
-from enum import Enum
+from .asset_loader import AsyncAssetLoader, LoadBatch, LoadPriority
+from .procedural_assets import ProceduralAssetCache, get_asset_cache
 
-from pand a3d.c or e import AudioSound, AudioManager
+logger = logging.getLogger(__name__)
 
-from pand a3d.c or e import GeomNode, Geom, GeomVertexData, GeomVertexF or mat
+class ResourceManager:
+    """Менеджер ресурсов для Panda3D"""
 
-from pand a3d.c or e import GeomVertexWriter, GeomTriangles
+    def __init__(self, asset_cache: Optional[ProceduralAssetCache] = None, io_workers: int = 4):
+        self.base_path = Path("assets")
+        self.cache: Dict[str, Any] = {}
+        self.textures: Dict[str, Texture] = {}
+        self.models: Dict[str, NodePath] = {}
+        self.sounds: Dict[str, AudioSound] = {}
+        self.audio_manager: Optional[AudioManager] = None
+        self.loader: Optional[Loader] = None
 
-from pand a3d.c or e import Texture, TextureStage, NodePath, Pand aNode
+        # Процедурные формы и текстуры, общие для всех сущностей
+        self.asset_cache = asset_cache or get_asset_cache()
 
-from pathlib import Path
+        # Фоновая загрузка: потоки стартуют при первом асинхронном запросе
+        self.async_loader = AsyncAssetLoader(self._load_blocking, max_workers=io_workers)
 
-from typing import *
+        logger.info("Менеджер ресурсов Panda3D инициализирован")
 
-from typing import Dict, Any, Optional, Union
+    def initialize(self) -> bool:
+        """Инициализация менеджера ресурсов"""
+        try:
+            self._create_resource_directories()
+            self._initialize_loader()
+            self._initialize_audio()
+            self._preload_basic_resources()
+            return True
+        except Exception as e:
+            logger.error(f"Ошибка инициализации менеджера ресурсов: {e}")
+            return False
 
-import logging
+    def _create_resource_directories(self):
+        """Создание директорий ресурсов"""
+        directories = ["textures", "models", "audio", "shaders", "data"]
+        for directory in directories:
+            dir_path = self.base_path / directory
+            dir_path.mkdir(parents=True, exist_ok=True)
+            logger.debug(f"Создана директория ресурсов: {directory}")
+
+    def _initialize_loader(self):
+        """Инициализация загрузчика Panda3D"""
+        try:
+            self.loader = Loader(None)
+        except Exception as e:
+            logger.warning(f"Не удалось инициализировать загрузчик: {e}")
+
+    def _initialize_audio(self):
+        """Инициализация аудио менеджера"""
+        try:
+            self.audio_manager = AudioManager.createAudioManager()
+            logger.debug("Аудио менеджер инициализирован")
+        except Exception as e:
+            # Грейсфул деградация: продолжаем без аудио, логируем один раз
+            self.audio_manager = None
+            logger.warning(f"Не удалось инициализировать аудио менеджер: {e}")
+
+    def _preload_basic_resources(self):
+        """Предзагрузка базовых ресурсов"""
+        try:
+            self._create_basic_textures()
+            self._create_basic_models()
+        except Exception as e:
+            logger.warning(f"Ошибка предзагрузки базовых ресурсов: {e}")
+
+    # Реализация методов интерфейса ISystem
+
+    def update(self, delta_time: float):
+        """Обновление системы"""
+        # Прикрепление загруженных в фоне ресурсов в пределах бюджета кадра
+        self.async_loader.process_completions()
+
+    # Реализация интерфейса управления ресурсами
+
+    def load_resource(self, resource_path: str, resource_type: str) -> Any:
+        """Загрузка ресурса"""
+        try:
+            if resource_type == "texture":
+                resource = self.load_texture(resource_path)
+            elif resource_type == "model":
+                resource = self.load_model(resource_path)
+            elif resource_type == "sound":
+                resource = self.load_sound(resource_path)
+            else:
+                logger.warning(f"Неизвестный тип ресурса: {resource_type}")
+                return None
+            if resource is not None:
+                self.cache[resource_path] = resource
+            return resource
+        except Exception as e:
+            logger.error(f"Ошибка загрузки ресурса {resource_path}: {e}")
+            return None
+
+    def unload_resource(self, resource_path: str) -> bool:
+        """Выгрузка ресурса"""
+        try:
+            removed = self.cache.pop(resource_path, None) is not None
+            for storage in (self.textures, self.models, self.sounds):
+                removed = storage.pop(resource_path, None) is not None or removed
+            return removed
+        except Exception as e:
+            logger.error(f"Ошибка выгрузки ресурса {resource_path}: {e}")
+            return False
+
+    # - Асинхронная загрузка
+
+    def _load_blocking(self, resource_type: str, resource_path: str) -> Any:
+        """Загрузка в потоке ввода-вывода; ошибки передаются в future"""
+        resource = self.load_resource(resource_path, resource_type)
+        if resource is None:
+            raise FileNotFoundError(f"Ресурс не загружен: {resource_type} {resource_path}")
+        return resource
+
+    def load_resource_async(self, resource_path: str, resource_type: str,
+                            priority: LoadPriority = LoadPriority.VISIBLE,
+                            on_ready: Optional[Callable[[Any], None]] = None) -> Future:
+        """Фоновая загрузка ресурса; on_ready вызывается в главном потоке из update()"""
+        return self.async_loader.load(resource_type, resource_path, priority, on_ready)
+
+    def load_texture_async(self, texture_path: str, priority: LoadPriority = LoadPriority.VISIBLE,
+                           on_ready: Optional[Callable[[Any], None]] = None) -> Future:
+        return self.load_resource_async(texture_path, "texture", priority, on_ready)
+
+    def load_model_async(self, model_path: str, priority: LoadPriority = LoadPriority.VISIBLE,
+                         on_ready: Optional[Callable[[Any], None]] = None) -> Future:
+        return self.load_resource_async(model_path, "model", priority, on_ready)
+
+    def load_sound_async(self, sound_path: str, priority: LoadPriority = LoadPriority.VISIBLE,
+                         on_ready: Optional[Callable[[Any], None]] = None) -> Future:
+        return self.load_resource_async(sound_path, "sound", priority, on_ready)
+
+    def attach_model_async(self, model_path: str, parent: NodePath,
+                           priority: LoadPriority = LoadPriority.VISIBLE) -> Future:
+        """Фоновая загрузка модели с прикреплением к parent в главном потоке
+        Каждый вызов получает свою копию узла: одна загрузка может обслуживать несколько запросов"""
+        return self.load_model_async(model_path, priority, on_ready=lambda model: model.copyTo(parent))
+
+    def preload(self, resources: List[Tuple[str, str]],
+                priority: LoadPriority = LoadPriority.PREFETCH) -> LoadBatch:
+        """Загрузка набора (тип, путь) с общим прогрессом, например для экрана загрузки"""
+        return self.async_loader.load_batch(resources, priority)
+
+    def get_resource(self, resource_path: str) -> Optional[Any]:
+        """Получение ресурса"""
+        return self.cache.get(resource_path)
+
+    def is_resource_loaded(self, resource_path: str) -> bool:
+        """Проверка загрузки ресурса"""
+        return resource_path in self.cache
+
+    def _create_basic_textures(self):
+        """Создание базовых текстур"""
+        # Серая текстура для тестирования
+        self.textures["basic"] = self.asset_cache.get_solid_texture(64, 64, (128, 128, 128, 128))
+        logger.debug("Создана базовая текстура")
+
+    def _create_basic_models(self):
+        """Создание базовых моделей"""
+        cube = self._create_cube_model()
+        self.models["cube"] = cube
+        logger.debug("Создана базовая модель куба")
+
+    def _create_cube_model(self) -> NodePath:
+        """Создание модели куба"""
+        # Белый куб 2x2x2 из общего кэша; копии моделей делят его Geom
+        return self.asset_cache.get_geometry('box', (2.0, 2.0, 2.0), (1, 1, 1, 1))
+
+    def load_texture(self, texture_path: str) -> Optional[Texture]:
+        """Загрузка текстуры"""
+        if texture_path in self.textures:
+            return self.textures[texture_path]
+        try:
+            full_path = self.base_path / "textures" / texture_path
+            if not full_path.exists() or not self.loader:
+                logger.warning(f"Текстура не найдена: {texture_path}")
+                return self.textures.get("basic")
+            texture = self.loader.loadTexture(str(full_path))
+            self.textures[texture_path] = texture
+            logger.debug(f"Текстура загружена: {texture_path}")
+            return texture
+        except Exception as e:
+            logger.error(f"Ошибка загрузки текстуры {texture_path}: {e}")
+            return self.textures.get("basic")
+
+    def load_model(self, model_path: str) -> Optional[NodePath]:
+        """Загрузка модели"""
+        if model_path in self.models:
+            return self.models[model_path].copyTo(NodePath())
+        try:
+            full_path = self.base_path / "models" / model_path
+            if not full_path.exists():
+                logger.warning(f"Модель не найдена: {model_path}")
+                return self.get_model("cube")
+
+            # Загружаем модель через Panda3D загрузчик
+            if self.loader:
+                model = self.loader.loadModel(str(full_path))
+                if model:
+                    self.models[model_path] = model
+                    logger.debug(f"Модель загружена: {model_path}")
+                    return model.copyTo(NodePath())
+
+            logger.warning(f"Не удалось загрузить модель: {model_path}")
+            return self.get_model("cube")
+        except Exception as e:
+            logger.error(f"Ошибка загрузки модели {model_path}: {e}")
+            return self.get_model("cube")
+
+    def load_sound(self, sound_path: str) -> Optional[AudioSound]:
+        """Загрузка звука"""
+        if sound_path in self.sounds:
+            return self.sounds[sound_path]
+        try:
+            full_path = self.base_path / "audio" / sound_path
+            if not full_path.exists() or not self.audio_manager:
+                logger.warning(f"Звук не найден: {sound_path}")
+                return None
+            sound = self.audio_manager.getSound(str(full_path))
+            self.sounds[sound_path] = sound
+            return sound
+        except Exception as e:
+            logger.error(f"Ошибка загрузки звука {sound_path}: {e}")
+            return None
+
+    def get_texture(self, texture_name: str) -> Optional[Texture]:
+        """Получение текстуры по имени"""
+        return self.textures.get(texture_name)
+
+    def get_model(self, model_name: str) -> Optional[NodePath]:
+        """Получение модели по имени"""
+        model = self.models.get(model_name)
+        return model.copyTo(NodePath()) if model else None
+
+    def get_sound(self, sound_name: str) -> Optional[AudioSound]:
+        """Получение звука по имени"""
+        return self.sounds.get(sound_name)
+
+    def create_simple_texture(self, name: str, width: int, height: int,
+                              color: tuple) -> Texture:
+        """Создание простой текстуры"""
+        # Одинаковые (размер, цвет) под разными именами - одна текстура из кэша
+        texture = self.asset_cache.get_solid_texture(width, height, color)
+        self.textures[name] = texture
+        logger.debug(f"Создана простая текстура: {name}")
+        return texture
+
+    def create_simple_model(self, name: str, vertices: list, faces: list,
+                            color: tuple = (1, 1, 1, 1)) -> NodePath:
+        """Создание простой модели"""
+        vdata = GeomVertexData(name, GeomVertexFormat.getV3c4(), Geom.UHStatic)
+        vertex = GeomVertexWriter(vdata, 'vertex')
+        color_writer = GeomVertexWriter(vdata, 'color')
+
+        # Добавляем вершины
+        for v in vertices:
+            vertex.addData3(*v)
+            color_writer.addData4(*color)
+
+        # Создаем треугольники
+        prim = GeomTriangles(Geom.UHStatic)
+        for face in faces:
+            prim.addVertices(*face)
+        prim.closePrimitive()
+
+        # Создаем геометрию
+        geom = Geom(vdata)
+        geom.addPrimitive(prim)
+
+        # Создаем узел
+        node = GeomNode(name)
+        node.addGeom(geom)
+
+        model = NodePath(node)
+        self.models[name] = model
+        logger.debug(f"Создана простая модель: {name}")
+        return model
+
+    def instance_shape(self, parent: NodePath, name: str, primitive: str, dimensions: tuple,
+                       color: tuple = (1, 1, 1, 1), color_scheme: str = "flat",
+                       texture_name: Optional[str] = None) -> NodePath:
+        """Инстанс процедурной формы с общим Geom; трансформации задаются на возвращенном узле"""
+        shape = self.asset_cache.instance_geometry(parent, name, primitive, dimensions,
+                                                   color, color_scheme, texture_name)
+        if texture_name:
+            texture = self.get_texture(texture_name)
+            if texture:
+                shape.setTexture(texture)
+        return shape
+
+    def clear_cache(self):
+        """Очистка кэша ресурсов"""
+        self.cache.clear()
+        self.asset_cache.clear()
+        logger.info("Кэш ресурсов очищен")
+
+    def get_resource_info(self) -> Dict[str, Any]:
+        """Получение информации о ресурсах"""
+        return {
+            'textures_count': len(self.textures),
+            'models_count': len(self.models),
+            'sounds_count': len(self.sounds),
+            'cache_size': len(self.cache),
+            'textures': list(self.textures.keys()),
+            'models': list(self.models.keys()),
+            'sounds': list(self.sounds.keys()),
+            'procedural_cache': self.asset_cache.get_stats(),
+            'async_loading': self.async_loader.get_stats()
+        }
+
+    def cleanup(self):
+        """Очистка менеджера ресурсов"""
+        try:
+            logger.info("Очистка менеджера ресурсов Panda3D...")
+            self.async_loader.shutdown()
+
+            # Очищаем ресурсы
+            self.textures.clear()
+            self.models.clear()
+            self.sounds.clear()
+            self.cache.clear()
+
+            # Очищаем менеджеры
+            self.audio_manager = None
+            self.loader = None
 
-import os
-
-import sys
-
-import time
-
-#!/usr / bin / env python3
-"""Resource Manager - Менеджер ресурсов для Pand a3D
-Отвечает только за загрузку, кэширование и управление игровыми ресурсами"""import logging
-
-logger= logging.getLogger(__name__)
-class ResourceManager(IResourceManager):"""Менеджер ресурсов для Pand a3D"""
-    pass
-pass
-pass
-pass
-pass
-pass
-pass
-def __in it__(self):
-    pass
-pass
-pass
-pass
-pass
-pass
-pass
-self.base_path= Path("assets")
-self.cache: Dict[str, Any]= {}
-self.textures: Dict[str, Texture]= {}
-self.models: Dict[str, NodePath]= {}
-self.sounds: Dict[str, AudioSound]= {}
-self.audio_manager: Optional[AudioManager]= None
-self.loader: Optional[Loader]= None
-logger.in fo("Менеджер ресурсов Pand a3D инициализирован")
-def initialize(self) -> bool: pass
-    pass
-pass
-pass
-pass
-pass
-pass
-"""Инициализация менеджера ресурсов"""
-try: except Exception as e: pass
-pass
-pass
-logger.err or(f"Ошибка инициализации менеджера ресурсов: {e}")
-return False
-def _create_resource_direct or ies(self):
-    pass
-pass
-pass
-pass
-pass
-pass
-pass
-"""Создание директорий ресурсов"""direct or ies= ["textures",
-"models",
-"audio",
-"shaders",
-"data"
-]
-for direct or yin direct or ies: dir_path= self.base_path / direct or y
-    pass
-pass
-pass
-pass
-pass
-pass
-pass
-dir_path.mkdir(parent = True, exis t_o = True)
-logger.debug(f"Создана директория ресурсов: {direct or y}")
-def _in itialize_loader(self):
-    pass
-pass
-pass
-pass
-pass
-pass
-pass
-"""Инициализация загрузчика Pand a3D"""
-try: except Exception as e: pass
-pass
-pass
-logger.warning(f"Не удалось инициализировать загрузчик: {e}")
-def _in itialize_audio(self):
-    pass
-pass
-pass
-pass
-pass
-pass
-pass
-"""Инициализация аудио менеджера"""
-try: self.audio_manager= AudioManager()
-logger.debug("Аудио менеджер инициализирован")
-except Exception as e: pass
-pass
-pass
-# Грейсфул деградация: продолжаем без аудио, логируем один раз
-self.audio_manager= None
-logger.warning(f"Не удалось инициализировать аудио менеджер: {e}")
-def _preload_basic_resources(self):
-    pass
-pass
-pass
-pass
-pass
-pass
-pass
-"""Предзагрузка базовых ресурсов"""
-try: except Exception as e: pass
-pass
-pass
-logger.warning(f"Ошибка предзагрузки базовых ресурсов: {e}")
-# Реализация методов интерфейса ISystem
-def update(self, delta_time: float):
-    pass
-pass
-pass
-pass
-pass
-pass
-pass
-"""Обновление системы"""# ResourceManager не требует постоянного обновления
-pass
-def cleanup(self):"""Очистка системы"""
-    pass
-pass
-pass
-pass
-pass
-pass
-pass
-try: except Exception as e: pass
-pass
-pass
-logger.err or(f"Ошибка очистки ResourceManager: {e}")
-# Реализация интерфейса IResourceManager
-def load_resource(self, resource_path: str, resource_type: str) -> Any: pass
-    pass
-pass
-pass
-pass
-pass
-pass
-"""Загрузка ресурса"""
-try: if resource_type = "texture":
-return self.load_texture(resource_path)
-elif resource_type = "model":
-    pass
-pass
-pass
-pass
-pass
-pass
-pass
-return self.load_model(resource_path)
-elif resource_type = "sound":
-    pass
-pass
-pass
-pass
-pass
-pass
-pass
-return self.load_sound(resource_path)
-else: logger.warning(f"Неизвестный тип ресурса: {resource_type}")
-    pass
-pass
-pass
-pass
-pass
-pass
-pass
-return None
-except Exception as e: pass
-pass
-pass
-logger.err or(f"Ошибка загрузки ресурса {resource_path}: {e}")
-return None
-def unload_resource(self, resource_path: str) -> bool: pass
-    pass
-pass
-pass
-pass
-pass
-pass
-"""Выгрузка ресурса"""
-try: except Exception as e: pass
-pass
-pass
-logger.err or(f"Ошибка выгрузки ресурса {resource_path}: {e}")
-return False
-def get_resource(self, resource_path: str) -> Optional[Any]:
-    pass
-pass
-pass
-pass
-pass
-pass
-pass
-"""Получение ресурса"""return self.cache.get(resource_path)
-def is_resource_loaded(self, resource_path: str) -> bool:"""Проверка загрузки ресурса"""return resource_pathin self.cache
-    pass
-pass
-pass
-pass
-pass
-pass
-pass
-def _create_basic_textures(self):"""Создание базовых текстур"""
-    pass
-pass
-pass
-pass
-pass
-pass
-pass
-# Создаем простую текстуру для тестирования
-texture= Texture("basic_texture")
-texture.setup2dTexture(64, 64, Texture.TUnsignedByte, Texture.FRgba)
-# Заполняем текстуру данными
-data= texture.modifyRamImage():
-pass  # Добавлен pass в пустой блок
-for iin range(64 * 64 * 4):
-    pass
-pass
-pass
-pass
-pass
-pass
-pass
-data.setElement(i, 128)  # Серый цвет
-self.textures["basic"]= texture
-logger.debug("Создана базовая текстура")
-def _create_basic_models(self):
-    pass
-pass
-pass
-pass
-pass
-pass
-pass
-"""Создание базовых моделей"""
-# Создаем простой куб
-cube= self._create_cube_model()
-self.models["cube"]= cube
-logger.debug("Создана базовая модель куба")
-def _create_cube_model(self) -> NodePath: pass
-    pass
-pass
-pass
-pass
-pass
-pass
-"""Создание модели куба"""# Создаем геометрию куба
-format= GeomVertexF or mat.getV3c4():
-    pass
-pass
-pass
-pass
-pass
-pass
-pass
-pass  # Добавлен pass в пустой блок
-vdata= GeomVertexData('cube', format, Geom.UHStatic):
-pass  # Добавлен pass в пустой блок
-vertex= GeomVertexWriter(vdata, 'vertex')
-color= GeomVertexWriter(vdata, 'col or ')
-# Вершины куба
-vertices= [
-( - 1, -1, -1), (1, -1, -1), (1, 1, -1), ( - 1, 1, -1),
-( - 1, -1, 1), (1, -1, 1), (1, 1, 1), ( - 1, 1, 1)
-]
-# Добавляем вершины
-for vin vertices: vertex.addData3( * v)
-    pass
-pass
-pass
-pass
-pass
-pass
-pass
-col or .addData4(1, 1, 1, 1)  # Белый цвет
-# Создаем треугольники
-prim= GeomTriangles(Geom.UHStatic)
-# Грани куба
-faces= [
-(0, 1, 2), (2, 3, 0),  # Передняя грань(1, 5, 6), (6, 2, 1),  # Правая грань(5, 4, 7), (7, 6, 5),  # Задняя грань(4, 0, 3), (3, 7, 4),  # Левая грань(3, 2, 6), (6, 7, 3),  # Верхняя грань(4, 5, 1), (1, 0, 4)   # Нижняя грань
-]
-for facein faces: prim.addVertices( * face)
-    pass
-pass
-pass
-pass
-pass
-pass
-pass
-prim.closePrimitive()
-# Создаем геометрию
-geom= Geom(vdata)
-geom.addPrimitive(prim)
-# Создаем узел
-node= GeomNode('cube')
-node.addGeom(geom)
-return NodePath(node)
-def load_texture(self, texture_path: str) -> Optional[Texture]:"""Загрузка текстуры"""
-    pass
-pass
-pass
-pass
-pass
-pass
-pass
-if texture_pathin self.textures: return self.textures[texture_path]
-    pass
-pass
-pass
-pass
-pass
-pass
-pass
-try: except Exception as e: pass
-pass
-pass
-logger.err or(f"Ошибка загрузки текстуры {texture_path}: {e}")
-return self.textures.get("basic")
-def load_model(self, model_path: str) -> Optional[NodePath]:
-    pass
-pass
-pass
-pass
-pass
-pass
-pass
-"""Загрузка модели"""
-if model_pathin self.models: return self.models[model_path].copy()
-    pass
-pass
-pass
-pass
-pass
-pass
-pass
-try: full_path= self.base_path / "models" / model_path
-if not full_path.exis ts():
-    pass
-pass
-pass
-pass
-pass
-pass
-pass
-logger.warning(f"Модель не найдена: {model_path}")
-return self.models.get("cube")
-# Загружаем модель через Pand a3D загрузчик
-if self.loader: model= self.loader.loadModel(str(full_path))
-    pass
-pass
-pass
-pass
-pass
-pass
-pass
-if model: self.models[model_path]= model
-    pass
-pass
-pass
-pass
-pass
-pass
-pass
-logger.debug(f"Модель загружена: {model_path}")
-return model.copy()
-logger.warning(f"Не удалось загрузить модель: {model_path}")
-return self.models.get("cube")
-except Exception as e: pass
-pass
-pass
-logger.err or(f"Ошибка загрузки модели {model_path}: {e}")
-return self.models.get("cube")
-def load_sound(self, sound_path: str) -> Optional[AudioSound]:
-    pass
-pass
-pass
-pass
-pass
-pass
-pass
-"""Загрузка звука"""
-if sound_pathin self.sounds: return self.sounds[sound_path]
-    pass
-pass
-pass
-pass
-pass
-pass
-pass
-try: except Exception as e: pass
-pass
-pass
-logger.err or(f"Ошибка загрузки звука {sound_path}: {e}")
-return None
-def get_texture(self, texture_name: str) -> Optional[Texture]:
-    pass
-pass
-pass
-pass
-pass
-pass
-pass
-"""Получение текстуры по имени"""return self.textures.get(texture_name)
-def get_model(self, model_name: str) -> Optional[NodePath]:"""Получение модели по имени"""model= self.models.get(model_name)
-    pass
-pass
-pass
-pass
-pass
-pass
-pass
-return model.copy() if model else None: pass  # Добавлен pass в пустой блок
-def get_sound(self, sound_name: str) -> Optional[AudioSound]:"""Получение звука по имени"""return self.sounds.get(sound_name)
-    pass
-pass
-pass
-pass
-pass
-pass
-pass
-def create_simple_texture(self, name: str, width: int, height: int
-    pass
-pass
-pass
-pass
-pass
-pass
-pass
-col or : tuple) -> Texture: pass  # Добавлен pass в пустой блок"""Создание простой текстуры"""
-texture= Texture(name)
-texture.setup2dTexture(width, height, Texture.TUnsignedByte
-Texture.FRgba)
-# Заполняем текстуру цветом
-data= texture.modifyRamImage():
-pass  # Добавлен pass в пустой блок
-for iin range(0, width * height * 4, 4):
-    pass
-pass
-pass
-pass
-pass
-pass
-pass
-data.setElement(i, col or [0])     # R
-data.setElement(i + 1, col or [1]) # G
-data.setElement(i + 2, col or [2]) # B
-data.setElement(i + 3, col or [3]) # A
-self.textures[name]= texture
-logger.debug(f"Создана простая текстура: {name}")
-return texture
-def create_simple_model(self, name: str, vertices: lis t, faces: lis t
-    pass
-pass
-pass
-pass
-pass
-pass
-pass
-col or : tuple= (1, 1, 1, 1)) -> NodePath: pass  # Добавлен pass в пустой блок
-"""Создание простой модели"""
-format= GeomVertexF or mat.getV3c4():
-    pass
-pass
-pass
-pass
-pass
-pass
-pass
-pass  # Добавлен pass в пустой блок
-vdata= GeomVertexData(name, format, Geom.UHStatic):
-pass  # Добавлен pass в пустой блок
-vertex= GeomVertexWriter(vdata, 'vertex')
-col or _writer= GeomVertexWriter(vdata, 'col or ')
-# Добавляем вершины
-for vin vertices: vertex.addData3( * v)
-    pass
-pass
-pass
-pass
-pass
-pass
-pass
-col or _writer.addData4( * col or )
-# Создаем треугольники
-prim= GeomTriangles(Geom.UHStatic)
-for facein faces: prim.addVertices( * face)
-    pass
-pass
-pass
-pass
-pass
-pass
-pass
-prim.closePrimitive()
-# Создаем геометрию
-geom= Geom(vdata)
-geom.addPrimitive(prim)
-# Создаем узел
-node= GeomNode(name)
-node.addGeom(geom)
-model= NodePath(node)
-self.models[name]= model
-logger.debug(f"Создана простая модель: {name}")
-return model
-def clear_cache(self):
-    pass
-pass
-pass
-pass
-pass
-pass
-pass
-"""Очистка кэша ресурсов"""
-self.cache.clear()
-logger.in fo("Кэш ресурсов очищен")
-def get_resource_in fo(self) -> Dict[str, Any]:
-    pass
-pass
-pass
-pass
-pass
-pass
-pass
-"""Получение информации о ресурсах"""return {
-'textures_count': len(self.textures),
-'models_count': len(self.models),
-'sounds_count': len(self.sounds),
-'cache_size': len(self.cache),
-'textures': lis t(self.textures.keys()),
-'models': lis t(self.models.keys()),
-'sounds': lis t(self.sounds.keys())
-}
-def cleanup(self):"""Очистка менеджера ресурсов"""
-    pass
-pass
-pass
-pass
-pass
-pass
-pass
-logger.in fo("Очистка менеджера ресурсов Pand a3D...")
-# Очищаем ресурсы
-self.textures.clear()
-self.models.clear()
-self.sounds.clear()
-self.cache.clear()
-# Очищаем менеджеры
-self.audio_manager= None
-self.loader= None
-logger.in fo("Менеджер ресурсов Pand a3D очищен")
+            logger.info("Менеджер ресурсов Panda3D очищен")
+        except Exception as e:
+            logger.error(f"Ошибка очистки ResourceManager: {e}")
@@ -0,0 +1,292 @@
+#!/usr/bin/env python3
+"""Пространственный индекс сущностей
+Равномерная хэш-сетка для запросов ближайшего соседа, радиуса и k ближайших"""
+
+import heapq
+import logging
+import math
+import threading
+from typing import Callable, Dict, Iterator, List, Optional, Set, Tuple
+
+logger = logging.getLogger(__name__)
+
+Position = Tuple[float, float, float]
+CellKey = Tuple[int, int]
+
+# = ХЭШ-СЕТКА
+
+class SpatialHashGrid:
+    """Равномерная хэш-сетка по плоскости XY
+    Сущности вставляются и перемещаются инкрементально: ячейка пересчитывается
+    только при пересечении ее границы. Расстояния считаются в квадрате, sqrt
+    берется один раз для возвращаемых результатов"""
+
+    def __init__(self, cell_size: float = 16.0):
+        if cell_size <= 0:
+            raise ValueError("cell_size должен быть положительным")
+        self.cell_size = float(cell_size)
+        self._inv_cell_size = 1.0 / self.cell_size
+        self._cells: Dict[CellKey, Set[str]] = {}
+        self._positions: Dict[str, Position] = {}
+        self._entity_cells: Dict[str, CellKey] = {}
+        # Границы занятых ячеек (только расширяются) - предел расширения колец поиска
+        self._bounds: Optional[List[int]] = None
+        self._lock = threading.RLock()
+
+        self.stats = {
+            'inserts': 0,
+            'moves': 0,
+            'cell_changes': 0,
+            'removes': 0,
+            'queries': 0
+        }
+
+    # - Обслуживание индекса
+
+    def _cell_of(self, x: float, y: float) -> CellKey:
+        """Ключ ячейки для точки"""
+        return (math.floor(x * self._inv_cell_size), math.floor(y * self._inv_cell_size))
+
+    def _expand_bounds(self, cell: CellKey):
+        """Расширение границ занятых ячеек"""
+        if self._bounds is None:
+            self._bounds = [cell[0], cell[1], cell[0], cell[1]]
+            return
+        bounds = self._bounds
+        if cell[0] < bounds[0]:
+            bounds[0] = cell[0]
+        elif cell[0] > bounds[2]:
+            bounds[2] = cell[0]
+        if cell[1] < bounds[1]:
+            bounds[1] = cell[1]
+        elif cell[1] > bounds[3]:
+            bounds[3] = cell[1]
+
+    def insert(self, entity_id: str, x: float, y: float, z: float = 0.0):
+        """Вставка сущности (повторная вставка равносильна перемещению)"""
+        with self._lock:
+            if entity_id in self._positions:
+                self.move(entity_id, x, y, z)
+                return
+
+            cell = self._cell_of(x, y)
+            self._cells.setdefault(cell, set()).add(entity_id)
+            self._positions[entity_id] = (x, y, z)
+            self._entity_cells[entity_id] = cell
+            self._expand_bounds(cell)
+            self.stats['inserts'] += 1
+
+    def move(self, entity_id: str, x: float, y: float, z: float = 0.0):
+        """Перемещение сущности"""
+        with self._lock:
+            old_cell = self._entity_cells.get(entity_id)
+            if old_cell is None:
+                self.insert(entity_id, x, y, z)
+                return
+
+            self._positions[entity_id] = (x, y, z)
+            self.stats['moves'] += 1
+
+            new_cell = self._cell_of(x, y)
+            if new_cell == old_cell:
+                return
+
+            bucket = self._cells[old_cell]
+            bucket.discard(entity_id)
+            if not bucket:
+                del self._cells[old_cell]
+            self._cells.setdefault(new_cell, set()).add(entity_id)
+            self._entity_cells[entity_id] = new_cell
+            self._expand_bounds(new_cell)
+            self.stats['cell_changes'] += 1
+
+    def remove(self, entity_id: str) -> bool:
+        """Удаление сущности"""
+        with self._lock:
+            cell = self._entity_cells.pop(entity_id, None)
+            if cell is None:
+                return False
+
+            del self._positions[entity_id]
+            bucket = self._cells[cell]
+            bucket.discard(entity_id)
+            if not bucket:
+                del self._cells[cell]
+            self.stats['removes'] += 1
+            return True
+
+    def clear(self):
+        """Очистка индекса"""
+        with self._lock:
+            self._cells.clear()
+            self._positions.clear()
+            self._entity_cells.clear()
+            self._bounds = None
+
+    def get_position(self, entity_id: str) -> Optional[Position]:
+        """Последняя известная позиция сущности"""
+        return self._positions.get(entity_id)
+
+    def __contains__(self, entity_id: str) -> bool:
+        return entity_id in self._positions
+
+    def __len__(self) -> int:
+        return len(self._positions)
+
+    # - Запросы
+
+    def _ring_cells(self, cx: int, cy: int, ring: int) -> Iterator[CellKey]:
+        """Ячейки квадратного кольца радиуса ring вокруг (cx, cy)"""
+        if ring == 0:
+            yield (cx, cy)
+            return
+        for dx in range(-ring, ring + 1):
+            yield (cx + dx, cy - ring)
+            yield (cx + dx, cy + ring)
+        for dy in range(-ring + 1, ring):
+            yield (cx - ring, cy + dy)
+            yield (cx + ring, cy + dy)
+
+    def _max_ring(self, cx: int, cy: int) -> int:
+        """Кольцо, за которым гарантированно нет занятых ячеек"""
+        if self._bounds is None:
+            return -1
+        min_x, min_y, max_x, max_y = self._bounds
+        return max(cx - min_x, max_x - cx, cy - min_y, max_y - cy, 0)
+
+    def _iter_candidates(self, x: float, y: float, max_radius: Optional[float]
+                         ) -> Iterator[Tuple[int, List[str]]]:
+        """Кандидаты по кольцам ячеек от центра наружу: (номер кольца, сущности)"""
+        cx, cy = self._cell_of(x, y)
+        max_ring = self._max_ring(cx, cy)
+        if max_radius is not None:
+            max_ring = min(max_ring, int(math.ceil(max_radius * self._inv_cell_size)))
+
+        for ring in range(max_ring + 1):
+            # Широкое кольцо на разреженной сетке дешевле заменить обходом занятых ячеек
+            if ring > 2 and (8 * ring) > len(self._cells):
+                remaining = []
+                for (kx, ky), bucket in self._cells.items():
+                    if max(abs(kx - cx), abs(ky - cy)) >= ring:
+                        remaining.extend(bucket)
+                yield ring, remaining
+                return
+
+            ids: List[str] = []
+            for cell in self._ring_cells(cx, cy, ring):
+                bucket = self._cells.get(cell)
+                if bucket:
+                    ids.extend(bucket)
+            yield ring, ids
+
+    def _distance_squared(self, entity_id: str, x: float, y: float, z: float) -> float:
+        """Квадрат расстояния от точки до сущности"""
+        px, py, pz = self._positions[entity_id]
+        return (px - x) ** 2 + (py - y) ** 2 + (pz - z) ** 2
+
+    def query_radius(self, x: float, y: float, radius: float, z: float = 0.0,
+                     predicate: Optional[Callable[[str], bool]] = None,
+                     exclude: Optional[str] = None) -> List[Tuple[str, float]]:
+        """Все сущности в радиусе: список (entity_id, расстояние) по возрастанию"""
+        with self._lock:
+            self.stats['queries'] += 1
+            radius_sq = radius * radius
+            min_cx, min_cy = self._cell_of(x - radius, y - radius)
+            max_cx, max_cy = self._cell_of(x + radius, y + radius)
+
+            found: List[Tuple[float, str]] = []
+            # При большом радиусе обходим только занятые ячейки
+            if (max_cx - min_cx + 1) * (max_cy - min_cy + 1) > len(self._cells):
+                buckets = [bucket for (kx, ky), bucket in self._cells.items()
+                           if min_cx <= kx <= max_cx and min_cy <= ky <= max_cy]
+            else:
+                buckets = [self._cells[(kx, ky)]
+                           for kx in range(min_cx, max_cx + 1)
+                           for ky in range(min_cy, max_cy + 1)
+                           if (kx, ky) in self._cells]
+
+            for bucket in buckets:
+                for entity_id in bucket:
+                    if entity_id == exclude or (predicate and not predicate(entity_id)):
+                        continue
+                    distance_sq = self._distance_squared(entity_id, x, y, z)
+                    if distance_sq <= radius_sq:
+                        found.append((distance_sq, entity_id))
+
+            found.sort()
+            return [(entity_id, math.sqrt(distance_sq)) for distance_sq, entity_id in found]
+
+    def k_nearest(self, x: float, y: float, k: int, z: float = 0.0,
+                  max_radius: Optional[float] = None,
+                  predicate: Optional[Callable[[str], bool]] = None,
+                  exclude: Optional[str] = None) -> List[Tuple[str, float]]:
+        """k ближайших сущностей: список (entity_id, расстояние) по возрастанию"""
+        if k <= 0:
+            return []
+
+        with self._lock:
+            self.stats['queries'] += 1
+            max_radius_sq = max_radius * max_radius if max_radius is not None else math.inf
+            # Max-куча (-d2, id) из k лучших кандидатов
+            best: List[Tuple[float, str]] = []
+
+            for ring, candidates in self._iter_candidates(x, y, max_radius):
+                # Любая точка кольца ring не ближе (ring - 1) * cell_size
+                if len(best) == k:
+                    ring_bound = max(0.0, (ring - 1) * self.cell_size)
+                    if ring_bound * ring_bound > -best[0][0]:
+                        break
+
+                for entity_id in candidates:
+                    if entity_id == exclude or (predicate and not predicate(entity_id)):
+                        continue
+                    distance_sq = self._distance_squared(entity_id, x, y, z)
+                    if distance_sq > max_radius_sq:
+                        continue
+                    if len(best) < k:
+                        heapq.heappush(best, (-distance_sq, entity_id))
+                    elif distance_sq < -best[0][0]:
+                        heapq.heapreplace(best, (-distance_sq, entity_id))
+
+            return [(entity_id, math.sqrt(-neg_sq)) for neg_sq, entity_id in sorted(best, reverse=True)]
+
+    def nearest(self, x: float, y: float, z: float = 0.0,
+                max_radius: Optional[float] = None,
+                predicate: Optional[Callable[[str], bool]] = None,
+                exclude: Optional[str] = None) -> Optional[Tuple[str, float]]:
+        """Ближайшая сущность: (entity_id, расстояние) или None"""
+        result = self.k_nearest(x, y, 1, z, max_radius, predicate, exclude)
+        return result[0] if result else None
+
+    def nearest_to_entity(self, entity_id: str, max_radius: Optional[float] = None,
+                          predicate: Optional[Callable[[str], bool]] = None) -> Optional[Tuple[str, float]]:
+        """Ближайшая к сущности другая сущность"""
+        position = self._positions.get(entity_id)
+        if position is None:
+            return None
+        return self.nearest(position[0], position[1], position[2], max_radius, predicate, exclude=entity_id)
+
+    def get_stats(self) -> Dict[str, float]:
+        """Статистика индекса"""
+        with self._lock:
+            occupied = len(self._cells)
+            return {
+                **self.stats,
+                'entities': len(self._positions),
+                'occupied_cells': occupied,
+                'average_per_cell': len(self._positions) / occupied if occupied else 0.0,
+                'cell_size': self.cell_size
+            }
+
+# = ОБЩИЙ ИНДЕКС
+
+_shared_index: Optional[SpatialHashGrid] = None
+_shared_lock = threading.Lock()
+
+def get_spatial_index() -> SpatialHashGrid:
+    """Общий для всех систем пространственный индекс сущностей"""
+    global _shared_index
+    with _shared_lock:
+        if _shared_index is None:
+            _shared_index = SpatialHashGrid()
+        return _shared_index
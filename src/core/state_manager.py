@@ -6,6 +6,7 @@ from dataclasses import dataclass, field
 from enum import Enum
 from typing import *
 from typing import Dict, List, Optional, Any, Callable, Generic, TypeVar
+import copy
 import logging
 import time
 import threading
@@ -55,6 +56,63 @@ class StateChange:
     metadata: Dict[str, Any] = field(default_factory=dict)
     change_type: str = "update"  # update, reset, restore, clear
 
+class StateHistoryBuffer:
+    """Кольцевой буфер истории изменений одного состояния
+    Поля хранятся в предвыделенных параллельных списках, объекты StateChange
+    создаются только при чтении истории"""
+    
+    __slots__ = ("capacity", "_old_values", "_new_values", "_timestamps",
+                 "_sources", "_change_types", "_head", "_size")
+    
+    def __init__(self, capacity: int = 100):
+        self.capacity = max(1, capacity)
+        self._old_values: List[Any] = [None] * self.capacity
+        self._new_values: List[Any] = [None] * self.capacity
+        self._timestamps: List[float] = [0.0] * self.capacity
+        self._sources: List[str] = [""] * self.capacity
+        self._change_types: List[str] = [""] * self.capacity
+        self._head = 0  # Слот следующей записи
+        self._size = 0
+    
+    def __len__(self) -> int:
+        return self._size
+    
+    def append(self, old_value: Any, new_value: Any, timestamp: float,
+               source: str, change_type: str = "update"):
+        """Запись изменения поверх самого старого при заполненном буфере"""
+        head = self._head
+        self._old_values[head] = old_value
+        self._new_values[head] = new_value
+        self._timestamps[head] = timestamp
+        self._sources[head] = source
+        self._change_types[head] = change_type
+        self._head = (head + 1) % self.capacity
+        if self._size < self.capacity:
+            self._size += 1
+    
+    def changes(self, state_id: str, limit: Optional[int] = None) -> List[StateChange]:
+        """Изменения от старых к новым (последние limit при указании)"""
+        count = self._size if limit is None else min(limit, self._size)
+        start = (self._head - count) % self.capacity
+        result = []
+        for offset in range(count):
+            slot = (start + offset) % self.capacity
+            result.append(StateChange(
+                state_id=state_id,
+                old_value=self._old_values[slot],
+                new_value=self._new_values[slot],
+                timestamp=self._timestamps[slot],
+                source=self._sources[slot],
+                change_type=self._change_types[slot]
+            ))
+        return result
+    
+    def clear(self):
+        self._old_values = [None] * self.capacity
+        self._new_values = [None] * self.capacity
+        self._head = 0
+        self._size = 0
+
 @dataclass
 class StateSnapshot:
     """Снимок состояния с версионированием"""
@@ -116,10 +174,14 @@ class StateManager(BaseComponent):
         # Хранилище состояний
         self._states: Dict[str, Any] = {}
         self._state_metadata: Dict[str, Dict[str, Any]] = {}
-        self._state_history: Dict[str, List[StateChange]] = {}
-        self._state_snapshots: Dict[str, List[StateSnapshot]] = {}
+        self._state_history: Dict[str, StateHistoryBuffer] = {}
+        self._history_capacity = 100
         self._validation_rules: Dict[str, StateValidationRule] = {}
         
+        # Версии состояний и последние снимки (копирование только изменившихся значений)
+        self._state_versions: Dict[str, int] = {}
+        self._state_snapshots: Dict[str, StateSnapshot] = {}
+        
         # Группы состояний
         self._state_groups: Dict[str, List[str]] = {}
         self._group_metadata: Dict[str, Dict[str, Any]] = {}
@@ -127,6 +189,12 @@ class StateManager(BaseComponent):
         # Подписчики на изменения
         self._subscribers: Dict[str, List[Callable]] = {}
         self._global_subscribers: List[Callable] = []
+        self._batch_subscribers: List[Callable] = []
+        
+        # Накопленные за кадр изменения: state_id -> [исходное значение, новое значение, источник]
+        self.coalesce_notifications = True
+        self._pending_changes: Dict[str, List[Any]] = {}
+        self._notifications_coalesced = 0
         
         # Производительность и мониторинг
         self._change_count = 0
@@ -225,12 +293,15 @@ class StateManager(BaseComponent):
                 
                 # Запись в историю
                 self._record_state_change(state_id, old_value, value, source)
-                
-                # Уведомление подписчиков
-                self._notify_subscribers(state_id, old_value, value, source)
+                self._state_versions[state_id] = self._state_versions.get(state_id, 0) + 1
                 
                 self._change_count += 1
-                logger.debug(f"Состояние {state_id} изменено: {old_value} -> {value}")
+                
+                # Уведомление подписчиков (или накопление до конца кадра)
+                if not self.coalesce_notifications:
+                    self._notify_subscribers(state_id, old_value, value, source)
+                    return True
+                self._queue_notification(state_id, old_value, value, source)
                 return True
                 
         except Exception as e:
@@ -270,9 +341,14 @@ class StateManager(BaseComponent):
                         del self._state_history[state_id]
                     if state_id in self._validation_rules:
                         del self._validation_rules[state_id]
+                    self._state_versions.pop(state_id, None)
+                    self._state_snapshots.pop(state_id, None)
                     
                     # Уведомление подписчиков
-                    self._notify_subscribers(state_id, old_value, None, "system")
+                    if self.coalesce_notifications:
+                        self._queue_notification(state_id, old_value, None, "system")
+                    else:
+                        self._notify_subscribers(state_id, old_value, None, "system")
                     
                     logger.debug(f"Состояние {state_id} удалено")
                     return True
@@ -389,6 +465,79 @@ class StateManager(BaseComponent):
             logger.error(f"Ошибка подписки на все состояния: {e}")
             return False
     
+    def subscribe_to_batches(self, callback: Callable[[Dict[str, StateChange]], None]) -> bool:
+        """Подписка на пакет итоговых изменений за кадр (один вызов на кадр)"""
+        try:
+            with self._lock:
+                if callback not in self._batch_subscribers:
+                    self._batch_subscribers.append(callback)
+                return True
+                
+        except Exception as e:
+            logger.error(f"Ошибка подписки на пакеты изменений: {e}")
+            return False
+    
+    # = ИСТОРИЯ И СНИМКИ
+    
+    def get_state_history(self, state_id: str, limit: Optional[int] = None) -> List[StateChange]:
+        """История изменений состояния от старых к новым"""
+        with self._lock:
+            history = self._state_history.get(state_id)
+            return history.changes(state_id, limit) if history else []
+    
+    def create_snapshot(self, state_ids: Optional[List[str]] = None) -> Dict[str, StateSnapshot]:
+        """Снимок состояний с копированием при записи
+        Значения, не менявшиеся с прошлого снимка, берутся из него без копирования;
+        под блокировкой выполняется только поверхностная выборка значений и версий"""
+        try:
+            with self._lock:
+                ids = list(self._states) if state_ids is None else [sid for sid in state_ids if sid in self._states]
+                current = [(sid, self._states[sid], self._state_versions.get(sid, 0),
+                            self._state_snapshots.get(sid)) for sid in ids]
+            
+            snapshot: Dict[str, StateSnapshot] = {}
+            fresh: List[StateSnapshot] = []
+            timestamp = time.time()
+            for state_id, value, version, cached in current:
+                if cached is not None and cached.version == version:
+                    snapshot[state_id] = cached
+                    continue
+                state_snapshot = StateSnapshot(
+                    state_id=state_id,
+                    value=self._copy_value(value),
+                    timestamp=timestamp,
+                    version=version
+                )
+                snapshot[state_id] = state_snapshot
+                fresh.append(state_snapshot)
+            
+            with self._lock:
+                for state_snapshot in fresh:
+                    # Значение могло измениться, пока шло копирование
+                    if self._state_versions.get(state_snapshot.state_id, 0) == state_snapshot.version:
+                        self._state_snapshots[state_snapshot.state_id] = state_snapshot
+            return snapshot
+            
+        except Exception as e:
+            logger.error(f"Ошибка создания снимка состояний: {e}")
+            return {}
+    
+    def restore_snapshot(self, snapshot: Dict[str, StateSnapshot], source: str = "snapshot") -> int:
+        """Восстановление состояний из снимка; возвращает число измененных состояний"""
+        restored = 0
+        for state_id, state_snapshot in snapshot.items():
+            value = self._copy_value(state_snapshot.value)
+            if self.get_state(state_id) != value and self.set_state(state_id, value, source=source):
+                restored += 1
+        return restored
+    
+    @staticmethod
+    def _copy_value(value: Any) -> Any:
+        """Глубокая копия изменяемых значений; неизменяемые разделяются"""
+        if isinstance(value, (str, int, float, bool, bytes, Enum)) or value is None:
+            return value
+        return copy.deepcopy(value)
+    
     def _validate_state(self, state_id: str, value: Any) -> bool:
         """Валидация состояния"""
         try:
@@ -432,26 +581,71 @@ class StateManager(BaseComponent):
     def _record_state_change(self, state_id: str, old_value: Any, new_value: Any, source: str):
         """Запись изменения состояния в историю"""
         try:
-            if state_id not in self._state_history:
-                self._state_history[state_id] = []
-            
-            change = StateChange(
-                state_id=state_id,
-                old_value=old_value,
-                new_value=new_value,
-                timestamp=time.time(),
-                source=source
-            )
+            history = self._state_history.get(state_id)
+            if history is None:
+                history = self._state_history[state_id] = StateHistoryBuffer(self._history_capacity)
             
-            self._state_history[state_id].append(change)
-            
-            # Ограничиваем размер истории
-            if len(self._state_history[state_id]) > 100:
-                self._state_history[state_id] = self._state_history[state_id][-50:]
+            history.append(old_value, new_value, time.time(), source)
                 
         except Exception as e:
             logger.error(f"Ошибка записи изменения состояния {state_id}: {e}")
     
+    def _queue_notification(self, state_id: str, old_value: Any, new_value: Any, source: str):
+        """Накопление изменения: сохраняется исходное значение кадра и последнее новое"""
+        pending = self._pending_changes.get(state_id)
+        if pending is None:
+            self._pending_changes[state_id] = [old_value, new_value, source]
+        else:
+            pending[1] = new_value
+            pending[2] = source
+            self._notifications_coalesced += 1
+    
+    def flush_notifications(self) -> int:
+        """Рассылка итоговых изменений за кадр; возвращает число разосланных изменений
+        Подписчик состояния получает один вызов на состояние, пакетный - один вызов на кадр"""
+        try:
+            with self._lock:
+                if not self._pending_changes:
+                    return 0
+                pending, self._pending_changes = self._pending_changes, {}
+                batch_subscribers = list(self._batch_subscribers)
+            
+            # Изменения, вернувшиеся к исходному значению, не рассылаются
+            net_changes = {}
+            for state_id, (old_value, new_value, source) in pending.items():
+                try:
+                    unchanged = bool(old_value == new_value)
+                except Exception:
+                    unchanged = False
+                if not unchanged:
+                    net_changes[state_id] = (old_value, new_value, source)
+            
+            for state_id, (old_value, new_value, source) in net_changes.items():
+                self._notify_subscribers(state_id, old_value, new_value, source)
+            
+            if batch_subscribers and net_changes:
+                timestamp = time.time()
+                batch = {
+                    state_id: StateChange(state_id, old_value, new_value, timestamp, source)
+                    for state_id, (old_value, new_value, source) in net_changes.items()
+                }
+                for callback in batch_subscribers:
+                    try:
+                        callback(batch)
+                    except Exception as e:
+                        logger.error(f"Ошибка в пакетном callback: {e}")
+            
+            return len(net_changes)
+            
+        except Exception as e:
+            logger.error(f"Ошибка рассылки изменений состояний: {e}")
+            return 0
+    
+    def _on_update(self, delta_time: float) -> bool:
+        """Обновление менеджера: рассылка накопленных за кадр изменений"""
+        self.flush_notifications()
+        return True
+    
     def _notify_subscribers(self, state_id: str, old_value: Any, new_value: Any, source: str):
         """Уведомление подписчиков об изменении состояния"""
         try:
@@ -483,7 +677,9 @@ class StateManager(BaseComponent):
             'total_groups': len(self._state_groups),
             'total_subscribers': len(self._subscribers),
             'change_count': self._change_count,
-            'validation_failures': self._validation_failures
+            'validation_failures': self._validation_failures,
+            'pending_notifications': len(self._pending_changes),
+            'notifications_coalesced': self._notifications_coalesced
         }
     
     def reset_stats(self):
@@ -491,6 +687,7 @@ class StateManager(BaseComponent):
         self._change_count = 0
         self._validation_failures = 0
         self._last_cleanup = time.time()
+        self._notifications_coalesced = 0
     
     def get_system_info(self) -> Dict[str, Any]:
         """Получение информации о системе"""
@@ -502,5 +699,7 @@ class StateManager(BaseComponent):
             'total_groups': len(self._state_groups),
             'total_subscribers': len(self._subscribers),
             'change_count': self._change_count,
-            'validation_failures': self._validation_failures
+            'validation_failures': self._validation_failures,
+            'pending_notifications': len(self._pending_changes),
+            'notifications_coalesced': self._notifications_coalesced
         }
@@ -0,0 +1,308 @@
+#!/usr/bin/env python3
+"""Планировщик обновления систем с бюджетом кадра
+Каждая система объявляет целевую частоту тиков и бюджет времени на тик.
+Системы высокого приоритета обновляются каждый свой тик, низкоприоритетные
+распределяются по кадрам в пределах бюджета кадра, а системы, превысившие
+свой бюджет, откладываются на несколько кадров вместо того, чтобы тормозить кадр"""
+
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Optional, Tuple
+import logging
+import time
+
+from src.core.component_types import Priority
+
+logger = logging.getLogger(__name__)
+
+# Частота тиков (Гц, 0 - каждый кадр), бюджет тика (с) и приоритет по умолчанию
+DEFAULT_SYSTEM_SCHEDULES: Dict[str, Tuple[float, float, Priority]] = {
+    # Кадровые системы
+    'rendering_system': (0.0, 0.008, Priority.CRITICAL),
+    'unified_visualization_system': (0.0, 0.002, Priority.HIGH),
+    'unified_ui_system': (0.0, 0.002, Priority.HIGH),
+    'combat_system': (0.0, 0.002, Priority.CRITICAL),
+    'effect_system': (0.0, 0.001, Priority.HIGH),
+    'skill_system': (0.0, 0.001, Priority.HIGH),
+    'navigation_system': (0.0, 0.002, Priority.HIGH),
+    'ai_system': (0.0, 0.003, Priority.HIGH),
+
+    # Системы со сниженной частотой
+    'attribute_system': (20.0, 0.001, Priority.NORMAL),
+    'item_system': (10.0, 0.001, Priority.NORMAL),
+    'world_manager': (10.0, 0.002, Priority.NORMAL),
+    'day_night_cycle': (10.0, 0.0005, Priority.NORMAL),
+    'dialogue_system': (10.0, 0.001, Priority.NORMAL),
+    'content_system': (5.0, 0.002, Priority.NORMAL),
+    'crafting_system': (5.0, 0.001, Priority.LOW),
+    'environmental_effects': (5.0, 0.001, Priority.LOW),
+    'quest_system': (2.0, 0.001, Priority.LOW),
+    'social_system': (2.0, 0.001, Priority.LOW),
+    'weather_system': (2.0, 0.001, Priority.LOW),
+    'evolution_system': (1.0, 0.002, Priority.BACKGROUND),
+    'memory_system': (1.0, 0.002, Priority.BACKGROUND),
+    'trading_system': (1.0, 0.001, Priority.BACKGROUND),
+    'unified_building_system': (1.0, 0.001, Priority.BACKGROUND),
+    'season_system': (0.2, 0.0005, Priority.BACKGROUND),
+}
+
+# Приоритеты, которые обновляются в срок независимо от бюджета кадра
+ESSENTIAL_PRIORITIES = (Priority.CRITICAL, Priority.HIGH)
+
+@dataclass
+class SystemSchedule:
+    """Расписание и статистика тиков одной системы"""
+    system_name: str
+    tick_rate: float = 0.0  # Гц, 0 - каждый кадр
+    budget: float = 0.001  # Бюджет одного тика, с
+    priority: Priority = Priority.NORMAL
+    order: int = 0  # Порядок инициализации
+
+    # Состояние
+    accumulated_time: float = 0.0  # Игровое время с прошлого тика
+    time_to_tick: float = 0.0  # Время до следующего тика по расписанию
+    deferred_frames: int = 0
+    missed_frames: int = 0  # Кадров подряд, пропущенных из-за бюджета
+    backoff: int = 0
+    enabled: bool = True
+
+    # Статистика
+    ticks: int = 0
+    last_tick_time: float = 0.0
+    avg_tick_time: float = 0.0
+    max_tick_time: float = 0.0
+    total_tick_time: float = 0.0
+    skipped_frames: int = 0
+    deferrals: int = 0
+    overruns: int = 0
+
+    @property
+    def interval(self) -> float:
+        return 1.0 / self.tick_rate if self.tick_rate > 0 else 0.0
+
+    @property
+    def essential(self) -> bool:
+        return self.priority in ESSENTIAL_PRIORITIES
+
+    @property
+    def expected_cost(self) -> float:
+        """Ожидаемая стоимость тика: средняя по истории, до первого тика - бюджет"""
+        return self.avg_tick_time if self.ticks else self.budget
+
+    def lateness(self) -> float:
+        """Насколько система просрочила свой тик, в интервалах
+        Интервал системы без частоты - один кадр, просрочка - пропущенные подряд кадры"""
+        if self.interval <= 0:
+            return float(self.missed_frames)
+        return -self.time_to_tick / self.interval
+
+class SystemScheduler:
+    """Кооперативный планировщик тиков систем в пределах бюджета кадра"""
+
+    def __init__(self, frame_budget: float = 0.012, max_backoff_frames: int = 32,
+                 max_lateness: float = 4.0, smoothing: float = 0.1):
+        self.frame_budget = frame_budget
+        self.max_backoff_frames = max_backoff_frames
+        # Просрочка (в интервалах), после которой система обновляется вне бюджета
+        self.max_lateness = max_lateness
+        self.smoothing = smoothing
+
+        self.schedules: Dict[str, SystemSchedule] = {}
+        self.frame_stats = {
+            'frames': 0,
+            'last_frame_time': 0.0,
+            'last_ticked': 0,
+            'last_deferred': 0,
+            'budget_exceeded_frames': 0
+        }
+
+    # - Регистрация
+
+    def register(self, system_name: str, system: Any = None, tick_rate: Optional[float] = None,
+                 budget: Optional[float] = None, priority: Optional[Priority] = None) -> SystemSchedule:
+        """Регистрация системы; явные параметры важнее объявленных системой, те - значений по умолчанию
+        Система может объявить атрибуты tick_rate и tick_budget"""
+        default_rate, default_budget, default_priority = DEFAULT_SYSTEM_SCHEDULES.get(
+            system_name, (0.0, 0.001, getattr(system, 'priority', Priority.NORMAL)))
+
+        if tick_rate is None:
+            tick_rate = getattr(system, 'tick_rate', default_rate)
+        if budget is None:
+            budget = getattr(system, 'tick_budget', default_budget)
+        if priority is None:
+            priority = default_priority
+
+        schedule = SystemSchedule(
+            system_name=system_name,
+            tick_rate=max(0.0, float(tick_rate)),
+            budget=max(0.0, float(budget)),
+            priority=priority,
+            order=len(self.schedules)
+        )
+        self.schedules[system_name] = schedule
+        self._stagger_phases()
+        return schedule
+
+    def unregister(self, system_name: str):
+        self.schedules.pop(system_name, None)
+
+    def configure(self, system_name: str, tick_rate: Optional[float] = None,
+                  budget: Optional[float] = None, priority: Optional[Priority] = None,
+                  enabled: Optional[bool] = None) -> bool:
+        """Изменение расписания зарегистрированной системы"""
+        schedule = self.schedules.get(system_name)
+        if schedule is None:
+            return False
+        if tick_rate is not None:
+            schedule.tick_rate = max(0.0, float(tick_rate))
+        if budget is not None:
+            schedule.budget = max(0.0, float(budget))
+        if priority is not None:
+            schedule.priority = priority
+        if enabled is not None:
+            schedule.enabled = enabled
+        if tick_rate is not None:
+            self._stagger_phases()
+        return True
+
+    def _stagger_phases(self):
+        """Разнос фаз систем с одинаковой частотой, чтобы их тики не приходились на один кадр"""
+        groups: Dict[float, List[SystemSchedule]] = {}
+        for schedule in self.schedules.values():
+            if schedule.tick_rate > 0:
+                groups.setdefault(schedule.tick_rate, []).append(schedule)
+        for schedules in groups.values():
+            for index, schedule in enumerate(schedules):
+                schedule.time_to_tick = schedule.interval * index / len(schedules)
+
+    # - Кадр
+
+    def run_frame(self, delta_time: float, update_system: Callable[[str, float], Any]) -> List[str]:
+        """Один кадр: выбор систем к обновлению и их вызов в пределах бюджета
+        update_system(имя, dt) вызывается с временем, накопленным системой с прошлого тика.
+        Возвращает имена обновленных систем"""
+        frame_start = time.perf_counter()
+        due: List[SystemSchedule] = []
+        deferred = 0
+
+        for schedule in self.schedules.values():
+            if not schedule.enabled:
+                continue
+            schedule.accumulated_time += delta_time
+            schedule.time_to_tick -= delta_time
+            if schedule.deferred_frames > 0:
+                schedule.deferred_frames -= 1
+                deferred += 1
+                continue
+            if schedule.time_to_tick <= 0.0:
+                due.append(schedule)
+
+        # Обязательные системы - в порядке инициализации, остальные - по приоритету и просрочке
+        due.sort(key=self._frame_order)
+
+        ticked: List[str] = []
+        spent = 0.0
+        for schedule in due:
+            if not schedule.essential and schedule.lateness() < self.max_lateness:
+                if spent + schedule.expected_cost > self.frame_budget:
+                    # Бюджет кадра исчерпан - система ждет следующего кадра, время копится
+                    schedule.skipped_frames += 1
+                    schedule.missed_frames += 1
+                    continue
+
+            elapsed = self._tick(schedule, update_system)
+            spent += elapsed
+            ticked.append(schedule.system_name)
+
+        self.frame_stats['frames'] += 1
+        self.frame_stats['last_frame_time'] = time.perf_counter() - frame_start
+        self.frame_stats['last_ticked'] = len(ticked)
+        self.frame_stats['last_deferred'] = deferred
+        if spent > self.frame_budget:
+            self.frame_stats['budget_exceeded_frames'] += 1
+        return ticked
+
+    @staticmethod
+    def _frame_order(schedule: SystemSchedule) -> Tuple:
+        if schedule.essential:
+            return (0, 0, 0.0, schedule.order)
+        return (1, schedule.priority.value, -schedule.lateness(), schedule.order)
+
+    def _tick(self, schedule: SystemSchedule, update_system: Callable[[str, float], Any]) -> float:
+        """Тик системы с замером времени и откладыванием при превышении бюджета"""
+        tick_delta = schedule.accumulated_time
+        schedule.accumulated_time = 0.0
+        schedule.missed_frames = 0
+        # Фаза сохраняется; отставший больше чем на интервал график не догоняет пачкой тиков
+        schedule.time_to_tick = max(schedule.time_to_tick + schedule.interval, 0.0)
+
+        start = time.perf_counter()
+        try:
+            update_system(schedule.system_name, tick_delta)
+        finally:
+            elapsed = time.perf_counter() - start
+
+        schedule.ticks += 1
+        schedule.last_tick_time = elapsed
+        schedule.total_tick_time += elapsed
+        schedule.max_tick_time = max(schedule.max_tick_time, elapsed)
+        if schedule.ticks == 1:
+            schedule.avg_tick_time = elapsed
+        else:
+            schedule.avg_tick_time += (elapsed - schedule.avg_tick_time) * self.smoothing
+
+        if schedule.budget > 0 and elapsed > schedule.budget:
+            schedule.overruns += 1
+            if not schedule.essential:
+                # Экспоненциальная задержка: 1, 2, 4 ... кадров
+                schedule.backoff = min(self.max_backoff_frames, max(1, schedule.backoff * 2))
+                schedule.deferred_frames = schedule.backoff
+                schedule.deferrals += 1
+                logger.debug(f"Система {schedule.system_name} превысила бюджет "
+                             f"({elapsed * 1000:.2f} мс > {schedule.budget * 1000:.2f} мс), "
+                             f"отложена на {schedule.deferred_frames} кадров")
+        else:
+            schedule.backoff = 0
+        return elapsed
+
+    # - Информация
+
+    def get_system_metrics(self, system_name: str) -> Dict[str, Any]:
+        """Метрики тиков системы (время в миллисекундах)"""
+        schedule = self.schedules.get(system_name)
+        if schedule is None:
+            return {}
+        return {
+            'tick_rate': schedule.tick_rate,
+            'tick_budget_ms': schedule.budget * 1000.0,
+            'last_tick_ms': schedule.last_tick_time * 1000.0,
+            'avg_tick_ms': schedule.avg_tick_time * 1000.0,
+            'max_tick_ms': schedule.max_tick_time * 1000.0,
+            'total_tick_ms': schedule.total_tick_time * 1000.0,
+            'ticks': schedule.ticks,
+            'skipped_frames': schedule.skipped_frames,
+            'deferrals': schedule.deferrals,
+            'overruns': schedule.overruns,
+            'deferred': schedule.deferred_frames > 0
+        }
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Статистика планировщика"""
+        return {
+            **self.frame_stats,
+            'frame_budget_ms': self.frame_budget * 1000.0,
+            'systems': len(self.schedules),
+            'deferred_systems': sum(1 for s in self.schedules.values() if s.deferred_frames > 0)
+        }
+
+    def reset_stats(self):
+        for schedule in self.schedules.values():
+            schedule.ticks = 0
+            schedule.last_tick_time = 0.0
+            schedule.avg_tick_time = 0.0
+            schedule.max_tick_time = 0.0
+            schedule.total_tick_time = 0.0
+            schedule.skipped_frames = 0
+            schedule.deferrals = 0
+            schedule.overruns = 0
+        for key in self.frame_stats:
+            self.frame_stats[key] = 0 if isinstance(self.frame_stats[key], int) else 0.0
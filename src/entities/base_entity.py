@@ -3,13 +3,14 @@
 
 import logging
 import time
-from typing import Dict, List, Optional, Any
-from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Any, Tuple
+from dataclasses import dataclass, field, fields
 
 from src.core.architecture import BaseComponent, ComponentType, Priority, LifecycleState
 from src.core.constants import constants_manager, EntityType, EntityState, ToughnessType, StanceState
 from src.core.state_manager import StateManager, StateType
 from src.systems.attributes.attribute_system import AttributeSystem, AttributeSet, AttributeModifier, StatModifier, BaseAttribute, DerivedStat
+from src.entities.entity_store import EntityStore, get_entity_store, STANCE_STATES, STANCE_CODES
 
 logger = logging.getLogger(__name__)
 
@@ -51,6 +52,10 @@ class EntityStats:
     max_toughness: float = 100.0
     toughness_recovery: float = 10.0
     toughness_type: ToughnessType = ToughnessType.PHYSICAL
+    
+    def to_dict(self) -> Dict[str, Any]:
+        """Значения всех полей (включая хранящиеся в колонках)"""
+        return {f.name: getattr(self, f.name) for f in fields(self)}
 
 @dataclass
 class ToughnessData:
@@ -61,6 +66,75 @@ class ToughnessData:
     stun_end_time: float = 0.0
     last_break_time: float = 0.0
     break_count: int = 0
+    
+    def to_dict(self) -> Dict[str, Any]:
+        """Значения всех полей (включая хранящиеся в колонках)"""
+        return {f.name: getattr(self, f.name) for f in fields(self)}
+
+# = ПРЕДСТАВЛЕНИЯ СТРОКИ ХРАНИЛИЩА
+
+class _ColumnField:
+    """Поле dataclass, значение которого хранится в колонке EntityStore"""
+    
+    def __init__(self, column: str):
+        self.column = column
+    
+    def __get__(self, instance, owner=None):
+        if instance is None:
+            return self
+        return float(instance._store.columns[self.column][instance._handle])
+    
+    def __set__(self, instance, value):
+        instance._store.columns[self.column][instance._handle] = value
+
+class _StanceField:
+    """Состояние стойкости, хранящееся кодом в колонке stance"""
+    
+    def __get__(self, instance, owner=None):
+        if instance is None:
+            return self
+        return STANCE_STATES[instance._store.columns['stance'][instance._handle]]
+    
+    def __set__(self, instance, value: StanceState):
+        instance._store.columns['stance'][instance._handle] = STANCE_CODES[value]
+
+class EntityStatsRow(EntityStats):
+    """Статистика сущности, горячие поля которой лежат в строке хранилища"""
+    
+    health = _ColumnField('health')
+    mana = _ColumnField('mana')
+    stamina = _ColumnField('stamina')
+    health_regen = _ColumnField('health_regen')
+    mana_regen = _ColumnField('mana_regen')
+    stamina_regen = _ColumnField('stamina_regen')
+    toughness = _ColumnField('toughness')
+    max_toughness = _ColumnField('max_toughness')
+    toughness_recovery = _ColumnField('toughness_recovery')
+    
+    def __init__(self, store: EntityStore, handle: int, **values):
+        self._store = store
+        self._handle = handle
+        super().__init__(**values)
+    
+    def detach(self) -> EntityStats:
+        """Копия без привязки к хранилищу"""
+        return EntityStats(**self.to_dict())
+
+class ToughnessDataRow(ToughnessData):
+    """Данные стойкости, текущая стойкость и состояние которых лежат в строке хранилища"""
+    
+    current_toughness = _ColumnField('toughness')
+    stance_state = _StanceField()
+    stun_end_time = _ColumnField('stun_end_time')
+    
+    def __init__(self, store: EntityStore, handle: int, **values):
+        self._store = store
+        self._handle = handle
+        super().__init__(**values)
+    
+    def detach(self) -> ToughnessData:
+        """Копия без привязки к хранилищу"""
+        return ToughnessData(**self.to_dict())
 
 @dataclass
 class EntityComponent:
@@ -72,7 +146,8 @@ class EntityComponent:
 class BaseEntity(BaseComponent):
     """Базовая сущность игры"""
     
-    def __init__(self, entity_id: str, entity_type: EntityType, name: str = ""):
+    def __init__(self, entity_id: str, entity_type: EntityType, name: str = "",
+                 entity_store: Optional[EntityStore] = None):
         super().__init__(
             component_id=entity_id,
             component_type=ComponentType.SYSTEM,
@@ -88,15 +163,21 @@ class BaseEntity(BaseComponent):
         self.state_manager: Optional[StateManager] = None
         self.attribute_system: Optional[AttributeSystem] = None
         
+        # Строка в колоночном хранилище (позиция, скорость, запасы, стойкость)
+        self.entity_store = entity_store or get_entity_store()
+        self.entity_handle: Optional[int] = self.entity_store.allocate(self)
+        self._detached_motion: Tuple[Tuple[float, float, float], Tuple[float, float, float]] = (
+            (0.0, 0.0, 0.0), (0.0, 0.0, 0.0)
+        )
+        
         # Состояние сущности
         self.entity_state = EntityState.ALIVE
-        self.position = (0.0, 0.0, 0.0)
         self.rotation = (0.0, 0.0, 0.0)
         self.scale = (1.0, 1.0, 1.0)
         
         # Статистика и характеристики
-        self.entity_stats = EntityStats()
-        self.toughness_data = ToughnessData()
+        self.entity_stats: EntityStats = EntityStatsRow(self.entity_store, self.entity_handle)
+        self.toughness_data: ToughnessData = ToughnessDataRow(self.entity_store, self.entity_handle)
         
         # Модификаторы
         self.attribute_modifiers: List[AttributeModifier] = []
@@ -130,6 +211,55 @@ class BaseEntity(BaseComponent):
             'last_update_time': time.time()
         }
     
+    # - Позиция и скорость (строка хранилища)
+    
+    @property
+    def position(self) -> Tuple[float, float, float]:
+        if self.entity_handle is None:
+            return self._detached_motion[0]
+        x, y, z = self.entity_store.columns['position'][self.entity_handle]
+        return (float(x), float(y), float(z))
+    
+    @position.setter
+    def position(self, value):
+        if self.entity_handle is None:
+            self._detached_motion = (tuple(value), self._detached_motion[1])
+            return
+        self.entity_store.columns['position'][self.entity_handle] = value[:3]
+    
+    @property
+    def velocity(self) -> Tuple[float, float, float]:
+        if self.entity_handle is None:
+            return self._detached_motion[1]
+        x, y, z = self.entity_store.columns['velocity'][self.entity_handle]
+        return (float(x), float(y), float(z))
+    
+    @velocity.setter
+    def velocity(self, value):
+        if self.entity_handle is None:
+            self._detached_motion = (self._detached_motion[0], tuple(value))
+            return
+        self.entity_store.columns['velocity'][self.entity_handle] = value[:3]
+    
+    def _sync_row_flags(self):
+        """Перенос настроек сущности во флаги строки хранилища"""
+        if self.entity_handle is None:
+            return
+        columns = self.entity_store.columns
+        columns['active'][self.entity_handle] = self.system_state == LifecycleState.RUNNING
+        columns['regen_enabled'][self.entity_handle] = self.entity_settings['auto_regen_enabled']
+        columns['toughness_enabled'][self.entity_handle] = self.entity_settings['toughness_enabled']
+    
+    def _detach_from_store(self):
+        """Копирование строки в обычные объекты и освобождение строки"""
+        if self.entity_handle is None:
+            return
+        self._detached_motion = (self.position, self.velocity)
+        self.entity_stats = self.entity_stats.detach()
+        self.toughness_data = self.toughness_data.detach()
+        self.entity_store.release(self.entity_handle)
+        self.entity_handle = None
+    
     def set_architecture_components(self, state_manager: StateManager, attribute_system: AttributeSystem):
         """Установка архитектурных компонентов"""
         self.state_manager = state_manager
@@ -141,13 +271,13 @@ class BaseEntity(BaseComponent):
         if self.state_manager:
             self.state_manager.set_state(
                 f"{self.component_id}_stats",
-                self.entity_stats.__dict__,
+                self.entity_stats.to_dict(),
                 StateType.ENTITY_STATS
             )
             
             self.state_manager.set_state(
                 f"{self.component_id}_toughness",
-                self.toughness_data.__dict__,
+                self.toughness_data.to_dict(),
                 StateType.ENTITY_STATE
             )
             
@@ -193,6 +323,7 @@ class BaseEntity(BaseComponent):
                 return False
             
             self.system_state = LifecycleState.RUNNING
+            self._sync_row_flags()
             logger.info(f"Сущность {self.name} запущена успешно")
             return True
             
@@ -208,6 +339,10 @@ class BaseEntity(BaseComponent):
         
         try:
             start_time = time.time()
+            self._sync_row_flags()
+            
+            # Движение по скорости
+            self._update_motion(delta_time)
             
             # Обновление стойкости
             self._update_toughness(delta_time)
@@ -227,13 +362,13 @@ class BaseEntity(BaseComponent):
             if self.state_manager:
                 self.state_manager.set_state(
                     f"{self.system_name}_stats",
-                    self.entity_stats.__dict__,
+                    self.entity_stats.to_dict(),
                     StateType.ENTITY_STATS
                 )
                 
                 self.state_manager.set_state(
                     f"{self.system_name}_toughness",
-                    self.toughness_data.__dict__,
+                    self.toughness_data.to_dict(),
                     StateType.ENTITY_STATE
                 )
                 
@@ -246,6 +381,7 @@ class BaseEntity(BaseComponent):
             logger.info(f"Остановка сущности {self.name}...")
             
             self.system_state = LifecycleState.STOPPED
+            self._sync_row_flags()
             logger.info(f"Сущность {self.name} остановлена успешно")
             return True
             
@@ -265,6 +401,9 @@ class BaseEntity(BaseComponent):
             self.attribute_modifiers.clear()
             self.stat_modifiers.clear()
             
+            # Освобождение строки хранилища
+            self._detach_from_store()
+            
             self.system_state = LifecycleState.DESTROYED
             logger.info(f"Сущность {self.name} уничтожена успешно")
             return True
@@ -282,9 +421,8 @@ class BaseEntity(BaseComponent):
         base_toughness = toughness_constants['base_toughness'].get(self.entity_type.value, 100)
         
         # Устанавливаем базовую стойкость
-        self.toughness_data.current_toughness = base_toughness
         self.entity_stats.max_toughness = base_toughness
-        self.entity_stats.toughness = base_toughness
+        self.toughness_data.current_toughness = base_toughness
         
         # Определяем тип стойкости на основе типа сущности
         if self.entity_type == EntityType.BOSS:
@@ -310,23 +448,12 @@ class BaseEntity(BaseComponent):
             self._end_stun()
     
     def _recover_toughness(self, delta_time: float):
-        """Восстановление стойкости"""
-        if self.toughness_data.current_toughness >= self.entity_stats.max_toughness:
+        """Восстановление стойкости
+        Стойкость статистики и данных стойкости - одна колонка хранилища. Если проходы
+        выполняет владелец хранилища (batch_updates), строка уже обновлена в EntityStore.update"""
+        if self.entity_handle is None or self.entity_store.batch_updates:
             return
-        
-        toughness_constants = constants_manager.get_toughness_constants()
-        recovery_multiplier = toughness_constants['recovery_multipliers'].get(
-            self.toughness_data.stance_state.value, 1.0
-        )
-        
-        recovery_amount = self.entity_stats.toughness_recovery * recovery_multiplier * delta_time
-        self.toughness_data.current_toughness = min(
-            self.entity_stats.max_toughness,
-            self.toughness_data.current_toughness + recovery_amount
-        )
-        
-        # Обновляем стойкость в статистике
-        self.entity_stats.toughness = self.toughness_data.current_toughness
+        self.entity_store.recover_toughness(delta_time, slice(self.entity_handle, self.entity_handle + 1))
     
     def _create_default_components(self):
         """Создание компонентов по умолчанию"""
@@ -348,7 +475,7 @@ class BaseEntity(BaseComponent):
             component_type="attributes",
             data={
                 "enabled": self.entity_settings['attribute_system_enabled'],
-                "base_stats": self.entity_stats.__dict__
+                "base_stats": self.entity_stats.to_dict()
             }
         )
     
@@ -360,27 +487,16 @@ class BaseEntity(BaseComponent):
                 pass
     
     def _update_regeneration(self, delta_time: float):
-        """Обновление регенерации"""
-        # Регенерация здоровья
-        if self.entity_stats.health < self._get_max_health():
-            self.entity_stats.health = min(
-                self._get_max_health(),
-                self.entity_stats.health + self.entity_stats.health_regen * delta_time
-            )
-        
-        # Регенерация маны
-        if self.entity_stats.mana < self._get_max_mana():
-            self.entity_stats.mana = min(
-                self._get_max_mana(),
-                self.entity_stats.mana + self.entity_stats.mana_regen * delta_time
-            )
-        
-        # Регенерация стамины
-        if self.entity_stats.stamina < self._get_max_stamina():
-            self.entity_stats.stamina = min(
-                self._get_max_stamina(),
-                self.entity_stats.stamina + self.entity_stats.stamina_regen * delta_time
-            )
+        """Обновление регенерации (тот же векторный проход по одной строке)"""
+        if self.entity_handle is None or self.entity_store.batch_updates:
+            return
+        self.entity_store.regenerate(delta_time, slice(self.entity_handle, self.entity_handle + 1))
+    
+    def _update_motion(self, delta_time: float):
+        """Перемещение по скорости"""
+        if self.entity_handle is None or self.entity_store.batch_updates:
+            return
+        self.entity_store.integrate_motion(delta_time, slice(self.entity_handle, self.entity_handle + 1))
     
     def _update_stats(self, delta_time: float):
         """Обновление статистики"""
@@ -416,6 +532,13 @@ class BaseEntity(BaseComponent):
             stat_modifiers=self.stat_modifiers
         )
         
+        # Максимумы запасов пересчитываются здесь, а не на каждом кадре регенерации
+        if self.entity_handle is not None:
+            columns = self.entity_store.columns
+            columns['max_health'][self.entity_handle] = calculated_stats.get('health', 100.0)
+            columns['max_mana'][self.entity_handle] = calculated_stats.get('mana', 50.0)
+            columns['max_stamina'][self.entity_handle] = calculated_stats.get('stamina', 100.0)
+        
         # Обновляем характеристики
         for stat_name, value in calculated_stats.items():
             if hasattr(self.entity_stats, stat_name):
@@ -423,57 +546,21 @@ class BaseEntity(BaseComponent):
     
     def _get_max_health(self) -> float:
         """Получение максимального здоровья"""
-        return self.attribute_system.calculate_stats_for_entity(
-            entity_id=self.entity_id,
-            base_attributes=AttributeSet(
-                strength=self.entity_stats.strength,
-                agility=self.entity_stats.agility,
-                intelligence=self.entity_stats.intelligence,
-                vitality=self.entity_stats.vitality,
-                wisdom=self.entity_stats.wisdom,
-                charisma=self.entity_stats.charisma,
-                luck=self.entity_stats.luck,
-                endurance=self.entity_stats.endurance
-            ),
-            attribute_modifiers=self.attribute_modifiers,
-            stat_modifiers=self.stat_modifiers
-        ).get('health', 100.0)
+        if self.entity_handle is None:
+            return self.entity_stats.health
+        return float(self.entity_store.columns['max_health'][self.entity_handle])
     
     def _get_max_mana(self) -> float:
         """Получение максимальной маны"""
-        return self.attribute_system.calculate_stats_for_entity(
-            entity_id=self.entity_id,
-            base_attributes=AttributeSet(
-                strength=self.entity_stats.strength,
-                agility=self.entity_stats.agility,
-                intelligence=self.entity_stats.intelligence,
-                vitality=self.entity_stats.vitality,
-                wisdom=self.entity_stats.wisdom,
-                charisma=self.entity_stats.charisma,
-                luck=self.entity_stats.luck,
-                endurance=self.entity_stats.endurance
-            ),
-            attribute_modifiers=self.attribute_modifiers,
-            stat_modifiers=self.stat_modifiers
-        ).get('mana', 50.0)
+        if self.entity_handle is None:
+            return self.entity_stats.mana
+        return float(self.entity_store.columns['max_mana'][self.entity_handle])
     
     def _get_max_stamina(self) -> float:
         """Получение максимальной стамины"""
-        return self.attribute_system.calculate_stats_for_entity(
-            entity_id=self.entity_id,
-            base_attributes=AttributeSet(
-                strength=self.entity_stats.strength,
-                agility=self.entity_stats.agility,
-                intelligence=self.entity_stats.intelligence,
-                vitality=self.entity_stats.vitality,
-                wisdom=self.entity_stats.wisdom,
-                charisma=self.entity_stats.charisma,
-                luck=self.entity_stats.luck,
-                endurance=self.entity_stats.endurance
-            ),
-            attribute_modifiers=self.attribute_modifiers,
-            stat_modifiers=self.stat_modifiers
-        ).get('stamina', 100.0)
+        if self.entity_handle is None:
+            return self.entity_stats.stamina
+        return float(self.entity_store.columns['max_stamina'][self.entity_handle])
     
     # = ПУБЛИЧНЫЕ МЕТОДЫ ДЛЯ СТОЙКОСТИ
     
@@ -514,8 +601,8 @@ class BaseEntity(BaseComponent):
         effective_damage = damage * effectiveness
         
         # Применяем урон
+        # Стойкость статистики и данных стойкости - одна колонка хранилища
         self.toughness_data.current_toughness = max(0, self.toughness_data.current_toughness - effective_damage)
-        self.entity_stats.toughness = self.toughness_data.current_toughness
         
         # Обновляем статистику
         self.entity_stats_tracking['toughness_damage_taken'] += effective_damage
@@ -619,6 +706,7 @@ class BaseEntity(BaseComponent):
             'state': self.system_state.value,
             'entity_state': self.entity_state.value,
             'position': self.position,
+            'entity_handle': self.entity_handle,
             'components_count': len(self.components),
             'attribute_modifiers_count': len(self.attribute_modifiers),
             'stat_modifiers_count': len(self.stat_modifiers),
@@ -5,9 +5,12 @@ import math
 import time
 import random
 from typing import Dict, List, Optional, Any, Tuple
-from panda3d.core import CardMaker, Vec3, Vec4, TransparencyAttrib, LODNode
+from panda3d.core import Vec3, Vec4, TransparencyAttrib, LODNode
 
 from .base_entity import BaseEntity
+from ..core import entity_registry
+from ..core.spatial_index import get_spatial_index
+from ..core.procedural_assets import get_asset_cache
 from ..core.constants import EntityType
 
 class Character(BaseEntity):
@@ -69,6 +72,7 @@ class Character(BaseEntity):
         
         # ID сущности для систем
         self.entity_id = f"character_{id(self)}"
+        entity_registry.register_entity(self.entity_id, self, (self.x, self.y, self.z))
         
         # ИИ управление
         self.ai_enabled = True
@@ -358,64 +362,12 @@ class Character(BaseEntity):
             self.aura.setTransparency(TransparencyAttrib.MAlpha)
             
     def _create_advanced_cube(self, parent, name, x, y, z, width, height, depth, color, texture_name):
-        """Создание продвинутого куба с текстурами"""
-        cube = parent.attachNewNode(name)
-        
-        # Создаем куб из 6 граней с разными текстурами
-        from panda3d.core import CardMaker
-        
-        # Передняя грань
-        cm = CardMaker(f"{name}_front")
-        cm.setFrame(-width/2, width/2, -height/2, height/2)
-        front = cube.attachNewNode(cm.generate())
-        front.setPos(0, depth/2, 0)
-        front.setColor(*color)
-        self._apply_texture(front, texture_name, "front")
-        
-        # Задняя грань
-        cm = CardMaker(f"{name}_back")
-        cm.setFrame(-width/2, width/2, -height/2, height/2)
-        back = cube.attachNewNode(cm.generate())
-        back.setPos(0, -depth/2, 0)
-        back.setHpr(0, 180, 0)
-        back.setColor(color[0] * 0.7, color[1] * 0.7, color[2] * 0.7, color[3])
-        self._apply_texture(back, texture_name, "back")
-        
-        # Левая грань
-        cm = CardMaker(f"{name}_left")
-        cm.setFrame(-depth/2, depth/2, -height/2, height/2)
-        left = cube.attachNewNode(cm.generate())
-        left.setPos(-width/2, 0, 0)
-        left.setHpr(0, -90, 0)
-        left.setColor(color[0] * 0.8, color[1] * 0.8, color[2] * 0.8, color[3])
-        self._apply_texture(left, texture_name, "side")
-        
-        # Правая грань
-        cm = CardMaker(f"{name}_right")
-        cm.setFrame(-depth/2, depth/2, -height/2, height/2)
-        right = cube.attachNewNode(cm.generate())
-        right.setPos(width/2, 0, 0)
-        right.setHpr(0, 90, 0)
-        right.setColor(color[0] * 0.6, color[1] * 0.6, color[2] * 0.6, color[3])
-        self._apply_texture(right, texture_name, "side")
-        
-        # Верхняя грань
-        cm = CardMaker(f"{name}_top")
-        cm.setFrame(-width/2, width/2, -depth/2, depth/2)
-        top = cube.attachNewNode(cm.generate())
-        top.setPos(0, 0, height/2)
-        top.setHpr(0, 0, -90)
-        top.setColor(color[0] * 1.2, color[1] * 1.2, color[2] * 1.2, color[3])
-        self._apply_texture(top, texture_name, "top")
-        
-        # Нижняя грань
-        cm = CardMaker(f"{name}_bottom")
-        cm.setFrame(-width/2, width/2, -depth/2, depth/2)
-        bottom = cube.attachNewNode(cm.generate())
-        bottom.setPos(0, 0, -height/2)
-        bottom.setHpr(0, 0, 90)
-        bottom.setColor(color[0] * 0.4, color[1] * 0.4, color[2] * 0.4, color[3])
-        self._apply_texture(bottom, texture_name, "bottom")
+        """Создание продвинутого куба с текстурами
+        Геометрия берется из общего кэша: одинаковые кубы разных персонажей делят один Geom"""
+        cube = get_asset_cache().instance_geometry(
+            parent, name, 'box', (width, depth, height), color, "shaded", texture_name
+        )
+        self._apply_texture(cube, texture_name, "all")
         
         cube.setPos(x, y, z)
         return cube
@@ -495,6 +447,7 @@ class Character(BaseEntity):
         self.y = y
         if z is not None:
             self.z = z
+        self._sync_position()
         if self.node:
             self.node.setPos(self.x, self.y, self.z)
             self.set_animation_state("walking")
@@ -505,6 +458,7 @@ class Character(BaseEntity):
         self.x += dx * move_speed
         self.y += dy * move_speed
         self.z += dz * move_speed
+        self._sync_position()
         if self.node:
             self.node.setPos(self.x, self.y, self.z)
             if dx != 0 or dy != 0:
@@ -584,18 +538,17 @@ class Character(BaseEntity):
             self._explore_area(dt)
     
     def _find_nearest_enemy(self, enemies):
-        """Поиск ближайшего врага"""
-        nearest_enemy = None
-        nearest_distance = float('inf')
-        
-        for enemy in enemies:
-            if enemy.is_alive():
-                distance = self.get_distance_to(enemy)
-                if distance < nearest_distance:
-                    nearest_distance = distance
-                    nearest_enemy = enemy
-                    
-        return nearest_enemy
+        """Поиск ближайшего живого врага по общему пространственному индексу"""
+        alive = {enemy.entity_id: enemy for enemy in enemies if enemy.is_alive()}
+        if not alive:
+            return None
+        
+        found = get_spatial_index().nearest_to_entity(self.entity_id, predicate=alive.__contains__)
+        return alive[found[0]] if found else None
+    
+    def _sync_position(self):
+        """Обновление позиции в общем пространственном индексе"""
+        entity_registry.update_entity_position(self.entity_id, self.x, self.y, self.z)
     
     def _move_towards_enemy(self, enemy, dt):
         """Движение к врагу"""
@@ -630,6 +583,7 @@ class Character(BaseEntity):
             move_distance = self.speed * dt
             self.x += dx * move_distance
             self.y += dy * move_distance
+            self._sync_position()
             
             if self.node:
                 self.node.setPos(self.x, self.y, self.z)
@@ -691,6 +645,7 @@ class Character(BaseEntity):
     
     def destroy(self):
         """Уничтожение персонажа"""
+        entity_registry.unregister_entity(self.entity_id)
         if self.node:
             self.node.removeNode()
             self.node = None
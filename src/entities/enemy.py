@@ -7,6 +7,8 @@ import random
 from typing import Dict, List, Optional, Any
 from panda3d.core import CardMaker, Vec3, Vec4, TransparencyAttrib
 
+from ..core import entity_registry
+
 class EnhancedEnemy:
     """Улучшенный класс врага с правильным рендерингом"""
     
@@ -24,6 +26,7 @@ class EnhancedEnemy:
         
         # ID сущности для систем
         self.entity_id = f"enemy_{id(self)}"
+        entity_registry.register_entity(self.entity_id, self, (self.x, self.y, self.z))
         
         # AI состояние
         self.state = "idle"  # idle, chasing, attacking, dead
@@ -188,6 +191,7 @@ class EnhancedEnemy:
         self.y = y
         if z is not None:
             self.z = z
+        self._sync_position()
         if self.node:
             self.node.setPos(self.x, self.y, self.z)
     
@@ -207,6 +211,7 @@ class EnhancedEnemy:
             move_distance = self.move_speed * dt
             self.x += dx * move_distance
             self.y += dy * move_distance
+            self._sync_position()
             
             if self.node:
                 self.node.setPos(self.x, self.y, self.z)
@@ -216,6 +221,10 @@ class EnhancedEnemy:
             if self.node:
                 self.node.setHpr(angle, 0, 0)
     
+    def _sync_position(self):
+        """Обновление позиции в общем пространственном индексе"""
+        entity_registry.update_entity_position(self.entity_id, self.x, self.y, self.z)
+    
     def get_position(self):
         """Получение позиции врага"""
         return (self.x, self.y, self.z)
@@ -320,6 +329,7 @@ class EnhancedEnemy:
     
     def destroy(self):
         """Уничтожение врага"""
+        entity_registry.unregister_entity(self.entity_id)
         if self.node:
             self.node.removeNode()
             self.node = None
@@ -0,0 +1,245 @@
+#!/usr/bin/env python3
+"""Колоночное хранилище компонентов сущностей
+Горячие данные сущностей (позиция, скорость, запасы здоровья/маны/стамины,
+скорости регенерации, стойкость) лежат в непрерывных массивах NumPy,
+строка массива адресуется плотным дескриптором сущности. Регенерация,
+восстановление стойкости и движение выполняются одним векторным проходом"""
+
+import logging
+import threading
+import weakref
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+from src.core.constants import constants_manager, StanceState
+
+logger = logging.getLogger(__name__)
+
+# Порядок состояний стойкости задает коды колонки stance
+STANCE_STATES: List[StanceState] = list(StanceState)
+STANCE_CODES: Dict[StanceState, int] = {state: code for code, state in enumerate(STANCE_STATES)}
+
+class EntityStore:
+    """Struct-of-arrays хранилище: одна строка на живую сущность
+    Освобожденные строки переиспользуются через список свободных дескрипторов,
+    поэтому дескрипторы остаются плотными, а проходы идут по срезу [:size]"""
+
+    # Скалярные колонки и значения по умолчанию
+    SCALAR_COLUMNS: Dict[str, float] = {
+        'health': 100.0,
+        'mana': 50.0,
+        'stamina': 100.0,
+        'max_health': 100.0,
+        'max_mana': 50.0,
+        'max_stamina': 100.0,
+        'health_regen': 1.0,
+        'mana_regen': 2.0,
+        'stamina_regen': 3.0,
+        'toughness': 100.0,
+        'max_toughness': 100.0,
+        'toughness_recovery': 10.0,
+    }
+
+    # Флаги строки
+    FLAG_COLUMNS = ('live', 'active', 'regen_enabled', 'toughness_enabled')
+
+    # Запасы: (текущее значение, максимум, скорость регенерации)
+    POOLS = (
+        ('health', 'max_health', 'health_regen'),
+        ('mana', 'max_mana', 'mana_regen'),
+        ('stamina', 'max_stamina', 'stamina_regen'),
+    )
+
+    def __init__(self, initial_capacity: int = 256):
+        self._lock = threading.RLock()
+        self.capacity = 0
+        self.size = 0  # Верхняя граница занятых строк
+        self.columns: Dict[str, np.ndarray] = {}
+        self._free: List[int] = []
+        # Строка освобождается и при сборке владельца, уничтоженного без destroy()
+        self._finalizers: Dict[int, weakref.finalize] = {}
+
+        # Проходы выполняет владелец хранилища через update(); сущности их пропускают
+        self.batch_updates = False
+
+        self.stance_multipliers = self._build_stance_multipliers()
+        self.stats = {
+            'allocations': 0,
+            'releases': 0,
+            'batch_updates': 0,
+            'grow_count': 0
+        }
+        self._allocate_columns(max(1, initial_capacity))
+
+    @staticmethod
+    def _build_stance_multipliers() -> np.ndarray:
+        """Множители восстановления стойкости по коду состояния"""
+        multipliers = constants_manager.get_toughness_constants().get('recovery_multipliers', {})
+        return np.array([multipliers.get(state.value, 1.0) for state in STANCE_STATES], dtype=np.float64)
+
+    # - Колонки
+
+    def _allocate_columns(self, capacity: int):
+        """Выделение (или расширение) колонок до заданной емкости"""
+        old = self.columns
+        columns: Dict[str, np.ndarray] = {}
+        for name, default in self.SCALAR_COLUMNS.items():
+            columns[name] = np.full(capacity, default, dtype=np.float64)
+        columns['stun_end_time'] = np.zeros(capacity, dtype=np.float64)
+        columns['position'] = np.zeros((capacity, 3), dtype=np.float64)
+        columns['velocity'] = np.zeros((capacity, 3), dtype=np.float64)
+        columns['stance'] = np.zeros(capacity, dtype=np.int8)
+        for name in self.FLAG_COLUMNS:
+            columns[name] = np.zeros(capacity, dtype=bool)
+
+        if old:
+            for name, array in old.items():
+                columns[name][:self.capacity] = array[:self.capacity]
+            self.stats['grow_count'] += 1
+
+        self.columns = columns
+        self.capacity = capacity
+
+    def __getattr__(self, name: str) -> np.ndarray:
+        # Доступ к колонкам как к атрибутам: store.health, store.position
+        columns = self.__dict__.get('columns')
+        if columns is not None and name in columns:
+            return columns[name]
+        raise AttributeError(name)
+
+    # - Дескрипторы
+
+    def allocate(self, owner: Any = None) -> int:
+        """Выделение строки под сущность, строка заполняется значениями по умолчанию"""
+        with self._lock:
+            if self._free:
+                handle = self._free.pop()
+            else:
+                if self.size >= self.capacity:
+                    self._allocate_columns(self.capacity * 2)
+                handle = self.size
+                self.size += 1
+
+            self._reset_row(handle)
+            self.columns['live'][handle] = True
+            if owner is not None:
+                self._finalizers[handle] = weakref.finalize(owner, self.release, handle)
+            self.stats['allocations'] += 1
+            return handle
+
+    def release(self, handle: int):
+        """Освобождение строки"""
+        with self._lock:
+            if not (0 <= handle < self.size) or not self.columns['live'][handle]:
+                return
+            self._reset_row(handle)
+            finalizer = self._finalizers.pop(handle, None)
+            if finalizer is not None:
+                finalizer.detach()
+            self._free.append(handle)
+            self.stats['releases'] += 1
+
+            # Хвостовые свободные строки отдаются обратно, чтобы проходы не задевали их
+            while self.size > 0 and not self.columns['live'][self.size - 1]:
+                self.size -= 1
+                if self.size in self._free:
+                    self._free.remove(self.size)
+
+    def _reset_row(self, handle: int):
+        for name, default in self.SCALAR_COLUMNS.items():
+            self.columns[name][handle] = default
+        self.columns['stun_end_time'][handle] = 0.0
+        self.columns['position'][handle] = 0.0
+        self.columns['velocity'][handle] = 0.0
+        self.columns['stance'][handle] = STANCE_CODES[StanceState.NORMAL]
+        for name in self.FLAG_COLUMNS:
+            self.columns[name][handle] = False
+
+    def is_live(self, handle: int) -> bool:
+        return 0 <= handle < self.size and bool(self.columns['live'][handle])
+
+    def live_handles(self) -> np.ndarray:
+        """Дескрипторы всех живых строк"""
+        return np.flatnonzero(self.columns['live'][:self.size])
+
+    @property
+    def count(self) -> int:
+        return self.size - len(self._free)
+
+    # - Векторные проходы
+
+    def update(self, delta_time: float):
+        """Один проход по всем активным сущностям: движение, регенерация, стойкость"""
+        with self._lock:
+            size = self.size
+            if size == 0:
+                return
+            active = self.columns['live'][:size] & self.columns['active'][:size]
+            self.integrate_motion(delta_time, slice(0, size), active)
+            self.regenerate(delta_time, slice(0, size), active & self.columns['regen_enabled'][:size])
+            self.recover_toughness(delta_time, slice(0, size), active & self.columns['toughness_enabled'][:size])
+            self.stats['batch_updates'] += 1
+
+    def integrate_motion(self, delta_time: float, rows: slice, mask: Optional[np.ndarray] = None):
+        """Перемещение по скорости"""
+        position = self.columns['position'][rows]
+        velocity = self.columns['velocity'][rows]
+        if mask is None:
+            position += velocity * delta_time
+        else:
+            np.add(position, velocity * delta_time, out=position, where=mask[:, None])
+
+    def regenerate(self, delta_time: float, rows: slice, mask: Optional[np.ndarray] = None):
+        """Регенерация запасов до максимума; значения выше максимума не трогаются"""
+        for value_name, max_name, regen_name in self.POOLS:
+            current = self.columns[value_name][rows]
+            maximum = self.columns[max_name][rows]
+            below = current < maximum
+            if mask is not None:
+                below &= mask
+            restored = np.minimum(maximum, current + self.columns[regen_name][rows] * delta_time)
+            np.copyto(current, restored, where=below)
+
+    def recover_toughness(self, delta_time: float, rows: slice, mask: Optional[np.ndarray] = None):
+        """Восстановление стойкости с множителем состояния стойкости"""
+        current = self.columns['toughness'][rows]
+        maximum = self.columns['max_toughness'][rows]
+        below = current < maximum
+        if mask is not None:
+            below &= mask
+        multiplier = self.stance_multipliers[self.columns['stance'][rows]]
+        recovered = np.minimum(maximum, current + self.columns['toughness_recovery'][rows] * multiplier * delta_time)
+        np.copyto(current, recovered, where=below)
+
+    def expired_stuns(self, current_time: float) -> np.ndarray:
+        """Дескрипторы сущностей, у которых истек стан"""
+        size = self.size
+        stun_end = self.columns['stun_end_time'][:size]
+        return np.flatnonzero(self.columns['live'][:size] & (stun_end > 0) & (stun_end <= current_time))
+
+    # - Информация
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Статистика хранилища"""
+        with self._lock:
+            return {
+                **self.stats,
+                'count': self.count,
+                'size': self.size,
+                'capacity': self.capacity,
+                'free': len(self._free),
+                'memory_bytes': sum(array.nbytes for array in self.columns.values())
+            }
+
+_default_store: Optional[EntityStore] = None
+_default_store_lock = threading.Lock()
+
+def get_entity_store() -> EntityStore:
+    """Общее хранилище сущностей по умолчанию"""
+    global _default_store
+    if _default_store is None:
+        with _default_store_lock:
+            if _default_store is None:
+                _default_store = EntityStore()
+    return _default_store
@@ -3,8 +3,9 @@
 """
 
 import logging
-from typing import Any, List, Optional
+from typing import Any, List, Optional, Tuple
 
+from src.core.asset_loader import LoadBatch, LoadPriority
 from .scene_manager import Scene
 
 logger = logging.getLogger(__name__)
@@ -20,6 +21,8 @@ except Exception:
     class OnscreenText:  # type: ignore
         def __init__(self, *args, **kwargs):
             pass
+        def setText(self, *args, **kwargs):
+            pass
         def destroy(self):
             pass
     class DirectButton:  # type: ignore
@@ -35,7 +38,8 @@ except Exception:
 class LoadScene(Scene):
     """Сцена загрузки сохранений"""
 
-    def __init__(self) -> None:
+    def __init__(self, resource_manager: Optional[Any] = None,
+                 preload_resources: Optional[List[Tuple[str, str]]] = None) -> None:
         super().__init__("load_game")
         self.title_text: Optional[OnscreenText] = None
         self.load_button: Optional[DirectButton] = None
@@ -45,6 +49,12 @@ class LoadScene(Scene):
         self.selected_index: Optional[int] = None
         self.save_files: List[dict] = []
 
+        # Фоновая загрузка ресурсов игрового мира перед переходом: (тип, путь)
+        self.resource_manager: Optional[Any] = resource_manager
+        self.preload_resources: List[Tuple[str, str]] = list(preload_resources or [])
+        self.load_batch: Optional[LoadBatch] = None
+        self.progress_text: Optional[OnscreenText] = None
+
     def initialize(self) -> bool:
         try:
             logger.info("Инициализация LoadScene...")
@@ -95,11 +105,35 @@ class LoadScene(Scene):
         if self.selected_index is not None and 0 <= self.selected_index < len(self.save_files):
             save_name = self.save_files[self.selected_index]["name"]
             logger.info(f"Загрузка сохранения: {save_name}")
-            if self.scene_manager:
+            if self.resource_manager and self.preload_resources:
+                # Переход выполнит update(), когда ресурсы будут загружены
+                self.load_batch = self.resource_manager.preload(self.preload_resources, LoadPriority.VISIBLE)
+            elif self.scene_manager:
                 self.scene_manager.load_scene("game_world")
         else:
             logger.warning("Сохранение не выбрано")
 
+    def get_loading_progress(self) -> float:
+        """Доля загруженных ресурсов (1.0, если загрузка не идет)"""
+        return self.load_batch.progress if self.load_batch else 1.0
+
+    def update(self, delta_time: float) -> None:
+        if not self.load_batch:
+            return
+        progress = self.load_batch.progress
+        if PANDA_AVAILABLE:
+            if self.progress_text is None:
+                self.progress_text = OnscreenText(text="", pos=(0.0, -0.6), scale=0.05,
+                                                  fg=(1, 1, 1, 1), align=TextNode.ACenter)
+            self.progress_text.setText(f"Loading... {int(progress * 100)}%")
+
+        if self.load_batch.done:
+            if self.load_batch.failed:
+                logger.warning(f"Не загружено ресурсов: {self.load_batch.failed} из {self.load_batch.total}")
+            self.load_batch = None
+            if self.scene_manager:
+                self.scene_manager.load_scene("game_world")
+
     def _delete_selected(self) -> None:
         if self.selected_index is not None and 0 <= self.selected_index < len(self.save_files):
             save_name = self.save_files[self.selected_index]["name"]
@@ -114,7 +148,9 @@ class LoadScene(Scene):
 
     def cleanup(self) -> None:
         try:
-            for w in [self.title_text, self.load_button, self.delete_button, self.back_button]:
+            self.load_batch = None
+            for w in [self.title_text, self.load_button, self.delete_button, self.back_button,
+                      self.progress_text]:
                 if w:
                     w.destroy()
             for lbl in self.save_labels:
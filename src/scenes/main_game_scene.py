@@ -447,17 +447,9 @@ class EnhancedGameScene:
         if not self.player:
             return
             
-        nearest_enemy = None
-        nearest_distance = float('inf')
-        
-        for enemy in self.enemies:
-            if enemy.is_alive():
-                distance = self.player.get_distance_to(enemy)
-                if distance < nearest_distance:
-                    nearest_distance = distance
-                    nearest_enemy = enemy
-                    
-        if nearest_enemy and nearest_distance <= self.player.attack_range:
+        # Ближайший живой враг по общему пространственному индексу
+        nearest_enemy = self.player._find_nearest_enemy(self.enemies)
+        if nearest_enemy and self.player.get_distance_to(nearest_enemy) <= self.player.attack_range:
             self.player.attack(nearest_enemy)
             
     def pause(self):
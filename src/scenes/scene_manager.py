@@ -3,7 +3,7 @@
 
 import logging
 import time
-from typing import Dict, List, Optional, Any, Callable
+from typing import Dict, List, Optional, Any, Callable, Tuple
 from dataclasses import dataclass, field
 from enum import Enum
 
@@ -77,7 +77,8 @@ class SceneTransition:
 class SceneManager(BaseComponent):
     """Менеджер игровых сцен"""
     
-    def __init__(self):
+    def __init__(self, resource_manager: Optional[Any] = None,
+                 preload_resources: Optional[List[Tuple[str, str]]] = None):
         super().__init__(
             component_id="scene_manager",
             component_type=ComponentType.SYSTEM,
@@ -87,6 +88,10 @@ class SceneManager(BaseComponent):
         # Архитектурные компоненты
         self.state_manager: Optional[StateManager] = None
         
+        # Фоновая загрузка: ресурсы игрового мира грузятся на экране загрузки
+        self.resource_manager: Optional[Any] = resource_manager
+        self.preload_resources: List[Tuple[str, str]] = list(preload_resources or [])
+        
         # Сцены и переходы
         self.scenes: Dict[str, SceneData] = {}
         self.scene_instances: Dict[str, Scene] = {}
@@ -199,6 +204,10 @@ class SceneManager(BaseComponent):
         try:
             start_time = time.time()
             
+            # Прикрепление ресурсов, загруженных в фоне
+            if self.resource_manager:
+                self.resource_manager.update(delta_time)
+            
             # Обновляем активную сцену
             self._update_active_scene(delta_time)
             
@@ -570,7 +579,8 @@ class SceneManager(BaseComponent):
 
             self.register_scene("main_menu", MenuScene(), SceneType.MAIN_MENU, "Главное меню")
             self.register_scene("settings", SettingsScene(), SceneType.SETTINGS, "Настройки")
-            self.register_scene("load_game", LoadScene(), SceneType.LOADING, "Загрузка")
+            self.register_scene("load_game", LoadScene(self.resource_manager, self.preload_resources),
+                                SceneType.LOADING, "Загрузка")
             # Для pauze используем SETTINGS как ближайший тип при отсутствии особого
             self.register_scene("pause", PauseScene(), SceneType.SETTINGS, "Пауза")
             self.register_scene("creator", CreatorScene(), SceneType.GAME_WORLD, "Творец мира")
@@ -17,6 +17,7 @@ from .ai_system import (
     AISettings,
     AINeuralNetwork
 )
+from .ai_lod import AILODManager, AILODSettings, AILODTier
 
 __all__ = [
     'AISystem',
@@ -32,5 +33,8 @@ __all__ = [
     'GenerationMemory',
     'LearningExperience',
     'AISettings',
-    'AINeuralNetwork'
+    'AINeuralNetwork',
+    'AILODManager',
+    'AILODSettings',
+    'AILODTier'
 ]
@@ -0,0 +1,269 @@
+#!/usr/bin/env python3
+"""Уровни детализации AI (LOD) по расстоянию и видимости
+Сущности делятся на уровни относительно точки фокуса (игрок или камера):
+ближние получают полные ML решения каждый тик, средние - дешевые решения по
+правилам с пониженной частотой, дальние - грубую статистическую симуляцию.
+Принадлежность к уровням пересчитывается инкрементально: несколько сущностей
+за кадр по кругу плюс сразу те, чья позиция изменилась"""
+
+from collections import deque
+from dataclasses import dataclass, field
+from enum import IntEnum
+from typing import Any, Callable, Deque, Dict, List, Optional, Set, Tuple
+import logging
+import math
+import time
+
+logger = logging.getLogger(__name__)
+
+Position = Tuple[float, float, float]
+
+class AILODTier(IntEnum):
+    """Уровни детализации AI (меньше - подробнее)"""
+    NEAR = 0   # Полные ML решения каждый тик
+    MID = 1    # Решения по правилам с пониженной частотой
+    FAR = 2    # Статистическая симуляция
+
+@dataclass
+class AILODSettings:
+    """Настройки LOD для AI"""
+    enabled: bool = True
+    near_distance: float = 30.0
+    mid_distance: float = 90.0
+    hysteresis: float = 0.15  # Доля порога, которую нужно пройти для перехода на более дальний уровень
+    hidden_distance_scale: float = 2.0  # Невидимые сущности считаются во столько раз дальше
+    view_angle: float = 110.0  # Угол обзора (градусы) для проверки видимости по направлению
+    mid_interval: float = 0.5  # Период решений по правилам (с); NEAR использует update_interval
+    far_interval: float = 2.0  # Период статистической симуляции (с)
+    retier_per_frame: int = 64  # Сущностей, пересчитываемых за кадр по кругу
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "AILODSettings":
+        """Настройки из секции конфигурации (неизвестные ключи игнорируются)"""
+        settings = cls()
+        for key, value in data.items():
+            if hasattr(settings, key):
+                setattr(settings, key, type(getattr(settings, key))(value))
+        return settings
+
+@dataclass
+class AILODTierStats:
+    """Нагрузка одного уровня"""
+    ticks: int = 0
+    processed: int = 0
+    last_time: float = 0.0
+    avg_time: float = 0.0
+    max_time: float = 0.0
+    total_time: float = 0.0
+    accumulated_time: float = 0.0  # Время с последнего тика уровня
+
+    def record(self, elapsed: float, count: int, smoothing: float = 0.1):
+        self.ticks += 1
+        self.processed += count
+        self.last_time = elapsed
+        self.total_time += elapsed
+        self.max_time = max(self.max_time, elapsed)
+        self.avg_time = elapsed if self.ticks == 1 else self.avg_time + (elapsed - self.avg_time) * smoothing
+
+class AILODManager:
+    """Распределение AI сущностей по уровням детализации"""
+
+    def __init__(self, settings: Optional[AILODSettings] = None):
+        self.settings = settings or AILODSettings()
+
+        # Фокус: явная позиция или сущность из пространственного индекса
+        self.focus_position: Optional[Position] = None
+        self.focus_direction: Optional[Position] = None
+        self.focus_entity_id: Optional[str] = None
+        self.visibility_check: Optional[Callable[[str, Position], bool]] = None
+
+        self._tiers: Dict[str, AILODTier] = {}
+        self._members: Dict[AILODTier, Dict[str, None]] = {tier: {} for tier in AILODTier}
+        self._retier_queue: Deque[str] = deque()
+        self._dirty: Set[str] = set()
+
+        self.tier_stats: Dict[AILODTier, AILODTierStats] = {tier: AILODTierStats() for tier in AILODTier}
+        self.stats = {
+            'transitions': 0,
+            'retiered': 0,
+            'retier_time': 0.0
+        }
+
+    # - Сущности
+
+    def add_entity(self, entity_id: str, position: Position):
+        """Новая сущность сразу получает уровень по текущему фокусу"""
+        if entity_id in self._tiers:
+            self.mark_dirty(entity_id)
+            return
+        tier = self.classify(entity_id, position, None)
+        self._tiers[entity_id] = tier
+        self._members[tier][entity_id] = None
+        self._retier_queue.append(entity_id)
+
+    def remove_entity(self, entity_id: str):
+        tier = self._tiers.pop(entity_id, None)
+        if tier is not None:
+            self._members[tier].pop(entity_id, None)
+        self._dirty.discard(entity_id)
+
+    def mark_dirty(self, entity_id: str):
+        """Позиция сущности изменилась - пересчет в ближайшем кадре"""
+        if entity_id in self._tiers:
+            self._dirty.add(entity_id)
+
+    def get_tier(self, entity_id: str) -> Optional[AILODTier]:
+        return self._tiers.get(entity_id)
+
+    def get_members(self, tier: AILODTier) -> List[str]:
+        return list(self._members[tier])
+
+    def clear(self):
+        self._tiers.clear()
+        for members in self._members.values():
+            members.clear()
+        self._retier_queue.clear()
+        self._dirty.clear()
+
+    # - Фокус
+
+    def set_focus(self, position: Optional[Position], direction: Optional[Position] = None):
+        """Позиция и направление взгляда игрока или камеры
+        При первом задании или скачке фокуса дальше near_distance пересчитываются все"""
+        previous = self.focus_position
+        self.focus_position = tuple(position[:3]) if position is not None else None
+        self.focus_direction = tuple(direction[:3]) if direction is not None else None
+        if self.focus_position is None:
+            return
+        if previous is None or math.dist(previous, self.focus_position) > self.settings.near_distance:
+            self._dirty.update(self._tiers)
+
+    # - Классификация
+
+    def _is_visible(self, entity_id: str, position: Position, dx: float, dy: float, dz: float,
+                    distance: float) -> bool:
+        if self.visibility_check is not None:
+            try:
+                return bool(self.visibility_check(entity_id, position))
+            except Exception as e:
+                logger.error(f"Ошибка проверки видимости {entity_id}: {e}")
+                return True
+        if self.focus_direction is None or distance <= 0.0:
+            return True
+        fx, fy, fz = self.focus_direction
+        length = math.sqrt(fx * fx + fy * fy + fz * fz)
+        if length <= 0.0:
+            return True
+        cos_angle = (dx * fx + dy * fy + dz * fz) / (distance * length)
+        return cos_angle >= math.cos(math.radians(self.settings.view_angle) / 2.0)
+
+    def classify(self, entity_id: str, position: Position, current: Optional[AILODTier]) -> AILODTier:
+        """Уровень по расстоянию до фокуса; невидимые считаются дальше
+        Уход на более дальний уровень требует пройти порог с запасом hysteresis"""
+        if self.focus_position is None or position is None:
+            return AILODTier.NEAR
+
+        dx = position[0] - self.focus_position[0]
+        dy = position[1] - self.focus_position[1]
+        dz = (position[2] if len(position) > 2 else 0.0) - self.focus_position[2]
+        distance = math.sqrt(dx * dx + dy * dy + dz * dz)
+        if not self._is_visible(entity_id, position, dx, dy, dz, distance):
+            distance *= self.settings.hidden_distance_scale
+
+        thresholds = (self.settings.near_distance, self.settings.mid_distance)
+        tier = AILODTier.NEAR
+        for boundary, threshold in enumerate(thresholds):
+            # Граница между boundary и boundary + 1 сдвигается наружу для сущностей внутри нее
+            if current is not None and current <= boundary:
+                threshold *= 1.0 + self.settings.hysteresis
+            if distance > threshold:
+                tier = AILODTier(boundary + 1)
+        return tier
+
+    def _retier(self, entity_id: str, position: Optional[Position]) -> bool:
+        current = self._tiers.get(entity_id)
+        if current is None:
+            return False
+        tier = self.classify(entity_id, position, current)
+        if tier == current:
+            return False
+        del self._members[current][entity_id]
+        self._members[tier][entity_id] = None
+        self._tiers[entity_id] = tier
+        self.stats['transitions'] += 1
+        return True
+
+    def update_tiers(self, get_position: Callable[[str], Optional[Position]]) -> int:
+        """Инкрементальный пересчет: измененные сущности и порция по кругу
+        Возвращает число переходов между уровнями"""
+        start = time.perf_counter()
+        transitions = 0
+        checked = 0
+
+        dirty, self._dirty = self._dirty, set()
+        for entity_id in dirty:
+            position = get_position(entity_id)
+            if position is None:
+                self.remove_entity(entity_id)
+                continue
+            transitions += self._retier(entity_id, position)
+            checked += 1
+
+        for _ in range(min(self.settings.retier_per_frame, len(self._retier_queue))):
+            entity_id = self._retier_queue.popleft()
+            if entity_id not in self._tiers:
+                continue
+            position = get_position(entity_id)
+            if position is None:
+                self.remove_entity(entity_id)
+                continue
+            self._retier_queue.append(entity_id)
+            if entity_id not in dirty:
+                transitions += self._retier(entity_id, position)
+                checked += 1
+
+        self.stats['retiered'] += checked
+        self.stats['retier_time'] += time.perf_counter() - start
+        return transitions
+
+    # - Расписание уровней
+
+    def advance(self, delta_time: float, intervals: Dict[AILODTier, float]) -> List[Tuple[AILODTier, float]]:
+        """Уровни, которым пора тикать: (уровень, время с прошлого тика)"""
+        due: List[Tuple[AILODTier, float]] = []
+        for tier in AILODTier:
+            stats = self.tier_stats[tier]
+            stats.accumulated_time += delta_time
+            if stats.accumulated_time >= intervals[tier]:
+                due.append((tier, stats.accumulated_time))
+                stats.accumulated_time = 0.0
+        return due
+
+    def record_cost(self, tier: AILODTier, elapsed: float, count: int):
+        self.tier_stats[tier].record(elapsed, count)
+
+    # - Информация
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Состав уровней и затраты CPU по уровням (мс)"""
+        tiers = {}
+        for tier in AILODTier:
+            stats = self.tier_stats[tier]
+            tiers[tier.name.lower()] = {
+                'entities': len(self._members[tier]),
+                'ticks': stats.ticks,
+                'processed': stats.processed,
+                'last_ms': stats.last_time * 1000.0,
+                'avg_ms': stats.avg_time * 1000.0,
+                'max_ms': stats.max_time * 1000.0,
+                'total_ms': stats.total_time * 1000.0,
+                'per_entity_us': stats.total_time / stats.processed * 1e6 if stats.processed else 0.0
+            }
+        return {
+            'enabled': self.settings.enabled,
+            'focus': self.focus_position,
+            'tiers': tiers,
+            'transitions': self.stats['transitions'],
+            'retiered': self.stats['retiered'],
+            'retier_ms': self.stats['retier_time'] * 1000.0
+        }
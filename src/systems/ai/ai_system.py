@@ -13,6 +13,7 @@ import threading
 import numpy as np
 import json
 import pickle
+from collections import deque
 from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 
@@ -36,7 +37,12 @@ except ImportError:
     logging.info("Scikit-learn не установлен - некоторые AI функции будут недоступны")
 
 from src.core.architecture import BaseComponent, ComponentType, Priority
+from src.core.spatial_index import SpatialHashGrid, get_spatial_index
 from src.core.constants import AIState, AIBehavior, constants_manager, TIME_CONSTANTS
+from src.systems.ai.ai_lod import AILODManager, AILODSettings, AILODTier
+
+# Конфигурация AI по умолчанию
+AI_CONFIG_PATH = Path(__file__).resolve().parents[3] / "config" / "ai_config.json"
 
 # = ТИПЫ AI
 class AIType(Enum):
@@ -130,6 +136,62 @@ class GenerationMemory:
     final_stats: Dict[str, Any] = field(default_factory=dict)
     cause_of_death: Optional[str] = None
 
+class ExperienceReplayBuffer:
+    """Кольцевой буфер опыта на предвыделенных массивах NumPy"""
+    
+    def __init__(self, capacity: int):
+        self.capacity = max(1, int(capacity))
+        self.states: Optional[np.ndarray] = None
+        self.next_states: Optional[np.ndarray] = None
+        self.actions = np.zeros(self.capacity, dtype=np.int64)
+        self.rewards = np.zeros(self.capacity, dtype=np.float32)
+        self.dones = np.zeros(self.capacity, dtype=np.float32)
+        self.position = 0
+        self.size = 0
+        self.lock = threading.Lock()
+    
+    def __len__(self) -> int:
+        return self.size
+    
+    def _allocate(self, state_size: int):
+        """Выделение массивов состояний по размеру первого состояния"""
+        self.states = np.zeros((self.capacity, state_size), dtype=np.float32)
+        self.next_states = np.zeros((self.capacity, state_size), dtype=np.float32)
+    
+    def add(self, state: np.ndarray, action: int, reward: float,
+            next_state: np.ndarray, done: bool):
+        """Добавление опыта с перезаписью самого старого"""
+        state = np.asarray(state, dtype=np.float32).ravel()
+        next_state = np.asarray(next_state, dtype=np.float32).ravel()
+        with self.lock:
+            if self.states is None:
+                self._allocate(state.shape[0])
+            width = self.states.shape[1]
+            index = self.position
+            self.states[index] = 0.0
+            self.states[index, :min(width, state.shape[0])] = state[:width]
+            self.next_states[index] = 0.0
+            self.next_states[index, :min(width, next_state.shape[0])] = next_state[:width]
+            self.actions[index] = action
+            self.rewards[index] = reward
+            self.dones[index] = float(done)
+            self.position = (index + 1) % self.capacity
+            self.size = min(self.size + 1, self.capacity)
+    
+    def sample(self, batch_size: int, rng: np.random.Generator
+               ) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+        """Случайная выборка без повторов (копии массивов)"""
+        with self.lock:
+            indices = rng.choice(self.size, size=min(batch_size, self.size), replace=False)
+            return (self.states[indices], self.actions[indices], self.rewards[indices],
+                    self.next_states[indices], self.dones[indices])
+    
+    def clear(self):
+        """Очистка буфера без освобождения памяти"""
+        with self.lock:
+            self.position = 0
+            self.size = 0
+
 @dataclass
 class AIEntity:
     """AI сущность с продвинутыми возможностями"""
@@ -150,7 +212,8 @@ class AIEntity:
     learning_data: Dict[str, Any] = field(default_factory=dict)
     neural_network: Optional[Any] = None
     last_update: float = field(default_factory=time.time)
-    experience_buffer: List[Dict[str, Any]] = field(default_factory=list)
+    experience_buffer: ExperienceReplayBuffer = field(default_factory=lambda: ExperienceReplayBuffer(10000))
+    optimizer: Optional[Any] = None
     learning_rate: float = 0.001
     exploration_rate: float = 0.1
     generation_id: int = 1
@@ -219,6 +282,13 @@ class AISettings:
     model_save_frequency: int = 10000
     memory_decay_rate: float = 0.95
     personality_adaptation_rate: float = 0.01
+    enable_batch_decisions: bool = True  # Пакетное принятие решений в update()
+    enable_background_training: bool = True  # Обучение в фоновом потоке
+    training_interval: float = 0.5  # Период фонового обучения (секунды)
+    training_steps_per_cycle: int = 1
+    discount_factor: float = 0.99
+    decision_history_size: int = 1000  # Последние решения, хранимые в decisions
+    lod: AILODSettings = field(default_factory=AILODSettings)  # Уровни детализации по расстоянию
 
 # = ЕДИНАЯ AI СИСТЕМА
 class AISystem(BaseComponent):
@@ -237,10 +307,19 @@ class AISystem(BaseComponent):
         # AI сущности
         self.ai_entities: Dict[str, AIEntity] = {}
         self.entity_behaviors: Dict[str, List[AIBehavior]] = {}
+        self.spatial_index: SpatialHashGrid = get_spatial_index()
         
         # Поведения и решения
         self.behaviors: Dict[str, AIBehavior] = {}
-        self.decisions: List[AIDecision] = []
+        self.decisions: deque = deque(maxlen=self.settings.decision_history_size)  # Ограниченная история
+        self.latest_decisions: Dict[str, AIDecision] = {}
+        self._decision_accumulator: float = 0.0
+        
+        # Уровни детализации: частоты поведений по типам AI для статистической симуляции
+        self.lod = AILODManager(self.settings.lod)
+        self.behavior_frequencies: Dict[AIType, Dict[str, int]] = {}
+        self._lod_rng = np.random.default_rng()
+        self.config_path: Path = AI_CONFIG_PATH
         
         # Машинное обучение
         self.global_memory: Dict[str, Any] = {}
@@ -258,6 +337,14 @@ class AISystem(BaseComponent):
         self.update_thread: Optional[threading.Thread] = None
         self.running = False
         
+        # Фоновое обучение
+        self.training_thread: Optional[threading.Thread] = None
+        self._training_stop = threading.Event()
+        self._training_pending: set = set()
+        self._training_lock = threading.Lock()
+        self._model_lock = threading.Lock()
+        self._replay_rng = np.random.default_rng()
+        
         # Статистика
         self.stats = {
             "total_entities": 0,
@@ -267,7 +354,11 @@ class AISystem(BaseComponent):
             "model_updates": 0,
             "memory_entries": 0,
             "generations": 0,
-            "update_time": 0.0
+            "update_time": 0.0,
+            "batch_ticks": 0,
+            "last_batch_size": 0,
+            "training_cycles": 0,
+            "training_time": 0.0
         }
         
         # Callbacks
@@ -281,6 +372,9 @@ class AISystem(BaseComponent):
     def _on_initialize(self) -> bool:
         """Инициализация AI системы"""
         try:
+            # Настройки частоты и уровней детализации из конфигурации
+            self._load_config()
+            
             # Инициализация поведений
             self._initialize_behaviors()
             
@@ -296,6 +390,11 @@ class AISystem(BaseComponent):
             if self.settings.enable_memory:
                 self._initialize_memory()
             
+            # Фоновое обучение сетей сущностей
+            if (self.settings.enable_learning and self.settings.enable_background_training
+                    and TORCH_AVAILABLE):
+                self._start_training_worker()
+            
             self.logger.info("AISystem инициализирован")
             return True
             
@@ -303,6 +402,23 @@ class AISystem(BaseComponent):
             self.logger.error(f"Ошибка инициализации AISystem: {e}")
             return False
     
+    def _load_config(self):
+        """Загрузка ai_update_frequency и секции ai_lod из ai_config.json"""
+        try:
+            if not self.config_path.exists():
+                return
+            with open(self.config_path, 'r', encoding='utf-8') as f:
+                config = json.load(f)
+            
+            if "ai_update_frequency" in config:
+                self.settings.update_interval = float(config["ai_update_frequency"])
+            if "ai_lod" in config:
+                self.settings.lod = AILODSettings.from_dict(config["ai_lod"])
+                self.lod.settings = self.settings.lod
+                
+        except Exception as e:
+            self.logger.error(f"Ошибка загрузки конфигурации AI: {e}")
+    
     def _initialize_behaviors(self):
         """Инициализация продвинутых поведений"""
         # Поведение патрулирования с обучением
@@ -468,13 +584,17 @@ class AISystem(BaseComponent):
             
             self.ai_entities[entity_id] = entity
             self.entity_behaviors[entity_id] = []
+            self.spatial_index.insert(entity_id, *position[:3])
+            self.lod.add_entity(entity_id, position)
             
             # Добавление поведений
             for behavior in self.behaviors.values():
                 self.entity_behaviors[entity_id].append(behavior)
             
-            # Инициализация буфера опыта
-            entity.experience_buffer = []
+            # Инициализация буфера опыта и постоянного оптимизатора
+            entity.experience_buffer = ExperienceReplayBuffer(self.settings.experience_buffer_size)
+            if entity.neural_network is not None:
+                entity.optimizer = optim.Adam(entity.neural_network.parameters(), lr=entity.learning_rate)
             
             self.stats["total_entities"] += 1
             self.stats["active_entities"] += 1
@@ -486,6 +606,37 @@ class AISystem(BaseComponent):
             self.logger.error(f"Ошибка регистрации AI сущности {entity_id}: {e}")
             return False
     
+    def update_entity_position(self, entity_id: str, position: Tuple[float, float, float]) -> bool:
+        """Обновление позиции AI сущности и пространственного индекса"""
+        entity = self.ai_entities.get(entity_id)
+        if not entity:
+            return False
+        entity.position = position
+        self.spatial_index.move(entity_id, *position[:3])
+        self.lod.mark_dirty(entity_id)
+        return True
+    
+    def find_entities_in_range(self, entity_id: str, radius: float,
+                               predicate: Optional[Callable[[str], bool]] = None) -> List[Tuple[str, float]]:
+        """Сущности в радиусе от AI сущности: (entity_id, расстояние) по возрастанию"""
+        entity = self.ai_entities.get(entity_id)
+        if not entity:
+            return []
+        x, y, z = entity.position[:3]
+        return self.spatial_index.query_radius(x, y, radius, z, predicate=predicate, exclude=entity_id)
+    
+    def find_nearest_target(self, entity_id: str, max_range: Optional[float] = None,
+                            predicate: Optional[Callable[[str], bool]] = None) -> Optional[Tuple[str, float]]:
+        """Ближайшая цель в пределах дальности обнаружения (по умолчанию detection_range)"""
+        entity = self.ai_entities.get(entity_id)
+        if not entity:
+            return None
+        if max_range is None:
+            max_range = entity.detection_range
+        x, y, z = entity.position[:3]
+        return self.spatial_index.nearest(x, y, z, max_radius=max_range,
+                                          predicate=predicate, exclude=entity_id)
+    
     def _create_entity_neural_network(self):
         """Создание нейронной сети для сущности"""
         if not TORCH_AVAILABLE:
@@ -553,7 +704,383 @@ class AISystem(BaseComponent):
         except Exception as e:
             self.logger.error(f"Ошибка принятия решения для {entity_id}: {e}")
             return None
-    
+
+    def make_decisions_batch(self, entity_ids: List[str]) -> Dict[str, AIDecision]:
+        """Пакетное принятие решений для группы сущностей за один проход"""
+        decisions: Dict[str, AIDecision] = {}
+        try:
+            entities = [self.ai_entities[eid] for eid in entity_ids if eid in self.ai_entities]
+            if not entities:
+                return decisions
+
+            # Все векторы состояния собираются в одну матрицу
+            states = self._get_entity_state_matrix(entities)
+
+            # Выбор поведения: условия проверяются по сущностям, оценки сетей - одним пакетом
+            selected = self._select_behaviors_batch(entities, states)
+
+            # Группировка строк по выбранному поведению: один прогон модели на группу
+            groups: Dict[str, List[int]] = {}
+            for row, behavior in enumerate(selected):
+                if behavior is not None:
+                    groups.setdefault(behavior.behavior_id, []).append(row)
+
+            now = time.time()
+            for behavior_id, rows in groups.items():
+                behavior = self.behaviors.get(behavior_id) or selected[rows[0]]
+                actions, confidences = self._select_actions_batch(behavior, states[rows])
+
+                for row, action, confidence in zip(rows, actions, confidences):
+                    entity = entities[row]
+                    decision = AIDecision(
+                        entity_id=entity.entity_id,
+                        behavior_id=behavior_id,
+                        action=action,
+                        confidence=float(confidence),
+                        timestamp=now,
+                        learning_data={
+                            'state': states[row],
+                            'behavior_selected': behavior_id,
+                            'action_selected': action
+                        },
+                        personality_influence=entity.personality_traits.copy()
+                    )
+                    decisions[entity.entity_id] = decision
+                    self.decisions.append(decision)
+                    self._notify_decision_made(decision)
+
+                behavior.last_execution = now
+
+            self.stats["decisions_made"] += len(decisions)
+            self.stats["last_batch_size"] = len(entities)
+
+        except Exception as e:
+            self.logger.error(f"Ошибка пакетного принятия решений: {e}")
+
+        return decisions
+
+    def _select_behaviors_batch(self, entities: List[AIEntity],
+                                states: np.ndarray) -> List[Optional[AIBehavior]]:
+        """Пакетный выбор поведений с учетом личности и условий"""
+        selected: List[Optional[AIBehavior]] = [None] * len(entities)
+        available_by_row: Dict[int, List[AIBehavior]] = {}
+
+        for row, entity in enumerate(entities):
+            available = [
+                behavior for behavior in self.entity_behaviors.get(entity.entity_id, [])
+                if self._check_behavior_conditions(entity, behavior)
+                and self._check_personality_requirements(entity, behavior)
+            ]
+            if not available:
+                continue
+            if len(available) > 1 and entity.neural_network:
+                available_by_row[row] = available
+            else:
+                selected[row] = max(available, key=lambda b: b.priority)
+
+        if available_by_row:
+            rows = list(available_by_row.keys())
+            scores = self._predict_behavior_scores_batch(
+                [entities[row].neural_network for row in rows], states[rows])
+            for row, row_scores in zip(rows, scores):
+                available = available_by_row[row]
+                selected[row] = available[int(np.argmax(row_scores[:len(available)]))]
+
+        return selected
+
+    def _predict_behavior_scores_batch(self, networks: List[Any], states: np.ndarray) -> np.ndarray:
+        """Пакетное предсказание оценок поведений по личным сетям сущностей"""
+        try:
+            if not TORCH_AVAILABLE:
+                return np.zeros((len(networks), 1), dtype=np.float32)
+
+            # Веса личных сетей складываются в пакет и прогоняются через bmm
+            with torch.no_grad(), self._model_lock:
+                x = torch.from_numpy(
+                    self._fit_state_width(states, networks[0].fc1.in_features)).unsqueeze(2)
+                for layer_name in ('fc1', 'fc2', 'fc3'):
+                    weight = torch.stack([getattr(net, layer_name).weight for net in networks])
+                    bias = torch.stack([getattr(net, layer_name).bias for net in networks]).unsqueeze(2)
+                    x = torch.baddbmm(bias, weight, x)
+                    if layer_name != 'fc3':
+                        x = torch.relu(x)
+                return x.squeeze(2).numpy()
+
+        except Exception as e:
+            self.logger.error(f"Ошибка пакетного предсказания оценок: {e}")
+            return np.zeros((len(networks), 1), dtype=np.float32)
+
+    def _select_actions_batch(self, behavior: AIBehavior,
+                              states: np.ndarray) -> Tuple[List[str], np.ndarray]:
+        """Пакетный выбор действий одной моделью поведения"""
+        count = states.shape[0]
+        if not behavior.actions:
+            return ["idle"] * count, np.ones(count, dtype=np.float32)
+
+        model_info = self.models.get(behavior.behavior_id)
+        if model_info and model_info['type'] == 'pytorch' and TORCH_AVAILABLE:
+            indices, confidences = self._predict_actions_pytorch_batch(model_info, states)
+        elif model_info and model_info['type'] == 'sklearn' and SKLEARN_AVAILABLE:
+            indices, confidences = self._predict_actions_sklearn_batch(model_info, states)
+        else:
+            indices = np.random.randint(0, len(behavior.actions), size=count)
+            confidences = np.ones(count, dtype=np.float32)
+
+        actions = [behavior.actions[idx] if idx < len(behavior.actions) else behavior.actions[0]
+                   for idx in indices.tolist()]
+        return actions, confidences
+
+    def _predict_actions_pytorch_batch(self, model_info: Dict[str, Any],
+                                       states: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """Пакетное предсказание действий с помощью PyTorch"""
+        try:
+            model = model_info['model']
+            was_training = model.training
+            model.eval()
+            try:
+                with torch.no_grad():
+                    state_tensor = torch.from_numpy(
+                        self._fit_state_width(states, model.fc1.in_features))
+                    probabilities = torch.softmax(model(state_tensor), dim=1)
+                    confidences, indices = torch.max(probabilities, dim=1)
+            finally:
+                model.train(was_training)
+            return indices.numpy(), confidences.numpy()
+
+        except Exception as e:
+            self.logger.error(f"Ошибка пакетного предсказания PyTorch: {e}")
+            return np.zeros(states.shape[0], dtype=np.int64), np.ones(states.shape[0], dtype=np.float32)
+
+    def _predict_actions_sklearn_batch(self, model_info: Dict[str, Any],
+                                       states: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """Пакетное предсказание действий с помощью Scikit-learn"""
+        try:
+            model = model_info['model']
+            if hasattr(model, 'predict_proba'):
+                probabilities = model.predict_proba(states)
+                indices = np.argmax(probabilities, axis=1)
+                return indices, probabilities[np.arange(len(indices)), indices]
+            indices = np.asarray(model.predict(states), dtype=np.int64)
+            return indices, np.ones(len(indices), dtype=np.float32)
+
+        except Exception as e:
+            self.logger.error(f"Ошибка пакетного предсказания Scikit-learn: {e}")
+            return np.zeros(states.shape[0], dtype=np.int64), np.ones(states.shape[0], dtype=np.float32)
+
+    def get_latest_decision(self, entity_id: str) -> Optional[AIDecision]:
+        """Получение последнего решения, принятого планировщиком update()"""
+        return self.latest_decisions.get(entity_id)
+
+    # - Уровни детализации (LOD)
+
+    def set_lod_focus(self, position: Optional[Tuple[float, float, float]],
+                      direction: Optional[Tuple[float, float, float]] = None):
+        """Точка фокуса LOD (игрок или камера) и направление взгляда для видимости"""
+        self.lod.focus_entity_id = None
+        self.lod.set_focus(position, direction)
+
+    def set_lod_focus_entity(self, entity_id: Optional[str],
+                             direction: Optional[Tuple[float, float, float]] = None):
+        """Фокус LOD следует за сущностью из пространственного индекса (обычно игроком)"""
+        self.lod.focus_entity_id = entity_id
+        self.lod.focus_direction = tuple(direction[:3]) if direction is not None else None
+
+    def set_lod_visibility_check(self, callback: Optional[Callable[[str, Tuple[float, float, float]], bool]]):
+        """Проверка видимости сущности (например, по фрустуму камеры) вместо угла обзора"""
+        self.lod.visibility_check = callback
+
+    def get_lod_tier(self, entity_id: str) -> Optional[AILODTier]:
+        """Текущий уровень детализации сущности"""
+        return self.lod.get_tier(entity_id)
+
+    def _get_lod_position(self, entity_id: str) -> Optional[Tuple[float, float, float]]:
+        entity = self.ai_entities.get(entity_id)
+        return entity.position if entity else None
+
+    def make_rule_decisions_batch(self, entity_ids: List[str]) -> Dict[str, AIDecision]:
+        """Дешевые решения по правилам: условия и личность, поведение по приоритету, без ML"""
+        decisions: Dict[str, AIDecision] = {}
+        try:
+            now = time.time()
+            for entity_id in entity_ids:
+                entity = self.ai_entities.get(entity_id)
+                if entity is None:
+                    continue
+                available = [
+                    behavior for behavior in self.entity_behaviors.get(entity_id, [])
+                    if self._check_behavior_conditions(entity, behavior)
+                    and self._check_personality_requirements(entity, behavior)
+                ]
+                if not available:
+                    continue
+
+                # Основное (первое) действие поведения с наивысшим приоритетом
+                behavior = max(available, key=lambda b: b.priority)
+                action = behavior.actions[0] if behavior.actions else "idle"
+                decision = AIDecision(
+                    entity_id=entity_id,
+                    behavior_id=behavior.behavior_id,
+                    action=action,
+                    timestamp=now,
+                    learning_data={
+                        'behavior_selected': behavior.behavior_id,
+                        'action_selected': action,
+                        'lod_tier': AILODTier.MID.name.lower()
+                    },
+                    personality_influence=entity.personality_traits.copy()
+                )
+                behavior.last_execution = now
+                decisions[entity_id] = decision
+                self.decisions.append(decision)
+                self._notify_decision_made(decision)
+
+            self.stats["decisions_made"] += len(decisions)
+
+        except Exception as e:
+            self.logger.error(f"Ошибка принятия решений по правилам: {e}")
+
+        return decisions
+
+    def _record_behavior_frequencies(self, decisions: Dict[str, AIDecision]):
+        """Накопление частот выбранных поведений по типам AI для дальнего уровня"""
+        for decision in decisions.values():
+            entity = self.ai_entities.get(decision.entity_id)
+            if entity is None:
+                continue
+            counts = self.behavior_frequencies.setdefault(entity.ai_type, {})
+            counts[decision.behavior_id] = counts.get(decision.behavior_id, 0) + 1
+            # Старые наблюдения постепенно теряют вес
+            if sum(counts.values()) > 10000:
+                for behavior_id in counts:
+                    counts[behavior_id] //= 2
+
+    def _simulate_far_entities(self, entity_ids: List[str], elapsed: float) -> Dict[str, AIDecision]:
+        """Грубая статистическая симуляция дальних сущностей
+        Движение к целевой точке одним векторным шагом за прошедшее время, поведение -
+        выборка из частот, накопленных ближними и средними уровнями того же типа AI.
+        Решения не рассылаются в callbacks: сущности далеко от игрока"""
+        decisions: Dict[str, AIDecision] = {}
+        try:
+            entities = [self.ai_entities[eid] for eid in entity_ids if eid in self.ai_entities]
+            if not entities:
+                return decisions
+
+            # Движение к целевым точкам
+            movers = [entity for entity in entities if entity.target_position]
+            if movers:
+                positions = np.array([entity.position[:3] for entity in movers], dtype=np.float64)
+                targets = np.array([
+                    (entity.target_position[0], entity.target_position[1],
+                     entity.target_position[2] if len(entity.target_position) > 2 else entity.position[2])
+                    for entity in movers], dtype=np.float64)
+                speeds = np.fromiter((entity.speed for entity in movers), dtype=np.float64, count=len(movers))
+
+                offsets = targets - positions
+                distances = np.linalg.norm(offsets, axis=1)
+                steps = np.minimum(speeds * elapsed, distances)
+                scale = np.divide(steps, distances, out=np.zeros_like(steps), where=distances > 0)
+                new_positions = positions + offsets * scale[:, None]
+                for entity, position in zip(movers, new_positions.tolist()):
+                    self.update_entity_position(entity.entity_id, tuple(position))
+
+            # Поведение по накопленной статистике
+            now = time.time()
+            by_type: Dict[AIType, List[AIEntity]] = {}
+            for entity in entities:
+                by_type.setdefault(entity.ai_type, []).append(entity)
+
+            for ai_type, group in by_type.items():
+                counts = {behavior_id: count for behavior_id, count in
+                          self.behavior_frequencies.get(ai_type, {}).items()
+                          if count > 0 and behavior_id in self.behaviors}
+                if not counts:
+                    continue
+                behavior_ids = list(counts)
+                probabilities = np.array([counts[b] for b in behavior_ids], dtype=np.float64)
+                probabilities /= probabilities.sum()
+                choices = self._lod_rng.choice(len(behavior_ids), size=len(group), p=probabilities)
+                action_picks = self._lod_rng.random(len(group))
+
+                for entity, choice, pick in zip(group, choices.tolist(), action_picks.tolist()):
+                    behavior = self.behaviors[behavior_ids[choice]]
+                    action = behavior.actions[int(pick * len(behavior.actions))] if behavior.actions else "idle"
+                    decisions[entity.entity_id] = AIDecision(
+                        entity_id=entity.entity_id,
+                        behavior_id=behavior.behavior_id,
+                        action=action,
+                        confidence=float(probabilities[choice]),
+                        timestamp=now,
+                        learning_data={'lod_tier': AILODTier.FAR.name.lower()}
+                    )
+
+        except Exception as e:
+            self.logger.error(f"Ошибка статистической симуляции AI: {e}")
+
+        return decisions
+
+    def _update_lod(self, delta_time: float) -> bool:
+        """Обновление по уровням детализации: у каждого уровня своя частота и учет затрат"""
+        start_time = time.time()
+
+        if self.lod.focus_entity_id:
+            position = self.spatial_index.get_position(self.lod.focus_entity_id)
+            if position is not None:
+                self.lod.set_focus(position, self.lod.focus_direction)
+
+        self.lod.update_tiers(self._get_lod_position)
+
+        intervals = {
+            AILODTier.NEAR: self.settings.update_interval,
+            AILODTier.MID: self.settings.lod.mid_interval,
+            AILODTier.FAR: self.settings.lod.far_interval
+        }
+        for tier, elapsed in self.lod.advance(delta_time, intervals):
+            entity_ids = self.lod.get_members(tier)
+            if not entity_ids:
+                continue
+
+            tier_start = time.perf_counter()
+            if tier == AILODTier.NEAR:
+                decisions = self.make_decisions_batch(entity_ids)
+                self._record_behavior_frequencies(decisions)
+                self.stats["batch_ticks"] += 1
+            elif tier == AILODTier.MID:
+                decisions = self.make_rule_decisions_batch(entity_ids)
+                self._record_behavior_frequencies(decisions)
+            else:
+                decisions = self._simulate_far_entities(entity_ids, elapsed)
+            self.latest_decisions.update(decisions)
+            self.lod.record_cost(tier, time.perf_counter() - tier_start, len(entity_ids))
+
+        self.stats["update_time"] = time.time() - start_time
+        return True
+
+    def _on_update(self, delta_time: float) -> bool:
+        """Обновление AI системы: пакетное принятие решений с интервалом update_interval
+        При включенном LOD частота и способ принятия решений зависят от уровня сущности"""
+        try:
+            if not self.settings.enable_batch_decisions or not self.ai_entities:
+                return True
+
+            if self.settings.lod.enabled:
+                return self._update_lod(delta_time)
+
+            self._decision_accumulator += delta_time
+            if self._decision_accumulator < self.settings.update_interval:
+                return True
+            self._decision_accumulator = 0.0
+
+            start_time = time.time()
+            self.latest_decisions = self.make_decisions_batch(list(self.ai_entities.keys()))
+            self.stats["update_time"] = time.time() - start_time
+            self.stats["batch_ticks"] += 1
+
+            return True
+
+        except Exception as e:
+            self.logger.error(f"Ошибка обновления AISystem: {e}")
+            return False
+
     def _select_behavior_with_personality(self, entity: AIEntity, behaviors: List[AIBehavior], 
                                         state: np.ndarray) -> Optional[AIBehavior]:
         """Выбор поведения с учетом личности и условий"""
@@ -626,11 +1153,46 @@ class AISystem(BaseComponent):
                 state.extend([0.0, 0.0])
             
             return np.array(state, dtype=np.float32)
-            
+
         except Exception as e:
             self.logger.error(f"Ошибка получения вектора состояния: {e}")
             return np.zeros(15, dtype=np.float32)
-    
+
+    def _get_entity_state_matrix(self, entities: List[AIEntity]) -> np.ndarray:
+        """Получение матрицы состояний для группы сущностей (строка на сущность)"""
+        count = len(entities)
+        now = time.time()
+
+        health = np.fromiter((e.health for e in entities), dtype=np.float32, count=count)
+        max_health = np.fromiter((e.max_health or 1.0 for e in entities), dtype=np.float32, count=count)
+        positions = np.array([e.position or (0.0, 0.0, 0.0) for e in entities], dtype=np.float32)
+        targets = np.array([e.target_position[:2] if e.target_position else (0.0, 0.0)
+                            for e in entities], dtype=np.float32)
+
+        states = np.empty((count, 16), dtype=np.float32)
+        states[:, 0] = health / max_health
+        states[:, 1:11] = [
+            (e.speed, e.detection_range, e.attack_range,
+             float(bool(e.target_entity)), float(bool(e.target_position)),
+             now - e.last_update, len(e.memory), len(e.experience_buffer),
+             e.learning_rate, e.exploration_rate)
+            for e in entities
+        ]
+        states[:, 11:14] = positions.reshape(count, 3) / 1000.0
+        states[:, 14:16] = targets.reshape(count, 2) / 1000.0
+        return states
+
+    @staticmethod
+    def _fit_state_width(states: np.ndarray, width: int) -> np.ndarray:
+        """Приведение ширины матрицы состояний к размеру входа модели"""
+        states = np.ascontiguousarray(states, dtype=np.float32)
+        if states.shape[1] == width:
+            return states
+        fitted = np.zeros((states.shape[0], width), dtype=np.float32)
+        columns = min(width, states.shape[1])
+        fitted[:, :columns] = states[:, :columns]
+        return fitted
+
     def _check_behavior_conditions(self, entity: AIEntity, behavior: AIBehavior) -> bool:
         """Проверка условий поведения"""
         try:
@@ -640,12 +1202,12 @@ class AISystem(BaseComponent):
                 elif condition == "has_target" and bool(entity.target_entity) != value:
                     return False
                 elif condition == "target_in_range" and entity.target_position:
-                    distance = self._calculate_distance(entity.position, entity.target_position)
-                    if distance > entity.detection_range:
+                    distance_sq = self._calculate_distance_squared(entity.position, self._resolve_target_position(entity))
+                    if distance_sq > entity.detection_range ** 2:
                         return False
                 elif condition == "target_in_attack_range" and entity.target_position:
-                    distance = self._calculate_distance(entity.position, entity.target_position)
-                    if distance > entity.attack_range:
+                    distance_sq = self._calculate_distance_squared(entity.position, self._resolve_target_position(entity))
+                    if distance_sq > entity.attack_range ** 2:
                         return False
                 elif condition == "health_low" and entity.health > entity.max_health * 0.3:
                     return False
@@ -671,6 +1233,20 @@ class AISystem(BaseComponent):
         """Расчет расстояния между точками"""
         return math.sqrt(sum((a - b) ** 2 for a, b in zip(pos1, pos2)))
     
+    @staticmethod
+    def _calculate_distance_squared(pos1: Tuple[float, float, float],
+                                    pos2: Tuple[float, float, float]) -> float:
+        """Квадрат расстояния между точками (без sqrt для сравнений с радиусом)"""
+        return sum((a - b) ** 2 for a, b in zip(pos1, pos2))
+    
+    def _resolve_target_position(self, entity: AIEntity) -> Tuple[float, float, float]:
+        """Актуальная позиция цели из пространственного индекса, иначе сохраненная"""
+        if entity.target_entity:
+            position = self.spatial_index.get_position(entity.target_entity)
+            if position is not None:
+                return position
+        return entity.target_position
+    
     def _select_action_ml(self, entity: AIEntity, behavior: AIBehavior, 
                           state: np.ndarray) -> Tuple[str, float]:
         """Выбор действия с помощью машинного обучения"""
@@ -707,8 +1283,9 @@ class AISystem(BaseComponent):
         """Предсказание оценок для поведений"""
         try:
             if entity.neural_network and TORCH_AVAILABLE:
-                with torch.no_grad():
-                    state_tensor = torch.FloatTensor(state).unsqueeze(0)
+                with torch.no_grad(), self._model_lock:
+                    state_tensor = torch.from_numpy(self._fit_state_width(
+                        state.reshape(1, -1), entity.neural_network.fc1.in_features))
                     scores = entity.neural_network(state_tensor)
                     return scores.numpy().flatten()
             else:
@@ -724,7 +1301,8 @@ class AISystem(BaseComponent):
         try:
             model = model_info['model']
             with torch.no_grad():
-                state_tensor = torch.FloatTensor(state).unsqueeze(0)
+                state_tensor = torch.from_numpy(self._fit_state_width(
+                    state.reshape(1, -1), model.fc1.in_features))
                 output = model(state_tensor)
                 probabilities = torch.softmax(output, dim=1)
                 action_idx = torch.argmax(probabilities).item()
@@ -827,25 +1405,16 @@ class AISystem(BaseComponent):
             
             entity = self.ai_entities[entity_id]
             
-            # Создание опыта
-            experience = LearningExperience(
-                state=state,
-                action=action,
-                reward=reward,
-                next_state=next_state,
-                done=done
-            )
-            
-            # Добавление в буфер опыта
-            entity.experience_buffer.append(experience)
+            # Добавление в кольцевой буфер опыта (старый опыт перезаписывается)
+            entity.experience_buffer.add(state, action, reward, next_state, done)
             
-            # Ограничение размера буфера
-            if len(entity.experience_buffer) > self.settings.experience_buffer_size:
-                entity.experience_buffer.pop(0)
-            
-            # Обучение модели
+            # Обучение модели: в фоновом потоке или синхронно, если он не запущен
             if len(entity.experience_buffer) >= self.settings.batch_size:
-                self._train_entity_model(entity)
+                if self.training_thread and self.training_thread.is_alive():
+                    with self._training_lock:
+                        self._training_pending.add(entity_id)
+                else:
+                    self._train_entity_model(entity)
             
             self.stats["learning_events"] += 1
             
@@ -858,42 +1427,76 @@ class AISystem(BaseComponent):
             if not entity.neural_network or not TORCH_AVAILABLE:
                 return
             
-            # Подготовка данных
-            batch = random.sample(entity.experience_buffer, 
-                                min(self.settings.batch_size, len(entity.experience_buffer)))
-            
-            states = torch.FloatTensor([exp.state for exp in batch])
-            actions = torch.LongTensor([exp.action for exp in batch])
-            rewards = torch.FloatTensor([exp.reward for exp in batch])
-            next_states = torch.FloatTensor([exp.next_state for exp in batch])
-            dones = torch.BoolTensor([exp.done for exp in batch])
-            
-            # Обучение
-            optimizer = optim.Adam(entity.neural_network.parameters(), lr=entity.learning_rate)
-            criterion = nn.MSELoss()
-            
-            # Q-learning обновление
-            current_q_values = entity.neural_network(states)
-            next_q_values = entity.neural_network(next_states)
-            
-            target_q_values = current_q_values.clone()
-            for i in range(len(batch)):
-                if dones[i]:
-                    target_q_values[i][actions[i]] = rewards[i]
-                else:
-                    target_q_values[i][actions[i]] = rewards[i] + 0.99 * torch.max(next_q_values[i])
+            network = entity.neural_network
+            if entity.optimizer is None:
+                entity.optimizer = optim.Adam(network.parameters(), lr=entity.learning_rate)
+            
+            # Подготовка данных из кольцевого буфера
+            states, actions, rewards, next_states, dones = entity.experience_buffer.sample(
+                self.settings.batch_size, self._replay_rng)
+            width = network.fc1.in_features
+            states = torch.from_numpy(self._fit_state_width(states, width))
+            next_states = torch.from_numpy(self._fit_state_width(next_states, width))
+            actions = torch.from_numpy(actions)
+            rewards = torch.from_numpy(rewards)
+            dones = torch.from_numpy(dones)
+            
+            # Q-learning обновление: цели считаются векторно
+            with torch.no_grad():
+                next_max_q = network(next_states).max(dim=1).values
+                target_q = rewards + self.settings.discount_factor * next_max_q * (1.0 - dones)
             
-            loss = criterion(current_q_values, target_q_values)
+            current_q = network(states).gather(1, actions.unsqueeze(1)).squeeze(1)
+            loss = nn.functional.mse_loss(current_q, target_q)
             
-            optimizer.zero_grad()
+            entity.optimizer.zero_grad()
             loss.backward()
-            optimizer.step()
+            with self._model_lock:
+                entity.optimizer.step()
             
             self.stats["model_updates"] += 1
             
         except Exception as e:
             self.logger.error(f"Ошибка обучения модели: {e}")
     
+    def _start_training_worker(self):
+        """Запуск фонового потока обучения"""
+        if self.training_thread and self.training_thread.is_alive():
+            return
+        self._training_stop.clear()
+        self.training_thread = threading.Thread(
+            target=self._training_loop, name="AISystemTraining", daemon=True)
+        self.training_thread.start()
+    
+    def _stop_training_worker(self):
+        """Остановка фонового потока обучения"""
+        self._training_stop.set()
+        if self.training_thread and self.training_thread.is_alive():
+            self.training_thread.join(timeout=5.0)
+        self.training_thread = None
+    
+    def _training_loop(self):
+        """Цикл фонового обучения с заданной периодичностью"""
+        while not self._training_stop.wait(self.settings.training_interval):
+            with self._training_lock:
+                pending = list(self._training_pending)
+                self._training_pending.clear()
+            if not pending:
+                continue
+            
+            start_time = time.time()
+            for entity_id in pending:
+                entity = self.ai_entities.get(entity_id)
+                if entity is None:
+                    continue
+                for _ in range(self.settings.training_steps_per_cycle):
+                    if self._training_stop.is_set():
+                        return
+                    self._train_entity_model(entity)
+            
+            self.stats["training_cycles"] += 1
+            self.stats["training_time"] = time.time() - start_time
+    
     def start_new_generation(self):
         """Начало нового поколения"""
         try:
@@ -1001,6 +1604,7 @@ class AISystem(BaseComponent):
             "memory_size": len(self.global_memory),
             "models_count": len(self.models),
             "current_generation": self.current_generation,
+            "lod": self.lod.get_stats(),
             "ml_frameworks": {
                 "pytorch": TORCH_AVAILABLE,
                 "sklearn": SKLEARN_AVAILABLE
@@ -1061,13 +1665,21 @@ class AISystem(BaseComponent):
         if self.update_thread and self.update_thread.is_alive():
             self.update_thread.join(timeout=5.0)
         
+        self._stop_training_worker()
+        self._training_pending.clear()
+        
         if self.executor:
             self.executor.shutdown(wait=True)
         
+        for entity_id in self.ai_entities:
+            self.spatial_index.remove(entity_id)
         self.ai_entities.clear()
         self.entity_behaviors.clear()
+        self.lod.clear()
+        self.behavior_frequencies.clear()
         self.behaviors.clear()
         self.decisions.clear()
+        self.latest_decisions.clear()
         self.global_memory.clear()
         self.experience_pool.clear()
         self.learning_data.clear()
@@ -3,10 +3,13 @@
 
 import logging
 import time
-from typing import Dict, List, Optional, Any
+from types import MappingProxyType
+from typing import Dict, List, Optional, Any, Iterable, Mapping, Set, Tuple
 from dataclasses import dataclass, field
 from enum import Enum
 
+import numpy as np
+
 from src.core.architecture import BaseComponent, ComponentType, Priority, LifecycleState
 from src.core.constants import constants_manager, ToughnessType, StanceState
 from src.core.state_manager import StateManager, StateType
@@ -103,6 +106,41 @@ class AttributeSet:
 class StatCalculator:
     """Калькулятор производных характеристик"""
     
+    # Линейные формулы: характеристика -> (база, {атрибут: коэффициент})
+    # Должны совпадать с методами calculate_* ниже
+    STAT_FORMULAS: Dict[str, Tuple[float, Dict[str, float]]] = {
+        'health': (100.0, {'vitality': 10.0, 'strength': 2.0}),
+        'mana': (50.0, {'intelligence': 8.0, 'wisdom': 4.0}),
+        'stamina': (100.0, {'endurance': 10.0, 'vitality': 3.0}),
+        'physical_damage': (10.0, {'strength': 2.0, 'agility': 1.0}),
+        'magical_damage': (5.0, {'intelligence': 3.0, 'wisdom': 1.0}),
+        'defense': (5.0, {'vitality': 1.0, 'endurance': 1.0}),
+        'attack_speed': (1.0, {'agility': 0.05, 'strength': 0.02}),
+        'skill_recovery_speed': (1.0, {'intelligence': 0.03, 'wisdom': 0.02}),
+        'health_regen': (1.0, {'vitality': 0.5, 'endurance': 0.2}),
+        'mana_regen': (2.0, {'intelligence': 0.4, 'wisdom': 0.3}),
+        'stamina_regen': (3.0, {'endurance': 0.6, 'vitality': 0.2}),
+        'critical_chance': (0.05, {'agility': 0.01, 'luck': 0.02}),
+        'critical_damage': (1.5, {'strength': 0.05, 'agility': 0.03}),
+        'dodge_chance': (0.05, {'agility': 0.015, 'luck': 0.01}),
+        'block_chance': (0.05, {'strength': 0.01, 'endurance': 0.01}),
+        'magic_resistance': (0.0, {'wisdom': 0.02, 'intelligence': 0.01}),
+        'max_weight': (50.0, {'strength': 5.0, 'endurance': 2.0}),
+        'movement_speed': (1.0, {'agility': 0.03, 'endurance': 0.01}),
+        'toughness': (100.0, {'vitality': 8.0, 'endurance': 5.0}),
+        'toughness_recovery': (10.0, {'endurance': 0.8, 'vitality': 0.4}),
+    }
+    
+    ATTRIBUTE_ORDER: Tuple[str, ...] = tuple(attribute.value for attribute in BaseAttribute)
+    STAT_ORDER: Tuple[str, ...] = tuple(STAT_FORMULAS)
+    
+    # Граф зависимостей: атрибут -> характеристики, которые его читают
+    # (заполняется из STAT_FORMULAS после определения класса)
+    STAT_DEPENDENCIES: Dict[str, frozenset] = {}
+    
+    _coefficient_matrix: Optional[np.ndarray] = None
+    _base_vector: Optional[np.ndarray] = None
+    
     @staticmethod
     def calculate_health(attributes: Dict[str, float]) -> float:
         """Расчет здоровья"""
@@ -263,6 +301,46 @@ class StatCalculator:
         vitality = attributes.get('vitality', 0)
         return base + (endurance * 0.8) + (vitality * 0.4)
     
+    @classmethod
+    def calculate_stat(cls, stat_name: str, attributes: Mapping[str, float]) -> float:
+        """Расчет одной характеристики"""
+        return getattr(cls, f"calculate_{stat_name}")(attributes)
+    
+    @classmethod
+    def dependent_stats(cls, attribute_names: Iterable[str]) -> Set[str]:
+        """Характеристики, зависящие от указанных атрибутов"""
+        stats: Set[str] = set()
+        for attribute in attribute_names:
+            stats |= cls.STAT_DEPENDENCIES.get(attribute, frozenset())
+        return stats
+    
+    @classmethod
+    def _get_coefficients(cls) -> Tuple[np.ndarray, np.ndarray]:
+        """Матрица коэффициентов (атрибуты x характеристики) и вектор баз"""
+        if cls._coefficient_matrix is None:
+            matrix = np.zeros((len(cls.ATTRIBUTE_ORDER), len(cls.STAT_ORDER)), dtype=np.float64)
+            base = np.zeros(len(cls.STAT_ORDER), dtype=np.float64)
+            for column, stat in enumerate(cls.STAT_ORDER):
+                base[column], coefficients = cls.STAT_FORMULAS[stat]
+                for attribute, coefficient in coefficients.items():
+                    matrix[cls.ATTRIBUTE_ORDER.index(attribute), column] = coefficient
+            cls._coefficient_matrix, cls._base_vector = matrix, base
+        return cls._coefficient_matrix, cls._base_vector
+    
+    @classmethod
+    def calculate_all_stats_batch(cls, attribute_matrix: np.ndarray) -> np.ndarray:
+        """Векторный расчет всех характеристик: (n, атрибуты) -> (n, характеристики)
+        Столбцы соответствуют ATTRIBUTE_ORDER и STAT_ORDER"""
+        matrix, base = cls._get_coefficients()
+        return np.asarray(attribute_matrix, dtype=np.float64) @ matrix + base
+    
+    @classmethod
+    def calculate_stat_batch(cls, stat_name: str, attribute_matrix: np.ndarray) -> np.ndarray:
+        """Векторный расчет одной характеристики для многих сущностей"""
+        matrix, base = cls._get_coefficients()
+        column = cls.STAT_ORDER.index(stat_name)
+        return np.asarray(attribute_matrix, dtype=np.float64) @ matrix[:, column] + base[column]
+    
     @classmethod
     def calculate_all_stats(cls, attributes: Dict[str, float]) -> Dict[str, float]:
         """Расчет всех характеристик"""
@@ -289,6 +367,24 @@ class StatCalculator:
             'toughness_recovery': cls.calculate_toughness_recovery(attributes)
         }
 
+StatCalculator.STAT_DEPENDENCIES.update({
+    attribute: frozenset(stat for stat, (_, coefficients) in StatCalculator.STAT_FORMULAS.items()
+                         if attribute in coefficients)
+    for attribute in StatCalculator.ATTRIBUTE_ORDER
+})
+
+@dataclass
+class EntityStatCache:
+    """Версионированный кэш характеристик сущности"""
+    attributes: Dict[str, float]
+    base_stats: Dict[str, float]
+    stats: Dict[str, float]
+    view: Mapping[str, float]
+    modifier_keys: Dict[str, Tuple[Tuple[str, float, bool], ...]] = field(default_factory=dict)
+    dirty: Set[str] = field(default_factory=set)
+    version: int = 0
+    last_access: float = field(default_factory=time.time)
+
 class AttributeSystem(BaseComponent):
     """Система атрибутов и характеристик"""
     
@@ -324,8 +420,8 @@ class AttributeSystem(BaseComponent):
             'update_time': 0.0
         }
         
-        # Кэш расчетов
-        self._stat_cache: Dict[str, Dict[str, float]] = {}
+        # Кэш расчетов: entity_id -> инкрементально обновляемые характеристики
+        self._entity_cache: Dict[str, EntityStatCache] = {}
         self._last_cleanup_time = time.time()
     
     def set_architecture_components(self, state_manager: StateManager):
@@ -430,7 +526,7 @@ class AttributeSystem(BaseComponent):
         try:
             logger.info("Уничтожение AttributeSystem...")
             
-            self._stat_cache.clear()
+            self._entity_cache.clear()
             
             self._state = LifecycleState.DESTROYED
             logger.info("AttributeSystem уничтожен успешно")
@@ -444,46 +540,179 @@ class AttributeSystem(BaseComponent):
         """Очистка кэша и устаревших модификаторов"""
         current_time = time.time()
         
-        # Очищаем кэш каждые 60 секунд
-        if current_time - self._last_cleanup_time >= self.system_settings['modifier_cleanup_interval']:
-            self._stat_cache.clear()
+        # Каждые 60 секунд вытесняем кэши сущностей, к которым не обращались
+        interval = self.system_settings['modifier_cleanup_interval']
+        if current_time - self._last_cleanup_time >= interval:
+            stale = [entity_id for entity_id, cache in self._entity_cache.items()
+                     if current_time - cache.last_access >= interval]
+            for entity_id in stale:
+                del self._entity_cache[entity_id]
             self._last_cleanup_time = current_time
-            logger.debug("Кэш характеристик очищен")
+            logger.debug(f"Кэш характеристик очищен: {len(stale)} сущностей")
     
     def calculate_stats_for_entity(self, entity_id: str, base_attributes: AttributeSet, 
                                  attribute_modifiers: List[AttributeModifier] = None,
-                                 stat_modifiers: List[StatModifier] = None) -> Dict[str, float]:
-        """Расчет характеристик для сущности"""
+                                 stat_modifiers: List[StatModifier] = None) -> Mapping[str, float]:
+        """Расчет характеристик для сущности
+        Пересчитываются только характеристики, зависящие от изменившихся атрибутов
+        или модификаторов. Возвращается стабильное read-only представление кэша"""
         try:
-            # Проверяем кэш
-            cache_key = f"{entity_id}_{hash(str(base_attributes))}"
-            if self.system_settings['cache_calculated_stats'] and cache_key in self._stat_cache:
-                self.system_stats['cache_hits'] += 1
-                return self._stat_cache[cache_key].copy()
-            
-            self.system_stats['cache_misses'] += 1
-            
             # Применяем модификаторы атрибутов
             final_attributes = self._apply_attribute_modifiers(base_attributes, attribute_modifiers or [])
+            modifier_keys = self._group_stat_modifiers(stat_modifiers or [])
+            
+            if not self.system_settings['cache_calculated_stats']:
+                self.system_stats['cache_misses'] += 1
+                self.system_stats['stat_calculations'] += 1
+                calculated_stats = self.stat_calculator.calculate_all_stats(final_attributes)
+                return {stat: self._apply_stat_modifier_keys(value, modifier_keys.get(stat, ()))
+                        for stat, value in calculated_stats.items()}
+            
+            cache = self._entity_cache.get(entity_id)
+            if cache is None:
+                return self._build_entity_cache(entity_id, final_attributes, modifier_keys).view
+            
+            cache.last_access = time.time()
+            dirty = cache.dirty
+            
+            # Атрибуты, изменившиеся с прошлого расчета, помечают зависимые характеристики
+            for attribute, value in final_attributes.items():
+                if cache.attributes.get(attribute) != value:
+                    cache.attributes[attribute] = value
+                    dirty |= StatCalculator.STAT_DEPENDENCIES.get(attribute, frozenset())
+            
+            for stat in dirty:
+                cache.base_stats[stat] = StatCalculator.calculate_stat(stat, cache.attributes)
+            
+            # Изменившиеся модификаторы характеристик
+            if modifier_keys != cache.modifier_keys:
+                for stat in modifier_keys.keys() | cache.modifier_keys.keys():
+                    if modifier_keys.get(stat) != cache.modifier_keys.get(stat):
+                        dirty.add(stat)
+                cache.modifier_keys = modifier_keys
+            
+            if not dirty:
+                self.system_stats['cache_hits'] += 1
+                return cache.view
             
-            # Рассчитываем базовые характеристики
-            calculated_stats = self.stat_calculator.calculate_all_stats(final_attributes)
-            
-            # Применяем модификаторы характеристик
-            final_stats = self._apply_stat_modifiers(calculated_stats, stat_modifiers or [])
+            self.system_stats['cache_misses'] += 1
+            self.system_stats['stat_calculations'] += 1
             
-            # Кэшируем результат
-            if self.system_settings['cache_calculated_stats']:
-                self._stat_cache[cache_key] = final_stats.copy()
+            changed = False
+            for stat in dirty:
+                if stat not in cache.base_stats:
+                    continue
+                value = self._apply_stat_modifier_keys(cache.base_stats[stat], modifier_keys.get(stat, ()))
+                if cache.stats.get(stat) != value:
+                    cache.stats[stat] = value
+                    changed = True
+            dirty.clear()
             
-            self.system_stats['stat_calculations'] += 1
+            if changed:
+                cache.version += 1
             
-            return final_stats
+            return cache.view
             
         except Exception as e:
             logger.error(f"Ошибка расчета характеристик для сущности {entity_id}: {e}")
             return {}
     
+    def _build_entity_cache(self, entity_id: str, final_attributes: Dict[str, float],
+                            modifier_keys: Dict[str, Tuple[Tuple[str, float, bool], ...]]) -> EntityStatCache:
+        """Полный расчет характеристик и создание кэша сущности"""
+        self.system_stats['cache_misses'] += 1
+        self.system_stats['stat_calculations'] += 1
+        
+        base_stats = self.stat_calculator.calculate_all_stats(final_attributes)
+        stats = {stat: self._apply_stat_modifier_keys(value, modifier_keys.get(stat, ()))
+                 for stat, value in base_stats.items()}
+        cache = EntityStatCache(
+            attributes=dict(final_attributes),
+            base_stats=base_stats,
+            stats=stats,
+            view=MappingProxyType(stats),
+            modifier_keys=modifier_keys,
+            version=1
+        )
+        self._entity_cache[entity_id] = cache
+        return cache
+    
+    def invalidate_entity(self, entity_id: str, attributes: Optional[Iterable[BaseAttribute]] = None):
+        """Пометка характеристик сущности как устаревших (все или зависящие от атрибутов)"""
+        cache = self._entity_cache.get(entity_id)
+        if cache is None:
+            return
+        if attributes is None:
+            cache.dirty.update(cache.base_stats)
+        else:
+            cache.dirty |= StatCalculator.dependent_stats(attribute.value for attribute in attributes)
+    
+    def remove_entity(self, entity_id: str):
+        """Удаление кэша характеристик сущности"""
+        self._entity_cache.pop(entity_id, None)
+    
+    def get_cached_stats(self, entity_id: str) -> Optional[Mapping[str, float]]:
+        """Последние рассчитанные характеристики сущности без пересчета"""
+        cache = self._entity_cache.get(entity_id)
+        return cache.view if cache else None
+    
+    def get_stats_version(self, entity_id: str) -> int:
+        """Версия характеристик сущности (растет при каждом изменении значений)"""
+        cache = self._entity_cache.get(entity_id)
+        return cache.version if cache else 0
+    
+    def calculate_stat_for_entities(self, stat: DerivedStat, entity_ids: List[str]) -> np.ndarray:
+        """Векторный пересчет одной характеристики для многих сущностей из кэша атрибутов
+        Сущности без кэша получают NaN"""
+        stat_name = stat.value
+        attribute_order = StatCalculator.ATTRIBUTE_ORDER
+        caches = [self._entity_cache.get(entity_id) for entity_id in entity_ids]
+        
+        attribute_matrix = np.zeros((len(entity_ids), len(attribute_order)), dtype=np.float64)
+        for row, cache in enumerate(caches):
+            if cache is not None:
+                attribute_matrix[row] = [cache.attributes.get(name, 0.0) for name in attribute_order]
+        
+        values = StatCalculator.calculate_stat_batch(stat_name, attribute_matrix)
+        for row, cache in enumerate(caches):
+            if cache is None:
+                values[row] = np.nan
+                continue
+            modifier_keys = cache.modifier_keys.get(stat_name)
+            if modifier_keys:
+                values[row] = self._apply_stat_modifier_keys(values[row], modifier_keys)
+        
+        self.system_stats['stat_calculations'] += 1
+        return values
+    
+    def _group_stat_modifiers(self, modifiers: List[StatModifier]
+                              ) -> Dict[str, Tuple[Tuple[str, float, bool], ...]]:
+        """Активные модификаторы характеристик, сгруппированные по характеристике"""
+        if not modifiers:
+            return {}
+        
+        current_time = time.time()
+        grouped: Dict[str, List[Tuple[str, float, bool]]] = {}
+        for modifier in modifiers:
+            # Проверяем, не истек ли модификатор
+            if modifier.duration > 0 and current_time - modifier.start_time > modifier.duration:
+                continue
+            grouped.setdefault(modifier.stat.value, []).append(
+                (modifier.modifier_id, modifier.value, modifier.is_percentage))
+            self.system_stats['modifier_applications'] += 1
+        
+        return {stat: tuple(keys) for stat, keys in grouped.items()}
+    
+    @staticmethod
+    def _apply_stat_modifier_keys(value: float, modifier_keys: Tuple[Tuple[str, float, bool], ...]) -> float:
+        """Применение модификаторов одной характеристики в порядке добавления"""
+        for _, modifier_value, is_percentage in modifier_keys:
+            if is_percentage:
+                value *= (1.0 + modifier_value / 100.0)
+            else:
+                value += modifier_value
+        return value
+    
     def _apply_attribute_modifiers(self, base_attributes: AttributeSet, 
                                  modifiers: List[AttributeModifier]) -> Dict[str, float]:
         """Применение модификаторов атрибутов"""
@@ -515,36 +744,6 @@ class AttributeSystem(BaseComponent):
             logger.error(f"Ошибка применения модификаторов атрибутов: {e}")
             return base_attributes.to_dict()
     
-    def _apply_stat_modifiers(self, base_stats: Dict[str, float], 
-                            modifiers: List[StatModifier]) -> Dict[str, float]:
-        """Применение модификаторов характеристик"""
-        try:
-            final_stats = base_stats.copy()
-            
-            current_time = time.time()
-            
-            for modifier in modifiers:
-                # Проверяем, не истек ли модификатор
-                if modifier.duration > 0 and current_time - modifier.start_time > modifier.duration:
-                    continue
-                
-                stat_name = modifier.stat.value
-                if stat_name in final_stats:
-                    if modifier.is_percentage:
-                        # Процентный модификатор
-                        final_stats[stat_name] *= (1.0 + modifier.value / 100.0)
-                    else:
-                        # Абсолютный модификатор
-                        final_stats[stat_name] += modifier.value
-                
-                self.system_stats['modifier_applications'] += 1
-            
-            return final_stats
-            
-        except Exception as e:
-            logger.error(f"Ошибка применения модификаторов характеристик: {e}")
-            return base_stats
-    
     def get_system_info(self) -> Dict[str, Any]:
         """Получение информации о системе"""
         return {
@@ -557,7 +756,7 @@ class AttributeSystem(BaseComponent):
             'modifier_applications': self.system_stats['modifier_applications'],
             'cache_hits': self.system_stats['cache_hits'],
             'cache_misses': self.system_stats['cache_misses'],
-            'cache_size': len(self._stat_cache),
+            'cache_size': len(self._entity_cache),
             'update_time': self.system_stats['update_time']
         }
     
@@ -585,6 +784,6 @@ class AttributeSystem(BaseComponent):
             'modifier_applications': self.system_stats['modifier_applications'],
             'cache_hits': self.system_stats['cache_hits'],
             'cache_misses': self.system_stats['cache_misses'],
-            'cache_size': len(self._stat_cache),
+            'cache_size': len(self._entity_cache),
             'update_time': self.system_stats['update_time']
         }
@@ -15,6 +15,7 @@ import random
 from src.core.architecture import BaseComponent, ComponentType, Priority, LifecycleState
 from src.core.constants import DamageType, constants_manager, PROBABILITY_CONSTANTS, ToughnessType
 from src.core.state_manager import StateManager, StateType
+from src.core.spatial_index import SpatialHashGrid, get_spatial_index
 from src.systems.attributes.attribute_system import AttributeSystem, AttributeSet, AttributeModifier, StatModifier, BaseAttribute, DerivedStat
 
 logger = logging.getLogger(__name__)
@@ -131,6 +132,9 @@ class CombatSystem(BaseComponent):
         self.evolution_system = None
         self.ai_system = None
         
+        # Пространственный индекс сущностей (общий с AI системой)
+        self.spatial_index: SpatialHashGrid = get_spatial_index()
+        
         # Настройки системы
         self.system_settings = {
             'auto_calculate_stats_from_attributes': True,
@@ -577,6 +581,32 @@ class CombatSystem(BaseComponent):
         
         return toughness_mapping.get(attack_type, ToughnessType.PHYSICAL)
     
+    def find_targets_in_range(self, attacker_id: str, radius: float, k: Optional[int] = None,
+                              predicate: Optional[Callable[[str], bool]] = None) -> List[Tuple[str, float]]:
+        """Цели в радиусе от атакующего: (entity_id, расстояние) по возрастанию, не более k"""
+        try:
+            position = self.spatial_index.get_position(attacker_id)
+            if position is None:
+                return []
+            x, y, z = position
+            if k is not None:
+                return self.spatial_index.k_nearest(x, y, k, z, max_radius=radius,
+                                                    predicate=predicate, exclude=attacker_id)
+            return self.spatial_index.query_radius(x, y, radius, z, predicate=predicate, exclude=attacker_id)
+            
+        except Exception as e:
+            logger.error(f"Ошибка поиска целей для {attacker_id}: {e}")
+            return []
+    
+    def find_nearest_target(self, attacker_id: str, max_range: Optional[float] = None,
+                            predicate: Optional[Callable[[str], bool]] = None) -> Optional[Tuple[str, float]]:
+        """Ближайшая цель атакующего"""
+        try:
+            return self.spatial_index.nearest_to_entity(attacker_id, max_radius=max_range, predicate=predicate)
+        except Exception as e:
+            logger.error(f"Ошибка поиска ближайшей цели для {attacker_id}: {e}")
+            return None
+    
     def start_combat_session(self, session_id: str, participants: List[str], 
                            combat_type: CombatType = CombatType.REAL_TIME) -> bool:
         """Начало сессии боя"""
@@ -5,13 +5,15 @@
 import json
 import logging
 import os
+import random
 import sqlite3
 import threading
 import time
 import uuid
-from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import Future, InvalidStateError, ProcessPoolExecutor, as_completed
+from contextlib import contextmanager
 from dataclasses import dataclass, field, asdict
-from typing import Dict, List, Optional, Any, Tuple
+from typing import Callable, Dict, Iterator, List, Optional, Any, Tuple
 from datetime import datetime
 
 from ...core.constants import (
@@ -113,19 +115,101 @@ class SkillContent:
     memory_requirement: int
 
 class ContentDatabase:
-    """База данных контента"""
+    """База данных контента
+    Каждый поток держит собственное постоянное соединение (WAL), запросы
+    переиспользуют подготовленные выражения из кэша sqlite3"""
+    
+    # Подготовленные выражения: одинаковый текст SQL берется из кэша соединения
+    SQL_SAVE_SESSION = '''
+        INSERT OR REPLACE INTO sessions 
+        (session_id, name, created_at, last_accessed, player_level, 
+         world_seed, content_hash, is_active, metadata)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+    '''
+    SQL_SAVE_CONTENT = '''
+        INSERT OR REPLACE INTO content 
+        (id, session_id, content_type, name, data, created_at,
+         level_requirement, evolution_requirement, memory_requirement,
+         rarity, is_unique)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+    '''
+    SQL_SELECT_SESSION = '''
+        SELECT session_id, name, created_at, last_accessed, player_level,
+               world_seed, content_hash, is_active, metadata
+        FROM sessions
+    '''
+    SQL_SELECT_CONTENT = '''
+        SELECT id, session_id, content_type, name, data, created_at,
+               level_requirement, evolution_requirement, memory_requirement,
+               rarity, is_unique
+        FROM content
+    '''
     
     def __init__(self, db_path: str = "content.db"):
         self.db_path = db_path
         self.lock = threading.Lock()
+        self._local = threading.local()
+        self._connections: List[sqlite3.Connection] = []
+        # In-memory база существует только в рамках одного соединения - оно общее для всех потоков
+        self._shared_connection: Optional[sqlite3.Connection] = None
+        self._shared_lock = threading.RLock()
         self._init_database()
     
+    def _connect(self) -> sqlite3.Connection:
+        """Открытие постоянного соединения с настройками производительности"""
+        # Соединение используется только своим потоком, но закрывается из close() любого потока
+        conn = sqlite3.connect(self.db_path, timeout=30.0, cached_statements=128,
+                               check_same_thread=False)
+        conn.execute('PRAGMA journal_mode=WAL')
+        conn.execute('PRAGMA synchronous=NORMAL')
+        with self.lock:
+            self._connections.append(conn)
+        return conn
+    
+    def _get_connection(self) -> sqlite3.Connection:
+        """Получение соединения текущего потока из пула"""
+        if self.db_path == ":memory:":
+            if self._shared_connection is None:
+                self._shared_connection = self._connect()
+            return self._shared_connection
+        
+        conn = getattr(self._local, "connection", None)
+        if conn is None:
+            conn = self._connect()
+            self._local.connection = conn
+        return conn
+    
+    @contextmanager
+    def transaction(self):
+        """Транзакция на соединении текущего потока
+        Вложенные вызовы присоединяются к внешней транзакции, фиксация - одна"""
+        conn = self._get_connection()
+        depth = getattr(self._local, "depth", 0)
+        shared = self.db_path == ":memory:"
+        if shared:
+            self._shared_lock.acquire()
+        try:
+            if depth == 0:
+                conn.execute('BEGIN')
+            self._local.depth = depth + 1
+            try:
+                yield conn.cursor()
+            except Exception:
+                if depth == 0:
+                    conn.rollback()
+                raise
+            else:
+                if depth == 0:
+                    conn.commit()
+            finally:
+                self._local.depth = depth
+        finally:
+            if shared:
+                self._shared_lock.release()
+    
     def _init_database(self):
         """Инициализация базы данных"""
-        with self.lock:
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
-            
+        with self.transaction() as cursor:
             # Таблица сессий
             cursor.execute('''
                 CREATE TABLE IF NOT EXISTS sessions (
@@ -163,33 +247,66 @@ class ContentDatabase:
             cursor.execute('CREATE INDEX IF NOT EXISTS idx_content_session ON content (session_id)')
             cursor.execute('CREATE INDEX IF NOT EXISTS idx_content_type ON content (content_type)')
             cursor.execute('CREATE INDEX IF NOT EXISTS idx_content_level ON content (level_requirement)')
-            
-            conn.commit()
-            conn.close()
-            
-            logger.info(f"База данных контента инициализирована: {self.db_path}")
+        
+        logger.info(f"База данных контента инициализирована: {self.db_path}")
+    
+    @staticmethod
+    def _session_params(session: SessionData) -> Tuple:
+        """Параметры выражения сохранения сессии"""
+        return (
+            session.session_id, session.name, session.created_at,
+            session.last_accessed, session.player_level, session.world_seed,
+            session.content_hash, session.is_active, json.dumps(session.metadata)
+        )
+    
+    @staticmethod
+    def _content_params(content: ContentItem) -> Tuple:
+        """Параметры выражения сохранения контента"""
+        return (
+            content.id, content.session_id, content.content_type,
+            content.name, json.dumps(content.data), content.created_at,
+            content.level_requirement, content.evolution_requirement,
+            content.memory_requirement, content.rarity, content.is_unique
+        )
+    
+    @staticmethod
+    def _row_to_session(row: Tuple) -> SessionData:
+        """Преобразование строки таблицы в SessionData"""
+        return SessionData(
+            session_id=row[0],
+            name=row[1],
+            created_at=row[2],
+            last_accessed=row[3],
+            player_level=row[4],
+            world_seed=row[5],
+            content_hash=row[6],
+            is_active=bool(row[7]),
+            metadata=json.loads(row[8]) if row[8] else {}
+        )
+    
+    @staticmethod
+    def _row_to_content(row: Tuple) -> ContentItem:
+        """Преобразование строки таблицы в ContentItem"""
+        return ContentItem(
+            id=row[0],
+            session_id=row[1],
+            content_type=row[2],
+            name=row[3],
+            data=json.loads(row[4]),
+            created_at=row[5],
+            level_requirement=row[6],
+            evolution_requirement=row[7],
+            memory_requirement=row[8],
+            rarity=row[9],
+            is_unique=bool(row[10])
+        )
     
     def save_session(self, session: SessionData) -> bool:
         """Сохранение сессии"""
         try:
-            with self.lock:
-                conn = sqlite3.connect(self.db_path)
-                cursor = conn.cursor()
-                
-                cursor.execute('''
-                    INSERT OR REPLACE INTO sessions 
-                    (session_id, name, created_at, last_accessed, player_level, 
-                     world_seed, content_hash, is_active, metadata)
-                    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
-                ''', (
-                    session.session_id, session.name, session.created_at,
-                    session.last_accessed, session.player_level, session.world_seed,
-                    session.content_hash, session.is_active, json.dumps(session.metadata)
-                ))
-                
-                conn.commit()
-                conn.close()
-                return True
+            with self.transaction() as cursor:
+                cursor.execute(self.SQL_SAVE_SESSION, self._session_params(session))
+            return True
                 
         except Exception as e:
             logger.error(f"Ошибка сохранения сессии: {e}")
@@ -198,32 +315,11 @@ class ContentDatabase:
     def load_session(self, session_id: str) -> Optional[SessionData]:
         """Загрузка сессии"""
         try:
-            with self.lock:
-                conn = sqlite3.connect(self.db_path)
-                cursor = conn.cursor()
-                
-                cursor.execute('''
-                    SELECT session_id, name, created_at, last_accessed, player_level,
-                           world_seed, content_hash, is_active, metadata
-                    FROM sessions WHERE session_id = ?
-                ''', (session_id,))
-                
+            with self.transaction() as cursor:
+                cursor.execute(self.SQL_SELECT_SESSION + ' WHERE session_id = ?', (session_id,))
                 row = cursor.fetchone()
-                conn.close()
-                
-                if row:
-                    return SessionData(
-                        session_id=row[0],
-                        name=row[1],
-                        created_at=row[2],
-                        last_accessed=row[3],
-                        player_level=row[4],
-                        world_seed=row[5],
-                        content_hash=row[6],
-                        is_active=bool(row[7]),
-                        metadata=json.loads(row[8]) if row[8] else {}
-                    )
-                return None
+            
+            return self._row_to_session(row) if row else None
                 
         except Exception as e:
             logger.error(f"Ошибка загрузки сессии: {e}")
@@ -232,33 +328,12 @@ class ContentDatabase:
     def get_all_sessions(self) -> List[SessionData]:
         """Получение всех сессий"""
         try:
-            with self.lock:
-                conn = sqlite3.connect(self.db_path)
-                cursor = conn.cursor()
-                
-                cursor.execute('''
-                    SELECT session_id, name, created_at, last_accessed, player_level,
-                           world_seed, content_hash, is_active, metadata
-                    FROM sessions WHERE is_active = 1
-                    ORDER BY last_accessed DESC
-                ''')
-                
-                sessions = []
-                for row in cursor.fetchall():
-                    sessions.append(SessionData(
-                        session_id=row[0],
-                        name=row[1],
-                        created_at=row[2],
-                        last_accessed=row[3],
-                        player_level=row[4],
-                        world_seed=row[5],
-                        content_hash=row[6],
-                        is_active=bool(row[7]),
-                        metadata=json.loads(row[8]) if row[8] else {}
-                    ))
-                
-                conn.close()
-                return sessions
+            with self.transaction() as cursor:
+                cursor.execute(self.SQL_SELECT_SESSION +
+                               ' WHERE is_active = 1 ORDER BY last_accessed DESC')
+                rows = cursor.fetchall()
+            
+            return [self._row_to_session(row) for row in rows]
                 
         except Exception as e:
             logger.error(f"Ошибка получения сессий: {e}")
@@ -267,75 +342,57 @@ class ContentDatabase:
     def save_content(self, content: ContentItem) -> bool:
         """Сохранение контента"""
         try:
-            with self.lock:
-                conn = sqlite3.connect(self.db_path)
-                cursor = conn.cursor()
-                
-                cursor.execute('''
-                    INSERT OR REPLACE INTO content 
-                    (id, session_id, content_type, name, data, created_at,
-                     level_requirement, evolution_requirement, memory_requirement,
-                     rarity, is_unique)
-                    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-                ''', (
-                    content.id, content.session_id, content.content_type,
-                    content.name, json.dumps(content.data), content.created_at,
-                    content.level_requirement, content.evolution_requirement,
-                    content.memory_requirement, content.rarity, content.is_unique
-                ))
+            with self.transaction() as cursor:
+                cursor.execute(self.SQL_SAVE_CONTENT, self._content_params(content))
+            return True
                 
-                conn.commit()
-                conn.close()
+        except Exception as e:
+            logger.error(f"Ошибка сохранения контента: {e}")
+            return False
+    
+    def save_content_bulk(self, items: List[ContentItem]) -> bool:
+        """Сохранение набора контента одним executemany в одной транзакции"""
+        try:
+            if not items:
                 return True
+            
+            with self.transaction() as cursor:
+                cursor.executemany(self.SQL_SAVE_CONTENT,
+                                   [self._content_params(item) for item in items])
+            return True
                 
         except Exception as e:
-            logger.error(f"Ошибка сохранения контента: {e}")
+            logger.error(f"Ошибка пакетного сохранения контента: {e}")
+            return False
+    
+    def save_session_with_content(self, session: SessionData, items: List[ContentItem]) -> bool:
+        """Атомарное сохранение сессии вместе со сгенерированным контентом"""
+        try:
+            with self.transaction() as cursor:
+                cursor.execute(self.SQL_SAVE_SESSION, self._session_params(session))
+                cursor.executemany(self.SQL_SAVE_CONTENT,
+                                   [self._content_params(item) for item in items])
+            return True
+                
+        except Exception as e:
+            logger.error(f"Ошибка сохранения сессии с контентом: {e}")
             return False
     
     def load_session_content(self, session_id: str, content_type: Optional[str] = None) -> List[ContentItem]:
         """Загрузка контента сессии"""
         try:
-            with self.lock:
-                conn = sqlite3.connect(self.db_path)
-                cursor = conn.cursor()
-                
+            with self.transaction() as cursor:
                 if content_type:
-                    cursor.execute('''
-                        SELECT id, session_id, content_type, name, data, created_at,
-                               level_requirement, evolution_requirement, memory_requirement,
-                               rarity, is_unique
-                        FROM content 
-                        WHERE session_id = ? AND content_type = ?
-                        ORDER BY created_at DESC
-                    ''', (session_id, content_type))
+                    cursor.execute(self.SQL_SELECT_CONTENT +
+                                   ' WHERE session_id = ? AND content_type = ? ORDER BY created_at DESC',
+                                   (session_id, content_type))
                 else:
-                    cursor.execute('''
-                        SELECT id, session_id, content_type, name, data, created_at,
-                               level_requirement, evolution_requirement, memory_requirement,
-                               rarity, is_unique
-                        FROM content 
-                        WHERE session_id = ?
-                        ORDER BY created_at DESC
-                    ''', (session_id,))
-                
-                content_items = []
-                for row in cursor.fetchall():
-                    content_items.append(ContentItem(
-                        id=row[0],
-                        session_id=row[1],
-                        content_type=row[2],
-                        name=row[3],
-                        data=json.loads(row[4]),
-                        created_at=row[5],
-                        level_requirement=row[6],
-                        evolution_requirement=row[7],
-                        memory_requirement=row[8],
-                        rarity=row[9],
-                        is_unique=bool(row[10])
-                    ))
-                
-                conn.close()
-                return content_items
+                    cursor.execute(self.SQL_SELECT_CONTENT +
+                                   ' WHERE session_id = ? ORDER BY created_at DESC',
+                                   (session_id,))
+                rows = cursor.fetchall()
+            
+            return [self._row_to_content(row) for row in rows]
                 
         except Exception as e:
             logger.error(f"Ошибка загрузки контента: {e}")
@@ -344,30 +401,51 @@ class ContentDatabase:
     def delete_session(self, session_id: str) -> bool:
         """Удаление сессии и всего её контента"""
         try:
-            with self.lock:
-                conn = sqlite3.connect(self.db_path)
-                cursor = conn.cursor()
-                
+            with self.transaction() as cursor:
                 # Удаление контента сессии
                 cursor.execute('DELETE FROM content WHERE session_id = ?', (session_id,))
                 
                 # Удаление сессии
                 cursor.execute('DELETE FROM sessions WHERE session_id = ?', (session_id,))
-                
-                conn.commit()
-                conn.close()
-                
-                logger.info(f"Сессия {session_id} удалена")
-                return True
+            
+            logger.info(f"Сессия {session_id} удалена")
+            return True
                 
         except Exception as e:
             logger.error(f"Ошибка удаления сессии: {e}")
             return False
+    
+    def close(self):
+        """Закрытие всех соединений пула"""
+        with self.lock:
+            connections, self._connections = self._connections, []
+        for conn in connections:
+            try:
+                conn.close()
+            except Exception as e:
+                logger.warning(f"Ошибка закрытия соединения: {e}")
+        self._local = threading.local()
+        self._shared_connection = None
+
+# Задача генерации одного элемента: (тип контента, сессия, уровень, сид, индекс)
+ContentTask = Tuple[str, str, int, int, int]
+
+# Диапазоны количества элементов по типам контента
+CONTENT_COUNT_RANGES: Dict[str, Tuple[int, int]] = {
+    "bosses": (3, 8),
+    "weapons": (10, 25),
+    "jewelry": (8, 20),
+    "skills": (15, 30)
+}
 
 class ContentGenerator:
-    """Генератор контента"""
+    """Генератор контента
+    Генераторы элементов - чистые функции (сессия, уровень, сид): у каждого элемента
+    свой сид и свой экземпляр Random, поэтому результат не зависит от того,
+    в каком процессе и в каком порядке элементы сгенерированы"""
     
-    def __init__(self):
+    def __init__(self, max_workers: Optional[int] = None, parallel: bool = True,
+                 chunk_size: int = 8):
         self.constants = constants_manager
         self.content_constants = CONTENT_GENERATION_CONSTANTS
         self.session_constants = SESSION_GENERATION_CONSTANTS
@@ -376,62 +454,37 @@ class ContentGenerator:
         self._content_cache = {}
         self._cache_lock = threading.Lock()
         
+        # Пул процессов для параллельной генерации (создается при первом использовании)
+        self.parallel = parallel
+        self.max_workers = max_workers or max(1, min(4, (os.cpu_count() or 1)))
+        self.chunk_size = max(1, chunk_size)
+        self._process_pool: Optional[ProcessPoolExecutor] = None
+        self._pool_lock = threading.Lock()
+        
         logger.info("Генератор контента инициализирован")
     
-    def generate_session_content(self, session_id: str, player_level: int, 
-                               world_seed: int, content_types: List[str]) -> List[ContentItem]:
-        """Генерация контента для сессии"""
-        try:
-            content_items = []
-            
-            with ThreadPoolExecutor(max_workers=4) as executor:
-                futures = []
-                
-                for content_type in content_types:
-                    if content_type == "bosses":
-                        futures.append(
-                            executor.submit(self._generate_bosses, session_id, player_level, world_seed)
-                        )
-                    elif content_type == "weapons":
-                        futures.append(
-                            executor.submit(self._generate_weapons, session_id, player_level, world_seed)
-                        )
-                    elif content_type == "jewelry":
-                        futures.append(
-                            executor.submit(self._generate_jewelry, session_id, player_level, world_seed)
-                        )
-                    elif content_type == "skills":
-                        futures.append(
-                            executor.submit(self._generate_skills, session_id, player_level, world_seed)
-                        )
-                
-                # Сбор результатов
-                for future in futures:
-                    try:
-                        result = future.result(timeout=self.session_constants["content_generation_timeout"])
-                        content_items.extend(result)
-                    except Exception as e:
-                        logger.error(f"Ошибка генерации контента: {e}")
-            
-            logger.info(f"Сгенерировано {len(content_items)} элементов контента для сессии {session_id}")
-            return content_items
-            
-        except Exception as e:
-            logger.error(f"Ошибка генерации контента сессии: {e}")
-            return []
+    # - Планирование
     
-    def _generate_bosses(self, session_id: str, player_level: int, world_seed: int) -> List[ContentItem]:
-        """Генерация боссов"""
-        import random
-        random.seed(world_seed)
-        
-        bosses = []
-        boss_count = random.randint(3, 8)
+    def plan_session_content(self, session_id: str, player_level: int,
+                             world_seed: int, content_types: List[str]) -> List[ContentTask]:
+        """Список задач генерации: количество элементов каждого типа определяется сидом мира"""
+        tasks: List[ContentTask] = []
+        for content_type in content_types:
+            count_range = CONTENT_COUNT_RANGES.get(content_type)
+            if count_range is None:
+                continue
+            count = random.Random(world_seed).randint(*count_range)
+            tasks.extend((content_type, session_id, player_level, world_seed + i, i) for i in range(count))
+        return tasks
+    
+    def create_content_item(self, task: ContentTask) -> ContentItem:
+        """Генерация одного элемента контента по задаче"""
+        content_type, session_id, player_level, seed, index = task
         
-        for i in range(boss_count):
-            boss = self._create_boss_content(session_id, player_level, world_seed + i)
-            content_item = ContentItem(
-                id=f"boss_{session_id}_{i}",
+        if content_type == "bosses":
+            boss = self._create_boss_content(session_id, player_level, seed)
+            return ContentItem(
+                id=f"boss_{session_id}_{index}",
                 session_id=session_id,
                 content_type="boss",
                 name=boss.name,
@@ -442,22 +495,11 @@ class ContentGenerator:
                 memory_requirement=boss.memory_capacity,
                 rarity="rare" if boss.evolution_stage > 2 else "uncommon"
             )
-            bosses.append(content_item)
-        
-        return bosses
-    
-    def _generate_weapons(self, session_id: str, player_level: int, world_seed: int) -> List[ContentItem]:
-        """Генерация оружия"""
-        import random
-        random.seed(world_seed)
         
-        weapons = []
-        weapon_count = random.randint(10, 25)
-        
-        for i in range(weapon_count):
-            weapon = self._create_weapon_content(session_id, player_level, world_seed + i)
-            content_item = ContentItem(
-                id=f"weapon_{session_id}_{i}",
+        if content_type == "weapons":
+            weapon = self._create_weapon_content(session_id, player_level, seed)
+            return ContentItem(
+                id=f"weapon_{session_id}_{index}",
                 session_id=session_id,
                 content_type="weapon",
                 name=weapon.name,
@@ -468,22 +510,11 @@ class ContentGenerator:
                 memory_requirement=0,
                 rarity=weapon.rarity
             )
-            weapons.append(content_item)
-        
-        return weapons
-    
-    def _generate_jewelry(self, session_id: str, player_level: int, world_seed: int) -> List[ContentItem]:
-        """Генерация украшений"""
-        import random
-        random.seed(world_seed)
-        
-        jewelry = []
-        jewelry_count = random.randint(8, 20)
         
-        for i in range(jewelry_count):
-            jewelry_item = self._create_jewelry_content(session_id, player_level, world_seed + i)
-            content_item = ContentItem(
-                id=f"jewelry_{session_id}_{i}",
+        if content_type == "jewelry":
+            jewelry_item = self._create_jewelry_content(session_id, player_level, seed)
+            return ContentItem(
+                id=f"jewelry_{session_id}_{index}",
                 session_id=session_id,
                 content_type="jewelry",
                 name=jewelry_item.name,
@@ -494,22 +525,11 @@ class ContentGenerator:
                 memory_requirement=0,
                 rarity=jewelry_item.rarity
             )
-            jewelry.append(content_item)
         
-        return jewelry
-    
-    def _generate_skills(self, session_id: str, player_level: int, world_seed: int) -> List[ContentItem]:
-        """Генерация навыков"""
-        import random
-        random.seed(world_seed)
-        
-        skills = []
-        skill_count = random.randint(15, 30)
-        
-        for i in range(skill_count):
-            skill = self._create_skill_content(session_id, player_level, world_seed + i)
-            content_item = ContentItem(
-                id=f"skill_{session_id}_{i}",
+        if content_type == "skills":
+            skill = self._create_skill_content(session_id, player_level, seed)
+            return ContentItem(
+                id=f"skill_{session_id}_{index}",
                 session_id=session_id,
                 content_type="skill",
                 name=skill.name,
@@ -520,36 +540,198 @@ class ContentGenerator:
                 memory_requirement=skill.memory_requirement,
                 rarity="rare" if skill.evolution_requirement > 0 else "common"
             )
-            skills.append(content_item)
         
-        return skills
+        raise ValueError(f"Неизвестный тип контента: {content_type}")
+    
+    # - Генерация
+    
+    def generate_session_content(self, session_id: str, player_level: int, 
+                               world_seed: int, content_types: List[str]) -> List[ContentItem]:
+        """Генерация контента для сессии (порядок элементов не зависит от режима)"""
+        try:
+            tasks = self.plan_session_content(session_id, player_level, world_seed, content_types)
+            if self.parallel and len(tasks) > self.chunk_size:
+                order = {task: position for position, task in enumerate(tasks)}
+                content_items = [None] * len(tasks)
+                for task, item in self._iter_parallel(tasks):
+                    content_items[order[task]] = item
+                content_items = [item for item in content_items if item is not None]
+            else:
+                content_items = self._generate_sequential(tasks)
+            
+            logger.info(f"Сгенерировано {len(content_items)} элементов контента для сессии {session_id}")
+            return content_items
+            
+        except Exception as e:
+            logger.error(f"Ошибка генерации контента сессии: {e}")
+            return []
+    
+    def iter_session_content(self, session_id: str, player_level: int,
+                             world_seed: int, content_types: List[str]) -> Iterator[ContentItem]:
+        """Элементы контента по мере готовности (порядок не гарантирован)"""
+        tasks = self.plan_session_content(session_id, player_level, world_seed, content_types)
+        if self.parallel and len(tasks) > self.chunk_size:
+            for _, item in self._iter_parallel(tasks):
+                yield item
+        else:
+            yield from self._generate_sequential(tasks)
+    
+    def submit_session_content(self, session_id: str, player_level: int, world_seed: int,
+                               content_types: List[str],
+                               on_item: Optional[Callable[[ContentItem], None]] = None) -> "Future[List[ContentItem]]":
+        """Фоновая генерация без блокировки вызывающего потока
+        on_item вызывается для каждого элемента по мере готовности (из потока пула);
+        возвращаемый Future завершается полным списком в порядке плана"""
+        result: "Future[List[ContentItem]]" = Future()
+        tasks = self.plan_session_content(session_id, player_level, world_seed, content_types)
+        chunks = [tasks[i:i + self.chunk_size] for i in range(0, len(tasks), self.chunk_size)]
+        if not chunks:
+            result.set_result([])
+            return result
+        
+        pool = self._get_process_pool() if self.parallel else None
+        if pool is None:
+            try:
+                items = self._generate_sequential(tasks)
+                if on_item:
+                    for item in items:
+                        on_item(item)
+                result.set_result(items)
+            except Exception as e:
+                result.set_exception(e)
+            return result
+        
+        chunk_results: List[Optional[List[ContentItem]]] = [None] * len(chunks)
+        remaining = [len(chunks)]
+        lock = threading.Lock()
+        
+        def chunk_done(position: int, future: Future):
+            try:
+                items = future.result()
+            except Exception as e:
+                # Пакет с упавшим воркером перегенерируется в текущем процессе
+                logger.error(f"Ошибка генерации контента: {e}")
+                items = [] if result.cancelled() else self._generate_sequential(chunks[position])
+            if on_item:
+                for item in items:
+                    try:
+                        on_item(item)
+                    except Exception as e:
+                        logger.error(f"Ошибка в обработчике контента: {e}")
+            with lock:
+                chunk_results[position] = items
+                remaining[0] -= 1
+                finished = remaining[0] == 0
+            if finished:
+                try:
+                    result.set_result([item for items in chunk_results for item in items])
+                except InvalidStateError:
+                    # Результат уже не нужен (Future отменен)
+                    pass
+        
+        try:
+            for position, chunk in enumerate(chunks):
+                future = pool.submit(_generate_content_chunk, chunk)
+                future.add_done_callback(lambda done, position=position: chunk_done(position, done))
+        except Exception as e:
+            logger.error(f"Ошибка постановки генерации контента: {e}")
+            if not result.done():
+                result.set_exception(e)
+        return result
+    
+    def _generate_sequential(self, tasks: List[ContentTask]) -> List[ContentItem]:
+        content_items = []
+        for task in tasks:
+            try:
+                content_items.append(self.create_content_item(task))
+            except Exception as e:
+                logger.error(f"Ошибка генерации контента {task[0]}: {e}")
+        return content_items
+    
+    def _iter_parallel(self, tasks: List[ContentTask]) -> Iterator[Tuple[ContentTask, ContentItem]]:
+        """Пары (задача, элемент) по мере завершения пакетов в пуле процессов"""
+        pool = self._get_process_pool()
+        if pool is None:
+            for task in tasks:
+                yield task, self.create_content_item(task)
+            return
+        
+        timeout = self.session_constants.get("content_generation_timeout")
+        futures = {pool.submit(_generate_content_chunk, tasks[i:i + self.chunk_size]): tasks[i:i + self.chunk_size]
+                   for i in range(0, len(tasks), self.chunk_size)}
+        for future in as_completed(futures, timeout=timeout):
+            try:
+                items = future.result()
+            except Exception as e:
+                logger.error(f"Ошибка генерации контента: {e}")
+                for task in futures[future]:
+                    try:
+                        yield task, self.create_content_item(task)
+                    except Exception as e:
+                        logger.error(f"Ошибка генерации контента {task[0]}: {e}")
+                continue
+            yield from zip(futures[future], items)
+    
+    def _get_process_pool(self) -> Optional[ProcessPoolExecutor]:
+        """Пул процессов; при недоступности - None и последовательная генерация"""
+        with self._pool_lock:
+            if self._process_pool is None and self.parallel:
+                try:
+                    self._process_pool = ProcessPoolExecutor(max_workers=self.max_workers)
+                except Exception as e:
+                    logger.warning(f"Пул процессов недоступен, генерация в текущем потоке: {e}")
+                    self.parallel = False
+            return self._process_pool
+    
+    def shutdown(self, wait: bool = True):
+        """Остановка пула процессов"""
+        with self._pool_lock:
+            if self._process_pool is not None:
+                self._process_pool.shutdown(wait=wait, cancel_futures=not wait)
+                self._process_pool = None
+    
+    def _generate_bosses(self, session_id: str, player_level: int, world_seed: int) -> List[ContentItem]:
+        """Генерация боссов"""
+        return self._generate_sequential(self.plan_session_content(session_id, player_level, world_seed, ["bosses"]))
+    
+    def _generate_weapons(self, session_id: str, player_level: int, world_seed: int) -> List[ContentItem]:
+        """Генерация оружия"""
+        return self._generate_sequential(self.plan_session_content(session_id, player_level, world_seed, ["weapons"]))
+    
+    def _generate_jewelry(self, session_id: str, player_level: int, world_seed: int) -> List[ContentItem]:
+        """Генерация украшений"""
+        return self._generate_sequential(self.plan_session_content(session_id, player_level, world_seed, ["jewelry"]))
+    
+    def _generate_skills(self, session_id: str, player_level: int, world_seed: int) -> List[ContentItem]:
+        """Генерация навыков"""
+        return self._generate_sequential(self.plan_session_content(session_id, player_level, world_seed, ["skills"]))
     
     def _create_boss_content(self, session_id: str, player_level: int, seed: int) -> BossContent:
         """Создание контента босса"""
-        import random
-        random.seed(seed)
+        # Собственный генератор элемента: глобальное состояние random не затрагивается
+        rng = random.Random(seed)
         
         # Базовые параметры с вариацией
         base_health = player_level * 100
         base_damage = player_level * 20
-        variation = 1.0 + random.uniform(-self.content_constants["boss_skills_variation"], 
+        variation = 1.0 + rng.uniform(-self.content_constants["boss_skills_variation"], 
                                        self.content_constants["boss_skills_variation"])
         
-        boss_level = max(1, int(player_level * random.uniform(0.8, 1.5)))
+        boss_level = max(1, int(player_level * rng.uniform(0.8, 1.5)))
         health = int(base_health * variation)
         damage = int(base_damage * variation)
         
         # Генерация навыков с вариацией
-        skill_count = random.randint(3, 6)
+        skill_count = rng.randint(3, 6)
         skills = []
         for i in range(skill_count):
-            skill_variation = 1.0 + random.uniform(-0.3, 0.3)
+            skill_variation = 1.0 + rng.uniform(-0.3, 0.3)
             skills.append({
                 "name": f"BossSkill_{session_id}_{i}",
                 "power": int(50 * skill_variation),
-                "cooldown": random.uniform(5.0, 15.0),
+                "cooldown": rng.uniform(5.0, 15.0),
                 "effects": ["damage", "debuff"],
-                "evolution_bonus": random.uniform(0.1, 0.5)
+                "evolution_bonus": rng.uniform(0.1, 0.5)
             })
         
         # Фазы босса
@@ -559,11 +741,11 @@ class ContentGenerator:
             {"name": "evolved", "health_threshold": 0.2, "damage_multiplier": 2.0}
         ]
         
-        evolution_stage = random.randint(1, 5)
-        memory_capacity = random.randint(100, 500)
+        evolution_stage = rng.randint(1, 5)
+        memory_capacity = rng.randint(100, 500)
         
         return BossContent(
-            name=f"Boss_{session_id}_{random.randint(1000, 9999)}",
+            name=f"Boss_{session_id}_{rng.randint(1000, 9999)}",
             level=boss_level,
             health=health,
             damage=damage,
@@ -578,149 +760,146 @@ class ContentGenerator:
                 "items": []
             },
             behavior={
-                "aggression": random.uniform(0.3, 0.8),
-                "intelligence": random.uniform(0.4, 0.9),
-                "adaptability": random.uniform(0.2, 0.7)
+                "aggression": rng.uniform(0.3, 0.8),
+                "intelligence": rng.uniform(0.4, 0.9),
+                "adaptability": rng.uniform(0.2, 0.7)
             }
         )
     
     def _create_weapon_content(self, session_id: str, player_level: int, seed: int) -> WeaponContent:
         """Создание контента оружия"""
-        import random
-        random.seed(seed)
+        rng = random.Random(seed)
         
         weapon_types = ["sword", "axe", "bow", "staff", "dagger", "hammer", "spear"]
-        weapon_type = random.choice(weapon_types)
+        weapon_type = rng.choice(weapon_types)
         
         # Базовые статы с вариацией
         base_damage = player_level * 15
-        variation = 1.0 + random.uniform(-self.content_constants["weapon_stats_variation"], 
+        variation = 1.0 + rng.uniform(-self.content_constants["weapon_stats_variation"], 
                                        self.content_constants["weapon_stats_variation"])
         damage = int(base_damage * variation)
         
         # Случайные статы
         stats = {}
         stat_types = ["strength", "dexterity", "intelligence", "constitution"]
-        for stat in random.sample(stat_types, random.randint(1, 3)):
-            stats[stat] = random.randint(1, 10)
+        for stat in rng.sample(stat_types, rng.randint(1, 3)):
+            stats[stat] = rng.randint(1, 10)
         
         # Навыки оружия
-        skill_count = random.randint(0, 2)
+        skill_count = rng.randint(0, 2)
         skills = []
         for i in range(skill_count):
             skills.append({
                 "name": f"WeaponSkill_{session_id}_{i}",
                 "effect": "damage_boost",
-                "value": random.randint(10, 30),
+                "value": rng.randint(10, 30),
                 "trigger": "on_hit"
             })
         
-        level_requirement = max(1, int(player_level * random.uniform(0.5, 1.2)))
-        rarity = random.choice(["common", "uncommon", "rare", "epic"])
+        level_requirement = max(1, int(player_level * rng.uniform(0.5, 1.2)))
+        rarity = rng.choice(["common", "uncommon", "rare", "epic"])
         
         return WeaponContent(
-            name=f"{weapon_type.capitalize()}_{session_id}_{random.randint(100, 999)}",
+            name=f"{weapon_type.capitalize()}_{session_id}_{rng.randint(100, 999)}",
             weapon_type=weapon_type,
             damage=damage,
-            damage_type=random.choice(["physical", "fire", "cold", "lightning"]),
+            damage_type=rng.choice(["physical", "fire", "cold", "lightning"]),
             stats=stats,
             skills=skills,
             level_requirement=level_requirement,
             rarity=rarity,
-            evolution_bonus=random.uniform(0.0, 0.3),
-            memory_bonus=random.uniform(0.0, 0.2)
+            evolution_bonus=rng.uniform(0.0, 0.3),
+            memory_bonus=rng.uniform(0.0, 0.2)
         )
     
     def _create_jewelry_content(self, session_id: str, player_level: int, seed: int) -> JewelryContent:
         """Создание контента украшений"""
-        import random
-        random.seed(seed)
+        rng = random.Random(seed)
         
         jewelry_types = ["ring", "necklace", "belt", "cloak"]
-        jewelry_type = random.choice(jewelry_types)
+        jewelry_type = rng.choice(jewelry_types)
         
         # Случайные статы
         stats = {}
         stat_types = ["strength", "dexterity", "intelligence", "constitution", "wisdom", "charisma"]
-        for stat in random.sample(stat_types, random.randint(1, 3)):
-            stats[stat] = random.randint(1, 8)
+        for stat in rng.sample(stat_types, rng.randint(1, 3)):
+            stats[stat] = rng.randint(1, 8)
         
         # Эффекты
-        effect_count = random.randint(0, 2)
+        effect_count = rng.randint(0, 2)
         effects = []
         for i in range(effect_count):
             effects.append({
                 "name": f"JewelryEffect_{session_id}_{i}",
-                "type": random.choice(["buff", "passive"]),
-                "value": random.randint(5, 20),
-                "duration": random.uniform(10.0, 60.0)
+                "type": rng.choice(["buff", "passive"]),
+                "value": rng.randint(5, 20),
+                "duration": rng.uniform(10.0, 60.0)
             })
         
         # Навыки
-        skill_count = random.randint(0, 1)
+        skill_count = rng.randint(0, 1)
         skills = []
         for i in range(skill_count):
             skills.append({
                 "name": f"JewelrySkill_{session_id}_{i}",
                 "effect": "utility",
-                "value": random.randint(10, 25),
-                "cooldown": random.uniform(30.0, 120.0)
+                "value": rng.randint(10, 25),
+                "cooldown": rng.uniform(30.0, 120.0)
             })
         
-        level_requirement = max(1, int(player_level * random.uniform(0.3, 1.0)))
-        rarity = random.choice(["common", "uncommon", "rare"])
+        level_requirement = max(1, int(player_level * rng.uniform(0.3, 1.0)))
+        rarity = rng.choice(["common", "uncommon", "rare"])
         
         return JewelryContent(
-            name=f"{jewelry_type.capitalize()}_{session_id}_{random.randint(100, 999)}",
+            name=f"{jewelry_type.capitalize()}_{session_id}_{rng.randint(100, 999)}",
             jewelry_type=jewelry_type,
             stats=stats,
             effects=effects,
             skills=skills,
             level_requirement=level_requirement,
             rarity=rarity,
-            evolution_bonus=random.uniform(0.0, 0.2),
-            memory_bonus=random.uniform(0.0, 0.3)
+            evolution_bonus=rng.uniform(0.0, 0.2),
+            memory_bonus=rng.uniform(0.0, 0.3)
         )
     
     def _create_skill_content(self, session_id: str, player_level: int, seed: int) -> SkillContent:
         """Создание контента навыка"""
-        import random
-        random.seed(seed)
+        rng = random.Random(seed)
         
         skill_types = ["combat", "survival", "social", "crafting", "evolution", "memory"]
-        skill_type = random.choice(skill_types)
+        skill_type = rng.choice(skill_types)
         
         # Базовые параметры с вариацией
         base_power = player_level * 25
-        variation = 1.0 + random.uniform(-self.content_constants["skill_stats_variation"], 
+        variation = 1.0 + rng.uniform(-self.content_constants["skill_stats_variation"], 
                                        self.content_constants["skill_stats_variation"])
         power = int(base_power * variation)
         
         # Масштабирование
         scaling = {}
         scaling_stats = ["strength", "intelligence", "evolution", "memory"]
-        for stat in random.sample(scaling_stats, random.randint(1, 2)):
-            scaling[stat] = random.uniform(0.5, 2.0)
+        for stat in rng.sample(scaling_stats, rng.randint(1, 2)):
+            scaling[stat] = rng.uniform(0.5, 2.0)
         
         # Эффекты
-        effect_count = random.randint(1, 3)
+        effect_count = rng.randint(1, 3)
         effects = []
         for i in range(effect_count):
             effects.append({
                 "name": f"SkillEffect_{session_id}_{i}",
-                "type": random.choice(["damage", "heal", "buff", "debuff"]),
-                "value": random.randint(20, 100),
-                "duration": random.uniform(5.0, 30.0)
+                "type": rng.choice(["damage", "heal", "buff", "debuff"]),
+                "value": rng.randint(20, 100),
+                "duration": rng.uniform(5.0, 30.0)
             })
         
-        cooldown = random.uniform(5.0, 45.0)
-        mana_cost = random.randint(10, 50)
-        level_requirement = max(1, int(player_level * random.uniform(0.4, 1.1)))
-        evolution_requirement = random.randint(0, 3)
-        memory_requirement = random.randint(0, 100)
+        cooldown = rng.uniform(5.0, 45.0)
+        mana_cost = rng.randint(10, 50)
+        level_requirement = max(1, int(player_level * rng.uniform(0.4, 1.1)))
+        evolution_requirement = rng.randint(0, 3)
+        memory_requirement = rng.randint(0, 100)
         
         return SkillContent(
-            name=f"Skill_{session_id}_{random.randint(1000, 9999)}",
+            name=f"Skill_{session_id}_{rng.randint(1000, 9999)}",
             skill_type=skill_type,
             description=f"A unique {skill_type} skill for session {session_id}",
             base_power=power,
@@ -733,9 +912,22 @@ class ContentGenerator:
             memory_requirement=memory_requirement
         )
 
+# Генератор рабочего процесса (создается один раз на процесс)
+_worker_generator: Optional[ContentGenerator] = None
+
+def _generate_content_chunk(tasks: List[ContentTask]) -> List[ContentItem]:
+    """Генерация пакета элементов в рабочем процессе"""
+    global _worker_generator
+    if _worker_generator is None:
+        _worker_generator = ContentGenerator(parallel=False)
+    return [_worker_generator.create_content_item(task) for task in tasks]
+
 class ContentSystem(BaseComponent):
     """Система контента"""
     
+    # Типы контента, генерируемого при переходе на новый уровень
+    LEVEL_CONTENT_TYPES = ["weapons", "jewelry", "skills"]
+    
     def __init__(self):
         super().__init__(
             component_id="content_system",
@@ -747,6 +939,11 @@ class ContentSystem(BaseComponent):
         self.current_session_id: Optional[str] = None
         self.session_cache: Dict[str, SessionData] = {}
         
+        # Контент уровней, сгенерированный заранее в фоне: (сессия, уровень) -> Future
+        self.prefetch_next_level = True
+        self._level_prefetch: Dict[Tuple[str, int], "Future[List[ContentItem]]"] = {}
+        self._prefetch_lock = threading.Lock()
+        
         logger.info("Система контента инициализирована")
     
     def _on_initialize(self) -> bool:
@@ -785,10 +982,6 @@ class ContentSystem(BaseComponent):
                 session_id, player_level, world_seed, content_types
             )
             
-            # Сохранение контента
-            for item in content_items:
-                self.database.save_content(item)
-            
             # Создание сессии
             session = SessionData(
                 session_id=session_id,
@@ -805,7 +998,9 @@ class ContentSystem(BaseComponent):
                 }
             )
             
-            self.database.save_session(session)
+            # Контент и сессия записываются одной транзакцией
+            if not self.database.save_session_with_content(session, content_items):
+                return None
             self.session_cache[session_id] = session
             
             logger.info(f"Создана сессия {session_id} с {len(content_items)} элементами контента")
@@ -858,29 +1053,71 @@ class ContentSystem(BaseComponent):
             if not session:
                 return []
             
-            # Генерация дополнительного контента
-            content_types = ["weapons", "jewelry", "skills"]
-            new_content = self.generator.generate_session_content(
-                self.current_session_id, level, session.world_seed + level, content_types
-            )
-            
-            # Сохранение нового контента
-            for item in new_content:
-                self.database.save_content(item)
+            # Генерация дополнительного контента (или результат фоновой предзагрузки)
+            with self._prefetch_lock:
+                prefetched = self._level_prefetch.pop((self.current_session_id, level), None)
+            new_content = None
+            if prefetched is not None:
+                try:
+                    new_content = prefetched.result(timeout=self.generator.session_constants.get("content_generation_timeout"))
+                except Exception as e:
+                    # Предзагрузка не удалась или не успела - уровень генерируется синхронно
+                    logger.warning(f"Предзагрузка контента уровня {level} недоступна: {e}")
+                    prefetched.cancel()
+            if new_content is None:
+                new_content = self.generator.generate_session_content(
+                    self.current_session_id, level, session.world_seed + level, self.LEVEL_CONTENT_TYPES
+                )
             
             # Обновление сессии
             session.player_level = level
             session.last_accessed = time.time()
             session.metadata["content_count"] = session.metadata.get("content_count", 0) + len(new_content)
-            self.database.save_session(session)
+            
+            # Новый контент и обновленная сессия записываются одной транзакцией
+            self.database.save_session_with_content(session, new_content)
             
             logger.info(f"Сгенерировано {len(new_content)} элементов контента для уровня {level}")
+            
+            # Следующий уровень готовится в фоне, пока игрок проходит текущий
+            if self.prefetch_next_level:
+                self.prefetch_level_content(level + 1)
             return new_content
             
         except Exception as e:
             logger.error(f"Ошибка генерации контента уровня: {e}")
             return []
     
+    def prefetch_level_content(self, level: int,
+                               on_item: Optional[Callable[[ContentItem], None]] = None) -> bool:
+        """Фоновая генерация контента уровня текущей сессии
+        Результат не сохраняется в базу до вызова generate_level_content для этого уровня"""
+        if not self.current_session_id:
+            return False
+        
+        try:
+            session = self.session_cache.get(self.current_session_id)
+            if not session:
+                return False
+            
+            key = (self.current_session_id, level)
+            with self._prefetch_lock:
+                if key in self._level_prefetch:
+                    return True
+                # Предзагрузки других сессий больше не нужны
+                for stale_key in [k for k in self._level_prefetch if k[0] != self.current_session_id]:
+                    self._level_prefetch.pop(stale_key).cancel()
+                self._level_prefetch[key] = self.generator.submit_session_content(
+                    self.current_session_id, level, session.world_seed + level,
+                    self.LEVEL_CONTENT_TYPES, on_item
+                )
+            logger.debug(f"Запущена предзагрузка контента уровня {level}")
+            return True
+            
+        except Exception as e:
+            logger.error(f"Ошибка предзагрузки контента уровня: {e}")
+            return False
+    
     def save_session_data(self, session_data: Dict[str, Any]) -> bool:
         """Сохранение данных сессии"""
         if not self.current_session_id:
@@ -955,5 +1192,20 @@ class ContentSystem(BaseComponent):
                 
         except Exception as e:
             logger.error(f"Ошибка обновления системы контента: {e}")
+    
+    def _on_destroy(self) -> bool:
+        """Уничтожение системы контента"""
+        try:
+            with self._prefetch_lock:
+                for future in self._level_prefetch.values():
+                    future.cancel()
+                self._level_prefetch.clear()
+            self.generator.shutdown(wait=False)
+            self.database.close()
+            self.session_cache.clear()
+            return True
+        except Exception as e:
+            logger.error(f"Ошибка уничтожения системы контента: {e}")
+            return False
 
 logger.info("Система контента загружена")
@@ -2,11 +2,13 @@
 """Система эффектов - баффы, дебаффы и визуальные эффекты
 Управление временными и постоянными эффектами для сущностей"""
 
-from dataclasses import dataclass, field
+from dataclasses import dataclass, field, replace
 from enum import Enum
 from pathlib import Path
 from typing import *
 from typing import Dict, List, Optional, Any, Tuple, Callable
+import heapq
+import itertools
 import logging
 import math
 import time
@@ -79,6 +81,8 @@ class ActiveEffect:
     is_active: bool = True
     last_tick: float = field(default_factory=time.time)
     tick_interval: float = 1.0
+    next_event_at: Optional[float] = None  # Время ближайшего тика или истечения
+    slot: int = field(default=-1, repr=False, compare=False)  # Индекс в списке сущности
 
 @dataclass
 class EffectTemplate:
@@ -109,6 +113,12 @@ class EffectSystem(BaseComponent):
         # Эффекты
         self.effect_templates: Dict[str, EffectTemplate] = {}
         self.active_effects: Dict[str, List[ActiveEffect]] = {}  # entity_id -> effects
+        self.effects_by_id: Dict[str, ActiveEffect] = {}  # effect_id -> активный эффект
+        
+        # Расписание событий: min-куча (время, порядковый номер, эффект)
+        self._event_queue: List[Tuple[float, int, ActiveEffect]] = []
+        self._event_counter = itertools.count()
+        self._effect_counter = itertools.count()
         
         # Статистика
         self.total_effects_applied: int = 0
@@ -288,14 +298,14 @@ class EffectSystem(BaseComponent):
             
             # Создание эффекта
             effect = Effect(
-                effect_id=f"{template_id}_{entity_id}_{int(time.time())}",
+                effect_id=f"{template_id}_{entity_id}_{int(time.time())}_{next(self._effect_counter)}",
                 name=template.name,
                 description=template.description,
                 effect_type=template.effect_type,
                 category=template.category,
                 duration=duration if duration is not None else template.base_duration,
                 modifiers=template.base_modifiers.copy(),
-                triggers=template.base_triggers.copy(),
+                triggers=[replace(trigger) for trigger in template.base_triggers],
                 visual_effects=template.visual_effects.copy(),
                 sound_effects=template.sound_effects.copy(),
                 icon_path=template.icon_path,
@@ -322,7 +332,11 @@ class EffectSystem(BaseComponent):
             if entity_id not in self.active_effects:
                 self.active_effects[entity_id] = []
             
-            self.active_effects[entity_id].append(active_effect)
+            effects = self.active_effects[entity_id]
+            active_effect.slot = len(effects)
+            effects.append(active_effect)
+            self.effects_by_id[effect.effect_id] = active_effect
+            self._schedule_effect(active_effect)
             
             # Обновление статистики
             self.total_effects_applied += 1
@@ -365,25 +379,31 @@ class EffectSystem(BaseComponent):
     def remove_effect(self, entity_id: str, effect_id: str) -> bool:
         """Удаление эффекта"""
         try:
-            if entity_id not in self.active_effects:
+            removed_effect = self.effects_by_id.get(effect_id)
+            if removed_effect is None or removed_effect.entity_id != entity_id:
                 return False
             
+            # Удаление за O(1): на место эффекта встает последний в списке
             effects = self.active_effects[entity_id]
-            for i, active_effect in enumerate(effects):
-                if active_effect.effect.effect_id == effect_id:
-                    removed_effect = effects.pop(i)
-                    
-                    # Обновление статистики
-                    self.total_effects_removed += 1
-                    
-                    # Вызов callback
-                    if self.on_effect_removed:
-                        self.on_effect_removed(entity_id, removed_effect)
-                    
-                    logger.info(f"Эффект {effect_id} удален с {entity_id}")
-                    return True
+            last_effect = effects.pop()
+            if last_effect is not removed_effect:
+                effects[removed_effect.slot] = last_effect
+                last_effect.slot = removed_effect.slot
+            removed_effect.slot = -1
             
-            return False
+            # Запись в расписании становится устаревшей и пропускается при извлечении
+            removed_effect.next_event_at = None
+            del self.effects_by_id[effect_id]
+            
+            # Обновление статистики
+            self.total_effects_removed += 1
+            
+            # Вызов callback
+            if self.on_effect_removed:
+                self.on_effect_removed(entity_id, removed_effect)
+            
+            logger.info(f"Эффект {effect_id} удален с {entity_id}")
+            return True
             
         except Exception as e:
             logger.error(f"Ошибка удаления эффекта: {e}")
@@ -485,40 +505,78 @@ class EffectSystem(BaseComponent):
         """Обновление системы эффектов"""
         try:
             current_time = time.time()
-            
-            # Обновление всех активных эффектов
-            for entity_id, effects in list(self.active_effects.items()):
-                effects_to_remove = []
+            queue = self._event_queue
+            
+            # Обрабатываются только эффекты, у которых наступил тик или истечение
+            while queue and queue[0][0] <= current_time:
+                event_time, _, active_effect = heapq.heappop(queue)
+                if active_effect.next_event_at != event_time:
+                    continue  # Устаревшая запись (эффект удален или перепланирован)
+                active_effect.next_event_at = None
                 
-                for active_effect in effects:
-                    if not active_effect.is_active:
-                        continue
-                    
-                    # Проверка истечения
-                    if active_effect.expires_at and current_time >= active_effect.expires_at:
-                        effects_to_remove.append(active_effect)
-                        continue
-                    
-                    # Обработка триггеров
-                    self._process_effect_triggers(active_effect, current_time)
+                if not active_effect.is_active:
+                    # Неактивный эффект не истекает и не тикает - проверяем его позже
+                    self._schedule_effect(active_effect, current_time + active_effect.tick_interval)
+                    continue
                 
-                # Удаление истекших эффектов
-                for effect_to_remove in effects_to_remove:
-                    self.remove_effect(entity_id, effect_to_remove.effect.effect_id)
+                # Проверка истечения
+                if active_effect.expires_at and current_time >= active_effect.expires_at:
+                    self.remove_effect(active_effect.entity_id, active_effect.effect.effect_id)
+                    continue
+                
+                # Обработка триггеров
+                self._process_effect_triggers(active_effect, current_time)
+                
+                # Следующее событие строго позже текущего времени, иначе цикл не завершится
+                next_time = self._next_event_time(active_effect)
+                if next_time is not None and next_time <= current_time:
+                    next_time = math.nextafter(current_time, math.inf)
+                self._schedule_effect(active_effect, next_time)
             
         except Exception as e:
             logger.error(f"Ошибка обновления системы эффектов: {e}")
     
+    def _next_event_time(self, active_effect: ActiveEffect) -> Optional[float]:
+        """Время ближайшего события эффекта: тика или истечения"""
+        next_time = active_effect.expires_at
+        for trigger in active_effect.effect.triggers:
+            if trigger.trigger_type != "tick":
+                continue
+            tick_time = self._tick_time(active_effect, trigger)
+            if next_time is None or tick_time < next_time:
+                next_time = tick_time
+        return next_time
+    
+    @staticmethod
+    def _tick_time(active_effect: ActiveEffect, trigger: EffectTrigger) -> float:
+        """Время тика триггера: одно выражение для расписания и для срабатывания"""
+        return max(active_effect.last_tick + active_effect.tick_interval,
+                   trigger.last_trigger + trigger.cooldown)
+    
+    def _schedule_effect(self, active_effect: ActiveEffect, event_time: Optional[float] = None):
+        """Постановка эффекта в расписание (предыдущая запись становится устаревшей)"""
+        if event_time is None:
+            event_time = self._next_event_time(active_effect)
+        active_effect.next_event_at = event_time
+        if event_time is not None:
+            heapq.heappush(self._event_queue, (event_time, next(self._event_counter), active_effect))
+    
+    def reschedule_effect(self, entity_id: str, effect_id: str) -> bool:
+        """Перепланирование эффекта после внешнего изменения expires_at или тиков"""
+        active_effect = self.effects_by_id.get(effect_id)
+        if active_effect is None or active_effect.entity_id != entity_id:
+            return False
+        self._schedule_effect(active_effect)
+        return True
+    
     def _process_effect_triggers(self, active_effect: ActiveEffect, current_time: float):
         """Обработка триггеров эффекта"""
         try:
             for trigger in active_effect.effect.triggers:
-                if current_time - trigger.last_trigger < trigger.cooldown:
-                    continue
-                
                 if trigger.trigger_type == "tick":
-                    # Обработка тиков
-                    if current_time - active_effect.last_tick >= active_effect.tick_interval:
+                    # Тик наступил, если его время из расписания уже прошло (без повторного
+                    # вычитания: current_time - last_tick может округлиться меньше интервала)
+                    if self._tick_time(active_effect, trigger) <= current_time:
                         active_effect.last_tick = current_time
                         trigger.last_trigger = current_time
                         
@@ -527,8 +585,12 @@ class EffectSystem(BaseComponent):
                             self.on_effect_tick(active_effect.entity_id, active_effect)
                         
                         logger.debug(f"Тик эффекта {active_effect.effect.name} для {active_effect.entity_id}")
+                    continue
+                
+                if current_time - trigger.last_trigger < trigger.cooldown:
+                    continue
                 
-                elif trigger.trigger_type == "on_hit":
+                if trigger.trigger_type == "on_hit":
                     # Обработка попаданий
                     pass
                 
@@ -556,7 +618,7 @@ class EffectSystem(BaseComponent):
                 category=template.category,
                 duration=duration,
                 modifiers=custom_modifiers,
-                triggers=template.base_triggers.copy(),
+                triggers=[replace(trigger) for trigger in template.base_triggers],
                 visual_effects=template.visual_effects.copy(),
                 sound_effects=template.sound_effects.copy(),
                 icon_path=template.icon_path
@@ -574,7 +636,8 @@ class EffectSystem(BaseComponent):
             return {
                 "total_effects_applied": self.total_effects_applied,
                 "total_effects_removed": self.total_effects_removed,
-                "active_effects_count": sum(len(effects) for effects in self.active_effects.values()),
+                "active_effects_count": len(self.effects_by_id),
+                "scheduled_events": len(self._event_queue),
                 "effect_templates_count": len(self.effect_templates),
                 "effect_statistics": self.effect_statistics.copy()
             }
@@ -593,6 +656,8 @@ class EffectSystem(BaseComponent):
             # Очистка данных
             self.effect_templates.clear()
             self.active_effects.clear()
+            self.effects_by_id.clear()
+            self._event_queue.clear()
             self.effect_statistics.clear()
             
             logger.info("Система эффектов очищена")
@@ -7,13 +7,18 @@ from enum import Enum
 from pathlib import Path
 from typing import *
 from typing import Dict, List, Optional, Any, Tuple, Callable
+import heapq
+import itertools
 import logging
 import math
+import threading
 import time
 import random
 import json
 import pickle
 
+import numpy as np
+
 from src.core.architecture import BaseComponent, ComponentType, Priority, LifecycleState
 from src.core.constants import MemoryType
 from src.core.state_manager import StateManager, StateType
@@ -59,6 +64,185 @@ class Memory:
     decay_rate: float = 0.01
     is_consolidated: bool = False
 
+class MemoryStore:
+    """Хранилище воспоминаний одного уровня памяти (столбцы NumPy)
+    Объекты Memory лежат в плотном списке, а числовые поля продублированы
+    в массивах того же порядка: распад, консолидация и выборка считаются масками"""
+    
+    COLUMNS = ("created_at", "last_accessed", "decay_rate", "importance")
+    
+    def __init__(self, initial_capacity: int = 64):
+        self._memories: List[Memory] = []
+        self._slots: Dict[str, int] = {}
+        self._columns: Dict[str, np.ndarray] = {
+            name: np.zeros(initial_capacity) for name in self.COLUMNS
+        }
+        
+        # Индексы слотов по типу и категории
+        self._type_index: Dict[MemoryType, Set[int]] = {}
+        self._category_index: Dict[MemoryCategory, Set[int]] = {}
+    
+    def __len__(self) -> int:
+        return len(self._memories)
+    
+    def __iter__(self):
+        return iter(list(self._memories))
+    
+    def __contains__(self, memory_id: str) -> bool:
+        return memory_id in self._slots
+    
+    def get(self, memory_id: str) -> Optional[Memory]:
+        slot = self._slots.get(memory_id)
+        return self._memories[slot] if slot is not None else None
+    
+    def column(self, name: str) -> np.ndarray:
+        """Представление столбца для занятых слотов"""
+        return self._columns[name][:len(self._memories)]
+    
+    def memories_at(self, slots: Iterable[int]) -> List[Memory]:
+        return [self._memories[int(slot)] for slot in slots]
+    
+    # - Изменение
+    
+    def add(self, memory: Memory) -> int:
+        """Добавление воспоминания; возвращает слот"""
+        if memory.memory_id in self._slots:
+            self.remove(memory.memory_id)
+        
+        slot = len(self._memories)
+        if slot >= len(self._columns["created_at"]):
+            for name, values in self._columns.items():
+                grown = np.zeros(max(2 * len(values), 16))
+                grown[:slot] = values[:slot]
+                self._columns[name] = grown
+        
+        self._memories.append(memory)
+        self._slots[memory.memory_id] = slot
+        self._write_columns(slot, memory)
+        self._index(slot, memory)
+        return slot
+    
+    def refresh(self, memory_id: str):
+        """Синхронизация столбцов после прямого изменения полей Memory"""
+        slot = self._slots.get(memory_id)
+        if slot is not None:
+            self._write_columns(slot, self._memories[slot])
+    
+    def remove(self, memory_id: str) -> Optional[Memory]:
+        slot = self._slots.get(memory_id)
+        return self._remove_slot(slot) if slot is not None else None
+    
+    def remove_slots(self, slots: Iterable[int]) -> List[Memory]:
+        """Удаление набора слотов (по убыванию, чтобы перестановки не сбивали индексы)"""
+        return [self._remove_slot(slot) for slot in sorted({int(s) for s in slots}, reverse=True)]
+    
+    def touch(self, slots: Iterable[int], current_time: float):
+        """Отметка доступа к воспоминаниям"""
+        last_accessed = self._columns["last_accessed"]
+        for slot in slots:
+            memory = self._memories[int(slot)]
+            memory.last_accessed = current_time
+            memory.access_count += 1
+            last_accessed[int(slot)] = current_time
+    
+    def clear(self):
+        self._memories.clear()
+        self._slots.clear()
+        self._type_index.clear()
+        self._category_index.clear()
+    
+    def _write_columns(self, slot: int, memory: Memory):
+        for name in self.COLUMNS:
+            self._columns[name][slot] = getattr(memory, name)
+    
+    def _index(self, slot: int, memory: Memory):
+        self._type_index.setdefault(memory.memory_type, set()).add(slot)
+        self._category_index.setdefault(memory.category, set()).add(slot)
+    
+    def _unindex(self, slot: int, memory: Memory):
+        self._type_index[memory.memory_type].discard(slot)
+        self._category_index[memory.category].discard(slot)
+    
+    def _remove_slot(self, slot: int) -> Memory:
+        """Удаление перестановкой последнего слота на место удаляемого"""
+        memory = self._memories[slot]
+        last = len(self._memories) - 1
+        self._unindex(slot, memory)
+        
+        if slot != last:
+            moved = self._memories[last]
+            self._unindex(last, moved)
+            self._memories[slot] = moved
+            for values in self._columns.values():
+                values[slot] = values[last]
+            self._slots[moved.memory_id] = slot
+            self._index(slot, moved)
+        
+        self._memories.pop()
+        del self._slots[memory.memory_id]
+        return memory
+    
+    # - Выборки
+    
+    def select(self, memory_type: Optional[MemoryType] = None,
+               category: Optional[MemoryCategory] = None) -> np.ndarray:
+        """Слоты по индексам типа и категории"""
+        if memory_type is None and category is None:
+            return np.arange(len(self._memories))
+        
+        candidates: Optional[Set[int]] = None
+        if memory_type is not None:
+            candidates = self._type_index.get(memory_type, set())
+        if category is not None:
+            by_category = self._category_index.get(category, set())
+            candidates = by_category if candidates is None else candidates & by_category
+        return np.fromiter(candidates, dtype=np.int64, count=len(candidates))
+    
+    def count(self, memory_type: Optional[MemoryType] = None,
+              category: Optional[MemoryCategory] = None) -> int:
+        if memory_type is None and category is None:
+            return len(self._memories)
+        if memory_type is None:
+            return len(self._category_index.get(category, ()))
+        if category is None:
+            return len(self._type_index.get(memory_type, ()))
+        return len(self.select(memory_type, category))
+    
+    def decayed_slots(self, current_time: float) -> np.ndarray:
+        """Слоты, у которых накопленный распад превысил 1"""
+        age = current_time - self.column("created_at")
+        return np.flatnonzero(self.column("decay_rate") * age > 1.0)
+    
+    def consolidation_slots(self, threshold: float, current_time: float, min_age: float) -> np.ndarray:
+        """Слоты, достаточно важные и старые для переноса в долговременную память"""
+        mask = ((self.column("importance") >= threshold) &
+                (current_time - self.column("created_at") >= min_age))
+        return np.flatnonzero(mask)
+    
+    def lowest_slots(self, count: int, secondary: str) -> np.ndarray:
+        """count наименее важных слотов (при равной важности - меньший secondary)"""
+        if count <= 0:
+            return np.empty(0, dtype=np.int64)
+        order = np.lexsort((self.column(secondary), self.column("importance")))
+        return order[:count]
+    
+    def top_slots(self, k: int, memory_type: Optional[MemoryType] = None,
+                  category: Optional[MemoryCategory] = None) -> np.ndarray:
+        """k самых важных слотов (при равной важности - недавно использованные)"""
+        candidates = self.select(memory_type, category)
+        if k <= 0 or not len(candidates):
+            return np.empty(0, dtype=np.int64)
+        
+        importance = self._columns["importance"][candidates]
+        if len(candidates) > k:
+            # Отсечение по k-й важности без полной сортировки
+            kth = np.partition(importance, len(importance) - k)[len(importance) - k]
+            keep = importance >= kth
+            candidates, importance = candidates[keep], importance[keep]
+        
+        order = np.lexsort((self._columns["last_accessed"][candidates], importance))[::-1]
+        return candidates[order[:k]]
+
 @dataclass
 class MemoryPattern:
     """Паттерн памяти"""
@@ -74,13 +258,23 @@ class MemoryPattern:
 class EntityMemory:
     """Память сущности"""
     entity_id: str
-    short_term_memories: List[Memory] = field(default_factory=list)
-    long_term_memories: List[Memory] = field(default_factory=list)
+    short_term: MemoryStore = field(default_factory=MemoryStore)
+    long_term: MemoryStore = field(default_factory=MemoryStore)
     memory_patterns: List[MemoryPattern] = field(default_factory=list)
     learning_rate: float = 1.0
     memory_capacity: int = 1000
     consolidation_threshold: float = 0.7
     last_consolidation: float = field(default_factory=time.time)
+    
+    @property
+    def short_term_memories(self) -> List[Memory]:
+        """Кратковременные воспоминания (копия)"""
+        return list(self.short_term)
+    
+    @property
+    def long_term_memories(self) -> List[Memory]:
+        """Долговременные воспоминания (копия)"""
+        return list(self.long_term)
 
 @dataclass
 class SharedMemory:
@@ -141,6 +335,10 @@ class MemorySystem(BaseComponent):
         self.consolidation_interval: float = 60.0  # секунды
         self.decay_interval: float = 300.0  # секунды
         
+        # Блокировка памяти сущностей (фоновые процессы консолидации и распада)
+        self._memory_lock = threading.RLock()
+        self._memory_sequence = itertools.count()
+        
         # Статистика
         self.total_memories_created: int = 0
         self.total_memories_consolidated: int = 0
@@ -261,8 +459,6 @@ class MemorySystem(BaseComponent):
     def _start_memory_processes(self):
         """Запуск процессов памяти"""
         try:
-            import threading
-            
             # Процесс консолидации памяти
             self.consolidation_thread = threading.Thread(
                 target=self._consolidation_process,
@@ -306,8 +502,8 @@ class MemorySystem(BaseComponent):
             
             entity_memory = self.entity_memories[entity_id]
             
-            # Создание воспоминания
-            memory_id = f"memory_{entity_id}_{int(time.time())}_{random.randint(1000, 9999)}"
+            # Создание воспоминания (порядковый номер исключает совпадение id)
+            memory_id = f"memory_{entity_id}_{int(time.time())}_{next(self._memory_sequence)}"
             
             memory = Memory(
                 memory_id=memory_id,
@@ -323,11 +519,12 @@ class MemorySystem(BaseComponent):
             )
             
             # Добавление в кратковременную память
-            entity_memory.short_term_memories.append(memory)
-            
-            # Проверка лимита кратковременной памяти
-            if len(entity_memory.short_term_memories) > self.max_short_term_memories:
-                self._cleanup_short_term_memory(entity_id)
+            with self._memory_lock:
+                entity_memory.short_term.add(memory)
+                
+                # Проверка лимита кратковременной памяти
+                if len(entity_memory.short_term) > self.max_short_term_memories:
+                    self._cleanup_short_term_memory(entity_id)
             
             # Обновление статистики
             self.total_memories_created += 1
@@ -373,21 +570,16 @@ class MemorySystem(BaseComponent):
     def _cleanup_short_term_memory(self, entity_id: str):
         """Очистка кратковременной памяти"""
         try:
-            entity_memory = self.entity_memories[entity_id]
+            store = self.entity_memories[entity_id].short_term
             
-            if len(entity_memory.short_term_memories) <= self.max_short_term_memories:
+            excess = len(store) - self.max_short_term_memories
+            if excess <= 0:
                 return
             
-            # Сортировка по важности и времени создания
-            entity_memory.short_term_memories.sort(
-                key=lambda m: (m.importance, m.created_at)
-            )
-            
-            # Удаление наименее важных воспоминаний
-            memories_to_remove = entity_memory.short_term_memories[:-self.max_short_term_memories]
+            # Удаление наименее важных (при равной важности - самых старых) воспоминаний
+            memories_to_remove = store.remove_slots(store.lowest_slots(excess, "created_at"))
             
             for memory in memories_to_remove:
-                entity_memory.short_term_memories.remove(memory)
                 self.total_memories_decayed += 1
                 
                 # Вызов callback
@@ -436,24 +628,20 @@ class MemorySystem(BaseComponent):
     def _check_condition(self, memory: Memory, condition: str, value: Any) -> bool:
         """Проверка условия паттерна"""
         try:
+            short_term = self.entity_memories[memory.entity_id].short_term
+            
             if condition == "combat_events":
-                combat_memories = [m for m in self.entity_memories[memory.entity_id].short_term_memories
-                                 if m.category == MemoryCategory.COMBAT]
-                return len(combat_memories) >= value
+                return short_term.count(category=MemoryCategory.COMBAT) >= value
             
             elif condition == "success_rate":
                 # Здесь должна быть логика расчета успешности
                 return True
             
             elif condition == "interactions":
-                social_memories = [m for m in self.entity_memories[memory.entity_id].short_term_memories
-                                 if m.category == MemoryCategory.SOCIAL]
-                return len(social_memories) >= value
+                return short_term.count(category=MemoryCategory.SOCIAL) >= value
             
             elif condition == "locations_discovered":
-                exploration_memories = [m for m in self.entity_memories[memory.entity_id].short_term_memories
-                                      if m.category == MemoryCategory.EXPLORATION]
-                return len(exploration_memories) >= value
+                return short_term.count(category=MemoryCategory.EXPLORATION) >= value
             
             return True
             
@@ -509,31 +697,28 @@ class MemorySystem(BaseComponent):
                 return 0
             
             entity_memory = self.entity_memories[entity_id]
-            consolidated_count = 0
-            
-            # Фильтрация воспоминаний для консолидации
-            memories_to_consolidate = [
-                memory for memory in entity_memory.short_term_memories
-                if (memory.importance >= entity_memory.consolidation_threshold and
-                    not memory.is_consolidated and
-                    time.time() - memory.created_at >= self.consolidation_interval)
-            ]
-            
-            for memory in memories_to_consolidate:
-                # Перемещение в долговременную память
-                entity_memory.short_term_memories.remove(memory)
-                entity_memory.long_term_memories.append(memory)
-                memory.is_consolidated = True
-                consolidated_count += 1
-                
-                # Вызов callback
-                if self.on_memory_consolidated:
-                    self.on_memory_consolidated(entity_id, memory)
             
-            # Проверка лимита долговременной памяти
-            if len(entity_memory.long_term_memories) > entity_memory.memory_capacity:
-                self._cleanup_long_term_memory(entity_id)
+            with self._memory_lock:
+                # Отбор воспоминаний для консолидации маской по столбцам
+                slots = entity_memory.short_term.consolidation_slots(
+                    entity_memory.consolidation_threshold, time.time(), self.consolidation_interval
+                )
+                memories_to_consolidate = entity_memory.short_term.remove_slots(slots)
+                
+                for memory in memories_to_consolidate:
+                    # Перемещение в долговременную память
+                    memory.is_consolidated = True
+                    entity_memory.long_term.add(memory)
+                    
+                    # Вызов callback
+                    if self.on_memory_consolidated:
+                        self.on_memory_consolidated(entity_id, memory)
+                
+                # Проверка лимита долговременной памяти
+                if len(entity_memory.long_term) > entity_memory.memory_capacity:
+                    self._cleanup_long_term_memory(entity_id)
             
+            consolidated_count = len(memories_to_consolidate)
             self.total_memories_consolidated += consolidated_count
             entity_memory.last_consolidation = time.time()
             
@@ -548,20 +733,16 @@ class MemorySystem(BaseComponent):
         """Очистка долговременной памяти"""
         try:
             entity_memory = self.entity_memories[entity_id]
+            store = entity_memory.long_term
             
-            if len(entity_memory.long_term_memories) <= entity_memory.memory_capacity:
+            excess = len(store) - entity_memory.memory_capacity
+            if excess <= 0:
                 return
             
-            # Сортировка по важности и времени последнего доступа
-            entity_memory.long_term_memories.sort(
-                key=lambda m: (m.importance, m.last_accessed)
-            )
-            
-            # Удаление наименее важных воспоминаний
-            memories_to_remove = entity_memory.long_term_memories[:-entity_memory.memory_capacity]
+            # Удаление наименее важных (при равной важности - давно не использованных) воспоминаний
+            memories_to_remove = store.remove_slots(store.lowest_slots(excess, "last_accessed"))
             
             for memory in memories_to_remove:
-                entity_memory.long_term_memories.remove(memory)
                 self.total_memories_decayed += 1
                 
                 # Вызов callback
@@ -633,24 +814,24 @@ class MemorySystem(BaseComponent):
                 return []
             
             entity_memory = self.entity_memories[entity_id]
-            all_memories = entity_memory.short_term_memories + entity_memory.long_term_memories
-            
-            # Фильтрация
-            if memory_type:
-                all_memories = [m for m in all_memories if m.memory_type == memory_type]
-            
-            if category:
-                all_memories = [m for m in all_memories if m.category == category]
-            
-            # Сортировка по важности и времени последнего доступа
-            all_memories.sort(key=lambda m: (m.importance, m.last_accessed), reverse=True)
             
-            # Обновление времени доступа
-            for memory in all_memories[:limit]:
-                memory.last_accessed = time.time()
-                memory.access_count += 1
+            with self._memory_lock:
+                # Лучшие limit из каждого уровня по индексам типа и категории
+                candidates = []
+                for store in (entity_memory.short_term, entity_memory.long_term):
+                    slots = store.top_slots(limit, memory_type, category)
+                    for slot, memory in zip(slots, store.memories_at(slots)):
+                        candidates.append((memory, store, int(slot)))
+                
+                best = heapq.nlargest(limit, candidates,
+                                      key=lambda item: (item[0].importance, item[0].last_accessed))
+                
+                # Обновление времени доступа
+                current_time = time.time()
+                for _, store, slot in best:
+                    store.touch((slot,), current_time)
             
-            return all_memories[:limit]
+            return [memory for memory, _, _ in best]
             
         except Exception as e:
             logger.error(f"Ошибка получения воспоминаний: {e}")
@@ -673,39 +854,41 @@ class MemorySystem(BaseComponent):
         """Процесс распада памяти"""
         try:
             while self.state == LifecycleState.READY:
-                current_time = time.time()
+                self.decay_memories()
+                time.sleep(self.decay_interval)
                 
-                # Распад кратковременной памяти
-                for entity_id, entity_memory in self.entity_memories.items():
-                    memories_to_decay = []
-                    
-                    for memory in entity_memory.short_term_memories:
-                        # Расчет распада
-                        time_since_creation = current_time - memory.created_at
-                        decay_factor = memory.decay_rate * time_since_creation
-                        
-                        if decay_factor > 1.0:
-                            memories_to_decay.append(memory)
+        except Exception as e:
+            logger.error(f"Ошибка процесса распада: {e}")
+    
+    def decay_memories(self, current_time: Optional[float] = None) -> int:
+        """Распад кратковременной памяти всех сущностей (маска decay_rate * возраст > 1)"""
+        try:
+            current_time = time.time() if current_time is None else current_time
+            decayed_count = 0
+            
+            with self._memory_lock:
+                for entity_id, entity_memory in list(self.entity_memories.items()):
+                    store = entity_memory.short_term
+                    memories_to_decay = store.remove_slots(store.decayed_slots(current_time))
                     
-                    # Удаление распавшихся воспоминаний
                     for memory in memories_to_decay:
-                        entity_memory.short_term_memories.remove(memory)
-                        self.total_memories_decayed += 1
-                        
                         if self.on_memory_decayed:
                             self.on_memory_decayed(entity_id, memory)
-                
-                time.sleep(self.decay_interval)
-                
+                    decayed_count += len(memories_to_decay)
+            
+            self.total_memories_decayed += decayed_count
+            return decayed_count
+            
         except Exception as e:
-            logger.error(f"Ошибка процесса распада: {e}")
+            logger.error(f"Ошибка распада памяти: {e}")
+            return 0
     
     def get_memory_statistics(self) -> Dict[str, Any]:
         """Получение статистики памяти"""
         try:
             total_entities = len(self.entity_memories)
-            total_short_term = sum(len(em.short_term_memories) for em in self.entity_memories.values())
-            total_long_term = sum(len(em.long_term_memories) for em in self.entity_memories.values())
+            total_short_term = sum(len(em.short_term) for em in self.entity_memories.values())
+            total_long_term = sum(len(em.long_term) for em in self.entity_memories.values())
             
             return {
                 "total_entities": total_entities,
@@ -1,223 +1,464 @@
 #!/usr/bin/env python3
 # -*- coding: utf-8 -*-
+"""Система частиц
+Состояние частиц каждого эмиттера хранится в массивах NumPy и обновляется
+векторно; видимая часть эмиттера - один общий буфер вершин-точек, в который
+позиции, цвета и размеры записываются целиком раз в кадр. Слоты умерших частиц
+переиспользуются через список свободных. Без окна система работает в headless-режиме"""
 
+import logging
 import math
-import random
 import time
-from typing import List, Dict, Tuple, Optional
-from panda3d.core import CardMaker, Vec3, Vec4, TransparencyAttrib
-from direct.task import Task
-
-class Particle:
-    """Отдельная частица"""
-    
-    def __init__(self, x=0, y=0, z=0, vx=0, vy=0, vz=0, 
-                 color=(1, 1, 1, 1), size=0.1, lifetime=1.0):
-        self.x = x
-        self.y = y
-        self.z = z
-        self.vx = vx
-        self.vy = vy
-        self.vz = vz
-        self.color = color
-        self.size = size
-        self.lifetime = lifetime
-        self.max_lifetime = lifetime
-        self.node = None
-        self.is_alive = True
-        
-    def update(self, dt):
-        """Обновление частицы"""
-        if not self.is_alive:
-            return False
-            
-        # Обновляем позицию
-        self.x += self.vx * dt
-        self.y += self.vy * dt
-        self.z += self.vz * dt
-        
-        # Обновляем время жизни
-        self.lifetime -= dt
-        if self.lifetime <= 0:
-            self.is_alive = False
-            return False
-            
-        # Обновляем прозрачность
-        alpha = self.lifetime / self.max_lifetime
-        self.color = (self.color[0], self.color[1], self.color[2], alpha)
-        
-        # Обновляем размер (уменьшаем со временем)
-        self.size = (self.lifetime / self.max_lifetime) * 0.1
-        
-        # Обновляем визуальное представление
-        if self.node:
-            self.node.setPos(self.x, self.y, self.z)
-            self.node.setScale(self.size)
-            self.node.setColor(*self.color)
-            
-        return True
-        
-    def create_visual(self, parent):
-        """Создание визуального представления частицы"""
-        # Создаем простой квадрат для частицы
-        cm = CardMaker("particle")
-        cm.setFrame(-0.5, 0.5, -0.5, 0.5)
-        self.node = parent.attachNewNode(cm.generate())
-        self.node.setPos(self.x, self.y, self.z)
-        self.node.setScale(self.size)
-        self.node.setColor(*self.color)
+from typing import Any, Dict, Optional, Tuple
+
+import numpy as np
+
+try:
+    from panda3d.core import (Geom, GeomNode, GeomPoints, GeomVertexArrayFormat, GeomVertexData,
+                              GeomVertexFormat, InternalName, TransparencyAttrib)
+    PANDA_AVAILABLE = True
+except ImportError:
+    PANDA_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+# Раскладка вершины буфера частиц: позиция, цвет, размер точки
+PARTICLE_VERTEX_DTYPE = np.dtype([
+    ('vertex', np.float32, 3),
+    ('color', np.float32, 4),
+    ('size', np.float32),
+])
+
+# Частиц за одну эмиссию эмиттера
+EMISSION_BATCH = 5
+
+# Начальная емкость буфера; дальше буфер удваивается до particle_count эмиттера
+INITIAL_BUFFER_CAPACITY = 256
+
+# Предел частиц эмиттеров одиночных эффектов (взрывы, искры, лечение)
+BURST_EMITTER_CAPACITY = 4096
+
+# Палитры эффектов
+EXPLOSION_COLORS = np.array([
+    (1, 0.2, 0, 1),      # Красный
+    (1, 0.5, 0, 1),      # Оранжевый
+    (1, 1, 0, 1),        # Желтый
+    (1, 0.8, 0.2, 1)     # Золотой
+], dtype=np.float32)
+
+SPARKLE_COLORS = np.array([
+    (0, 0.5, 1, 1),      # Синий
+    (0.5, 0, 1, 1),      # Фиолетовый
+    (1, 1, 1, 1),        # Белый
+    (0, 1, 1, 1)         # Голубой
+], dtype=np.float32)
+
+class ParticleBuffer:
+    """Массивы состояния частиц одного эмиттера с пулом слотов
+    При заполнении max_capacity новые частицы занимают слоты самых старых"""
+
+    def __init__(self, capacity: int = 64, max_capacity: Optional[int] = None):
+        self.max_capacity = max(1, max_capacity) if max_capacity is not None else None
+        if self.max_capacity is not None:
+            capacity = min(capacity, self.max_capacity)
+        self.capacity = 0
+        self.count = 0
+        self.recycled = 0
+        self.position = np.zeros((0, 3), dtype=np.float32)
+        self.velocity = np.zeros((0, 3), dtype=np.float32)
+        self.base_color = np.zeros((0, 4), dtype=np.float32)
+        self.color = np.zeros((0, 4), dtype=np.float32)
+        self.base_size = np.zeros(0, dtype=np.float32)
+        self.size = np.zeros(0, dtype=np.float32)
+        self.lifetime = np.zeros(0, dtype=np.float32)
+        self.max_lifetime = np.ones(0, dtype=np.float32)
+        self.alive = np.zeros(0, dtype=bool)
+        self.serial = np.zeros(0, dtype=np.int64)  # Порядковый номер рождения частицы
+        self._next_serial = 0
+
+        # Стек свободных слотов: вершина - в конце занятой части
+        self._free = np.zeros(0, dtype=np.int32)
+        self._free_count = 0
+        self._grow(max(1, capacity))
+
+    def _grow(self, capacity: int):
+        """Расширение массивов; новые слоты попадают в список свободных"""
+        old = self.capacity
+        for name in ('position', 'velocity', 'base_color', 'color', 'base_size', 'size', 'lifetime', 'alive',
+                     'serial'):
+            array = getattr(self, name)
+            grown = np.zeros((capacity,) + array.shape[1:], dtype=array.dtype)
+            grown[:old] = array
+            setattr(self, name, grown)
+        max_lifetime = np.ones(capacity, dtype=np.float32)
+        max_lifetime[:old] = self.max_lifetime
+        self.max_lifetime = max_lifetime
+
+        # Новые слоты выдаются по возрастанию индекса
+        free = np.zeros(capacity, dtype=np.int32)
+        added = np.arange(capacity - 1, old - 1, -1, dtype=np.int32)
+        free[:len(added)] = added
+        free[len(added):len(added) + self._free_count] = self._free[:self._free_count]
+        self._free = free
+        self._free_count += len(added)
+        self.capacity = capacity
+
+    def spawn(self, positions: np.ndarray, velocities: np.ndarray, colors: np.ndarray,
+              sizes: np.ndarray, lifetimes: np.ndarray) -> np.ndarray:
+        """Размещение пачки частиц в свободных слотах, возвращает их индексы"""
+        amount = len(lifetimes)
+        if amount == 0:
+            return np.zeros(0, dtype=np.int32)
+        if self.max_capacity is not None and amount > self.max_capacity:
+            # Из пачки больше предела остаются последние частицы
+            amount = self.max_capacity
+            positions, velocities, colors, sizes, lifetimes = (
+                np.asarray(values)[-amount:] for values in (positions, velocities, colors, sizes, lifetimes))
+        if amount > self._free_count and (self.max_capacity is None or self.capacity < self.max_capacity):
+            capacity = self.capacity
+            while capacity - self.count < amount:
+                capacity *= 2
+            if self.max_capacity is not None:
+                capacity = min(capacity, self.max_capacity)
+            self._grow(capacity)
+        if amount > self._free_count:
+            self._recycle_oldest(amount - self._free_count)
+
+        top = self._free_count
+        slots = self._free[top - amount:top][::-1].copy()
+        self._free_count -= amount
+
+        self.position[slots] = positions
+        self.velocity[slots] = velocities
+        self.base_color[slots] = colors
+        self.color[slots] = colors
+        self.base_size[slots] = sizes
+        self.size[slots] = sizes
+        self.lifetime[slots] = lifetimes
+        self.max_lifetime[slots] = np.maximum(lifetimes, 1e-6)
+        self.alive[slots] = True
+        self.serial[slots] = np.arange(self._next_serial, self._next_serial + amount)
+        self._next_serial += amount
+        self.count += amount
+        return slots
+
+    def _release(self, slots: np.ndarray):
+        """Возврат слотов в список свободных"""
+        self.alive[slots] = False
+        self.velocity[slots] = 0.0
+        self._free[self._free_count:self._free_count + len(slots)] = slots
+        self._free_count += len(slots)
+        self.count -= len(slots)
+
+    def _recycle_oldest(self, amount: int):
+        """Освобождение слотов самых старых живых частиц"""
+        live = np.flatnonzero(self.alive)
+        if amount < len(live):
+            live = live[np.argpartition(self.serial[live], amount - 1)[:amount]]
+        self.lifetime[live] = 0.0
+        self.color[live, 3] = 0.0
+        self.size[live] = 0.0
+        self._release(live)
+        self.recycled += len(live)
+
+    def update(self, dt: float) -> int:
+        """Движение, старение, затухание и освобождение умерших; возвращает число умерших"""
+        if self.count == 0:
+            return 0
+        alive = self.alive
+
+        # Скорость мертвых слотов нулевая, поэтому движение считается по всему массиву
+        self.position += self.velocity * dt
+        np.subtract(self.lifetime, dt, out=self.lifetime, where=alive)
+
+        dead = np.flatnonzero(alive & (self.lifetime <= 0.0))
+        if len(dead):
+            self._release(dead)
+
+        # Прозрачность и размер убывают с оставшимся временем жизни; у мертвых - ноль
+        ratio = np.clip(self.lifetime / self.max_lifetime, 0.0, 1.0)
+        ratio[~alive] = 0.0
+        self.color[:, :3] = self.base_color[:, :3]
+        self.color[:, 3] = self.base_color[:, 3] * ratio
+        np.multiply(self.base_size, ratio, out=self.size)
+        return len(dead)
+
+    def clear(self):
+        """Освобождение всех слотов"""
+        self.alive[:] = False
+        self.velocity[:] = 0.0
+        self.lifetime[:] = 0.0
+        self.color[:, 3] = 0.0
+        self.size[:] = 0.0
+        self._free[:] = np.arange(self.capacity - 1, -1, -1, dtype=np.int32)
+        self._free_count = self.capacity
+        self.count = 0
+
+class ParticleGeometry:
+    """Общий буфер вершин-точек эмиттера в Panda3D"""
+
+    _format = None
+
+    @classmethod
+    def _get_format(cls):
+        if cls._format is None:
+            array = GeomVertexArrayFormat()
+            array.addColumn(InternalName.getVertex(), 3, Geom.NT_float32, Geom.C_point)
+            array.addColumn(InternalName.getColor(), 4, Geom.NT_float32, Geom.C_color)
+            array.addColumn(InternalName.getSize(), 1, Geom.NT_float32, Geom.C_other)
+            cls._format = GeomVertexFormat.registerFormat(array)
+        return cls._format
+
+    def __init__(self, name: str, parent, capacity: int):
+        self.capacity = 0
+        self.vdata = GeomVertexData(name, self._get_format(), Geom.UH_dynamic)
+        self.points = GeomPoints(Geom.UH_static)
+        geom = Geom(self.vdata)
+        geom.addPrimitive(self.points)
+        geom_node = GeomNode(name)
+        geom_node.addGeom(geom)
+
+        self.node = parent.attachNewNode(geom_node)
         self.node.setTransparency(TransparencyAttrib.MAlpha)
-        
+        self.node.setRenderModePerspective(True)
+        self.node.setDepthWrite(False)
+        self.node.setLightOff()
+        self._resize(capacity)
+
+    def _resize(self, capacity: int):
+        self.vdata.uncleanSetNumRows(capacity)
+        self.points.clearVertices()
+        self.points.addConsecutiveVertices(0, capacity)
+        self.capacity = capacity
+
+    def upload(self, buffer: ParticleBuffer):
+        """Запись всего состояния буфера частиц одной копией в массив вершин"""
+        if buffer.capacity != self.capacity:
+            self._resize(buffer.capacity)
+        array = self.vdata.modifyArray(0)
+        vertices = np.frombuffer(memoryview(array).cast('B'), dtype=PARTICLE_VERTEX_DTYPE)
+        vertices['vertex'] = buffer.position
+        vertices['color'] = buffer.color
+        vertices['size'] = buffer.size
+
     def destroy(self):
-        """Уничтожение частицы"""
         if self.node:
             self.node.removeNode()
             self.node = None
 
+class ParticleEmitter:
+    """Эмиттер частиц: параметры эмиссии, буфер частиц и его геометрия"""
+
+    def __init__(self, name: str, x=0, y=0, z=0,
+                 particle_count=100, emission_rate=10.0,
+                 particle_lifetime=2.0, particle_size=0.1,
+                 color=(1, 1, 1, 1), velocity_range=(1, 5),
+                 direction=(0, 0, 1), spread=45, duration: Optional[float] = None):
+        self.name = name
+        self.x, self.y, self.z = x, y, z
+        self.particle_count = particle_count
+        self.emission_rate = emission_rate
+        self.particle_lifetime = particle_lifetime
+        self.particle_size = particle_size
+        self.color = color
+        self.velocity_range = velocity_range
+        self.direction = direction
+        self.spread = spread
+        self.is_active = True
+
+        # Эмиттер с длительностью останавливается сам и удаляется после угасания частиц
+        self.duration = duration
+        self.elapsed = 0.0
+        self.emission_accumulator = 0.0
+
+        # particle_count - предел живых частиц эмиттера
+        self.buffer = ParticleBuffer(min(particle_count, INITIAL_BUFFER_CAPACITY), max_capacity=particle_count)
+        self.geometry: Optional[ParticleGeometry] = None
+
+    @property
+    def finished(self) -> bool:
+        return self.duration is not None and not self.is_active and self.buffer.count == 0
+
 class ParticleSystem:
     """Система частиц для визуальных эффектов"""
-    
-    def __init__(self, game):
+
+    def __init__(self, game=None, headless: bool = False, seed: Optional[int] = None):
         self.game = game
-        self.particles = []
-        self.emitters = []
+        self.headless = headless
+        self.emitters: Dict[str, ParticleEmitter] = {}
         self.parent_node = None
-        
+        self._rng = np.random.default_rng(seed)
+        self.stats = {
+            'spawned': 0,
+            'expired': 0,
+            'update_time': 0.0
+        }
+
     def initialize(self):
         """Инициализация системы частиц"""
-        # Создаем родительский узел для всех частиц
-        self.parent_node = self.game.render.attachNewNode("particle_system")
-        
-    def create_emitter(self, name, x=0, y=0, z=0, 
+        if not self.headless and PANDA_AVAILABLE and getattr(self.game, 'render', None) is not None:
+            # Создаем родительский узел для всех частиц
+            self.parent_node = self.game.render.attachNewNode("particle_system")
+        else:
+            self.headless = True
+            logger.info("Система частиц работает в headless-режиме")
+
+    # - Эмиттеры
+
+    def create_emitter(self, name, x=0, y=0, z=0,
                       particle_count=100, emission_rate=10.0,
                       particle_lifetime=2.0, particle_size=0.1,
                       color=(1, 1, 1, 1), velocity_range=(1, 5),
-                      direction=(0, 0, 1), spread=45):
+                      direction=(0, 0, 1), spread=45, duration=None) -> ParticleEmitter:
         """Создание эмиттера частиц"""
-        emitter = {
-            'name': name,
-            'x': x, 'y': y, 'z': z,
-            'particle_count': particle_count,
-            'emission_rate': emission_rate,
-            'particle_lifetime': particle_lifetime,
-            'particle_size': particle_size,
-            'color': color,
-            'velocity_range': velocity_range,
-            'direction': direction,
-            'spread': spread,
-            'last_emission': 0,
-            'is_active': True
-        }
-        self.emitters.append(emitter)
-        
+        emitter = ParticleEmitter(
+            name, x, y, z, particle_count, emission_rate, particle_lifetime, particle_size,
+            color, velocity_range, direction, spread, duration
+        )
+        self.remove_emitter(name)
+        if self.parent_node is not None:
+            emitter.geometry = ParticleGeometry(name, self.parent_node, emitter.buffer.capacity)
+        self.emitters[name] = emitter
+        return emitter
+
+    def remove_emitter(self, emitter_name):
+        """Удаление эмиттера вместе с его частицами"""
+        emitter = self.emitters.pop(emitter_name, None)
+        if emitter and emitter.geometry:
+            emitter.geometry.destroy()
+
     def start_emission(self, emitter_name):
         """Запуск эмиссии частиц"""
-        for emitter in self.emitters:
-            if emitter['name'] == emitter_name:
-                emitter['is_active'] = True
-                break
-                
+        emitter = self.emitters.get(emitter_name)
+        if emitter:
+            emitter.is_active = True
+
     def stop_emission(self, emitter_name):
         """Остановка эмиссии частиц"""
-        for emitter in self.emitters:
-            if emitter['name'] == emitter_name:
-                emitter['is_active'] = False
-                break
-                
+        emitter = self.emitters.get(emitter_name)
+        if emitter:
+            emitter.is_active = False
+
+    def _get_burst_emitter(self, name: str, capacity: int = BURST_EMITTER_CAPACITY) -> ParticleEmitter:
+        """Эмиттер без собственной эмиссии, в который пишутся одиночные эффекты"""
+        emitter = self.emitters.get(name)
+        if emitter is None:
+            emitter = self.create_emitter(name, particle_count=capacity)
+            emitter.is_active = False
+        return emitter
+
+    # - Обновление
+
     def update(self, dt):
         """Обновление системы частиц"""
-        current_time = time.time()
-        
-        # Обновляем эмиттеры
-        for emitter in self.emitters:
-            if not emitter['is_active']:
-                continue
-                
-            # Проверяем, нужно ли создать новые частицы
-            time_since_last = current_time - emitter['last_emission']
-            if time_since_last >= 1.0 / emitter['emission_rate']:
-                self._emit_particles(emitter)
-                emitter['last_emission'] = current_time
-                
-        # Обновляем существующие частицы
-        for particle in self.particles[:]:  # Используем копию для безопасного удаления
-            if not particle.update(dt):
-                particle.destroy()
-                self.particles.remove(particle)
-                
-    def _emit_particles(self, emitter):
+        start_time = time.perf_counter()
+        finished = []
+
+        for emitter in self.emitters.values():
+            if emitter.is_active:
+                self._update_emission(emitter, dt)
+
+            expired = emitter.buffer.update(dt)
+            self.stats['expired'] += expired
+            # Пустой буфер уже выгружен с нулевыми размерами - повторная запись не нужна
+            if emitter.geometry is not None and (emitter.buffer.count or expired):
+                emitter.geometry.upload(emitter.buffer)
+            if emitter.finished:
+                finished.append(emitter.name)
+
+        for name in finished:
+            self.remove_emitter(name)
+
+        self.stats['update_time'] = time.perf_counter() - start_time
+
+    def _update_emission(self, emitter: ParticleEmitter, dt: float):
+        """Эмиссия по накопленному времени: пачка частиц каждые 1 / emission_rate секунд"""
+        emitter.elapsed += dt
+        if emitter.duration is not None and emitter.elapsed >= emitter.duration:
+            emitter.is_active = False
+            return
+        if emitter.emission_rate <= 0:
+            return
+
+        emitter.emission_accumulator += dt
+        interval = 1.0 / emitter.emission_rate
+        emissions = int(emitter.emission_accumulator / interval)
+        if emissions:
+            emitter.emission_accumulator -= emissions * interval
+            self._emit_particles(emitter, emissions * min(EMISSION_BATCH, emitter.particle_count))
+
+    def _emit_particles(self, emitter: ParticleEmitter, count: int):
         """Создание новых частиц из эмиттера"""
-        # Создаем несколько частиц за раз
-        for _ in range(min(5, emitter['particle_count'])):
-            # Случайная скорость в заданном направлении
-            velocity = random.uniform(*emitter['velocity_range'])
-            
-            # Случайное отклонение от основного направления
-            spread_rad = math.radians(emitter['spread'])
-            angle_x = random.uniform(-spread_rad, spread_rad)
-            angle_y = random.uniform(-spread_rad, spread_rad)
-            
-            # Вычисляем направление с учетом разброса
-            dir_x, dir_y, dir_z = emitter['direction']
-            vx = velocity * dir_x + random.uniform(-0.5, 0.5)
-            vy = velocity * dir_y + random.uniform(-0.5, 0.5)
-            vz = velocity * dir_z + random.uniform(-0.5, 0.5)
-            
-            # Создаем частицу
-            particle = Particle(
-                x=emitter['x'] + random.uniform(-0.1, 0.1),
-                y=emitter['y'] + random.uniform(-0.1, 0.1),
-                z=emitter['z'] + random.uniform(-0.1, 0.1),
-                vx=vx, vy=vy, vz=vz,
-                color=emitter['color'],
-                size=emitter['particle_size'],
-                lifetime=emitter['particle_lifetime']
-            )
-            
-            # Создаем визуальное представление
-            particle.create_visual(self.parent_node)
-            
-            # Добавляем в список
-            self.particles.append(particle)
-            
+        rng = self._rng
+        # Случайная скорость внутри конуса с осью direction и полууглом spread (градусы)
+        speed = rng.uniform(*emitter.velocity_range, size=(count, 1))
+        velocities = speed * self._cone_directions(count, emitter.direction, emitter.spread)
+        positions = np.array((emitter.x, emitter.y, emitter.z)) + rng.uniform(-0.1, 0.1, (count, 3))
+
+        self._spawn(
+            emitter, positions, velocities,
+            np.broadcast_to(np.asarray(emitter.color, dtype=np.float32), (count, 4)),
+            np.full(count, emitter.particle_size),
+            np.full(count, emitter.particle_lifetime)
+        )
+
+    def _cone_directions(self, count: int, direction, spread: float) -> np.ndarray:
+        """Единичные векторы, равномерно распределенные в конусе вокруг direction"""
+        axis = np.asarray(direction, dtype=np.float64)
+        length = np.linalg.norm(axis)
+        axis = axis / length if length > 0 else np.array((0.0, 0.0, 1.0))
+
+        # Базис плоскости, перпендикулярной оси
+        helper = np.array((1.0, 0.0, 0.0)) if abs(axis[0]) < 0.9 else np.array((0.0, 1.0, 0.0))
+        u = np.cross(axis, helper)
+        u /= np.linalg.norm(u)
+        v = np.cross(axis, u)
+
+        cos_theta = self._rng.uniform(math.cos(math.radians(min(abs(spread), 180.0))), 1.0, count)
+        sin_theta = np.sqrt(1.0 - cos_theta * cos_theta)
+        phi = self._rng.uniform(0, 2 * math.pi, count)
+        return (cos_theta[:, None] * axis
+                + (sin_theta * np.cos(phi))[:, None] * u
+                + (sin_theta * np.sin(phi))[:, None] * v)
+
+    def _spawn(self, emitter: ParticleEmitter, positions, velocities, colors, sizes, lifetimes):
+        emitter.buffer.spawn(positions, velocities, colors, sizes, lifetimes)
+        self.stats['spawned'] += len(lifetimes)
+
+    def _radial_velocities(self, count: int, speed_range: Tuple[float, float],
+                           vertical_range: Tuple[float, float]) -> np.ndarray:
+        """Скорости в случайных горизонтальных направлениях с вертикальной составляющей"""
+        angle = self._rng.uniform(0, 2 * math.pi, count)
+        speed = self._rng.uniform(*speed_range, count)
+        return np.column_stack((
+            speed * np.cos(angle),
+            speed * np.sin(angle),
+            self._rng.uniform(*vertical_range, count)
+        ))
+
+    # - Эффекты
+
     def create_explosion(self, x, y, z, intensity=1.0):
         """Создание эффекта взрыва"""
-        # Создаем множество частиц для взрыва
-        particle_count = int(50 * intensity)
-        
-        for _ in range(particle_count):
-            # Случайное направление во все стороны
-            angle = random.uniform(0, 2 * math.pi)
-            velocity = random.uniform(2, 8) * intensity
-            
-            vx = velocity * math.cos(angle)
-            vy = velocity * math.sin(angle)
-            vz = random.uniform(-2, 5) * intensity
-            
-            # Случайный цвет (красный, оранжевый, желтый)
-            color_choice = random.choice([
-                (1, 0.2, 0, 1),      # Красный
-                (1, 0.5, 0, 1),      # Оранжевый
-                (1, 1, 0, 1),        # Желтый
-                (1, 0.8, 0.2, 1)     # Золотой
-            ])
-            
-            particle = Particle(
-                x=x, y=y, z=z,
-                vx=vx, vy=vy, vz=vz,
-                color=color_choice,
-                size=random.uniform(0.05, 0.2),
-                lifetime=random.uniform(0.5, 2.0)
-            )
-            
-            particle.create_visual(self.parent_node)
-            self.particles.append(particle)
-            
+        count = int(50 * intensity)
+        if count <= 0:
+            return
+        rng = self._rng
+        self._spawn(
+            self._get_burst_emitter("explosion"),
+            np.tile((x, y, z), (count, 1)),
+            self._radial_velocities(count, (2 * intensity, 8 * intensity), (-2 * intensity, 5 * intensity)),
+            EXPLOSION_COLORS[rng.integers(len(EXPLOSION_COLORS), size=count)],
+            rng.uniform(0.05, 0.2, count),
+            rng.uniform(0.5, 2.0, count)
+        )
+
     def create_smoke(self, x, y, z, duration=5.0):
         """Создание эффекта дыма"""
-        # Создаем эмиттер дыма
-        self.create_emitter(
-            name=f"smoke_{int(time.time())}",
+        # Эмиттер дыма останавливается через duration и удаляется после угасания частиц
+        name = f"smoke_{len(self.emitters)}_{time.time():.6f}"
+        return self.create_emitter(
+            name=name,
             x=x, y=y, z=z,
             particle_count=200,
             emission_rate=20.0,
@@ -226,81 +467,67 @@ class ParticleSystem:
             color=(0.3, 0.3, 0.3, 0.5),
             velocity_range=(0.5, 2),
             direction=(0, 0, 1),
-            spread=30
+            spread=30,
+            duration=duration
         )
-        
-        # Запускаем эмиссию
-        self.start_emission(f"smoke_{int(time.time())}")
-        
-        # Останавливаем через заданное время
-        def stop_smoke():
-            time.sleep(duration)
-            self.stop_emission(f"smoke_{int(time.time())}")
-            
-        import threading
-        threading.Thread(target=stop_smoke, daemon=True).start()
-        
+
     def create_magic_sparkles(self, x, y, z, count=20):
         """Создание магических искр"""
-        for _ in range(count):
-            # Случайное направление
-            angle = random.uniform(0, 2 * math.pi)
-            velocity = random.uniform(1, 3)
-            
-            vx = velocity * math.cos(angle)
-            vy = velocity * math.sin(angle)
-            vz = random.uniform(-1, 2)
-            
-            # Магический цвет (синий, фиолетовый, белый)
-            color_choice = random.choice([
-                (0, 0.5, 1, 1),      # Синий
-                (0.5, 0, 1, 1),      # Фиолетовый
-                (1, 1, 1, 1),        # Белый
-                (0, 1, 1, 1)         # Голубой
-            ])
-            
-            particle = Particle(
-                x=x, y=y, z=z,
-                vx=vx, vy=vy, vz=vz,
-                color=color_choice,
-                size=random.uniform(0.02, 0.08),
-                lifetime=random.uniform(1.0, 3.0)
-            )
-            
-            particle.create_visual(self.parent_node)
-            self.particles.append(particle)
-            
+        rng = self._rng
+        self._spawn(
+            self._get_burst_emitter("magic_sparkles"),
+            np.tile((x, y, z), (count, 1)),
+            self._radial_velocities(count, (1, 3), (-1, 2)),
+            SPARKLE_COLORS[rng.integers(len(SPARKLE_COLORS), size=count)],
+            rng.uniform(0.02, 0.08, count),
+            rng.uniform(1.0, 3.0, count)
+        )
+
     def create_healing_effect(self, x, y, z):
         """Создание эффекта лечения"""
-        # Создаем зеленые частицы, поднимающиеся вверх
-        for _ in range(30):
-            angle = random.uniform(0, 2 * math.pi)
-            velocity = random.uniform(1, 3)
-            
-            vx = velocity * math.cos(angle) * 0.3
-            vy = velocity * math.sin(angle) * 0.3
-            vz = velocity * 2  # Вверх
-            
-            particle = Particle(
-                x=x, y=y, z=z,
-                vx=vx, vy=vy, vz=vz,
-                color=(0, 1, 0, 0.8),
-                size=random.uniform(0.05, 0.15),
-                lifetime=random.uniform(1.5, 3.0)
-            )
-            
-            particle.create_visual(self.parent_node)
-            self.particles.append(particle)
-            
+        # Зеленые частицы, поднимающиеся вверх
+        count = 30
+        rng = self._rng
+        angle = rng.uniform(0, 2 * math.pi, count)
+        speed = rng.uniform(1, 3, count)
+        velocities = np.column_stack((speed * np.cos(angle) * 0.3, speed * np.sin(angle) * 0.3, speed * 2))
+        self._spawn(
+            self._get_burst_emitter("healing"),
+            np.tile((x, y, z), (count, 1)),
+            velocities,
+            np.tile((0, 1, 0, 0.8), (count, 1)),
+            rng.uniform(0.05, 0.15, count),
+            rng.uniform(1.5, 3.0, count)
+        )
+
+    # - Управление
+
+    @property
+    def particle_count(self) -> int:
+        return sum(emitter.buffer.count for emitter in self.emitters.values())
+
     def clear_all_particles(self):
         """Очистка всех частиц"""
-        for particle in self.particles:
-            particle.destroy()
-        self.particles.clear()
-        
+        for emitter in self.emitters.values():
+            emitter.buffer.clear()
+            if emitter.geometry is not None:
+                emitter.geometry.upload(emitter.buffer)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Статистика системы частиц"""
+        return {
+            **self.stats,
+            'emitters': len(self.emitters),
+            'particles': self.particle_count,
+            'capacity': sum(emitter.buffer.capacity for emitter in self.emitters.values()),
+            'recycled': sum(emitter.buffer.recycled for emitter in self.emitters.values()),
+            'headless': self.headless
+        }
+
     def destroy(self):
         """Уничтожение системы частиц"""
-        self.clear_all_particles()
+        for name in list(self.emitters):
+            self.remove_emitter(name)
         if self.parent_node:
             self.parent_node.removeNode()
             self.parent_node = None
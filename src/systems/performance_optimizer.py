@@ -3,8 +3,9 @@
 
 import time
 import math
-from typing import Dict, List, Optional, Tuple
+from typing import Any, Dict, List, Optional, Tuple
 from direct.task import Task
+from panda3d.core import NodePath
 
 # Пробуем импортировать компоненты Panda3D с обработкой ошибок
 try:
@@ -22,6 +23,165 @@ except ImportError:
     OCCLUSION_AVAILABLE = False
     OcclusionCuller = None
 
+def count_draw_calls(node_path) -> int:
+    """Число Geom (вызовов отрисовки) в поддереве узла"""
+    return sum(geom_np.node().getNumGeoms() for geom_np in node_path.findAllMatches("**/+GeomNode"))
+
+class StaticBatch:
+    """Пакет статической геометрии одного чанка или комнаты"""
+    
+    def __init__(self, key, parent):
+        self.key = key
+        self.node = parent.attachNewNode(f"static_batch_{key}")
+        self.sources: Dict[Any, NodePath] = {}
+        self.dirty = True
+        self.draw_calls_before = 0
+        self.draw_calls_after = 0
+        self.rebuilds = 0
+
+class StaticBatcher:
+    """Объединение статической геометрии по чанкам и комнатам
+    Исходные узлы отвязываются от сцены и хранятся с мировой трансформацией;
+    каждый пакет - копия своих источников, сведенная flattenStrong. Изменение или
+    удаление объекта помечает грязным только его пакет, он пересобирается в flush()"""
+    
+    def __init__(self, render, chunk_size: float = 64.0):
+        self.render = render
+        self.chunk_size = chunk_size
+        self.root = render.attachNewNode("static_batches")
+        # Отдельный граф, не попадающий в отрисовку
+        self.sources_root = NodePath("static_batch_sources")
+        self.batches: Dict[Any, StaticBatch] = {}
+        self.object_batches: Dict[Any, Any] = {}
+        self._origins: Dict[Any, Tuple[NodePath, Any]] = {}
+        self.stats = {
+            'rebuilds': 0,
+            'rebuild_time': 0.0
+        }
+        
+    def batch_key(self, node, obj=None):
+        """Ключ пакета: комната или чанк объекта, иначе чанк по мировой позиции
+        Ключи по позиции имеют свой префикс pos_: только их update_object пересчитывает"""
+        for attr in ('room_id', 'chunk_id'):
+            value = getattr(obj, attr, None)
+            if value is not None:
+                return f"{attr[:-3]}_{value}"
+        pos = node.getPos(self.render)
+        return f"pos_{int(pos.x // self.chunk_size)}_{int(pos.y // self.chunk_size)}"
+        
+    def add_object(self, object_id, node, key=None):
+        """Перенос объекта в пакет; возвращает ключ пакета"""
+        if object_id in self.object_batches:
+            self.remove_object(object_id)
+        if key is None:
+            key = self.batch_key(node)
+            
+        batch = self.batches.get(key)
+        if batch is None:
+            batch = StaticBatch(key, self.root)
+            self.batches[key] = batch
+            
+        # Унаследованное состояние (цвет, текстуры родителей) фиксируется на самом узле
+        self._origins[object_id] = (node.getParent(), node.getState())
+        node.setState(node.getNetState())
+        node.wrtReparentTo(self.sources_root)
+        
+        batch.sources[object_id] = node
+        batch.dirty = True
+        self.object_batches[object_id] = key
+        return key
+        
+    def remove_object(self, object_id, restore: bool = True) -> Optional[NodePath]:
+        """Исключение объекта из пакета; по умолчанию узел возвращается на прежнее место в сцене"""
+        key = self.object_batches.pop(object_id, None)
+        if key is None:
+            return None
+        batch = self.batches[key]
+        node = batch.sources.pop(object_id)
+        batch.dirty = True
+        
+        parent, state = self._origins.pop(object_id)
+        if restore and not parent.isEmpty():
+            node.wrtReparentTo(parent)
+            node.setState(state)
+        else:
+            node.detachNode()
+        return node
+        
+    def get_source(self, object_id) -> Optional[NodePath]:
+        """Исходный узел объекта для изменения; после изменения нужен update_object"""
+        key = self.object_batches.get(object_id)
+        return self.batches[key].sources.get(object_id) if key is not None else None
+        
+    def update_object(self, object_id):
+        """Пометка пакета объекта к пересборке; при смене чанка объект переносится"""
+        key = self.object_batches.get(object_id)
+        if key is None:
+            return
+        batch = self.batches[key]
+        node = batch.sources[object_id]
+        if key.startswith("pos_"):
+            new_key = self.batch_key(node)
+            if new_key != key:
+                parent, state = self._origins[object_id]
+                self.remove_object(object_id, restore=False)
+                self.add_object(object_id, node, new_key)
+                self._origins[object_id] = (parent, state)
+                return
+        batch.dirty = True
+        
+    def flush(self, max_batches: Optional[int] = None) -> int:
+        """Пересборка грязных пакетов; возвращает число пересобранных"""
+        rebuilt = 0
+        for key in [key for key, batch in self.batches.items() if batch.dirty]:
+            if max_batches is not None and rebuilt >= max_batches:
+                break
+            self._rebuild(self.batches[key])
+            rebuilt += 1
+        return rebuilt
+        
+    def _rebuild(self, batch: StaticBatch):
+        """Сборка пакета из копий источников"""
+        start_time = time.perf_counter()
+        batch.node.node().removeAllChildren()
+        batch.dirty = False
+        
+        if not batch.sources:
+            batch.draw_calls_before = batch.draw_calls_after = 0
+            batch.node.removeNode()
+            del self.batches[batch.key]
+            return
+            
+        merged = NodePath("merged")
+        for source in batch.sources.values():
+            source.copyTo(merged)
+        batch.draw_calls_before = count_draw_calls(merged)
+        merged.flattenStrong()
+        merged.reparentTo(batch.node)
+        batch.draw_calls_after = count_draw_calls(merged)
+        
+        batch.rebuilds += 1
+        self.stats['rebuilds'] += 1
+        self.stats['rebuild_time'] += time.perf_counter() - start_time
+        
+    def get_stats(self) -> Dict[str, Any]:
+        """Статистика пакетов, включая вызовы отрисовки до и после объединения"""
+        return {
+            **self.stats,
+            'static_batches': len(self.batches),
+            'batched_objects': len(self.object_batches),
+            'dirty_batches': sum(1 for batch in self.batches.values() if batch.dirty),
+            'static_draw_calls_before': sum(batch.draw_calls_before for batch in self.batches.values()),
+            'static_draw_calls_after': sum(batch.draw_calls_after for batch in self.batches.values())
+        }
+        
+    def destroy(self):
+        """Возврат всех объектов в сцену и удаление пакетов"""
+        for object_id in list(self.object_batches):
+            self.remove_object(object_id)
+        self.batches.clear()
+        self.root.removeNode()
+
 class PerformanceOptimizer:
     """Система оптимизации производительности рендеринга"""
     
@@ -29,12 +189,17 @@ class PerformanceOptimizer:
         self.game = game
         self.lod_manager = None
         self.occlusion_culler = None
+        self.static_batcher: Optional[StaticBatcher] = None
         self.performance_stats = {
             'fps': 0,
             'frame_time': 0,
             'draw_calls': 0,
             'triangles': 0,
-            'vertices': 0
+            'vertices': 0,
+            'static_batches': 0,
+            'batched_objects': 0,
+            'static_draw_calls_before': 0,
+            'static_draw_calls_after': 0
         }
         self.optimization_level = "medium"  # low, medium, high, ultra
         self.adaptive_quality = True
@@ -53,6 +218,10 @@ class PerformanceOptimizer:
             # Настраиваем бины рендеринга
             self._setup_render_bins()
             
+            # Пакетирование статической геометрии
+            if getattr(self.game, 'render', None) is not None:
+                self.static_batcher = StaticBatcher(self.game.render)
+            
             # Запускаем мониторинг производительности
             self._start_performance_monitoring()
             
@@ -126,6 +295,10 @@ class PerformanceOptimizer:
             if self.adaptive_quality:
                 self._adaptive_optimization()
                 
+            # Пересборка измененных пакетов статической геометрии
+            if self.static_batcher and self.static_batcher.flush(max_batches=2):
+                self._update_batching_stats()
+                
             return Task.cont
             
         self.game.showbase.taskMgr.add(monitor_performance, "performance_monitor")
@@ -333,9 +506,62 @@ class PerformanceOptimizer:
             self._apply_lod_to_dynamic_objects(objects)
             
     def _batch_static_objects(self, objects):
-        """Объединение статических объектов"""
-        # В реальной игре здесь была бы батчинг геометрии
-        pass
+        """Объединение статических объектов по чанкам и комнатам"""
+        if not self.static_batcher:
+            return
+            
+        for obj in objects:
+            node = self._get_object_node(obj)
+            if node is None or node.isEmpty():
+                continue
+            self.static_batcher.add_object(self._get_object_id(obj), node,
+                                           self.static_batcher.batch_key(node, obj))
+            
+        self.static_batcher.flush()
+        self._update_batching_stats()
+        stats = self.static_batcher.get_stats()
+        print(f"✅ Статическая геометрия объединена: {stats['batched_objects']} объектов в "
+              f"{stats['static_batches']} пакетов, вызовы отрисовки "
+              f"{stats['static_draw_calls_before']} -> {stats['static_draw_calls_after']}")
+        
+    @staticmethod
+    def _get_object_node(obj) -> Optional[NodePath]:
+        """Узел сцены объекта: сам NodePath или его атрибут node"""
+        if isinstance(obj, NodePath):
+            return obj
+        node = getattr(obj, 'node', None)
+        return node if isinstance(node, NodePath) else None
+        
+    @staticmethod
+    def _get_object_id(obj):
+        for attr in ('object_id', 'entity_id', 'id'):
+            value = getattr(obj, attr, None)
+            if isinstance(value, (str, int)):
+                return value
+        return id(obj)
+        
+    def batch_static_object(self, object_id, node, key=None):
+        """Добавление статического объекта в пакет (пересборка - в следующем кадре)"""
+        if self.static_batcher:
+            return self.static_batcher.add_object(object_id, node, key)
+        return None
+        
+    def update_static_object(self, object_id):
+        """Пересборка пакета измененного объекта"""
+        if self.static_batcher:
+            self.static_batcher.update_object(object_id)
+            
+    def unbatch_static_object(self, object_id, restore: bool = True):
+        """Исключение объекта из пакета"""
+        if self.static_batcher:
+            return self.static_batcher.remove_object(object_id, restore)
+        return None
+        
+    def _update_batching_stats(self):
+        self.performance_stats.update({
+            key: value for key, value in self.static_batcher.get_stats().items()
+            if key in self.performance_stats
+        })
         
     def _sort_transparent_objects(self, objects):
         """Сортировка прозрачных объектов по расстоянию"""
@@ -386,5 +612,9 @@ class PerformanceOptimizer:
         # Останавливаем мониторинг
         self.game.showbase.taskMgr.remove("performance_monitor")
         
+        if self.static_batcher:
+            self.static_batcher.destroy()
+            self.static_batcher = None
+        
         # Очищаем данные
         self.performance_stats.clear()
@@ -0,0 +1,171 @@
+#!/usr/bin/env python3
+"""Дисковый кэш сгенерированных чанков
+Карты высот и биомов хранятся в .npy по ключу (seed, x, y, размер, версия генератора)
+и открываются через mmap; старые записи вытесняются по LRU при превышении лимита"""
+
+import hashlib
+import logging
+import os
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+ChunkArrays = Tuple[np.ndarray, np.ndarray]
+
+class ChunkStore:
+    """Контентно-адресуемое хранилище массивов чанков с LRU-вытеснением"""
+
+    LAYERS = ("height", "biome")
+
+    def __init__(self, root: str, max_size_mb: float = 512.0):
+        self.root = Path(root)
+        self.max_bytes = int(max_size_mb * 1024 * 1024)
+        self._entries: "OrderedDict[str, int]" = OrderedDict()  # key -> размер в байтах (LRU порядок)
+        self._total_bytes = 0
+        self._lock = threading.Lock()
+        self.stats = {
+            'hits': 0,
+            'misses': 0,
+            'writes': 0,
+            'evictions': 0,
+            'invalid': 0
+        }
+        self._scan()
+
+    # - Ключи и пути
+
+    @staticmethod
+    def make_key(world_seed: int, chunk_x: int, chunk_y: int, chunk_size: int,
+                 generator_version: str) -> str:
+        """Ключ записи: хэш всех параметров, определяющих содержимое чанка"""
+        raw = f"{world_seed}:{chunk_x}:{chunk_y}:{chunk_size}:{generator_version}"
+        return hashlib.sha1(raw.encode("utf-8")).hexdigest()
+
+    def _path(self, key: str, layer: str) -> Path:
+        return self.root / key[:2] / f"{key}.{layer}.npy"
+
+    def _scan(self):
+        """Восстановление LRU-индекса с диска по времени изменения файлов"""
+        try:
+            self.root.mkdir(parents=True, exist_ok=True)
+            found: Dict[str, Tuple[float, int]] = {}
+            for path in self.root.glob("*/*.npy"):
+                key = path.name.split(".", 1)[0]
+                stat = path.stat()
+                access_time, size = found.get(key, (0.0, 0))
+                found[key] = (max(access_time, stat.st_mtime), size + stat.st_size)
+
+            for key, (_, size) in sorted(found.items(), key=lambda item: item[1][0]):
+                self._entries[key] = size
+                self._total_bytes += size
+
+            self._evict()
+            logger.debug(f"Кэш чанков: {len(self._entries)} записей, {self._total_bytes / 1048576:.1f} МБ")
+
+        except Exception as e:
+            logger.error(f"Ошибка сканирования кэша чанков {self.root}: {e}")
+
+    # - Чтение и запись
+
+    def load(self, key: str, chunk_size: int) -> Optional[ChunkArrays]:
+        """Открытие карт высот и биомов через mmap с проверкой формы и типа"""
+        with self._lock:
+            if key not in self._entries:
+                self.stats['misses'] += 1
+                return None
+            self._entries.move_to_end(key)
+
+        try:
+            arrays = []
+            for layer in self.LAYERS:
+                array = np.load(self._path(key, layer), mmap_mode="r", allow_pickle=False)
+                if array.shape != (chunk_size, chunk_size) or array.dtype.kind not in "fiu":
+                    raise ValueError(f"неверный слой {layer}: {array.shape} {array.dtype}")
+                arrays.append(array)
+
+            # Время изменения служит отметкой доступа для LRU между сессиями
+            os.utime(self._path(key, self.LAYERS[0]))
+            self.stats['hits'] += 1
+            return arrays[0], arrays[1]
+
+        except Exception as e:
+            logger.warning(f"Запись кэша чанков {key} повреждена и будет удалена: {e}")
+            self.stats['invalid'] += 1
+            self.remove(key)
+            return None
+
+    def save(self, key: str, height_map: np.ndarray, biome_map: np.ndarray) -> bool:
+        """Атомарная запись карт чанка (через временный файл и os.replace)"""
+        try:
+            directory = self.root / key[:2]
+            directory.mkdir(parents=True, exist_ok=True)
+            size = 0
+            for layer, array in zip(self.LAYERS, (height_map, biome_map)):
+                path = self._path(key, layer)
+                temp_path = path.with_name(f"{path.name}.{threading.get_ident()}.tmp")
+                with open(temp_path, "wb") as file:
+                    np.save(file, np.ascontiguousarray(array), allow_pickle=False)
+                os.replace(temp_path, path)
+                size += path.stat().st_size
+
+            with self._lock:
+                self._total_bytes += size - self._entries.pop(key, 0)
+                self._entries[key] = size
+                self.stats['writes'] += 1
+                self._evict()
+            return True
+
+        except Exception as e:
+            logger.error(f"Ошибка записи чанка {key} в кэш: {e}")
+            return False
+
+    def contains(self, key: str) -> bool:
+        with self._lock:
+            return key in self._entries
+
+    def remove(self, key: str):
+        """Удаление записи"""
+        with self._lock:
+            self._total_bytes -= self._entries.pop(key, 0)
+        self._delete_files(key)
+
+    def _delete_files(self, key: str):
+        for layer in self.LAYERS:
+            try:
+                self._path(key, layer).unlink()
+            except FileNotFoundError:
+                pass
+            except Exception as e:
+                logger.error(f"Ошибка удаления файла кэша чанков {key}: {e}")
+
+    def _evict(self):
+        """Вытеснение давно не использованных записей сверх лимита (под блокировкой)"""
+        while self._total_bytes > self.max_bytes and len(self._entries) > 1:
+            key, size = self._entries.popitem(last=False)
+            self._total_bytes -= size
+            self._delete_files(key)
+            self.stats['evictions'] += 1
+
+    def clear(self):
+        """Полная очистка кэша"""
+        with self._lock:
+            keys = list(self._entries)
+            self._entries.clear()
+            self._total_bytes = 0
+        for key in keys:
+            self._delete_files(key)
+
+    def get_stats(self) -> Dict[str, float]:
+        """Статистика кэша"""
+        with self._lock:
+            return {
+                **self.stats,
+                'entries': len(self._entries),
+                'size_mb': self._total_bytes / (1024 * 1024),
+                'max_size_mb': self.max_bytes / (1024 * 1024)
+            }
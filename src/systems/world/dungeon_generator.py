@@ -1,17 +1,48 @@
 #!/usr/bin/env python3
 """Генератор подземелий для процедурного мира
-Создает процедурные подземелья с комнатами, коридорами, ловушками и сокровищами"""
+Создает процедурные подземелья с комнатами, коридорами, ловушками и сокровищами.
+Сетка хранится в массиве NumPy uint8, комнаты связываются графом
+Делоне/минимального остовного дерева, коридоры прокладываются A* по стоимости клеток"""
 
+from concurrent.futures import ProcessPoolExecutor
 from dataclasses import dataclass, field
 from enum import Enum
-from typing import Dict, List, Optional, Any, Tuple, Set
+from typing import Dict, List, Optional, Any, Tuple, Set, Sequence
+import heapq
 import logging
+import os
 import random
 import time
 import math
 
+import numpy as np
+
 from src.core.architecture import BaseComponent, ComponentType, Priority
 
+# Попытка импорта триангуляции Делоне
+try:
+    from scipy.spatial import Delaunay
+    SCIPY_AVAILABLE = True
+except ImportError:
+    SCIPY_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+# Значения клеток сетки
+CELL_WALL = 0
+CELL_ROOM = 1
+CELL_CORRIDOR = 2
+
+# Стоимость прокладки коридора через клетку (индекс - значение клетки):
+# существующие коридоры дешевле, через чужие комнаты дороже, чем через камень
+CORRIDOR_ROUTING_COSTS = np.array([1.0, 3.0, 0.6], dtype=np.float64)
+CORRIDOR_TURN_PENALTY = 0.5
+
+# Кандидаты в петли без scipy: ближайшие соседи каждой комнаты
+LOOP_NEIGHBORS = 3
+
+Cell = Tuple[int, int]
+
 # = ТИПЫ ПОДЗЕМЕЛИЙ
 class DungeonType(Enum):
     """Типы подземелий"""
@@ -98,13 +129,14 @@ class GeneratedDungeon:
     settings: DungeonSettings
     rooms: Dict[str, Room] = field(default_factory=dict)
     corridors: Dict[str, Corridor] = field(default_factory=dict)
-    grid: List[List[int]] = field(default_factory=list)
+    grid: np.ndarray = field(default_factory=lambda: np.zeros((0, 0), dtype=np.uint8))
     entrance_room: str = ""
     exit_room: str = ""
     boss_room: str = ""
     treasure_rooms: List[str] = field(default_factory=list)
     trap_rooms: List[str] = field(default_factory=list)
     generation_time: float = field(default_factory=time.time)
+    seed: Optional[int] = None
 
 # = ОСНОВНАЯ СИСТЕМА ГЕНЕРАЦИИ ПОДЗЕМЕЛИЙ
 class DungeonGenerator(BaseComponent):
@@ -126,6 +158,9 @@ class DungeonGenerator(BaseComponent):
         # Кэш сгенерированных подземелий
         self.dungeon_cache: Dict[str, GeneratedDungeon] = {}
         
+        # Генератор случайных чисел текущей генерации (сид задает результат полностью)
+        self._rng = random.Random()
+        
         # Статистика генерации
         self.generation_stats = {
             "total_dungeons": 0,
@@ -191,23 +226,29 @@ class DungeonGenerator(BaseComponent):
             self._logger.error(f"Ошибка инициализации шаблонов комнат: {e}")
     
     def generate_dungeon(self, dungeon_type: DungeonType, 
-                        settings: Optional[DungeonSettings] = None) -> GeneratedDungeon:
-        """Генерация подземелья"""
+                        settings: Optional[DungeonSettings] = None,
+                        seed: Optional[int] = None) -> GeneratedDungeon:
+        """Генерация подземелья (при заданном сиде - детерминированная)"""
         try:
             start_time = time.time()
+            self._rng = random.Random(seed)
             
             # Используем переданные настройки или создаем новые
             if settings is None:
                 settings = DungeonSettings(dungeon_type=dungeon_type)
             
             # Создаем уникальный ID для подземелья
-            dungeon_id = f"{dungeon_type.value}_{int(time.time() * 1000)}_{random.randint(1000, 9999)}"
+            if seed is None:
+                dungeon_id = f"{dungeon_type.value}_{int(time.time() * 1000)}_{self._rng.randint(1000, 9999)}"
+            else:
+                dungeon_id = f"{dungeon_type.value}_seed_{seed}"
             
             # Создаем подземелье
             dungeon = GeneratedDungeon(
                 dungeon_id=dungeon_id,
                 dungeon_type=dungeon_type,
-                settings=settings
+                settings=settings,
+                seed=seed
             )
             
             # Генерируем сетку
@@ -239,7 +280,7 @@ class DungeonGenerator(BaseComponent):
             # Кэшируем результат
             self.dungeon_cache[dungeon_id] = dungeon
             
-            self._logger.info(f"Подземелье {dungeon_type.value} сгенерировано за {generation_time:.3f}с")
+            self._logger.debug(f"Подземелье {dungeon_type.value} сгенерировано за {generation_time:.3f}с")
             
             return dungeon
             
@@ -247,24 +288,81 @@ class DungeonGenerator(BaseComponent):
             self._logger.error(f"Ошибка генерации подземелья {dungeon_type.value}: {e}")
             return None
     
-    def _create_empty_grid(self, width: int, height: int) -> List[List[int]]:
+    def generate_dungeons(self, seeds: Sequence[int], dungeon_type: DungeonType,
+                          settings: Optional[DungeonSettings] = None,
+                          max_workers: Optional[int] = None) -> List[GeneratedDungeon]:
+        """Пакетная генерация подземелий по сидам в пуле процессов
+        Результаты попадают в кэш; уже закэшированные сиды не генерируются повторно"""
+        try:
+            start_time = time.time()
+            results: Dict[int, GeneratedDungeon] = {}
+            pending = []
+            for seed in dict.fromkeys(seeds):
+                cached = self.dungeon_cache.get(f"{dungeon_type.value}_seed_{seed}")
+                if cached is not None and (settings is None or cached.settings == settings):
+                    results[seed] = cached
+                else:
+                    pending.append(seed)
+            
+            workers = max_workers or min(len(pending), os.cpu_count() or 1)
+            generated: List[Optional[GeneratedDungeon]] = []
+            if workers > 1 and len(pending) > 1:
+                try:
+                    with ProcessPoolExecutor(max_workers=workers) as executor:
+                        chunk_size = max(1, len(pending) // (workers * 4))
+                        generated = list(executor.map(
+                            _generate_dungeon_worker,
+                            [(dungeon_type, settings, seed) for seed in pending],
+                            chunksize=chunk_size
+                        ))
+                except Exception as e:
+                    self._logger.warning(f"Пул процессов недоступен, генерация в текущем потоке: {e}")
+                    generated = []
+            
+            if len(generated) != len(pending):
+                generated = [self.generate_dungeon(dungeon_type, settings, seed) for seed in pending]
+            else:
+                # Подземелья из рабочих процессов учитываются в кэше и статистике здесь
+                for dungeon in generated:
+                    if dungeon is None:
+                        continue
+                    self.dungeon_cache[dungeon.dungeon_id] = dungeon
+                    self.generation_stats["total_dungeons"] += 1
+                    self.generation_stats["total_rooms"] += len(dungeon.rooms)
+                    self.generation_stats["total_corridors"] += len(dungeon.corridors)
+                    self.generation_stats["generation_time"] += dungeon.generation_time
+            
+            for seed, dungeon in zip(pending, generated):
+                if dungeon is not None:
+                    results[seed] = dungeon
+            
+            self._logger.info(f"Пакет из {len(pending)} подземелий сгенерирован за "
+                              f"{time.time() - start_time:.3f}с ({workers} процессов)")
+            return [results[seed] for seed in seeds if seed in results]
+            
+        except Exception as e:
+            self._logger.error(f"Ошибка пакетной генерации подземелий: {e}")
+            return []
+    
+    def _create_empty_grid(self, width: int, height: int) -> np.ndarray:
         """Создание пустой сетки подземелья"""
         try:
-            return [[0 for _ in range(width)] for _ in range(height)]
+            return np.zeros((height, width), dtype=np.uint8)
         except Exception as e:
             self._logger.error(f"Ошибка создания сетки: {e}")
-            return []
+            return np.zeros((0, 0), dtype=np.uint8)
     
     def _generate_rooms(self, dungeon: GeneratedDungeon):
         """Генерация комнат подземелья"""
         try:
             settings = dungeon.settings
-            num_rooms = random.randint(settings.min_rooms, settings.max_rooms)
+            num_rooms = self._rng.randint(settings.min_rooms, settings.max_rooms)
             
             # Создаем входную комнату
             entrance_room = self._create_room(dungeon, RoomType.ENTRANCE, 0)
-            dungeon.rooms[entrance_room.room_id] = entrance_room
-            dungeon.entrance_room = entrance_room.room_id
+            if entrance_room:
+                dungeon.rooms[entrance_room.room_id] = entrance_room
+                dungeon.entrance_room = entrance_room.room_id
             
             # Создаем остальные комнаты
             for i in range(1, num_rooms - 1):
@@ -272,7 +370,7 @@ class DungeonGenerator(BaseComponent):
                 room = self._create_room(dungeon, room_type, i)
                 
                 if room:
-                    dungeon.rooms[room.room_id] = entrance_room
+                    dungeon.rooms[room.room_id] = room
                     
                     # Определяем специальные комнаты
                     if room_type == RoomType.BOSS:
@@ -284,8 +382,9 @@ class DungeonGenerator(BaseComponent):
             
             # Создаем выходную комнату
             exit_room = self._create_room(dungeon, RoomType.EXIT, num_rooms - 1)
-            dungeon.rooms[exit_room.room_id] = exit_room
-            dungeon.exit_room = exit_room.room_id
+            if exit_room:
+                dungeon.rooms[exit_room.room_id] = exit_room
+                dungeon.exit_room = exit_room.room_id
             
         except Exception as e:
             self._logger.error(f"Ошибка генерации комнат: {e}")
@@ -301,8 +400,8 @@ class DungeonGenerator(BaseComponent):
             size_range = template.get("size_range", (settings.room_min_size, settings.room_max_size))
             
             # Определяем размер комнаты
-            width = random.randint(size_range[0], size_range[1])
-            height = random.randint(size_range[0], size_range[1])
+            width = self._rng.randint(size_range[0], size_range[1])
+            height = self._rng.randint(size_range[0], size_range[1])
             
             # Определяем позицию комнаты
             max_x = settings.width - width
@@ -311,28 +410,36 @@ class DungeonGenerator(BaseComponent):
             if max_x <= 0 or max_y <= 0:
                 return None
             
-            # Пытаемся разместить комнату
-            for attempt in range(100):
-                x = random.randint(0, max_x)
-                y = random.randint(0, max_y)
-                
+            # Несколько случайных попыток, затем выбор среди всех свободных позиций
+            position = None
+            for attempt in range(8):
+                x = self._rng.randint(0, max_x)
+                y = self._rng.randint(0, max_y)
                 if self._can_place_room(dungeon, x, y, width, height):
-                    # Создаем комнату
-                    room = Room(
-                        room_id=f"room_{room_type.value}_{room_index}_{int(time.time() * 1000)}",
-                        room_type=room_type,
-                        x=x,
-                        y=y,
-                        width=width,
-                        height=height
-                    )
-                    
-                    # Размещаем комнату на сетке
-                    self._place_room_on_grid(dungeon, room)
-                    
-                    return room
+                    position = (x, y)
+                    break
+            
+            if position is None:
+                free_y, free_x = np.nonzero(self._free_room_positions(dungeon.grid, width, height))
+                if free_x.size == 0:
+                    return None
+                choice = self._rng.randrange(free_x.size)
+                position = (int(free_x[choice]), int(free_y[choice]))
+            
+            # Создаем комнату
+            room = Room(
+                room_id=f"room_{room_type.value}_{room_index}",
+                room_type=room_type,
+                x=position[0],
+                y=position[1],
+                width=width,
+                height=height
+            )
             
-            return None
+            # Размещаем комнату на сетке
+            self._place_room_on_grid(dungeon, room)
+            
+            return room
             
         except Exception as e:
             self._logger.error(f"Ошибка создания комнаты {room_type.value}: {e}")
@@ -342,28 +449,32 @@ class DungeonGenerator(BaseComponent):
                         width: int, height: int) -> bool:
         """Проверка возможности размещения комнаты"""
         try:
+            grid_height, grid_width = dungeon.grid.shape
+            
             # Проверяем границы
-            if x < 0 or y < 0 or x + width > len(dungeon.grid[0]) or y + height > len(dungeon.grid):
+            if x < 0 or y < 0 or x + width > grid_width or y + height > grid_height:
                 return False
             
             # Проверяем, что место свободно
-            for dy in range(y, y + height):
-                for dx in range(x, x + width):
-                    if dungeon.grid[dy][dx] != 0:
-                        return False
-            
-            return True
+            return not dungeon.grid[y:y + height, x:x + width].any()
             
         except Exception as e:
             self._logger.error(f"Ошибка проверки размещения комнаты: {e}")
             return False
     
+    def _free_room_positions(self, grid: np.ndarray, width: int, height: int) -> np.ndarray:
+        """Маска левых верхних углов, где комната width x height не пересекает занятые клетки
+        Суммы по всем окнам считаются одной таблицей префиксных сумм"""
+        occupied = np.zeros((grid.shape[0] + 1, grid.shape[1] + 1), dtype=np.int32)
+        np.cumsum(np.cumsum(grid != CELL_WALL, axis=0), axis=1, out=occupied[1:, 1:])
+        window = (occupied[height:, width:] - occupied[:-height, width:]
+                  - occupied[height:, :-width] + occupied[:-height, :-width])
+        return window == 0
+    
     def _place_room_on_grid(self, dungeon: GeneratedDungeon, room: Room):
         """Размещение комнаты на сетке"""
         try:
-            for y in range(room.y, room.y + room.height):
-                for x in range(room.x, room.x + room.width):
-                    dungeon.grid[y][x] = 1  # 1 = комната
+            dungeon.grid[room.y:room.y + room.height, room.x:room.x + room.width] = CELL_ROOM
             
         except Exception as e:
             self._logger.error(f"Ошибка размещения комнаты на сетке: {e}")
@@ -379,9 +490,9 @@ class DungeonGenerator(BaseComponent):
                 return RoomType.EXIT
             elif room_index == total_rooms // 2:
                 return RoomType.BOSS
-            elif random.random() < 0.2:
+            elif self._rng.random() < 0.2:
                 return RoomType.TREASURE
-            elif random.random() < 0.3:
+            elif self._rng.random() < 0.3:
                 return RoomType.TRAP
             else:
                 return RoomType.CHAMBER
@@ -391,44 +502,112 @@ class DungeonGenerator(BaseComponent):
             return RoomType.CHAMBER
     
     def _connect_rooms(self, dungeon: GeneratedDungeon):
-        """Соединение комнат коридорами"""
+        """Соединение комнат коридорами
+        Основа - минимальное остовное дерево по расстояниям между центрами,
+        петли добавляются из ребер триангуляции Делоне в зависимости от сложности"""
         try:
             room_list = list(dungeon.rooms.values())
+            if len(room_list) < 2:
+                return
             
-            # Соединяем комнаты последовательно
-            for i in range(len(room_list) - 1):
-                room1 = room_list[i]
-                room2 = room_list[i + 1]
-                
-                corridor = self._create_corridor(dungeon, room1, room2)
-                if corridor:
-                    dungeon.corridors[corridor.corridor_id] = corridor
-                    
-                    # Добавляем связи между комнатами
-                    room1.connections.append(room2.room_id)
-                    room2.connections.append(room1.room_id)
+            centers = np.array([self._room_center(room) for room in room_list], dtype=np.float64)
+            tree_edges = self._minimum_spanning_tree(centers)
+            
+            # Стоимость прокладки поддерживается инкрементально по мере вырезания коридоров
+            routing_costs = CORRIDOR_ROUTING_COSTS[dungeon.grid].ravel().tolist()
+            
+            # Короткие ребра первыми: длинные коридоры переиспользуют уже проложенные
+            for i, j in sorted(tree_edges, key=lambda edge: self._edge_length(centers, edge)):
+                self._link_rooms(dungeon, room_list[i], room_list[j], routing_costs)
             
-            # Добавляем случайные дополнительные связи для сложности
-            if dungeon.settings.complexity > 0.5:
-                self._add_random_connections(dungeon)
+            # Добавляем дополнительные связи (петли) для сложности
+            candidate_edges = self._candidate_loop_edges(centers) - set(tree_edges)
+            self._add_random_connections(dungeon, room_list, candidate_edges, routing_costs)
             
         except Exception as e:
             self._logger.error(f"Ошибка соединения комнат: {e}")
     
+    def _link_rooms(self, dungeon: GeneratedDungeon, room1: Room, room2: Room,
+                    routing_costs: Optional[List[float]] = None) -> Optional[Corridor]:
+        """Коридор между комнатами с регистрацией связи"""
+        corridor = self._create_corridor(dungeon, room1, room2, routing_costs)
+        if corridor:
+            dungeon.corridors[corridor.corridor_id] = corridor
+            room1.connections.append(room2.room_id)
+            room2.connections.append(room1.room_id)
+        return corridor
+    
+    @staticmethod
+    def _room_center(room: Room) -> Cell:
+        return (room.x + room.width // 2, room.y + room.height // 2)
+    
+    @staticmethod
+    def _edge_length(centers: np.ndarray, edge: Tuple[int, int]) -> float:
+        return float(np.hypot(*(centers[edge[0]] - centers[edge[1]])))
+    
+    def _minimum_spanning_tree(self, centers: np.ndarray) -> List[Tuple[int, int]]:
+        """Алгоритм Прима по полной матрице расстояний (евклидово MST лежит в графе Делоне)"""
+        count = len(centers)
+        distances = np.hypot(centers[:, None, 0] - centers[None, :, 0],
+                             centers[:, None, 1] - centers[None, :, 1])
+        in_tree = np.zeros(count, dtype=bool)
+        in_tree[0] = True
+        best = distances[0].copy()
+        parent = np.zeros(count, dtype=np.int64)
+        edges = []
+        
+        for _ in range(count - 1):
+            candidates = np.where(in_tree, np.inf, best)
+            node = int(np.argmin(candidates))
+            edges.append((min(node, int(parent[node])), max(node, int(parent[node]))))
+            in_tree[node] = True
+            closer = distances[node] < best
+            best = np.where(closer, distances[node], best)
+            parent = np.where(closer, node, parent)
+        
+        return edges
+    
+    def _candidate_loop_edges(self, centers: np.ndarray) -> Set[Tuple[int, int]]:
+        """Ребра триангуляции Делоне; без scipy - граф ближайших соседей"""
+        count = len(centers)
+        edges: Set[Tuple[int, int]] = set()
+        if count < 3:
+            return edges
+        
+        if SCIPY_AVAILABLE:
+            try:
+                for simplex in Delaunay(centers).simplices:
+                    for a, b in ((0, 1), (1, 2), (0, 2)):
+                        i, j = int(simplex[a]), int(simplex[b])
+                        edges.add((min(i, j), max(i, j)))
+                return edges
+            except Exception as e:
+                # Вырожденные конфигурации (все центры на одной прямой)
+                self._logger.debug(f"Триангуляция Делоне недоступна: {e}")
+        
+        distances = np.hypot(centers[:, None, 0] - centers[None, :, 0],
+                             centers[:, None, 1] - centers[None, :, 1])
+        np.fill_diagonal(distances, np.inf)
+        neighbors = np.argsort(distances, axis=1)[:, :LOOP_NEIGHBORS]
+        for i in range(count):
+            for j in neighbors[i]:
+                edges.add((min(i, int(j)), max(i, int(j))))
+        return edges
+    
     def _create_corridor(self, dungeon: GeneratedDungeon, room1: Room, 
-                         room2: Room) -> Optional[Corridor]:
+                         room2: Room, routing_costs: Optional[List[float]] = None) -> Optional[Corridor]:
         """Создание коридора между двумя комнатами"""
         try:
             # Определяем центры комнат
-            center1 = (room1.x + room1.width // 2, room1.y + room1.height // 2)
-            center2 = (room2.x + room2.width // 2, room2.y + room2.height // 2)
+            center1 = self._room_center(room1)
+            center2 = self._room_center(room2)
             
             # Создаем путь коридора
-            path = self._create_corridor_path(dungeon, center1, center2)
+            path = self._create_corridor_path(dungeon, center1, center2, routing_costs)
             
             if path:
                 corridor = Corridor(
-                    corridor_id=f"corridor_{room1.room_id}_{room2.room_id}_{int(time.time() * 1000)}",
+                    corridor_id=f"corridor_{room1.room_id}_{room2.room_id}",
                     start_room=room1.room_id,
                     end_room=room2.room_id,
                     path=path,
@@ -436,7 +615,7 @@ class DungeonGenerator(BaseComponent):
                 )
                 
                 # Размещаем коридор на сетке
-                self._place_corridor_on_grid(dungeon, corridor)
+                self._place_corridor_on_grid(dungeon, corridor, routing_costs)
                 
                 return corridor
             
@@ -446,62 +625,129 @@ class DungeonGenerator(BaseComponent):
             self._logger.error(f"Ошибка создания коридора: {e}")
             return None
     
-    def _create_corridor_path(self, dungeon: GeneratedDungeon, start: Tuple[int, int], 
-                             end: Tuple[int, int]) -> List[Tuple[int, int]]:
-        """Создание пути коридора"""
+    def _create_corridor_path(self, dungeon: GeneratedDungeon, start: Cell, end: Cell,
+                              routing_costs: Optional[List[float]] = None) -> List[Cell]:
+        """Создание пути коридора
+        A* по 4-связной сетке; состояние - клетка и направление, поворот штрафуется.
+        Эвристика - манхэттенское расстояние по стоимости камня (поиск близок к жадному,
+        но обходит комнаты и подхватывает проложенные коридоры)"""
         try:
-            path = []
-            current = start
-            
-            # Простой алгоритм: сначала по X, потом по Y
-            while current[0] != end[0]:
-                next_x = current[0] + (1 if current[0] < end[0] else -1)
-                current = (next_x, current[1])
-                path.append(current)
-            
-            while current[1] != end[1]:
-                next_y = current[1] + (1 if current[1] < end[1] else -1)
-                current = (current[0], next_y)
-                path.append(current)
+            grid_height, grid_width = dungeon.grid.shape
+            if routing_costs is None:
+                routing_costs = CORRIDOR_ROUTING_COSTS[dungeon.grid].ravel().tolist()
+            
+            wall_cost = float(CORRIDOR_ROUTING_COSTS[CELL_WALL])
+            goal_x, goal_y = end
+            start_index = start[1] * grid_width + start[0]
+            goal_index = goal_y * grid_width + goal_x
+            if start_index == goal_index:
+                return []
+            
+            # Направления: 0 - +x, 1 - -x, 2 - +y, 3 - -y; состояние = индекс * 4 + направление
+            offsets = (1, -1, grid_width, -grid_width)
+            g_score: Dict[int, float] = {}
+            parents: Dict[int, int] = {}
+            open_heap: List[Tuple[float, float, int]] = []
+            for direction in range(4):
+                state = start_index * 4 + direction
+                g_score[state] = 0.0
+                parents[state] = -1
+                open_heap.append((0.0, 0.0, state))
+            closed: Set[int] = set()
+            
+            while open_heap:
+                _, g, state = heapq.heappop(open_heap)
+                if state in closed:
+                    continue
+                index, direction = divmod(state, 4)
+                if index == goal_index:
+                    return self._reconstruct_corridor(parents, state, grid_width)
+                closed.add(state)
+                
+                y, x = divmod(index, grid_width)
+                for new_direction, offset in enumerate(offsets):
+                    # Границы сетки и разворот на месте
+                    if ((new_direction == 0 and x + 1 >= grid_width) or (new_direction == 1 and x == 0) or
+                            (new_direction == 2 and y + 1 >= grid_height) or (new_direction == 3 and y == 0)):
+                        continue
+                    if new_direction ^ 1 == direction and parents[state] != -1:
+                        continue
+                    
+                    neighbor = index + offset
+                    neighbor_state = neighbor * 4 + new_direction
+                    if neighbor_state in closed:
+                        continue
+                    
+                    new_g = g + routing_costs[neighbor]
+                    if new_direction != direction and parents[state] != -1:
+                        new_g += CORRIDOR_TURN_PENALTY
+                    if new_g < g_score.get(neighbor_state, math.inf):
+                        g_score[neighbor_state] = new_g
+                        parents[neighbor_state] = state
+                        ny, nx = divmod(neighbor, grid_width)
+                        h = (abs(nx - goal_x) + abs(ny - goal_y)) * wall_cost
+                        heapq.heappush(open_heap, (new_g + h, new_g, neighbor_state))
             
-            return path
+            return []
             
         except Exception as e:
             self._logger.error(f"Ошибка создания пути коридора: {e}")
             return []
     
-    def _place_corridor_on_grid(self, dungeon: GeneratedDungeon, corridor: Corridor):
-        """Размещение коридора на сетке"""
+    @staticmethod
+    def _reconstruct_corridor(parents: Dict[int, int], state: int, grid_width: int) -> List[Cell]:
+        """Клетки пути без стартовой (как в прежнем пошаговом алгоритме)"""
+        path = []
+        while parents[state] != -1:
+            y, x = divmod(state // 4, grid_width)
+            path.append((x, y))
+            state = parents[state]
+        path.reverse()
+        return path
+    
+    def _place_corridor_on_grid(self, dungeon: GeneratedDungeon, corridor: Corridor,
+                                routing_costs: Optional[List[float]] = None):
+        """Размещение коридора на сетке
+        Путь расширяется до ширины коридора сдвигами маски; комнаты не перезаписываются"""
         try:
-            for x, y in corridor.path:
-                # Размещаем коридор с учетом ширины
-                for dy in range(y - corridor.width // 2, y + corridor.width // 2 + 1):
-                    for dx in range(x - corridor.width // 2, x + corridor.width // 2 + 1):
-                        if (0 <= dy < len(dungeon.grid) and 
-                            0 <= dx < len(dungeon.grid[0])):
-                            dungeon.grid[dy][dx] = 2  # 2 = коридор
+            grid = dungeon.grid
+            grid_height, grid_width = grid.shape
+            path = np.array(corridor.path, dtype=np.int64).reshape(-1, 2)
+            path_mask = np.zeros(grid.shape, dtype=bool)
+            path_mask[path[:, 1], path[:, 0]] = True
+            
+            # Размещаем коридор с учетом ширины
+            half = corridor.width // 2
+            carved = np.zeros(grid.shape, dtype=bool)
+            for dy in range(-half, half + 1):
+                for dx in range(-half, half + 1):
+                    carved[max(dy, 0):grid_height + min(dy, 0), max(dx, 0):grid_width + min(dx, 0)] |= \
+                        path_mask[max(-dy, 0):grid_height + min(-dy, 0), max(-dx, 0):grid_width + min(-dx, 0)]
+            
+            carved &= grid == CELL_WALL
+            grid[carved] = CELL_CORRIDOR
+            
+            if routing_costs is not None:
+                corridor_cost = float(CORRIDOR_ROUTING_COSTS[CELL_CORRIDOR])
+                for index in np.flatnonzero(carved).tolist():
+                    routing_costs[index] = corridor_cost
             
         except Exception as e:
             self._logger.error(f"Ошибка размещения коридора на сетке: {e}")
     
-    def _add_random_connections(self, dungeon: GeneratedDungeon):
-        """Добавление случайных связей между комнатами"""
+    def _add_random_connections(self, dungeon: GeneratedDungeon, room_list: List[Room],
+                                candidate_edges: Set[Tuple[int, int]],
+                                routing_costs: Optional[List[float]] = None):
+        """Добавление случайных связей между комнатами
+        Доля использованных ребер-кандидатов растет со сложностью подземелья"""
         try:
-            room_list = list(dungeon.rooms.values())
-            num_extra_connections = int(len(room_list) * 0.3)
+            edges = sorted(candidate_edges)
+            num_extra_connections = int(round(len(edges) * dungeon.settings.complexity * 0.5))
             
-            for _ in range(num_extra_connections):
-                room1 = random.choice(room_list)
-                room2 = random.choice(room_list)
-                
-                if (room1.room_id != room2.room_id and 
-                    room2.room_id not in room1.connections):
-                    
-                    corridor = self._create_corridor(dungeon, room1, room2)
-                    if corridor:
-                        dungeon.corridors[corridor.corridor_id] = corridor
-                        room1.connections.append(room2.room_id)
-                        room2.connections.append(room1.room_id)
+            for i, j in self._rng.sample(edges, min(num_extra_connections, len(edges))):
+                room1, room2 = room_list[i], room_list[j]
+                if room2.room_id not in room1.connections:
+                    self._link_rooms(dungeon, room1, room2, routing_costs)
             
         except Exception as e:
             self._logger.error(f"Ошибка добавления случайных связей: {e}")
@@ -539,12 +785,12 @@ class DungeonGenerator(BaseComponent):
             
             for room in dungeon.rooms.values():
                 # Добавляем ловушки
-                if random.random() < settings.trap_density:
-                    trap_type = random.choice(list(TrapType))
+                if self._rng.random() < settings.trap_density:
+                    trap_type = self._rng.choice(list(TrapType))
                     room.traps.append(trap_type.value)
                 
                 # Добавляем сокровища
-                if random.random() < settings.treasure_density:
+                if self._rng.random() < settings.treasure_density:
                     treasure_type = self._select_treasure_type(room.room_type)
                     room.treasures.append(treasure_type)
                 
@@ -552,8 +798,8 @@ class DungeonGenerator(BaseComponent):
                 for corridor in dungeon.corridors.values():
                     if (corridor.start_room == room.room_id or 
                         corridor.end_room == room.room_id):
-                        if random.random() < settings.trap_density * 0.5:
-                            trap_type = random.choice(list(TrapType))
+                        if self._rng.random() < settings.trap_density * 0.5:
+                            trap_type = self._rng.choice(list(TrapType))
                             corridor.traps.append(trap_type.value)
             
         except Exception as e:
@@ -571,7 +817,7 @@ class DungeonGenerator(BaseComponent):
             }
             
             available_types = treasure_types.get(room_type, ["misc_item"])
-            return random.choice(available_types)
+            return self._rng.choice(available_types)
             
         except Exception as e:
             self._logger.error(f"Ошибка выбора типа сокровища: {e}")
@@ -650,7 +896,7 @@ class DungeonGenerator(BaseComponent):
                 }
                 available_types = boss_enemies.get(dungeon_type, ["boss_enemy"])
             
-            return random.choice(available_types)
+            return self._rng.choice(available_types)
             
         except Exception as e:
             self._logger.error(f"Ошибка выбора типа врага: {e}")
@@ -710,3 +956,19 @@ class DungeonGenerator(BaseComponent):
         except Exception as e:
             self._logger.error(f"Ошибка уничтожения генератора подземелий: {e}")
             return False
+
+# = ПАКЕТНАЯ ГЕНЕРАЦИЯ В ПУЛЕ ПРОЦЕССОВ
+
+# Генератор рабочего процесса (создается один раз на процесс)
+_worker_generator: Optional[DungeonGenerator] = None
+
+def _generate_dungeon_worker(task: Tuple[DungeonType, Optional[DungeonSettings], int]) -> Optional[GeneratedDungeon]:
+    """Генерация одного подземелья в рабочем процессе"""
+    global _worker_generator
+    if _worker_generator is None:
+        _worker_generator = DungeonGenerator()
+    dungeon_type, settings, seed = task
+    dungeon = _worker_generator.generate_dungeon(dungeon_type, settings, seed)
+    # Кэш рабочего процесса не нужен: результат возвращается в основной процесс
+    _worker_generator.dungeon_cache.clear()
+    return dungeon
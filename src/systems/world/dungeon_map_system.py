@@ -1,15 +1,19 @@
 #!/usr/bin/env python3
 """Система карт подземелий для игрового мира
-Включает генерацию карт подземелий, отслеживание исследованных областей и навигацию"""
+Включает генерацию карт подземелий, отслеживание исследованных областей и навигацию.
+Слои хранятся плотными массивами, исследование - битовыми картами NumPy по персонажам"""
 
+from collections.abc import Mapping
 from dataclasses import dataclass, field
 from enum import Enum
-from typing import Dict, List, Optional, Any, Tuple, Set
+from typing import Dict, List, Optional, Any, Tuple, Set, Union
 import logging
 import random
 import time
 import math
 
+import numpy as np
+
 from src.core.architecture import BaseComponent, ComponentType, Priority
 
 # = ТИПЫ КАРТ ПОДЗЕМЕЛИЙ
@@ -54,6 +58,18 @@ class DungeonMapSettings:
     persistence: bool = True
 
 # = СТРУКТУРЫ ДАННЫХ
+
+# Коды типов областей в плотных массивах слоев
+AREA_TYPES: List[MapAreaType] = list(MapAreaType)
+AREA_CODES: Dict[MapAreaType, int] = {area_type: code for code, area_type in enumerate(AREA_TYPES)}
+UNEXPLORED_CODE = AREA_CODES[MapAreaType.UNEXPLORED]
+EXPLORED_CODE = AREA_CODES[MapAreaType.EXPLORED]
+
+def _mask_to_cells(mask: np.ndarray) -> Set[Tuple[int, int]]:
+    """Множество координат (x, y) отмеченных клеток"""
+    ys, xs = np.nonzero(mask)
+    return set(zip(xs.tolist(), ys.tolist()))
+
 @dataclass
 class MapCell:
     """Ячейка карты"""
@@ -68,28 +84,182 @@ class MapCell:
 
 @dataclass
 class MapLayer:
-    """Слой карты"""
+    """Слой карты
+    Типы областей хранятся плотным массивом кодов [y, x], метаданные - списком
+    объектов слоя (комнат, ловушек...) и массивом индексов объекта по клеткам"""
     layer_id: str
     layer_type: DungeonMapType
-    cells: Dict[Tuple[int, int], MapCell]
+    area_types: np.ndarray
+    feature_ids: np.ndarray
+    features: List[Dict[str, Any]] = field(default_factory=list)
     visible: bool = True
     opacity: float = 1.0
     z_order: int = 0
+    cell_state: Optional["MapCellState"] = None
+    
+    def area_type_at(self, x: int, y: int) -> MapAreaType:
+        return AREA_TYPES[self.area_types[y, x]]
+    
+    def metadata_at(self, x: int, y: int) -> Dict[str, Any]:
+        """Метаданные объекта в клетке (общий словарь объекта, изменения сохраняются)"""
+        feature = self.feature_ids[y, x]
+        return self.features[feature] if feature >= 0 else {}
+    
+    @property
+    def cells(self) -> "LayerCellsView":
+        """Совместимое представление {(x, y): MapCell}; ячейки создаются при обращении"""
+        return LayerCellsView(self, self.cell_state)
+
+class LayerCellsView(Mapping):
+    """Ленивое отображение клеток слоя в MapCell с необязательной маской тумана войны"""
+    
+    def __init__(self, layer: MapLayer, state: Optional["MapCellState"] = None,
+                 fog_mask: Optional[np.ndarray] = None):
+        self.layer = layer
+        self.state = state
+        self.fog_mask = fog_mask
+    
+    def __getitem__(self, key: Tuple[int, int]) -> MapCell:
+        x, y = key
+        height, width = self.layer.area_types.shape
+        if not (0 <= x < width and 0 <= y < height):
+            raise KeyError(key)
+        
+        state = self.state
+        explored = bool(state.explored[y, x]) if state is not None else False
+        cell = MapCell(
+            x=x, y=y,
+            area_type=self.layer.area_type_at(x, y),
+            discovered=bool(state.discovered[y, x]) if state is not None else False,
+            explored=explored,
+            visible=explored,
+            last_seen=float(state.last_seen[y, x]) if state is not None else 0.0,
+            metadata=self.layer.metadata_at(x, y)
+        )
+        
+        # Скрытие неисследованных областей
+        if self.fog_mask is not None and not self.fog_mask[y, x]:
+            cell.area_type = MapAreaType.UNEXPLORED
+            cell.visible = False
+            cell.metadata = {}
+        return cell
+    
+    def __iter__(self):
+        height, width = self.layer.area_types.shape
+        for x in range(width):
+            for y in range(height):
+                yield (x, y)
+    
+    def __len__(self) -> int:
+        return self.layer.area_types.size
+    
+    def __contains__(self, key) -> bool:
+        try:
+            x, y = key
+        except (TypeError, ValueError):
+            return False
+        height, width = self.layer.area_types.shape
+        return 0 <= x < width and 0 <= y < height
+
+@dataclass
+class MapCellState:
+    """Битовые карты состояния клеток [y, x]"""
+    explored: np.ndarray
+    discovered: np.ndarray
+    last_seen: np.ndarray
+    
+    @classmethod
+    def empty(cls, width: int, height: int) -> "MapCellState":
+        return cls(
+            explored=np.zeros((height, width), dtype=bool),
+            discovered=np.zeros((height, width), dtype=bool),
+            last_seen=np.zeros((height, width), dtype=np.float64)
+        )
 
 @dataclass
 class DungeonMapData:
-    """Данные карты подземелья"""
+    """Данные карты подземелья
+    Состояние исследования: общее по карте (cell_state) и по каждому персонажу"""
     dungeon_id: str
     map_id: str
     settings: DungeonMapSettings
     layers: Dict[str, MapLayer]
     grid_width: int
     grid_height: int
-    explored_cells: Set[Tuple[int, int]]
-    discovered_cells: Set[Tuple[int, int]]
+    cell_state: MapCellState
     secret_areas: Set[Tuple[int, int]]
+    character_states: Dict[str, MapCellState] = field(default_factory=dict)
     created_at: float = field(default_factory=time.time)
     last_updated: float = field(default_factory=time.time)
+    
+    @property
+    def explored_cells(self) -> Set[Tuple[int, int]]:
+        return _mask_to_cells(self.cell_state.explored)
+    
+    @property
+    def discovered_cells(self) -> Set[Tuple[int, int]]:
+        return _mask_to_cells(self.cell_state.discovered)
+    
+    def get_character_state(self, character_id: str) -> MapCellState:
+        """Битовые карты персонажа (создаются при первом обращении)"""
+        state = self.character_states.get(character_id)
+        if state is None:
+            state = MapCellState.empty(self.grid_width, self.grid_height)
+            self.character_states[character_id] = state
+        return state
+
+class FoggedMapView:
+    """Карта глазами персонажа: слои не копируются, туман применяется при чтении"""
+    
+    def __init__(self, dungeon_map: DungeonMapData, character_id: str):
+        self.base_map = dungeon_map
+        self.character_id = character_id
+        self.cell_state = dungeon_map.get_character_state(character_id)
+        self.fog_mask = self.cell_state.explored | self.cell_state.discovered
+        self.layers = {layer_id: FoggedLayerView(layer, self.cell_state, self.fog_mask)
+                       for layer_id, layer in dungeon_map.layers.items()}
+    
+    def __getattr__(self, name: str) -> Any:
+        # Остальные атрибуты (map_id, settings, размеры...) берутся у исходной карты
+        return getattr(self.base_map, name)
+    
+    @property
+    def explored_cells(self) -> Set[Tuple[int, int]]:
+        return _mask_to_cells(self.cell_state.explored)
+    
+    @property
+    def discovered_cells(self) -> Set[Tuple[int, int]]:
+        return _mask_to_cells(self.cell_state.discovered)
+
+class FoggedLayerView:
+    """Слой под маской тумана войны"""
+    
+    def __init__(self, layer: MapLayer, state: MapCellState, fog_mask: np.ndarray):
+        self.layer = layer
+        self.state = state
+        self.fog_mask = fog_mask
+    
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self.layer, name)
+    
+    @property
+    def area_types(self) -> np.ndarray:
+        """Коды типов областей; скрытые клетки - UNEXPLORED"""
+        return np.where(self.fog_mask, self.layer.area_types, UNEXPLORED_CODE).astype(np.uint8)
+    
+    @property
+    def feature_ids(self) -> np.ndarray:
+        return np.where(self.fog_mask, self.layer.feature_ids, -1)
+    
+    def area_type_at(self, x: int, y: int) -> MapAreaType:
+        return self.layer.area_type_at(x, y) if self.fog_mask[y, x] else MapAreaType.UNEXPLORED
+    
+    def metadata_at(self, x: int, y: int) -> Dict[str, Any]:
+        return self.layer.metadata_at(x, y) if self.fog_mask[y, x] else {}
+    
+    @property
+    def cells(self) -> LayerCellsView:
+        return LayerCellsView(self.layer, self.state, self.fog_mask)
 
 @dataclass
 class MapMarker:
@@ -110,13 +280,17 @@ class ExplorationData:
     """Данные исследования"""
     dungeon_id: str
     character_id: str
-    explored_cells: Set[Tuple[int, int]]
+    cell_state: MapCellState
     discovered_secrets: Set[Tuple[int, int]]
     found_treasures: Set[Tuple[int, int]]
     triggered_traps: Set[Tuple[int, int]]
     defeated_enemies: Set[Tuple[int, int]]
     exploration_percentage: float = 0.0
     last_exploration: float = 0.0
+    
+    @property
+    def explored_cells(self) -> Set[Tuple[int, int]]:
+        return _mask_to_cells(self.cell_state.explored)
 
 # = СИСТЕМА КАРТ ПОДЗЕМЕЛИЙ
 class DungeonMapSystem(BaseComponent):
@@ -211,10 +385,11 @@ class DungeonMapSystem(BaseComponent):
             layers=layers,
             grid_width=grid_width,
             grid_height=grid_height,
-            explored_cells=set(),
-            discovered_cells=set(),
+            cell_state=MapCellState.empty(grid_width, grid_height),
             secret_areas=set()
         )
+        for layer in layers.values():
+            layer.cell_state = dungeon_map.cell_state
         
         self.dungeon_maps[map_id] = dungeon_map
         self.map_markers[map_id] = []
@@ -223,232 +398,133 @@ class DungeonMapSystem(BaseComponent):
         generation_time = time.time() - start_time
         self.generation_stats["maps_created"] += 1
         self.generation_stats["layers_created"] += len(layers)
-        self.generation_stats["cells_generated"] += sum(len(layer.cells) for layer in layers.values())
+        self.generation_stats["cells_generated"] += sum(layer.area_types.size for layer in layers.values())
         self.generation_stats["total_generation_time"] += generation_time
         
         self.logger.info(f"Создана карта подземелья {map_id}: {len(layers)} слоев, {grid_width}x{grid_height} ячеек")
         
         return dungeon_map
     
+    # - Построение слоев
+    
+    def _new_layer(self, layer_id: str, layer_type: DungeonMapType, width: int, height: int,
+                   z_order: int) -> MapLayer:
+        return MapLayer(
+            layer_id=layer_id,
+            layer_type=layer_type,
+            area_types=np.full((height, width), UNEXPLORED_CODE, dtype=np.uint8),
+            feature_ids=np.full((height, width), -1, dtype=np.int32),
+            z_order=z_order
+        )
+    
+    def _paint_areas(self, layer: MapLayer, areas: List[Dict[str, Any]], area_type: MapAreaType,
+                     metadata_keys: Optional[Dict[str, Tuple[str, Any]]] = None):
+        """Закраска прямоугольников (границы включительно) срезами массива
+        Области рисуются в обратном порядке, чтобы при пересечении побеждала первая,
+        как при прежнем поиске первого совпадения"""
+        height, width = layer.area_types.shape
+        code = AREA_CODES[area_type]
+        for area in reversed(areas):
+            x0, y0 = max(int(area["x"]), 0), max(int(area["y"]), 0)
+            x1 = min(int(area["x"] + area["width"]) + 1, width)
+            y1 = min(int(area["y"] + area["height"]) + 1, height)
+            if x0 >= x1 or y0 >= y1:
+                continue
+            layer.area_types[y0:y1, x0:x1] = code
+            if metadata_keys is not None:
+                layer.feature_ids[y0:y1, x0:x1] = len(layer.features)
+                layer.features.append({key: area.get(source, default)
+                                       for key, (source, default) in metadata_keys.items()})
+    
+    def _paint_points(self, layer: MapLayer, points: List[Dict[str, Any]], area_type: MapAreaType,
+                      metadata_keys: Dict[str, Tuple[str, Any]]):
+        """Точечные объекты; в занятой клетке остается первый объект списка"""
+        height, width = layer.area_types.shape
+        code = AREA_CODES[area_type]
+        for point in reversed(points):
+            x, y = int(point["x"]), int(point["y"])
+            if not (0 <= x < width and 0 <= y < height):
+                continue
+            layer.area_types[y, x] = code
+            layer.feature_ids[y, x] = len(layer.features)
+            layer.features.append({key: point.get(source, default)
+                                   for key, (source, default) in metadata_keys.items()})
+    
     def _create_floor_layer(self, dungeon_id: str, width: int, height: int, 
                            dungeon_data: Dict[str, Any]) -> MapLayer:
         """Создание слоя плана этажа"""
-        cells = {}
-        
-        # Получение данных о комнатах и коридорах
-        rooms = dungeon_data.get("rooms", [])
-        corridors = dungeon_data.get("corridors", [])
-        
-        # Заполнение ячеек
-        for x in range(width):
-            for y in range(height):
-                cell_type = MapAreaType.UNEXPLORED
-                
-                # Проверка, находится ли ячейка в комнате
-                for room in rooms:
-                    if (room["x"] <= x <= room["x"] + room["width"] and 
-                        room["y"] <= y <= room["y"] + room["height"]):
-                        cell_type = MapAreaType.EXPLORED
-                        break
-                
-                # Проверка, находится ли ячейка в коридоре
-                if cell_type == MapAreaType.UNEXPLORED:
-                    for corridor in corridors:
-                        if (corridor["x"] <= x <= corridor["x"] + corridor["width"] and 
-                            corridor["y"] <= y <= corridor["y"] + corridor["height"]):
-                            cell_type = MapAreaType.EXPLORED
-                            break
-                
-                cells[(x, y)] = MapCell(
-                    x=x, y=y, area_type=cell_type
-                )
+        layer = self._new_layer("floor", DungeonMapType.FLOOR_PLAN, width, height, 0)
         
-        return MapLayer(
-            layer_id="floor",
-            layer_type=DungeonMapType.FLOOR_PLAN,
-            cells=cells,
-            z_order=0
-        )
+        # Комнаты и коридоры
+        self._paint_areas(layer, dungeon_data.get("rooms", []), MapAreaType.EXPLORED)
+        self._paint_areas(layer, dungeon_data.get("corridors", []), MapAreaType.EXPLORED)
+        return layer
     
     def _create_room_layer(self, dungeon_id: str, width: int, height: int, 
                           dungeon_data: Dict[str, Any]) -> MapLayer:
         """Создание слоя комнат"""
-        cells = {}
-        rooms = dungeon_data.get("rooms", [])
-        
-        for x in range(width):
-            for y in range(height):
-                cell_type = MapAreaType.UNEXPLORED
-                metadata = {}
-                
-                for room in rooms:
-                    if (room["x"] <= x <= room["x"] + room["width"] and 
-                        room["y"] <= y <= room["y"] + room["height"]):
-                        cell_type = MapAreaType.EXPLORED
-                        metadata["room_id"] = room.get("id", "")
-                        metadata["room_type"] = room.get("type", "")
-                        break
-                
-                cells[(x, y)] = MapCell(
-                    x=x, y=y, area_type=cell_type, metadata=metadata
-                )
-        
-        return MapLayer(
-            layer_id="rooms",
-            layer_type=DungeonMapType.ROOM_LAYOUT,
-            cells=cells,
-            z_order=1
-        )
+        layer = self._new_layer("rooms", DungeonMapType.ROOM_LAYOUT, width, height, 1)
+        self._paint_areas(layer, dungeon_data.get("rooms", []), MapAreaType.EXPLORED, {
+            "room_id": ("id", ""),
+            "room_type": ("type", "")
+        })
+        return layer
     
     def _create_corridor_layer(self, dungeon_id: str, width: int, height: int, 
                               dungeon_data: Dict[str, Any]) -> MapLayer:
         """Создание слоя коридоров"""
-        cells = {}
-        corridors = dungeon_data.get("corridors", [])
-        
-        for x in range(width):
-            for y in range(height):
-                cell_type = MapAreaType.UNEXPLORED
-                metadata = {}
-                
-                for corridor in corridors:
-                    if (corridor["x"] <= x <= corridor["x"] + corridor["width"] and 
-                        corridor["y"] <= y <= corridor["y"] + corridor["height"]):
-                        cell_type = MapAreaType.EXPLORED
-                        metadata["corridor_id"] = corridor.get("id", "")
-                        metadata["corridor_type"] = corridor.get("type", "")
-                        break
-                
-                cells[(x, y)] = MapCell(
-                    x=x, y=y, area_type=cell_type, metadata=metadata
-                )
-        
-        return MapLayer(
-            layer_id="corridors",
-            layer_type=DungeonMapType.CORRIDOR_MAP,
-            cells=cells,
-            z_order=2
-        )
+        layer = self._new_layer("corridors", DungeonMapType.CORRIDOR_MAP, width, height, 2)
+        self._paint_areas(layer, dungeon_data.get("corridors", []), MapAreaType.EXPLORED, {
+            "corridor_id": ("id", ""),
+            "corridor_type": ("type", "")
+        })
+        return layer
     
     def _create_treasure_layer(self, dungeon_id: str, width: int, height: int, 
                               dungeon_data: Dict[str, Any]) -> MapLayer:
         """Создание слоя сокровищ"""
-        cells = {}
-        treasures = dungeon_data.get("treasures", [])
-        
-        for x in range(width):
-            for y in range(height):
-                cell_type = MapAreaType.UNEXPLORED
-                metadata = {}
-                
-                for treasure in treasures:
-                    if treasure["x"] == x and treasure["y"] == y:
-                        cell_type = MapAreaType.TREASURE
-                        metadata["treasure_id"] = treasure.get("id", "")
-                        metadata["treasure_type"] = treasure.get("type", "")
-                        metadata["rarity"] = treasure.get("rarity", "")
-                        break
-                
-                cells[(x, y)] = MapCell(
-                    x=x, y=y, area_type=cell_type, metadata=metadata
-                )
-        
-        return MapLayer(
-            layer_id="treasures",
-            layer_type=DungeonMapType.TREASURE_MAP,
-            cells=cells,
-            z_order=3
-        )
+        layer = self._new_layer("treasures", DungeonMapType.TREASURE_MAP, width, height, 3)
+        self._paint_points(layer, dungeon_data.get("treasures", []), MapAreaType.TREASURE, {
+            "treasure_id": ("id", ""),
+            "treasure_type": ("type", ""),
+            "rarity": ("rarity", "")
+        })
+        return layer
     
     def _create_trap_layer(self, dungeon_id: str, width: int, height: int, 
                           dungeon_data: Dict[str, Any]) -> MapLayer:
         """Создание слоя ловушек"""
-        cells = {}
-        traps = dungeon_data.get("traps", [])
-        
-        for x in range(width):
-            for y in range(height):
-                cell_type = MapAreaType.UNEXPLORED
-                metadata = {}
-                
-                for trap in traps:
-                    if trap["x"] == x and trap["y"] == y:
-                        cell_type = MapAreaType.TRAP
-                        metadata["trap_id"] = trap.get("id", "")
-                        metadata["trap_type"] = trap.get("type", "")
-                        metadata["triggered"] = trap.get("triggered", False)
-                        break
-                
-                cells[(x, y)] = MapCell(
-                    x=x, y=y, area_type=cell_type, metadata=metadata
-                )
-        
-        return MapLayer(
-            layer_id="traps",
-            layer_type=DungeonMapType.TRAP_MAP,
-            cells=cells,
-            z_order=4
-        )
+        layer = self._new_layer("traps", DungeonMapType.TRAP_MAP, width, height, 4)
+        self._paint_points(layer, dungeon_data.get("traps", []), MapAreaType.TRAP, {
+            "trap_id": ("id", ""),
+            "trap_type": ("type", ""),
+            "triggered": ("triggered", False)
+        })
+        return layer
     
     def _create_enemy_layer(self, dungeon_id: str, width: int, height: int, 
                            dungeon_data: Dict[str, Any]) -> MapLayer:
         """Создание слоя врагов"""
-        cells = {}
-        enemies = dungeon_data.get("enemies", [])
-        
-        for x in range(width):
-            for y in range(height):
-                cell_type = MapAreaType.UNEXPLORED
-                metadata = {}
-                
-                for enemy in enemies:
-                    if enemy["x"] == x and enemy["y"] == y:
-                        cell_type = MapAreaType.ENEMY
-                        metadata["enemy_id"] = enemy.get("id", "")
-                        metadata["enemy_type"] = enemy.get("type", "")
-                        metadata["defeated"] = enemy.get("defeated", False)
-                        break
-                
-                cells[(x, y)] = MapCell(
-                    x=x, y=y, area_type=cell_type, metadata=metadata
-                )
-        
-        return MapLayer(
-            layer_id="enemies",
-            layer_type=DungeonMapType.ENEMY_MAP,
-            cells=cells,
-            z_order=5
-        )
+        layer = self._new_layer("enemies", DungeonMapType.ENEMY_MAP, width, height, 5)
+        self._paint_points(layer, dungeon_data.get("enemies", []), MapAreaType.ENEMY, {
+            "enemy_id": ("id", ""),
+            "enemy_type": ("type", ""),
+            "defeated": ("defeated", False)
+        })
+        return layer
     
     def _create_secret_layer(self, dungeon_id: str, width: int, height: int, 
                             dungeon_data: Dict[str, Any]) -> MapLayer:
         """Создание слоя секретов"""
-        cells = {}
-        secrets = dungeon_data.get("secrets", [])
-        
-        for x in range(width):
-            for y in range(height):
-                cell_type = MapAreaType.UNEXPLORED
-                metadata = {}
-                
-                for secret in secrets:
-                    if secret["x"] == x and secret["y"] == y:
-                        cell_type = MapAreaType.SECRET
-                        metadata["secret_id"] = secret.get("id", "")
-                        metadata["secret_type"] = secret.get("type", "")
-                        metadata["discovered"] = secret.get("discovered", False)
-                        break
-                
-                cells[(x, y)] = MapCell(
-                    x=x, y=y, area_type=cell_type, metadata=metadata
-                )
-        
-        return MapLayer(
-            layer_id="secrets",
-            layer_type=DungeonMapType.SECRET_MAP,
-            cells=cells,
-            z_order=6
-        )
+        layer = self._new_layer("secrets", DungeonMapType.SECRET_MAP, width, height, 6)
+        self._paint_points(layer, dungeon_data.get("secrets", []), MapAreaType.SECRET, {
+            "secret_id": ("id", ""),
+            "secret_type": ("type", ""),
+            "discovered": ("discovered", False)
+        })
+        return layer
+    
+    # - Исследование
     
     def explore_cell(self, map_id: str, character_id: str, x: int, y: int) -> bool:
         """Исследование ячейки карты"""
@@ -461,25 +537,7 @@ class DungeonMapSystem(BaseComponent):
         if not (0 <= x < dungeon_map.grid_width and 0 <= y < dungeon_map.grid_height):
             return False
         
-        # Обновление ячеек во всех слоях
-        for layer in dungeon_map.layers.values():
-            cell_key = (x, y)
-            if cell_key in layer.cells:
-                cell = layer.cells[cell_key]
-                cell.explored = True
-                cell.visible = True
-                cell.last_seen = time.time()
-                
-                # Обновление типа области
-                if cell.area_type == MapAreaType.UNEXPLORED:
-                    cell.area_type = MapAreaType.EXPLORED
-        
-        # Добавление в исследованные ячейки
-        dungeon_map.explored_cells.add((x, y))
-        dungeon_map.last_updated = time.time()
-        
-        # Обновление данных исследования
-        self._update_exploration_data(dungeon_map.dungeon_id, character_id, x, y)
+        self._mark_explored(dungeon_map, character_id, (slice(y, y + 1), slice(x, x + 1)), None)
         
         # Уведомление о исследовании ячейки
         self._notify_cell_explored(map_id, character_id, x, y)
@@ -488,26 +546,64 @@ class DungeonMapSystem(BaseComponent):
     
     def reveal_area(self, map_id: str, character_id: str, center_x: int, center_y: int, 
                     radius: int = 3) -> int:
-        """Раскрытие области вокруг позиции"""
+        """Раскрытие области вокруг позиции (маска круга по окну сетки)"""
         if map_id not in self.dungeon_maps:
             return 0
         
         dungeon_map = self.dungeon_maps[map_id]
-        revealed_cells = 0
-        
-        # Раскрытие ячеек в радиусе
-        for dx in range(-radius, radius + 1):
-            for dy in range(-radius, radius + 1):
-                x = center_x + dx
-                y = center_y + dy
-                
-                # Проверка расстояния
-                distance = math.sqrt(dx*dx + dy*dy)
-                if distance <= radius:
-                    if self.explore_cell(map_id, character_id, x, y):
-                        revealed_cells += 1
-        
-        return revealed_cells
+        
+        # Окно круга, обрезанное по границам карты
+        x0, x1 = max(center_x - radius, 0), min(center_x + radius + 1, dungeon_map.grid_width)
+        y0, y1 = max(center_y - radius, 0), min(center_y + radius + 1, dungeon_map.grid_height)
+        if x0 >= x1 or y0 >= y1:
+            return 0
+        
+        dy = np.arange(y0, y1)[:, None] - center_y
+        dx = np.arange(x0, x1)[None, :] - center_x
+        disk = dx * dx + dy * dy <= radius * radius
+        
+        window = (slice(y0, y1), slice(x0, x1))
+        self._mark_explored(dungeon_map, character_id, window, disk, discovered=True)
+        
+        # Уведомления по клеткам только при наличии подписчиков
+        if self.cell_explored_callbacks:
+            ys, xs = np.nonzero(disk)
+            for y, x in zip((ys + y0).tolist(), (xs + x0).tolist()):
+                self._notify_cell_explored(map_id, character_id, x, y)
+        
+        return int(np.count_nonzero(disk))
+    
+    def _mark_explored(self, dungeon_map: DungeonMapData, character_id: str,
+                       window: Tuple[slice, slice], mask: Optional[np.ndarray],
+                       discovered: bool = False):
+        """Отметка окна сетки (по маске) исследованным для карты и персонажа"""
+        current_time = time.time()
+        character_state = dungeon_map.get_character_state(character_id)
+        
+        for state in (dungeon_map.cell_state, character_state):
+            if mask is None:
+                state.explored[window] = True
+                state.last_seen[window] = current_time
+                if discovered:
+                    state.discovered[window] = True
+            else:
+                state.explored[window] |= mask
+                state.last_seen[window][mask] = current_time
+                if discovered:
+                    state.discovered[window] |= mask
+        
+        # Обновление типа области во всех слоях
+        for layer in dungeon_map.layers.values():
+            area_types = layer.area_types[window]
+            unexplored = area_types == UNEXPLORED_CODE
+            if mask is not None:
+                unexplored &= mask
+            area_types[unexplored] = EXPLORED_CODE
+        
+        dungeon_map.last_updated = current_time
+        
+        # Обновление данных исследования
+        self._update_exploration_data(dungeon_map, character_id)
     
     def discover_secret(self, map_id: str, character_id: str, x: int, y: int) -> bool:
         """Обнаружение секрета"""
@@ -521,22 +617,28 @@ class DungeonMapSystem(BaseComponent):
         if not secret_layer:
             return False
         
-        cell_key = (x, y)
-        if cell_key not in secret_layer.cells:
+        if not (0 <= x < dungeon_map.grid_width and 0 <= y < dungeon_map.grid_height):
             return False
         
-        cell = secret_layer.cells[cell_key]
-        if cell.area_type != MapAreaType.SECRET:
+        if secret_layer.area_types[y, x] != AREA_CODES[MapAreaType.SECRET]:
             return False
         
         # Обнаружение секрета
-        cell.area_type = MapAreaType.DISCOVERED
-        cell.metadata["discovered"] = True
+        cell_key = (x, y)
+        metadata = secret_layer.metadata_at(x, y)
+        secret_layer.area_types[y, x] = AREA_CODES[MapAreaType.DISCOVERED]
+        if metadata:
+            metadata["discovered"] = True
         dungeon_map.secret_areas.add(cell_key)
+        dungeon_map.cell_state.discovered[y, x] = True
+        dungeon_map.get_character_state(character_id).discovered[y, x] = True
         dungeon_map.last_updated = time.time()
         
+        exploration = self._get_or_create_exploration(dungeon_map, character_id)
+        exploration.discovered_secrets.add(cell_key)
+        
         # Уведомление о обнаружении секрета
-        self._notify_secret_found(map_id, character_id, x, y, cell.metadata)
+        self._notify_secret_found(map_id, character_id, x, y, metadata)
         
         return True
     
@@ -577,7 +679,7 @@ class DungeonMapSystem(BaseComponent):
         
         return False
     
-    def get_map_data(self, map_id: str, character_id: str = None) -> Optional[DungeonMapData]:
+    def get_map_data(self, map_id: str, character_id: str = None) -> Optional[Union[DungeonMapData, FoggedMapView]]:
         """Получение данных карты"""
         if map_id not in self.dungeon_maps:
             return None
@@ -590,78 +692,38 @@ class DungeonMapSystem(BaseComponent):
         
         return dungeon_map
     
-    def _apply_fog_of_war(self, dungeon_map: DungeonMapData, character_id: str) -> DungeonMapData:
-        """Применение тумана войны"""
-        # Создание копии карты
-        fog_map = DungeonMapData(
-            dungeon_id=dungeon_map.dungeon_id,
-            map_id=dungeon_map.map_id,
-            settings=dungeon_map.settings,
-            layers={},
-            grid_width=dungeon_map.grid_width,
-            grid_height=dungeon_map.grid_height,
-            explored_cells=dungeon_map.explored_cells.copy(),
-            discovered_cells=dungeon_map.discovered_cells.copy(),
-            secret_areas=dungeon_map.secret_areas.copy()
-        )
-        
-        # Копирование слоев с применением тумана войны
-        for layer_id, layer in dungeon_map.layers.items():
-            fog_layer = MapLayer(
-                layer_id=layer.layer_id,
-                layer_type=layer.layer_type,
-                cells={},
-                visible=layer.visible,
-                opacity=layer.opacity,
-                z_order=layer.z_order
-            )
-            
-            for cell_key, cell in layer.cells.items():
-                fog_cell = MapCell(
-                    x=cell.x, y=cell.y,
-                    area_type=cell.area_type,
-                    discovered=cell.discovered,
-                    explored=cell.explored,
-                    visible=cell.visible,
-                    last_seen=cell.last_seen,
-                    metadata=cell.metadata.copy()
-                )
-                
-                # Скрытие неисследованных областей
-                if not cell.explored:
-                    fog_cell.area_type = MapAreaType.UNEXPLORED
-                    fog_cell.visible = False
-                
-                fog_layer.cells[cell_key] = fog_cell
-            
-            fog_map.layers[layer_id] = fog_layer
-        
-        return fog_map
+    def _apply_fog_of_war(self, dungeon_map: DungeonMapData, character_id: str) -> FoggedMapView:
+        """Применение тумана войны
+        Возвращается представление без копирования слоев: маска персонажа
+        накладывается при чтении массивов или отдельных ячеек"""
+        return FoggedMapView(dungeon_map, character_id)
     
-    def _update_exploration_data(self, dungeon_id: str, character_id: str, x: int, y: int):
-        """Обновление данных исследования"""
-        exploration_key = f"{dungeon_id}_{character_id}"
-        
-        if exploration_key not in self.exploration_data:
-            self.exploration_data[exploration_key] = ExplorationData(
-                dungeon_id=dungeon_id,
+    def _get_or_create_exploration(self, dungeon_map: DungeonMapData, character_id: str) -> ExplorationData:
+        exploration_key = f"{dungeon_map.dungeon_id}_{character_id}"
+        exploration = self.exploration_data.get(exploration_key)
+        if exploration is None:
+            # Битовые карты общие с картой подземелья, без копирования
+            exploration = ExplorationData(
+                dungeon_id=dungeon_map.dungeon_id,
                 character_id=character_id,
-                explored_cells=set(),
+                cell_state=dungeon_map.get_character_state(character_id),
                 discovered_secrets=set(),
                 found_treasures=set(),
                 triggered_traps=set(),
                 defeated_enemies=set()
             )
-        
-        exploration = self.exploration_data[exploration_key]
-        exploration.explored_cells.add((x, y))
+            self.exploration_data[exploration_key] = exploration
+        return exploration
+    
+    def _update_exploration_data(self, dungeon_map: DungeonMapData, character_id: str):
+        """Обновление данных исследования"""
+        exploration = self._get_or_create_exploration(dungeon_map, character_id)
         exploration.last_exploration = time.time()
         
         # Обновление процента исследования
-        if dungeon_id in self.dungeon_maps:
-            dungeon_map = self.dungeon_maps[dungeon_id]
-            total_cells = dungeon_map.grid_width * dungeon_map.grid_height
-            exploration.exploration_percentage = len(exploration.explored_cells) / total_cells * 100
+        total_cells = dungeon_map.grid_width * dungeon_map.grid_height
+        explored = np.count_nonzero(exploration.cell_state.explored)
+        exploration.exploration_percentage = explored / total_cells * 100 if total_cells else 0.0
     
     def get_exploration_data(self, dungeon_id: str, character_id: str) -> Optional[ExplorationData]:
         """Получение данных исследования"""
@@ -681,9 +743,10 @@ class DungeonMapSystem(BaseComponent):
         
         # Подсчет статистики по слоям
         layer_stats = {}
+        explored_total = int(np.count_nonzero(dungeon_map.cell_state.explored))
         for layer_id, layer in dungeon_map.layers.items():
-            explored_cells = sum(1 for cell in layer.cells.values() if cell.explored)
-            total_cells = len(layer.cells)
+            explored_cells = explored_total
+            total_cells = layer.area_types.size
             
             layer_stats[layer_id] = {
                 "total_cells": total_cells,
@@ -696,8 +759,9 @@ class DungeonMapSystem(BaseComponent):
             "dungeon_id": dungeon_map.dungeon_id,
             "grid_size": f"{dungeon_map.grid_width}x{dungeon_map.grid_height}",
             "total_cells": dungeon_map.grid_width * dungeon_map.grid_height,
-            "explored_cells": len(dungeon_map.explored_cells),
-            "discovered_cells": len(dungeon_map.discovered_cells),
+            "explored_cells": explored_total,
+            "discovered_cells": int(np.count_nonzero(dungeon_map.cell_state.discovered)),
+            "characters": len(dungeon_map.character_states),
             "secret_areas": len(dungeon_map.secret_areas),
             "layers": len(dungeon_map.layers),
             "markers": len(self.map_markers.get(map_id, [])),
@@ -2,9 +2,10 @@
 """Генератор высот для процедурного мира
 Использует шум Перлина для создания естественного ландшафта"""
 
-from dataclasses import dataclass, field
+from dataclasses import asdict, dataclass, field
 from enum import Enum
 from typing import Dict, List, Optional, Any, Tuple, Callable
+import hashlib
 import logging
 import math
 import random
@@ -69,10 +70,94 @@ class ErosionSettings:
     evaporation_rate: float = 0.01
     gravity: float = 9.81
 
+# = ВЕКТОРИЗОВАННЫЙ ГРАДИЕНТНЫЙ ШУМ
+class GradientNoise:
+    """Векторизованный градиентный шум Перлина с таблицей перестановок по seed
+    Работает в мировых координатах, поэтому соседние чанки стыкуются без швов"""
+
+    GRADIENTS = np.array([[1.0, 1.0], [-1.0, 1.0], [1.0, -1.0], [-1.0, -1.0],
+                          [1.0, 0.0], [-1.0, 0.0], [0.0, 1.0], [0.0, -1.0]], dtype=np.float64)
+    MAX_LAYERS = 256
+
+    def __init__(self, seed: int):
+        self.seed = seed
+        rng = np.random.RandomState(seed & 0xFFFFFFFF)
+        permutation = rng.permutation(256)
+        # Удвоенная таблица избавляет от взятия по модулю при поиске углов ячейки
+        self.permutation = np.concatenate([permutation, permutation]).astype(np.int64)
+        # Смещения слоев/октав вместо случайных uniform() на каждый вызов
+        self.layer_offsets = rng.uniform(0.0, 1000.0, size=(self.MAX_LAYERS, 2))
+        self._grid_cache: Dict[int, Tuple[np.ndarray, np.ndarray]] = {}
+
+    @staticmethod
+    def _fade(t: np.ndarray) -> np.ndarray:
+        """Сглаживающая кривая Перлина 6t^5 - 15t^4 + 10t^3"""
+        return t * t * t * (t * (t * 6.0 - 15.0) + 10.0)
+
+    def _gradient_dot(self, hashes: np.ndarray, dx: np.ndarray, dy: np.ndarray) -> np.ndarray:
+        """Скалярное произведение градиента угла на вектор смещения"""
+        gradients = self.GRADIENTS[hashes & 7]
+        return gradients[..., 0] * dx + gradients[..., 1] * dy
+
+    def perlin(self, x: np.ndarray, y: np.ndarray) -> np.ndarray:
+        """Шум Перлина для массивов координат произвольной формы (диапазон ~[-1, 1])"""
+        x0 = np.floor(x)
+        y0 = np.floor(y)
+        fx = x - x0
+        fy = y - y0
+        xi = x0.astype(np.int64) & 255
+        yi = y0.astype(np.int64) & 255
+
+        perm = self.permutation
+        px0 = perm[xi]
+        px1 = perm[xi + 1]
+        h00 = perm[px0 + yi]
+        h10 = perm[px1 + yi]
+        h01 = perm[px0 + yi + 1]
+        h11 = perm[px1 + yi + 1]
+
+        n00 = self._gradient_dot(h00, fx, fy)
+        n10 = self._gradient_dot(h10, fx - 1.0, fy)
+        n01 = self._gradient_dot(h01, fx, fy - 1.0)
+        n11 = self._gradient_dot(h11, fx - 1.0, fy - 1.0)
+
+        u = self._fade(fx)
+        v = self._fade(fy)
+        bottom = n00 + u * (n10 - n00)
+        top = n01 + u * (n11 - n01)
+        return bottom + v * (top - bottom)
+
+    def fbm(self, x: np.ndarray, y: np.ndarray, octaves: int, persistence: float,
+            lacunarity: float, layer: int = 0) -> np.ndarray:
+        """Фрактальная сумма октав шума Перлина"""
+        result = np.zeros(np.shape(x), dtype=np.float64)
+        for octave in range(octaves):
+            frequency = lacunarity ** octave
+            amplitude = persistence ** octave
+            offset_x, offset_y = self.layer_offsets[(layer * 16 + octave) % self.MAX_LAYERS]
+            result += self.perlin(x * frequency + offset_x, y * frequency + offset_y) * amplitude
+        return result
+
+    def chunk_grid(self, chunk_coords: List[Tuple[int, int]],
+                   chunk_size: int) -> Tuple[np.ndarray, np.ndarray]:
+        """Мировые координаты ячеек для пакета чанков, форма (n, size, size)"""
+        if chunk_size not in self._grid_cache:
+            local = np.arange(chunk_size, dtype=np.float64)
+            self._grid_cache[chunk_size] = np.meshgrid(local, local)
+        local_x, local_y = self._grid_cache[chunk_size]
+
+        coords = np.asarray(chunk_coords, dtype=np.float64).reshape(-1, 2)
+        world_x = coords[:, 0, None, None] * chunk_size + local_x[None]
+        world_y = coords[:, 1, None, None] * chunk_size + local_y[None]
+        return world_x, world_y
+
 # = ОСНОВНАЯ СИСТЕМА ГЕНЕРАЦИИ ВЫСОТ
 class HeightMapGenerator(BaseComponent):
     """Генератор высот для процедурного мира"""
     
+    # Версия алгоритма генерации: повышается при любом изменении результата
+    GENERATOR_VERSION = 2
+    
     def __init__(self):
         super().__init__(
             component_id="HeightMapGenerator",
@@ -94,6 +179,7 @@ class HeightMapGenerator(BaseComponent):
         # Системные параметры
         self.seed = int(time.time())
         self.random_generator = random.Random(self.seed)
+        self.noise = GradientNoise(self.seed)
         
         # Статистика генерации
         self.generation_stats = {
@@ -117,11 +203,23 @@ class HeightMapGenerator(BaseComponent):
             self._logger.error(f"Ошибка инициализации генератора высот: {e}")
             return False
     
+    def get_generator_version(self) -> str:
+        """Версия генератора с отпечатком настроек (ключ дискового кэша чанков)"""
+        settings = repr((asdict(self.settings), asdict(self.biome_settings), asdict(self.erosion_settings)))
+        digest = hashlib.sha1(settings.encode("utf-8")).hexdigest()[:12]
+        return f"{self.GENERATOR_VERSION}-{digest}"
+    
+    def set_seed(self, seed: int) -> None:
+        """Установка seed мира (пересоздает таблицу перестановок и сбрасывает кэш)"""
+        self.seed = seed
+        self.random_generator = random.Random(seed)
+        self.noise = GradientNoise(seed)
+        self.clear_cache()
+    
     def generate_height_map(self, chunk_x: int, chunk_y: int, 
                            chunk_size: int = 64) -> np.ndarray:
         """Генерация карты высот для чанка"""
         try:
-            start_time = time.time()
             chunk_key = f"{chunk_x}_{chunk_y}_{chunk_size}"
             
             # Проверяем кэш
@@ -129,186 +227,155 @@ class HeightMapGenerator(BaseComponent):
                 self.generation_stats["cache_hits"] += 1
                 return self.height_cache[chunk_key]
             
-            self.generation_stats["cache_misses"] += 1
+            return self.generate_height_maps([(chunk_x, chunk_y)], chunk_size)[(chunk_x, chunk_y)]
+            
+        except Exception as e:
+            self._logger.error(f"Ошибка генерации карты высот для чанка {chunk_x}, {chunk_y}: {e}")
+            # Возвращаем пустую карту в случае ошибки
+            return np.zeros((chunk_size, chunk_size), dtype=np.float32)
+    
+    def generate_height_maps(self, chunk_coords: List[Tuple[int, int]],
+                             chunk_size: int = 64) -> Dict[Tuple[int, int], np.ndarray]:
+        """Пакетная генерация карт высот для нескольких чанков за один вызов"""
+        results: Dict[Tuple[int, int], np.ndarray] = {}
+        try:
+            start_time = time.time()
+            missing: List[Tuple[int, int]] = []
             
-            # Создаем базовую карту высот
-            height_map = self._create_base_height_map(chunk_x, chunk_y, chunk_size)
+            for chunk_x, chunk_y in chunk_coords:
+                chunk_key = f"{chunk_x}_{chunk_y}_{chunk_size}"
+                if chunk_key in self.height_cache:
+                    self.generation_stats["cache_hits"] += 1
+                    results[(chunk_x, chunk_y)] = self.height_cache[chunk_key]
+                elif (chunk_x, chunk_y) not in missing:
+                    missing.append((chunk_x, chunk_y))
             
-            # Применяем слои шума
-            height_map = self._apply_noise_layers(height_map, chunk_x, chunk_y, chunk_size)
+            if not missing:
+                return results
             
-            # Применяем эрозию
-            if self.erosion_settings.enabled:
-                height_map = self._apply_erosion(height_map)
+            self.generation_stats["cache_misses"] += len(missing)
             
-            # Нормализуем высоты
-            height_map = self._normalize_heights(height_map)
+            # Создаем базовые карты высот сразу для всего пакета
+            height_maps = self._create_base_height_map(missing, chunk_size)
             
-            # Кэшируем результат
-            self.height_cache[chunk_key] = height_map
+            # Применяем слои шума
+            height_maps = self._apply_noise_layers(height_maps, missing, chunk_size)
+            
+            for index, (chunk_x, chunk_y) in enumerate(missing):
+                height_map = height_maps[index]
+                
+                # Применяем эрозию
+                if self.erosion_settings.enabled:
+                    height_map = self._apply_erosion(height_map, chunk_x, chunk_y)
+                
+                # Нормализуем высоты
+                height_map = self._normalize_heights(height_map)
+                
+                # Кэшируем результат
+                self.height_cache[f"{chunk_x}_{chunk_y}_{chunk_size}"] = height_map
+                results[(chunk_x, chunk_y)] = height_map
             
             # Обновляем статистику
             generation_time = time.time() - start_time
             self.generation_stats["total_time"] += generation_time
-            self.generation_stats["total_chunks"] += 1
+            self.generation_stats["total_chunks"] += len(missing)
             
-            self._logger.debug(f"Сгенерирован чанк {chunk_x}, {chunk_y} за {generation_time:.3f}с")
-            
-            return height_map
+            self._logger.debug(f"Сгенерировано {len(missing)} чанков за {generation_time:.3f}с")
             
         except Exception as e:
-            self._logger.error(f"Ошибка генерации карты высот для чанка {chunk_x}, {chunk_y}: {e}")
-            # Возвращаем пустую карту в случае ошибки
-            return np.zeros((chunk_size, chunk_size), dtype=np.float32)
+            self._logger.error(f"Ошибка пакетной генерации карт высот: {e}")
+            for coords in chunk_coords:
+                results.setdefault(tuple(coords), np.zeros((chunk_size, chunk_size), dtype=np.float32))
+        
+        return results
     
-    def _create_base_height_map(self, chunk_x: int, chunk_y: int, chunk_size: int) -> np.ndarray:
-        """Создание базовой карты высот"""
+    def _create_base_height_map(self, chunk_coords: List[Tuple[int, int]], chunk_size: int) -> np.ndarray:
+        """Создание базовых карт высот для пакета чанков, форма (n, size, size)"""
         try:
-            # Создаем координатную сетку
-            x_coords = np.linspace(chunk_x * chunk_size, (chunk_x + 1) * chunk_size, chunk_size)
-            y_coords = np.linspace(chunk_y * chunk_size, (chunk_y + 1) * chunk_size, chunk_size)
-            X, Y = np.meshgrid(x_coords, y_coords)
+            # Мировые координаты ячеек
+            _, Y = self.noise.chunk_grid(chunk_coords, chunk_size)
             
             # Базовые высоты
-            base_height = np.full((chunk_size, chunk_size), self.settings.base_height, dtype=np.float32)
+            base_height = np.full(Y.shape, self.settings.base_height, dtype=np.float64)
             
             # Добавляем глобальный уклон (например, от севера к югу)
-            global_slope = (Y - chunk_y * chunk_size) * 0.01
-            base_height += global_slope
+            base_height += Y * 0.01
             
             return base_height
             
         except Exception as e:
             self._logger.error(f"Ошибка создания базовой карты высот: {e}")
-            return np.zeros((chunk_size, chunk_size), dtype=np.float32)
+            return np.zeros((len(chunk_coords), chunk_size, chunk_size))
     
-    def _apply_noise_layers(self, height_map: np.ndarray, chunk_x: int, chunk_y: int, 
+    def _apply_noise_layers(self, height_maps: np.ndarray, chunk_coords: List[Tuple[int, int]],
                            chunk_size: int) -> np.ndarray:
-        """Применение слоев шума к карте высот"""
+        """Применение слоев шума к пакету карт высот"""
         try:
-            result = height_map.copy()
+            result = height_maps.copy()
             
             # Основной слой шума (крупные формы рельефа)
-            main_noise = self._generate_perlin_noise(chunk_x, chunk_y, chunk_size, 
-                                                   scale=self.settings.scale, octaves=1)
+            main_noise = self._generate_perlin_noise_batch(chunk_coords, chunk_size,
+                                                         scale=self.settings.scale, octaves=1, layer=0)
             result += main_noise * 200.0
             
             # Детализирующий слой (средние формы)
-            detail_noise = self._generate_perlin_noise(chunk_x, chunk_y, chunk_size,
-                                                     scale=self.settings.scale * 0.5, octaves=3)
+            detail_noise = self._generate_perlin_noise_batch(chunk_coords, chunk_size,
+                                                           scale=self.settings.scale * 0.5, octaves=3, layer=1)
             result += detail_noise * 100.0
             
             # Мелкие детали (каменистость)
-            fine_noise = self._generate_perlin_noise(chunk_x, chunk_y, chunk_size,
-                                                   scale=self.settings.scale * 0.25, octaves=6)
+            fine_noise = self._generate_perlin_noise_batch(chunk_coords, chunk_size,
+                                                         scale=self.settings.scale * 0.25, octaves=6, layer=2)
             result += fine_noise * 50.0
             
             # Фрактальный шум для естественности
-            fractal_noise = self._generate_fractal_noise(chunk_x, chunk_y, chunk_size)
+            fractal_noise = self._generate_fractal_noise(chunk_coords, chunk_size)
             result += fractal_noise * 75.0
             
             return result
             
         except Exception as e:
             self._logger.error(f"Ошибка применения слоев шума: {e}")
-            return height_map
+            return height_maps
     
     def _generate_perlin_noise(self, chunk_x: int, chunk_y: int, chunk_size: int,
-                              scale: float, octaves: int) -> np.ndarray:
-        """Генерация шума Перлина"""
-        try:
-            # Создаем координатную сетку
-            x_coords = np.linspace(chunk_x * chunk_size / scale, 
-                                 (chunk_x + 1) * chunk_size / scale, chunk_size)
-            y_coords = np.linspace(chunk_y * chunk_size / scale, 
-                                 (chunk_y + 1) * chunk_size / scale, chunk_size)
-            X, Y = np.meshgrid(x_coords, y_coords)
-            
-            # Генерируем шум Перлина
-            noise = np.zeros((chunk_size, chunk_size))
-            
-            for i in range(octaves):
-                frequency = self.settings.lacunarity ** i
-                amplitude = self.settings.persistence ** i
-                
-                # Смешиваем координаты для разнообразия
-                x_noise = X * frequency + self.random_generator.uniform(0, 1000)
-                y_noise = Y * frequency + self.random_generator.uniform(0, 1000)
-                
-                # Простая реализация шума Перлина (для производительности)
-                layer_noise = self._simple_perlin_noise(x_noise, y_noise)
-                noise += layer_noise * amplitude
-            
-            return noise
-            
-        except Exception as e:
-            self._logger.error(f"Ошибка генерации шума Перлина: {e}")
-            return np.zeros((chunk_size, chunk_size))
+                              scale: float, octaves: int, layer: int = 0) -> np.ndarray:
+        """Генерация шума Перлина для одного чанка"""
+        return self._generate_perlin_noise_batch([(chunk_x, chunk_y)], chunk_size,
+                                                 scale, octaves, layer)[0]
     
-    def _simple_perlin_noise(self, x: np.ndarray, y: np.ndarray) -> np.ndarray:
-        """Упрощенная реализация шума Перлина"""
+    def _generate_perlin_noise_batch(self, chunk_coords: List[Tuple[int, int]], chunk_size: int,
+                                     scale: float, octaves: int, layer: int = 0) -> np.ndarray:
+        """Генерация шума Перлина для пакета чанков, форма (n, size, size)"""
         try:
-            # Интерполяция между случайными значениями
-            x_int = x.astype(int)
-            y_int = y.astype(int)
-            
-            # Получаем случайные значения для углов
-            corners = np.zeros((x.shape[0], x.shape[1], 4))
-            
-            for i in range(x.shape[0]):
-                for j in range(x.shape[1]):
-                    # Генерируем детерминированные случайные значения
-                    seed = hash((x_int[i, j], y_int[i, j])) % 1000000
-                    random.seed(seed)
-                    
-                    corners[i, j, 0] = random.uniform(-1, 1)  # Левый верхний
-                    corners[i, j, 1] = random.uniform(-1, 1)  # Правый верхний
-                    corners[i, j, 2] = random.uniform(-1, 1)  # Левый нижний
-                    corners[i, j, 3] = random.uniform(-1, 1)  # Правый нижний
-            
-            # Интерполяция
-            x_frac = x - x_int
-            y_frac = y - y_int
-            
-            # Функция сглаживания
-            def smoothstep(t):
-                return t * t * (3.0 - 2.0 * t)
-            
-            x_smooth = smoothstep(x_frac)
-            y_smooth = smoothstep(y_frac)
-            
-            # Билинейная интерполяция
-            noise = (corners[:, :, 0] * (1 - x_smooth) * (1 - y_smooth) +
-                    corners[:, :, 1] * x_smooth * (1 - y_smooth) +
-                    corners[:, :, 2] * (1 - x_smooth) * y_smooth +
-                    corners[:, :, 3] * x_smooth * y_smooth)
-            
-            return noise
+            X, Y = self.noise.chunk_grid(chunk_coords, chunk_size)
+            return self.noise.fbm(X / scale, Y / scale, octaves,
+                                  self.settings.persistence, self.settings.lacunarity, layer)
             
         except Exception as e:
-            self._logger.error(f"Ошибка простого шума Перлина: {e}")
-            return np.zeros_like(x)
+            self._logger.error(f"Ошибка генерации шума Перлина: {e}")
+            return np.zeros((len(chunk_coords), chunk_size, chunk_size))
     
-    def _generate_fractal_noise(self, chunk_x: int, chunk_y: int, chunk_size: int) -> np.ndarray:
-        """Генерация фрактального шума"""
+    def _generate_fractal_noise(self, chunk_coords: List[Tuple[int, int]], chunk_size: int) -> np.ndarray:
+        """Генерация фрактального шума для пакета чанков"""
         try:
-            result = np.zeros((chunk_size, chunk_size))
+            result = np.zeros((len(chunk_coords), chunk_size, chunk_size))
             
             # Множественные слои с разными масштабами
             for i in range(4):
                 scale = self.settings.scale * (0.5 ** i)
                 amplitude = 50.0 * (0.7 ** i)
                 
-                layer = self._generate_perlin_noise(chunk_x, chunk_y, chunk_size, scale, 2)
+                layer = self._generate_perlin_noise_batch(chunk_coords, chunk_size, scale, 2, layer=3 + i)
                 result += layer * amplitude
             
             return result
             
         except Exception as e:
             self._logger.error(f"Ошибка генерации фрактального шума: {e}")
-            return np.zeros((chunk_size, chunk_size))
+            return np.zeros((len(chunk_coords), chunk_size, chunk_size))
     
-    def _apply_erosion(self, height_map: np.ndarray) -> np.ndarray:
+    def _apply_erosion(self, height_map: np.ndarray, chunk_x: int = 0, chunk_y: int = 0) -> np.ndarray:
         """Применение эрозии к карте высот"""
         try:
             if not self.erosion_settings.enabled:
@@ -317,11 +384,16 @@ class HeightMapGenerator(BaseComponent):
             result = height_map.copy()
             height, width = result.shape
             
+            # Генератор зависит только от seed и координат чанка - результат детерминирован
+            chunk_seed = (self.seed * 1000003 + chunk_x * 73856093 + chunk_y * 19349663) & 0xFFFFFFFF
+            points_x = np.random.RandomState(chunk_seed).randint(0, width, size=self.erosion_settings.iterations)
+            points_y = np.random.RandomState(chunk_seed ^ 0x5BD1E995).randint(0, height, size=self.erosion_settings.iterations)
+            
             # Простая гидравлическая эрозия
             for iteration in range(self.erosion_settings.iterations):
                 # Выбираем случайную точку
-                x = self.random_generator.randint(0, width - 1)
-                y = self.random_generator.randint(0, height - 1)
+                x = points_x[iteration]
+                y = points_y[iteration]
                 
                 if y < height - 1:  # Не на нижней границе
                     # Вычисляем градиент
@@ -418,7 +490,7 @@ class HeightMapGenerator(BaseComponent):
             
             # Добавляем случайные вариации
             noise = self._generate_perlin_noise(chunk_x, chunk_y, width, 
-                                              scale=100.0, octaves=2)
+                                              scale=100.0, octaves=2, layer=8)
             temperature_variation = noise * 10.0
             
             # Финальная температура
@@ -451,7 +523,7 @@ class HeightMapGenerator(BaseComponent):
             
             # Добавляем случайные вариации
             noise = self._generate_perlin_noise(chunk_x, chunk_y, width,
-                                              scale=80.0, octaves=3)
+                                              scale=80.0, octaves=3, layer=9)
             humidity_variation = noise * 0.3
             
             # Финальная влажность
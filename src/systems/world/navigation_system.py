@@ -11,6 +11,8 @@ import time
 import math
 
 from src.core.architecture import BaseComponent, ComponentType, Priority
+from src.systems.world.height_map_generator import HeightMapSettings
+from src.systems.world.pathfinding import Cell, FlowField, NavigationGrid, PathfindingService
 
 # = ТИПЫ НАВИГАЦИИ
 class MapType(Enum):
@@ -139,6 +141,9 @@ class NavigationSystem(BaseComponent):
         # Позиция игрока
         self.player_position = (0.0, 0.0, 0.0)
         
+        # Сервисы поиска путей по сеткам (подземелья, чанки)
+        self.pathfinding_services: Dict[str, PathfindingService] = {}
+        
         # Статистика
         self.navigation_stats = {
             "total_waypoints": 0,
@@ -556,6 +561,83 @@ class NavigationSystem(BaseComponent):
             self._logger.error(f"Ошибка получения цвета путевой точки: {e}")
             return "#FFFFFF"
     
+    # = ПОИСК ПУТЕЙ
+    
+    def register_navigation_grid(self, grid_id: str, grid: NavigationGrid) -> PathfindingService:
+        """Регистрация сетки для поиска путей"""
+        service = PathfindingService(grid)
+        self.pathfinding_services[grid_id] = service
+        self._logger.debug(f"Зарегистрирована навигационная сетка {grid_id} ({grid.width}x{grid.height})")
+        return service
+    
+    def register_dungeon_grid(self, dungeon: Any) -> Optional[PathfindingService]:
+        """Регистрация сетки сгенерированного подземелья (GeneratedDungeon)"""
+        try:
+            return self.register_navigation_grid(dungeon.dungeon_id, NavigationGrid.from_dungeon(dungeon))
+        except Exception as e:
+            self._logger.error(f"Ошибка регистрации сетки подземелья: {e}")
+            return None
+    
+    def register_chunk_grid(self, chunk: Any, biome_costs: Optional[Dict[int, float]] = None,
+                            height_settings: Optional[HeightMapSettings] = None,
+                            **cost_options) -> Optional[PathfindingService]:
+        """Регистрация сетки стоимостей по карте высот чанка мира (WorldChunk)
+        Уровень моря и предельный уклон берутся из настроек генератора высот"""
+        try:
+            height_settings = height_settings or HeightMapSettings()
+            cost_options.setdefault('sea_level', height_settings.sea_level)
+            cost_options.setdefault('height_range', height_settings.max_height - height_settings.min_height)
+            grid = NavigationGrid.from_height_map(chunk.height_map, chunk.biome_map,
+                                                  biome_costs, **cost_options)
+            return self.register_navigation_grid(f"chunk_{chunk.chunk_id}", grid)
+        except Exception as e:
+            self._logger.error(f"Ошибка регистрации сетки чанка: {e}")
+            return None
+    
+    def unregister_navigation_grid(self, grid_id: str) -> bool:
+        """Удаление сетки вместе с путями агентов и полями потоков"""
+        return self.pathfinding_services.pop(grid_id, None) is not None
+    
+    def find_path(self, grid_id: str, start: Cell, goal: Cell,
+                  agent_id: Optional[str] = None) -> Optional[List[Cell]]:
+        """Путь по клеткам сетки; с agent_id путь запоминается и
+        восстанавливается при изменении клеток"""
+        try:
+            service = self.pathfinding_services.get(grid_id)
+            if service is None:
+                return None
+            if agent_id is not None:
+                return service.request_path(agent_id, start, goal)
+            return service.find_path(start, goal)
+            
+        except Exception as e:
+            self._logger.error(f"Ошибка поиска пути на сетке {grid_id}: {e}")
+            return None
+    
+    def get_agent_path(self, grid_id: str, agent_id: str,
+                       current: Optional[Cell] = None) -> Optional[List[Cell]]:
+        """Актуальный (при необходимости восстановленный) путь агента"""
+        service = self.pathfinding_services.get(grid_id)
+        return service.get_agent_path(agent_id, current) if service else None
+    
+    def get_flow_field(self, grid_id: str, goal: Cell) -> Optional[FlowField]:
+        """Поле потока к общей цели группы агентов (кэшируется до изменения сетки)"""
+        try:
+            service = self.pathfinding_services.get(grid_id)
+            return service.get_flow_field(goal) if service else None
+        except Exception as e:
+            self._logger.error(f"Ошибка построения поля потока на сетке {grid_id}: {e}")
+            return None
+    
+    def update_grid_cells(self, grid_id: str, changes: Dict[Cell, float]) -> int:
+        """Изменение стоимости клеток (двери, обвалы); возвращает число изменившихся клеток"""
+        try:
+            service = self.pathfinding_services.get(grid_id)
+            return len(service.update_cells(changes)) if service else 0
+        except Exception as e:
+            self._logger.error(f"Ошибка изменения клеток сетки {grid_id}: {e}")
+            return 0
+    
     def get_gps_data(self) -> GPSData:
         """Получение GPS данных"""
         return self.gps_data
@@ -573,7 +655,9 @@ class NavigationSystem(BaseComponent):
                 "gps_updates": self.navigation_stats["gps_updates"],
                 "compass_updates": self.navigation_stats["compass_updates"],
                 "player_position": self.player_position,
-                "active_waypoints": len([w for w in self.waypoints.values() if w.visible])
+                "active_waypoints": len([w for w in self.waypoints.values() if w.visible]),
+                "pathfinding": {grid_id: service.get_stats()
+                                for grid_id, service in self.pathfinding_services.items()}
             }
             
         except Exception as e:
@@ -608,6 +692,7 @@ class NavigationSystem(BaseComponent):
             # Очищаем все данные
             self.maps.clear()
             self.waypoints.clear()
+            self.pathfinding_services.clear()
             
             # Сбрасываем статистику
             self.navigation_stats = {
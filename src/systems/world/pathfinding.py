@@ -0,0 +1,705 @@
+#!/usr/bin/env python3
+"""Поиск путей на сетках мира
+A* с jump point search для одиночных агентов, кэшируемые поля потоков для групп
+с общей целью и инкрементальное восстановление путей при изменении клеток"""
+
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Dict, List, Mapping, Optional, Set, Tuple
+import heapq
+import logging
+import math
+import threading
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+Cell = Tuple[int, int]
+
+SQRT2 = math.sqrt(2.0)
+
+# Смещения восьми соседей: сначала ортогональные, затем диагональные
+NEIGHBOR_OFFSETS: Tuple[Cell, ...] = ((1, 0), (-1, 0), (0, 1), (0, -1),
+                                      (1, 1), (1, -1), (-1, 1), (-1, -1))
+
+# Стоимость клеток GeneratedDungeon.grid: 0 - стена, 1 - комната, 2 - коридор
+DUNGEON_CELL_COSTS: Dict[int, float] = {0: math.inf, 1: 1.0, 2: 1.0}
+
+# Предельный уклон на клетку как доля диапазона высот генератора (max_height - min_height)
+MAX_SLOPE_FRACTION = 0.25
+
+def _sign(value: int) -> int:
+    return (value > 0) - (value < 0)
+
+def octile_distance(dx: int, dy: int) -> float:
+    """Расстояние на 8-связной сетке"""
+    dx, dy = abs(dx), abs(dy)
+    return dx + dy + (SQRT2 - 2.0) * min(dx, dy)
+
+# = СЕТКА СТОИМОСТЕЙ
+
+class NavigationGrid:
+    """Сетка стоимостей перемещения, индексация costs[y, x]; inf - непроходимая клетка
+    Для поиска поддерживаются плоские списки с рамкой из непроходимых клеток,
+    что избавляет от проверок границ во внутренних циклах"""
+
+    def __init__(self, costs: np.ndarray):
+        self.costs = np.array(costs, dtype=np.float64)
+        self.height, self.width = self.costs.shape
+        self.version = 0
+        self.lock = threading.RLock()
+        self._stride = self.width + 2
+        self._rebuild()
+
+    def _rebuild(self):
+        """Пересборка плоских массивов поиска"""
+        padded = np.full((self.height + 2, self.width + 2), math.inf)
+        padded[1:-1, 1:-1] = self.costs
+        self._flat_costs: List[float] = padded.ravel().tolist()
+        self._walkable: List[bool] = np.isfinite(padded).ravel().tolist()
+        self._update_cost_range()
+
+    def _update_cost_range(self):
+        """Минимальная стоимость (для эвристики) и признак однородности (для JPS)"""
+        passable = self.costs[np.isfinite(self.costs)]
+        self.min_cost = float(passable.min()) if passable.size else 1.0
+        self.is_uniform = bool(passable.size == 0 or passable.max() == passable.min())
+
+    # - Конструкторы
+
+    @classmethod
+    def from_dungeon(cls, dungeon: Any, cell_costs: Optional[Mapping[int, float]] = None) -> "NavigationGrid":
+        """Сетка по GeneratedDungeon.grid"""
+        cell_costs = cell_costs or DUNGEON_CELL_COSTS
+        cells = np.asarray(dungeon.grid, dtype=np.int32)
+        costs = np.full(cells.shape, math.inf)
+        for value, cost in cell_costs.items():
+            costs[cells == value] = cost
+        return cls(costs)
+
+    @classmethod
+    def from_height_map(cls, height_map: np.ndarray, biome_map: Optional[np.ndarray] = None,
+                        biome_costs: Optional[Mapping[int, float]] = None, sea_level: float = 0.0,
+                        max_slope: Optional[float] = None, height_range: Optional[float] = None,
+                        slope_weight: float = 0.05) -> "NavigationGrid":
+        """Сетка по карте высот чанка: стоимость растет с уклоном,
+        вода и слишком крутые склоны непроходимы, биомы задают множители
+        Уклон зависит от масштаба высот, поэтому нужен max_slope или height_range
+        генератора: тогда max_slope = MAX_SLOPE_FRACTION * height_range"""
+        if max_slope is None:
+            if not height_range:
+                raise ValueError("Нужен max_slope или height_range генератора высот")
+            max_slope = MAX_SLOPE_FRACTION * height_range
+        heights = np.asarray(height_map, dtype=np.float64)
+        gradient_y, gradient_x = np.gradient(heights)
+        slope = np.hypot(gradient_x, gradient_y)
+
+        costs = 1.0 + slope_weight * slope
+        costs[(slope > max_slope) | (heights < sea_level)] = math.inf
+
+        if biome_map is not None and biome_costs:
+            biomes = np.asarray(biome_map)
+            for biome, multiplier in biome_costs.items():
+                costs[biomes == biome] *= multiplier
+        return cls(costs)
+
+    # - Доступ к клеткам
+
+    def index(self, x: int, y: int) -> int:
+        return (y + 1) * self._stride + (x + 1)
+
+    def cell(self, index: int) -> Cell:
+        y, x = divmod(index, self._stride)
+        return x - 1, y - 1
+
+    def in_bounds(self, x: int, y: int) -> bool:
+        return 0 <= x < self.width and 0 <= y < self.height
+
+    def is_walkable(self, x: int, y: int) -> bool:
+        return self.in_bounds(x, y) and self._walkable[self.index(x, y)]
+
+    def can_move(self, from_cell: Cell, to_cell: Cell) -> bool:
+        """Допустимость шага между соседними клетками (диагональ без срезания углов)"""
+        (x, y), (nx, ny) = from_cell, to_cell
+        if not self.is_walkable(nx, ny):
+            return False
+        dx, dy = nx - x, ny - y
+        if dx and dy:
+            return self.is_walkable(x + dx, y) and self.is_walkable(x, y + dy)
+        return True
+
+    def update_cells(self, changes: Mapping[Cell, float]) -> Set[Cell]:
+        """Изменение стоимости клеток; возвращает реально изменившиеся клетки"""
+        changed: Set[Cell] = set()
+        with self.lock:
+            for (x, y), cost in changes.items():
+                if not self.in_bounds(x, y):
+                    continue
+                cost = float(cost)
+                if self.costs[y, x] == cost:
+                    continue
+                self.costs[y, x] = cost
+                index = self.index(x, y)
+                self._flat_costs[index] = cost
+                self._walkable[index] = math.isfinite(cost)
+                changed.add((x, y))
+
+            if changed:
+                self.version += 1
+                self._update_cost_range()
+        return changed
+
+# = ПОИСК ПУТИ ОДНОГО АГЕНТА
+
+class GridPathfinder:
+    """A* и jump point search на NavigationGrid (8-связность без срезания углов)"""
+
+    def __init__(self, grid: NavigationGrid):
+        self.grid = grid
+        self.stats = {
+            'searches': 0,
+            'jps_searches': 0,
+            'expanded_nodes': 0,
+            'failed_searches': 0
+        }
+
+    def find_path(self, start: Cell, goal: Cell, use_jps: Optional[bool] = None,
+                  max_expansions: Optional[int] = None) -> Optional[List[Cell]]:
+        """Путь из start в goal списком клеток (включая обе) или None
+        JPS по умолчанию используется на сетках с одинаковой стоимостью клеток"""
+        grid = self.grid
+        if not grid.is_walkable(*start) or not grid.is_walkable(*goal):
+            return None
+        if start == goal:
+            return [start]
+
+        with grid.lock:
+            self.stats['searches'] += 1
+            if use_jps is None:
+                use_jps = grid.is_uniform
+            if use_jps:
+                self.stats['jps_searches'] += 1
+                path = self._search_jps(start, goal, max_expansions)
+            else:
+                path = self._search_astar(start, goal, max_expansions)
+
+        if path is None:
+            self.stats['failed_searches'] += 1
+        return path
+
+    def _search_astar(self, start: Cell, goal: Cell, max_expansions: Optional[int]) -> Optional[List[Cell]]:
+        """Взвешенный A* с октильной эвристикой"""
+        grid = self.grid
+        stride = grid._stride
+        costs = grid._flat_costs
+        walkable = grid._walkable
+        min_cost = grid.min_cost
+        goal_x, goal_y = goal
+        moves = [(dx + dy * stride, dx, dy * stride, SQRT2 if dx and dy else 1.0)
+                 for dx, dy in NEIGHBOR_OFFSETS]
+
+        def heuristic(index: int) -> float:
+            y, x = divmod(index, stride)
+            return octile_distance(x - 1 - goal_x, y - 1 - goal_y) * min_cost
+
+        start_index = grid.index(*start)
+        goal_index = grid.index(*goal)
+        g_score: Dict[int, float] = {start_index: 0.0}
+        parents: Dict[int, int] = {start_index: -1}
+        closed: Set[int] = set()
+        open_heap = [(heuristic(start_index), 0.0, start_index)]
+        expanded = 0
+
+        while open_heap:
+            _, g, index = heapq.heappop(open_heap)
+            if index in closed:
+                continue
+            if index == goal_index:
+                self.stats['expanded_nodes'] += expanded
+                return self._reconstruct(parents, goal_index)
+
+            closed.add(index)
+            expanded += 1
+            if max_expansions is not None and expanded > max_expansions:
+                break
+
+            for offset, dx, dy_offset, step in moves:
+                neighbor = index + offset
+                if not walkable[neighbor] or neighbor in closed:
+                    continue
+                if dx and dy_offset and not (walkable[index + dx] and walkable[index + dy_offset]):
+                    continue
+                new_g = g + costs[neighbor] * step
+                if new_g < g_score.get(neighbor, math.inf):
+                    g_score[neighbor] = new_g
+                    parents[neighbor] = index
+                    heapq.heappush(open_heap, (new_g + heuristic(neighbor), new_g, neighbor))
+
+        self.stats['expanded_nodes'] += expanded
+        return None
+
+    def _reconstruct(self, parents: Dict[int, int], index: int) -> List[Cell]:
+        path = []
+        while index != -1:
+            path.append(self.grid.cell(index))
+            index = parents[index]
+        path.reverse()
+        return path
+
+    # - Jump point search
+
+    def _search_jps(self, start: Cell, goal: Cell, max_expansions: Optional[int]) -> Optional[List[Cell]]:
+        """A* по точкам прыжка (только для однородной стоимости клеток)"""
+        cell_cost = self.grid.min_cost
+        goal_x, goal_y = goal
+        g_score: Dict[Cell, float] = {start: 0.0}
+        parents: Dict[Cell, Optional[Cell]] = {start: None}
+        closed: Set[Cell] = set()
+        open_heap = [(octile_distance(start[0] - goal_x, start[1] - goal_y) * cell_cost, 0.0, start)]
+        expanded = 0
+
+        while open_heap:
+            _, g, node = heapq.heappop(open_heap)
+            if node in closed:
+                continue
+            if node == goal:
+                self.stats['expanded_nodes'] += expanded
+                return self._expand_jump_points(parents, goal)
+
+            closed.add(node)
+            expanded += 1
+            if max_expansions is not None and expanded > max_expansions:
+                break
+
+            x, y = node
+            for nx, ny in self._jps_neighbors(node, parents[node]):
+                jump_point = self._jump(nx, ny, _sign(nx - x), _sign(ny - y), goal)
+                if jump_point is None or jump_point in closed:
+                    continue
+                new_g = g + octile_distance(jump_point[0] - x, jump_point[1] - y) * cell_cost
+                if new_g < g_score.get(jump_point, math.inf):
+                    g_score[jump_point] = new_g
+                    parents[jump_point] = node
+                    h = octile_distance(jump_point[0] - goal_x, jump_point[1] - goal_y) * cell_cost
+                    heapq.heappush(open_heap, (new_g + h, new_g, jump_point))
+
+        self.stats['expanded_nodes'] += expanded
+        return None
+
+    def _jps_neighbors(self, node: Cell, parent: Optional[Cell]) -> List[Cell]:
+        """Соседи с отсечением по направлению прихода"""
+        walkable = self.grid.is_walkable
+        x, y = node
+        if parent is None:
+            return [(x + dx, y + dy) for dx, dy in NEIGHBOR_OFFSETS
+                    if self.grid.can_move(node, (x + dx, y + dy))]
+
+        dx, dy = _sign(x - parent[0]), _sign(y - parent[1])
+        neighbors = []
+        if dx and dy:
+            vertical = walkable(x, y + dy)
+            horizontal = walkable(x + dx, y)
+            if vertical:
+                neighbors.append((x, y + dy))
+            if horizontal:
+                neighbors.append((x + dx, y))
+            if vertical and horizontal and walkable(x + dx, y + dy):
+                neighbors.append((x + dx, y + dy))
+        elif dx:
+            forward = walkable(x + dx, y)
+            up, down = walkable(x, y + 1), walkable(x, y - 1)
+            if forward:
+                neighbors.append((x + dx, y))
+                if up and walkable(x + dx, y + 1):
+                    neighbors.append((x + dx, y + 1))
+                if down and walkable(x + dx, y - 1):
+                    neighbors.append((x + dx, y - 1))
+            if up:
+                neighbors.append((x, y + 1))
+            if down:
+                neighbors.append((x, y - 1))
+        else:
+            forward = walkable(x, y + dy)
+            right, left = walkable(x + 1, y), walkable(x - 1, y)
+            if forward:
+                neighbors.append((x, y + dy))
+                if right and walkable(x + 1, y + dy):
+                    neighbors.append((x + 1, y + dy))
+                if left and walkable(x - 1, y + dy):
+                    neighbors.append((x - 1, y + dy))
+            if right:
+                neighbors.append((x + 1, y))
+            if left:
+                neighbors.append((x - 1, y))
+        return neighbors
+
+    def _jump(self, x: int, y: int, dx: int, dy: int, goal: Cell) -> Optional[Cell]:
+        """Поиск следующей точки прыжка в направлении (dx, dy)
+        Сканирование идет по плоскому списку проходимости: рамка сетки
+        гарантирует остановку без проверок границ"""
+        grid = self.grid
+        walkable = grid._walkable
+        stride = grid._stride
+        index = grid.index(x, y)
+        goal_index = grid.index(*goal)
+        step_y = dy * stride
+        step = dx + step_y
+
+        if dx and dy:
+            while walkable[index]:
+                if index == goal_index:
+                    return grid.cell(index)
+                # По диагонали точка прыжка - клетка, из которой прямой прыжок что-то находит
+                if (self._scan_straight(index + dx, dx, goal_index) >= 0
+                        or self._scan_straight(index + step_y, step_y, goal_index) >= 0):
+                    return grid.cell(index)
+                if not (walkable[index + dx] and walkable[index + step_y]):
+                    return None
+                index += step
+            return None
+
+        found = self._scan_straight(index, step, goal_index)
+        return grid.cell(found) if found >= 0 else None
+
+    def _scan_straight(self, index: int, step: int, goal_index: int) -> int:
+        """Прямой прыжок по плоскому индексу; -1 если точка прыжка не найдена"""
+        walkable = self.grid._walkable
+        # Боковые соседи перпендикулярны направлению движения
+        side = self.grid._stride if step in (1, -1) else 1
+        while walkable[index]:
+            if index == goal_index:
+                return index
+            behind = index - step
+            if ((walkable[index - side] and not walkable[behind - side])
+                    or (walkable[index + side] and not walkable[behind + side])):
+                return index
+            index += step
+        return -1
+
+    @staticmethod
+    def _expand_jump_points(parents: Dict[Cell, Optional[Cell]], goal: Cell) -> List[Cell]:
+        """Развертывание точек прыжка в путь по клеткам"""
+        jump_points = []
+        node: Optional[Cell] = goal
+        while node is not None:
+            jump_points.append(node)
+            node = parents[node]
+        jump_points.reverse()
+
+        path = [jump_points[0]]
+        for (x, y), (tx, ty) in zip(jump_points, jump_points[1:]):
+            dx, dy = _sign(tx - x), _sign(ty - y)
+            while (x, y) != (tx, ty):
+                x += dx
+                y += dy
+                path.append((x, y))
+        return path
+
+# = ПОЛЯ ПОТОКОВ
+
+class FlowField:
+    """Поле потока к одной цели: интегральная стоимость до цели и направление шага
+    для каждой клетки. Один расчет обслуживает любое число агентов с этой целью"""
+
+    def __init__(self, grid: NavigationGrid, goal: Cell):
+        self.goal = goal
+        self.grid_version = grid.version
+        self.distance = np.full((grid.height, grid.width), math.inf)
+        self.directions = np.full((grid.height, grid.width), -1, dtype=np.int8)
+        if grid.is_walkable(*goal):
+            self._integrate(grid)
+            self._build_directions(grid)
+
+    def _integrate(self, grid: NavigationGrid):
+        """Дейкстра от цели; шаг в клетку стоит ее стоимость (x sqrt2 по диагонали)"""
+        stride = grid._stride
+        costs = grid._flat_costs
+        walkable = grid._walkable
+        moves = [(dx + dy * stride, dx, dy * stride, SQRT2 if dx and dy else 1.0)
+                 for dx, dy in NEIGHBOR_OFFSETS]
+
+        goal_index = grid.index(*self.goal)
+        distance: Dict[int, float] = {goal_index: 0.0}
+        open_heap = [(0.0, goal_index)]
+        settled: Set[int] = set()
+
+        while open_heap:
+            current, index = heapq.heappop(open_heap)
+            if index in settled:
+                continue
+            settled.add(index)
+            # Агент из соседней клетки заходит в index
+            enter_cost = costs[index]
+            for offset, dx, dy_offset, step in moves:
+                neighbor = index + offset
+                if not walkable[neighbor] or neighbor in settled:
+                    continue
+                if dx and dy_offset and not (walkable[index + dx] and walkable[index + dy_offset]):
+                    continue
+                new_distance = current + enter_cost * step
+                if new_distance < distance.get(neighbor, math.inf):
+                    distance[neighbor] = new_distance
+                    heapq.heappush(open_heap, (new_distance, neighbor))
+
+        for index, value in distance.items():
+            x, y = grid.cell(index)
+            self.distance[y, x] = value
+
+    def _build_directions(self, grid: NavigationGrid):
+        """Векторный выбор лучшего соседа для каждой клетки"""
+        height, width = self.distance.shape
+        padded_distance = np.full((height + 2, width + 2), math.inf)
+        padded_distance[1:-1, 1:-1] = self.distance
+        padded_costs = np.full((height + 2, width + 2), math.inf)
+        padded_costs[1:-1, 1:-1] = grid.costs
+        walkable = np.isfinite(padded_costs)
+
+        def shifted(array: np.ndarray, dx: int, dy: int) -> np.ndarray:
+            return array[1 + dy:height + 1 + dy, 1 + dx:width + 1 + dx]
+
+        totals = np.empty((len(NEIGHBOR_OFFSETS), height, width))
+        for k, (dx, dy) in enumerate(NEIGHBOR_OFFSETS):
+            step = SQRT2 if dx and dy else 1.0
+            total = shifted(padded_distance, dx, dy) + shifted(padded_costs, dx, dy) * step
+            if dx and dy:
+                blocked = ~(shifted(walkable, dx, 0) & shifted(walkable, 0, dy))
+                total = np.where(blocked, math.inf, total)
+            totals[k] = total
+
+        best = np.argmin(totals, axis=0).astype(np.int8)
+        reachable = np.isfinite(np.min(totals, axis=0)) & np.isfinite(self.distance)
+        self.directions = np.where(reachable, best, -1).astype(np.int8)
+        self.directions[self.goal[1], self.goal[0]] = -1
+
+    def is_valid(self, grid: NavigationGrid) -> bool:
+        return self.grid_version == grid.version
+
+    def distance_at(self, x: int, y: int) -> float:
+        return float(self.distance[y, x])
+
+    def direction(self, x: int, y: int) -> Cell:
+        """Единичный шаг из клетки к цели ((0, 0) - цель или недостижимо)"""
+        k = int(self.directions[y, x])
+        return NEIGHBOR_OFFSETS[k] if k >= 0 else (0, 0)
+
+    def next_cell(self, x: int, y: int) -> Optional[Cell]:
+        k = int(self.directions[y, x])
+        if k < 0:
+            return None
+        dx, dy = NEIGHBOR_OFFSETS[k]
+        return x + dx, y + dy
+
+    def trace(self, start: Cell, max_steps: Optional[int] = None) -> Optional[List[Cell]]:
+        """Путь по полю от start до цели"""
+        if not math.isfinite(self.distance[start[1], start[0]]):
+            return None
+        path = [start]
+        limit = max_steps if max_steps is not None else self.distance.size
+        while path[-1] != self.goal and len(path) <= limit:
+            next_cell = self.next_cell(*path[-1])
+            if next_cell is None:
+                return None
+            path.append(next_cell)
+        return path
+
+# = СЕРВИС ПУТЕЙ
+
+@dataclass
+class AgentPath:
+    """Путь агента с отметкой версии сетки"""
+    agent_id: str
+    goal: Cell
+    cells: List[Cell]
+    grid_version: int
+    repairs: int = 0
+
+class PathfindingService:
+    """Пути агентов, кэш полей потоков и восстановление путей для одной сетки"""
+
+    def __init__(self, grid: NavigationGrid, max_flow_fields: int = 16,
+                 repair_expansion_factor: int = 64):
+        self.grid = grid
+        self.pathfinder = GridPathfinder(grid)
+        self.max_flow_fields = max_flow_fields
+        self.repair_expansion_factor = repair_expansion_factor
+        self.agent_paths: Dict[str, AgentPath] = {}
+        self._cell_agents: Dict[Cell, Set[str]] = {}
+        self._dirty_agents: Set[str] = set()
+        self._flow_fields: "OrderedDict[Cell, FlowField]" = OrderedDict()
+        self.stats = {
+            'paths_requested': 0,
+            'paths_repaired': 0,
+            'full_replans': 0,
+            'flow_fields_built': 0,
+            'flow_field_hits': 0
+        }
+
+    # - Пути одиночных агентов
+
+    def find_path(self, start: Cell, goal: Cell) -> Optional[List[Cell]]:
+        return self.pathfinder.find_path(start, goal)
+
+    def request_path(self, agent_id: str, start: Cell, goal: Cell) -> Optional[List[Cell]]:
+        """Построение и запоминание пути агента (для последующего восстановления)"""
+        self.stats['paths_requested'] += 1
+        self.release_agent(agent_id)
+        cells = self.pathfinder.find_path(start, goal)
+        if cells is None:
+            return None
+        self._store_path(AgentPath(agent_id, goal, cells, self.grid.version))
+        return list(cells)
+
+    def get_agent_path(self, agent_id: str, current: Optional[Cell] = None) -> Optional[List[Cell]]:
+        """Актуальный путь агента; при изменении клеток он восстанавливается,
+        пройденная часть до current отбрасывается"""
+        agent_path = self.agent_paths.get(agent_id)
+        if agent_path is None:
+            return None
+
+        if current is not None and current in agent_path.cells:
+            index = agent_path.cells.index(current)
+            if index:
+                self._unindex_path(agent_path)
+                agent_path.cells = agent_path.cells[index:]
+                self._index_path(agent_path)
+
+        if agent_id in self._dirty_agents:
+            self._dirty_agents.discard(agent_id)
+            if not self._repair_path(agent_path):
+                self.release_agent(agent_id)
+                return None
+        return list(agent_path.cells)
+
+    def release_agent(self, agent_id: str):
+        """Забыть путь агента"""
+        agent_path = self.agent_paths.pop(agent_id, None)
+        if agent_path is not None:
+            self._unindex_path(agent_path)
+        self._dirty_agents.discard(agent_id)
+
+    def _store_path(self, agent_path: AgentPath):
+        self.agent_paths[agent_path.agent_id] = agent_path
+        self._index_path(agent_path)
+
+    def _index_path(self, agent_path: AgentPath):
+        for cell in agent_path.cells:
+            self._cell_agents.setdefault(cell, set()).add(agent_path.agent_id)
+
+    def _unindex_path(self, agent_path: AgentPath):
+        for cell in agent_path.cells:
+            agents = self._cell_agents.get(cell)
+            if agents:
+                agents.discard(agent_path.agent_id)
+                if not agents:
+                    del self._cell_agents[cell]
+
+    # - Изменение сетки и восстановление путей
+
+    def update_cells(self, changes: Mapping[Cell, float]) -> Set[Cell]:
+        """Изменение клеток: пути через них помечаются к восстановлению,
+        поля потоков устаревают"""
+        changed = self.grid.update_cells(changes)
+        for cell in changed:
+            self._dirty_agents.update(self._cell_agents.get(cell, ()))
+        if changed:
+            self._flow_fields.clear()
+        return changed
+
+    def repair_paths(self, max_repairs: Optional[int] = None) -> int:
+        """Пакетное восстановление помеченных путей"""
+        repaired = 0
+        for agent_id in list(self._dirty_agents):
+            if max_repairs is not None and repaired >= max_repairs:
+                break
+            self._dirty_agents.discard(agent_id)
+            agent_path = self.agent_paths.get(agent_id)
+            if agent_path is not None and not self._repair_path(agent_path):
+                self.release_agent(agent_id)
+            repaired += 1
+        return repaired
+
+    def _first_invalid_step(self, cells: List[Cell], begin: int = 1) -> int:
+        """Индекс первой клетки, в которую больше нельзя шагнуть (-1 если путь цел)"""
+        for index in range(max(begin, 1), len(cells)):
+            if not self.grid.can_move(cells[index - 1], cells[index]):
+                return index
+        return -1
+
+    def _repair_path(self, agent_path: AgentPath) -> bool:
+        """Локальная перестройка участков пути вокруг изменившихся клеток,
+        при неудаче - полный поиск от последней целой клетки"""
+        cells = agent_path.cells
+        if not cells or not self.grid.is_walkable(*cells[0]):
+            return False
+
+        self._unindex_path(agent_path)
+        invalid = self._first_invalid_step(cells)
+        while invalid != -1:
+            # Обход от последней целой клетки до первой проходимой клетки после разрыва
+            anchor = invalid - 1
+            rejoin = invalid
+            while rejoin < len(cells) and not self.grid.is_walkable(*cells[rejoin]):
+                rejoin += 1
+
+            detour = None
+            if rejoin < len(cells):
+                budget = self.repair_expansion_factor * (rejoin - anchor + 1)
+                detour = self.pathfinder.find_path(cells[anchor], cells[rejoin], max_expansions=budget)
+
+            if detour is not None:
+                cells = cells[:anchor] + detour + cells[rejoin + 1:]
+                invalid = self._first_invalid_step(cells, anchor + len(detour))
+            else:
+                self.stats['full_replans'] += 1
+                tail = self.pathfinder.find_path(cells[anchor], agent_path.goal)
+                if tail is None:
+                    return False
+                cells = cells[:anchor] + tail
+                invalid = -1
+
+        agent_path.cells = cells
+        agent_path.grid_version = self.grid.version
+        agent_path.repairs += 1
+        self._index_path(agent_path)
+        self.stats['paths_repaired'] += 1
+        return True
+
+    # - Поля потоков
+
+    def get_flow_field(self, goal: Cell) -> Optional[FlowField]:
+        """Поле потока к цели из кэша или новый расчет (LRU на max_flow_fields целей)"""
+        if not self.grid.is_walkable(*goal):
+            return None
+
+        field = self._flow_fields.get(goal)
+        if field is not None and field.is_valid(self.grid):
+            self._flow_fields.move_to_end(goal)
+            self.stats['flow_field_hits'] += 1
+            return field
+
+        with self.grid.lock:
+            field = FlowField(self.grid, goal)
+        self._flow_fields[goal] = field
+        self._flow_fields.move_to_end(goal)
+        while len(self._flow_fields) > self.max_flow_fields:
+            self._flow_fields.popitem(last=False)
+        self.stats['flow_fields_built'] += 1
+        return field
+
+    def next_step(self, position: Cell, goal: Cell) -> Optional[Cell]:
+        """Следующая клетка к общей цели по полю потока"""
+        field = self.get_flow_field(goal)
+        if field is None or not self.grid.in_bounds(*position):
+            return None
+        return field.next_cell(*position)
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            **self.stats,
+            **self.pathfinder.stats,
+            'agents': len(self.agent_paths),
+            'dirty_agents': len(self._dirty_agents),
+            'cached_flow_fields': len(self._flow_fields),
+            'grid_version': self.grid.version
+        }
@@ -2,16 +2,20 @@
 """Менеджер мира - главная система управления процедурно генерируемым миром
 Координирует генерацию ландшафта, структур, биомов и экологических систем"""
 
+from collections import deque
 from dataclasses import dataclass, field
 from enum import Enum
-from typing import Dict, List, Optional, Any, Tuple, Callable
+from typing import Deque, Dict, List, Optional, Any, Tuple, Callable
+import heapq
+import itertools
 import logging
 import time
 import math
 import threading
-from concurrent.futures import ThreadPoolExecutor, as_completed
+from concurrent.futures import Future, ThreadPoolExecutor, as_completed
 
 from src.core.architecture import BaseComponent, ComponentType, Priority
+from src.systems.world.chunk_store import ChunkStore
 from src.systems.world.height_map_generator import HeightMapGenerator
 from src.systems.world.structure_generator import StructureGenerator
 
@@ -32,6 +36,9 @@ class ChunkState(Enum):
     ACTIVE = "active"            # Активен
     UNLOADING = "unloading"      # Выгружается
 
+# Этапы генерации чанка: каждый выполняется отдельной задачей пула потоков
+CHUNK_GENERATION_STAGES: Tuple[str, ...] = ("height", "biome", "structures")
+
 # = ДАТАКЛАССЫ
 @dataclass
 class WorldSettings:
@@ -44,6 +51,12 @@ class WorldSettings:
     generation_threads: int = 4
     auto_save_interval: float = 300.0  # 5 минут
     max_chunk_generation_time: float = 5.0  # 5 секунд
+    integration_budget_ms: float = 2.0  # Бюджет кадра на интеграцию готовых этапов
+    max_inflight_stages: int = 4  # Одновременно выполняемых этапов генерации
+    cancel_margin: int = 1  # Запас колец сверх view_distance до отмены загрузки
+    enable_chunk_cache: bool = True  # Дисковый кэш карт высот и биомов
+    chunk_cache_dir: str = "saves/chunk_cache"
+    chunk_cache_max_mb: float = 512.0
 
 @dataclass
 class WorldChunk:
@@ -60,6 +73,7 @@ class WorldChunk:
     last_accessed: float = field(default_factory=time.time)
     generation_time: float = 0.0
     memory_usage: float = 0.0
+    generation_stage: int = 0  # Индекс следующего этапа в CHUNK_GENERATION_STAGES
 
 @dataclass
 class WorldStats:
@@ -94,8 +108,23 @@ class WorldManager(BaseComponent):
         
         # Управление чанками
         self.chunks: Dict[str, WorldChunk] = {}
-        self.chunk_load_queue: List[str] = []
-        self.chunk_unload_queue: List[str] = []
+        self.chunk_unload_queue: Deque[str] = deque()
+        
+        # Потоковая загрузка: куча (кольцо, квадрат расстояния, номер, chunk_id)
+        self.chunk_load_heap: List[Tuple[int, int, int, str]] = []
+        self._queued_priority: Dict[str, Tuple[int, int]] = {}
+        self._load_sequence = itertools.count()
+        self._chunk_futures: Dict[str, Future] = {}
+        self._completed_stages: Deque[Tuple[str, Future]] = deque()
+        self._loaded_chunk_count = 0
+        self._load_started: Dict[str, float] = {}
+        self._player_chunk: Tuple[int, int] = (0, 0)
+        self.streaming_stats = {
+            'stages_completed': 0,
+            'chunks_cancelled': 0,
+            'integration_time_ms': 0.0,
+            'backlog': 0
+        }
         
         # Многопоточность
         self.executor: Optional[ThreadPoolExecutor] = None
@@ -103,6 +132,8 @@ class WorldManager(BaseComponent):
         
         # Кэш и оптимизация
         self.chunk_cache: Dict[str, Any] = {}
+        self.chunk_store: Optional[ChunkStore] = None
+        self._generator_version = ""
         self.spatial_index: Dict[Tuple[int, int], str] = {}  # (x, y) -> chunk_id
         
         # События и колбэки
@@ -135,6 +166,12 @@ class WorldManager(BaseComponent):
             # Устанавливаем seed мира
             if self.settings.world_seed == 0:
                 self.settings.world_seed = int(time.time())
+            self.height_generator.set_seed(self.settings.world_seed)
+            
+            # Дисковый кэш сгенерированных чанков
+            if self.settings.enable_chunk_cache:
+                self.chunk_store = ChunkStore(self.settings.chunk_cache_dir, self.settings.chunk_cache_max_mb)
+                self._generator_version = self.height_generator.get_generator_version()
             
             self._logger.info(f"Менеджер мира инициализирован с seed: {self.settings.world_seed}")
             return True
@@ -157,10 +194,14 @@ class WorldManager(BaseComponent):
                     chunk.state = ChunkState.ACTIVE
                     return chunk
                 elif chunk.state == ChunkState.LOADING:
+                    if priority:
+                        self._enqueue_chunk(chunk, urgent=True)
                     return None  # Чанк уже загружается
+                elif chunk.state == ChunkState.ACTIVE:
+                    return chunk
             
             # Проверяем лимит загруженных чанков
-            if len([c for c in self.chunks.values() if c.state in [ChunkState.LOADED, ChunkState.ACTIVE]]) >= self.settings.max_chunks_loaded:
+            if self._loaded_chunk_count >= self.settings.max_chunks_loaded:
                 self._unload_oldest_chunks()
             
             # Создаем новый чанк
@@ -174,15 +215,14 @@ class WorldManager(BaseComponent):
             
             self.chunks[chunk_id] = chunk
             self.spatial_index[(chunk_x, chunk_y)] = chunk_id
+            self._load_started[chunk_id] = time.time()
             
-            # Добавляем в очередь загрузки
-            if priority:
-                self.chunk_load_queue.insert(0, chunk_id)
-            else:
-                self.chunk_load_queue.append(chunk_id)
+            # Ранее посещенный чанк открывается из дискового кэша без генерации карт
+            self._restore_cached_chunk(chunk)
             
-            # Запускаем асинхронную загрузку
-            self._load_chunk_async(chunk_id)
+            # Ставим в очередь по расстоянию до игрока и запускаем свободные слоты
+            self._enqueue_chunk(chunk, urgent=priority)
+            self._dispatch_generation()
             
             return chunk
             
@@ -190,83 +230,166 @@ class WorldManager(BaseComponent):
             self._logger.error(f"Ошибка загрузки чанка {chunk_x}, {chunk_y}: {e}")
             return None
     
-    def _load_chunk_async(self, chunk_id: str):
-        """Асинхронная загрузка чанка"""
-        try:
-            if self.executor:
-                future = self.executor.submit(self._generate_chunk_content, chunk_id)
-                future.add_done_callback(lambda f: self._on_chunk_generated(chunk_id, f))
-            
-        except Exception as e:
-            self._logger.error(f"Ошибка запуска асинхронной загрузки чанка {chunk_id}: {e}")
+    # - Дисковый кэш чанков
     
-    def _generate_chunk_content(self, chunk_id: str) -> bool:
-        """Генерация содержимого чанка"""
-        try:
-            if chunk_id not in self.chunks:
-                return False
-            
-            chunk = self.chunks[chunk_id]
-            start_time = time.time()
-            
-            # Генерируем карту высот
-            height_map = self.height_generator.generate_height_map(
-                chunk.chunk_x, chunk.chunk_y, chunk.chunk_size
-            )
-            
-            # Генерируем карту биомов
-            biome_map = self.height_generator.generate_biome_map(
-                height_map, chunk.chunk_x, chunk.chunk_y
-            )
-            
-            # Генерируем структуры
-            structures = self.structure_generator.generate_structures_for_chunk(
-                chunk.chunk_x, chunk.chunk_y, chunk.chunk_size, self.settings.world_seed
-            )
-            
-            # Сохраняем результаты
-            with self.generation_lock:
-                chunk.height_map = height_map
-                chunk.biome_map = biome_map
-                chunk.structures = [s.structure_id for s in structures]
-                chunk.generation_time = time.time() - start_time
-                chunk.state = ChunkState.LOADED
-                chunk.last_accessed = time.time()
-            
-            # Обновляем статистику
-            self.world_stats.total_structures += len(structures)
-            self.world_stats.generation_time += chunk.generation_time
-            
-            self._logger.debug(f"Чанк {chunk_id} сгенерирован за {chunk.generation_time:.3f}с")
-            return True
-            
-        except Exception as e:
-            self._logger.error(f"Ошибка генерации содержимого чанка {chunk_id}: {e}")
+    def _chunk_cache_key(self, chunk: WorldChunk) -> str:
+        return ChunkStore.make_key(self.settings.world_seed, chunk.chunk_x, chunk.chunk_y,
+                                   chunk.chunk_size, self._generator_version)
+    
+    def _restore_cached_chunk(self, chunk: WorldChunk) -> bool:
+        """Загрузка карт высот и биомов из кэша (mmap), этапы генерации карт пропускаются"""
+        if not self.chunk_store:
             return False
+        cached = self.chunk_store.load(self._chunk_cache_key(chunk), chunk.chunk_size)
+        if cached is None:
+            return False
+        chunk.height_map, chunk.biome_map = cached
+        chunk.generation_stage = CHUNK_GENERATION_STAGES.index("structures")
+        return True
+    
+    def _store_chunk(self, chunk: WorldChunk):
+        """Фоновая запись карт чанка в дисковый кэш"""
+        if not self.chunk_store or not self.executor:
+            return
+        if chunk.height_map is None or chunk.biome_map is None:
+            return
+        self.executor.submit(self.chunk_store.save, self._chunk_cache_key(chunk),
+                             chunk.height_map, chunk.biome_map)
+    
+    # - Потоковая генерация чанков
+    
+    def _chunk_priority(self, chunk: WorldChunk) -> Tuple[int, int]:
+        """Приоритет чанка: кольцо вокруг игрока, затем квадрат расстояния"""
+        dx = chunk.chunk_x - self._player_chunk[0]
+        dy = chunk.chunk_y - self._player_chunk[1]
+        return max(abs(dx), abs(dy)), dx * dx + dy * dy
+    
+    def _enqueue_chunk(self, chunk: WorldChunk, urgent: bool = False):
+        """Постановка следующего этапа чанка в кучу (старая запись становится устаревшей)"""
+        if chunk.chunk_id in self._chunk_futures:
+            return  # Этап уже выполняется
+        ring, distance_sq = self._chunk_priority(chunk)
+        if urgent:
+            ring = -1
+        self._queued_priority[chunk.chunk_id] = (ring, distance_sq)
+        heapq.heappush(self.chunk_load_heap, (ring, distance_sq, next(self._load_sequence), chunk.chunk_id))
+    
+    def _dispatch_generation(self):
+        """Запуск этапов генерации ближайших чанков в свободные слоты пула"""
+        if not self.executor:
+            return
+        
+        heap = self.chunk_load_heap
+        while heap and len(self._chunk_futures) < self.settings.max_inflight_stages:
+            ring, distance_sq, _, chunk_id = heapq.heappop(heap)
+            if self._queued_priority.get(chunk_id) != (ring, distance_sq):
+                continue  # Устаревшая запись
+            del self._queued_priority[chunk_id]
+            
+            chunk = self.chunks.get(chunk_id)
+            if chunk is None or chunk.state != ChunkState.LOADING:
+                continue
+            
+            stage = CHUNK_GENERATION_STAGES[chunk.generation_stage]
+            future = self.executor.submit(self._run_generation_stage, stage, chunk.chunk_x,
+                                          chunk.chunk_y, chunk.chunk_size, chunk.height_map)
+            self._chunk_futures[chunk_id] = future
+            future.add_done_callback(lambda f, cid=chunk_id: self._completed_stages.append((cid, f)))
+        
+        self.streaming_stats['backlog'] = len(self._queued_priority)
     
-    def _on_chunk_generated(self, chunk_id: str, future):
-        """Обработка завершения генерации чанка"""
+    def _run_generation_stage(self, stage: str, chunk_x: int, chunk_y: int,
+                              chunk_size: int, height_map: Optional[Any]) -> Any:
+        """Выполнение одного этапа генерации в рабочем потоке (без изменения чанка)"""
+        if stage == "height":
+            return self.height_generator.generate_height_map(chunk_x, chunk_y, chunk_size)
+        if stage == "biome":
+            return self.height_generator.generate_biome_map(height_map, chunk_x, chunk_y)
+        return self.structure_generator.generate_structures_for_chunk(
+            chunk_x, chunk_y, chunk_size, self.settings.world_seed
+        )
+    
+    def process_streaming(self, budget_ms: Optional[float] = None) -> int:
+        """Интеграция готовых этапов в пределах бюджета кадра; возвращает число этапов"""
+        if budget_ms is None:
+            budget_ms = self.settings.integration_budget_ms
+        start = time.perf_counter()
+        deadline = start + budget_ms / 1000.0
+        integrated = 0
+        
+        while self._completed_stages:
+            chunk_id, future = self._completed_stages.popleft()
+            # Результат отмененной или перезапущенной загрузки отбрасывается
+            if self._chunk_futures.get(chunk_id) is not future:
+                continue
+            del self._chunk_futures[chunk_id]
+            self._integrate_stage(chunk_id, future)
+            integrated += 1
+            if time.perf_counter() >= deadline:
+                break
+        
+        self._dispatch_generation()
+        self.streaming_stats['integration_time_ms'] = (time.perf_counter() - start) * 1000.0
+        return integrated
+    
+    def _integrate_stage(self, chunk_id: str, future: Future):
+        """Применение результата этапа к чанку в основном потоке"""
+        chunk = self.chunks.get(chunk_id)
+        if chunk is None or chunk.state != ChunkState.LOADING:
+            return
+        
         try:
-            if chunk_id in self.chunks:
-                chunk = self.chunks[chunk_id]
-                
-                if future.result():
-                    # Уведомляем о загрузке чанка
-                    self._notify_chunk_loaded(chunk)
-                    
-                    # Обновляем статистику
-                    self.world_stats.loaded_chunks += 1
-                    self.world_stats.total_chunks += 1
-                else:
-                    # Ошибка генерации
-                    chunk.state = ChunkState.UNLOADED
-                    if chunk_id in self.chunks:
-                        del self.chunks[chunk_id]
-                    if (chunk.chunk_x, chunk.chunk_y) in self.spatial_index:
-                        del self.spatial_index[(chunk.chunk_x, chunk.chunk_y)]
-            
+            result = future.result()
         except Exception as e:
-            self._logger.error(f"Ошибка обработки завершения генерации чанка {chunk_id}: {e}")
+            self._logger.error(f"Ошибка генерации содержимого чанка {chunk_id}: {e}")
+            self._discard_chunk(chunk)
+            return
+        
+        stage = CHUNK_GENERATION_STAGES[chunk.generation_stage]
+        if stage == "height":
+            chunk.height_map = result
+        elif stage == "biome":
+            chunk.biome_map = result
+            self._store_chunk(chunk)
+        else:
+            chunk.structures = [structure.structure_id for structure in result]
+            self.world_stats.total_structures += len(result)
+        
+        self.streaming_stats['stages_completed'] += 1
+        chunk.generation_stage += 1
+        
+        if chunk.generation_stage < len(CHUNK_GENERATION_STAGES):
+            self._enqueue_chunk(chunk)
+            return
+        
+        # Все этапы готовы
+        chunk.generation_time = time.time() - self._load_started.pop(chunk_id, time.time())
+        chunk.state = ChunkState.LOADED
+        chunk.last_accessed = time.time()
+        self._loaded_chunk_count += 1
+        
+        self.world_stats.generation_time += chunk.generation_time
+        self.world_stats.loaded_chunks += 1
+        self.world_stats.total_chunks += 1
+        
+        self._logger.debug(f"Чанк {chunk_id} сгенерирован за {chunk.generation_time:.3f}с")
+        self._notify_chunk_loaded(chunk)
+    
+    def _cancel_chunk_loading(self, chunk: WorldChunk):
+        """Отмена загрузки чанка: снятие с очереди и отмена задачи"""
+        self._queued_priority.pop(chunk.chunk_id, None)
+        future = self._chunk_futures.pop(chunk.chunk_id, None)
+        if future is not None:
+            future.cancel()  # Уже выполняющийся этап будет отброшен при интеграции
+        self.streaming_stats['chunks_cancelled'] += 1
+    
+    def _discard_chunk(self, chunk: WorldChunk):
+        """Удаление незагруженного чанка"""
+        chunk.state = ChunkState.UNLOADED
+        self.chunks.pop(chunk.chunk_id, None)
+        self._load_started.pop(chunk.chunk_id, None)
+        if self.spatial_index.get((chunk.chunk_x, chunk.chunk_y)) == chunk.chunk_id:
+            del self.spatial_index[(chunk.chunk_x, chunk.chunk_y)]
     
     def unload_chunk(self, chunk_x: int, chunk_y: int) -> bool:
         """Выгрузка чанка мира"""
@@ -278,17 +401,25 @@ class WorldManager(BaseComponent):
             
             chunk = self.chunks[chunk_id]
             
-            if chunk.state in [ChunkState.LOADING, ChunkState.LOADED, ChunkState.ACTIVE]:
+            if chunk.state == ChunkState.LOADING:
+                # Незавершенная загрузка отменяется без уведомлений
+                self._cancel_chunk_loading(chunk)
+                self._discard_chunk(chunk)
+                return True
+            
+            if chunk.state in [ChunkState.LOADED, ChunkState.ACTIVE]:
+                previous_state = chunk.state
                 chunk.state = ChunkState.UNLOADING
                 self.chunk_unload_queue.append(chunk_id)
+                self._loaded_chunk_count -= 1
                 
                 # Уведомляем о выгрузке
                 self._notify_chunk_unloaded(chunk)
                 
                 # Обновляем статистику
-                if chunk.state == ChunkState.LOADED:
+                if previous_state == ChunkState.LOADED:
                     self.world_stats.loaded_chunks -= 1
-                elif chunk.state == ChunkState.ACTIVE:
+                else:
                     self.world_stats.active_chunks -= 1
                 
                 return True
@@ -365,30 +496,44 @@ class WorldManager(BaseComponent):
         try:
             player_chunk_x = int(player_position[0] // self.settings.chunk_size)
             player_chunk_y = int(player_position[1] // self.settings.chunk_size)
-            
-            # Определяем чанки в области видимости
-            view_chunks = []
-            for dx in range(-self.settings.view_distance, self.settings.view_distance + 1):
-                for dy in range(-self.settings.view_distance, self.settings.view_distance + 1):
-                    chunk_x = player_chunk_x + dx
-                    chunk_y = player_chunk_y + dy
-                    chunk_id = f"{chunk_x}_{chunk_y}"
-                    
-                    if chunk_id not in self.chunks:
-                        # Загружаем новый чанк с высоким приоритетом
-                        self.load_chunk(chunk_x, chunk_y, priority=True)
-                    else:
-                        chunk = self.chunks[chunk_id]
-                        if chunk.state == ChunkState.LOADED:
-                            chunk.state = ChunkState.ACTIVE
-                        chunk.last_accessed = time.time()
-                        view_chunks.append(chunk_id)
-            
-            # Выгружаем чанки вне области видимости
-            for chunk_id, chunk in self.chunks.items():
-                if chunk_id not in view_chunks and chunk.state == ChunkState.ACTIVE:
+            moved = (player_chunk_x, player_chunk_y) != self._player_chunk
+            self._player_chunk = (player_chunk_x, player_chunk_y)
+            view_distance = self.settings.view_distance
+            cancel_distance = view_distance + self.settings.cancel_margin
+            current_time = time.time()
+            
+            # Загрузки, от которых игрок ушел, отменяются; остальные перепланируются
+            for chunk in list(self.chunks.values()):
+                ring = max(abs(chunk.chunk_x - player_chunk_x), abs(chunk.chunk_y - player_chunk_y))
+                if chunk.state == ChunkState.LOADING:
+                    if ring > cancel_distance:
+                        self._cancel_chunk_loading(chunk)
+                        self._discard_chunk(chunk)
+                    elif moved and chunk.chunk_id in self._queued_priority:
+                        self._enqueue_chunk(chunk)
+                elif chunk.state == ChunkState.ACTIVE and ring > view_distance:
                     chunk.state = ChunkState.LOADED
             
+            # Чанки области видимости - кольцами от игрока наружу
+            for ring in range(view_distance + 1):
+                for dx in range(-ring, ring + 1):
+                    for dy in range(-ring, ring + 1):
+                        if max(abs(dx), abs(dy)) != ring:
+                            continue
+                        chunk_x = player_chunk_x + dx
+                        chunk_y = player_chunk_y + dy
+                        chunk = self.chunks.get(f"{chunk_x}_{chunk_y}")
+                        
+                        if chunk is None:
+                            self.load_chunk(chunk_x, chunk_y)
+                        else:
+                            if chunk.state == ChunkState.LOADED:
+                                chunk.state = ChunkState.ACTIVE
+                            if chunk.state != ChunkState.LOADING:
+                                chunk.last_accessed = current_time
+            
+            self._dispatch_generation()
+            
         except Exception as e:
             self._logger.error(f"Ошибка обновления приоритетов чанков: {e}")
     
@@ -477,6 +622,9 @@ class WorldManager(BaseComponent):
                 time.time() - self.last_save_time > self.settings.auto_save_interval):
                 self.save_world_state()
             
+            # Интегрируем готовые этапы генерации в пределах бюджета кадра
+            self.process_streaming()
+            
             # Обрабатываем очередь выгрузки
             self._process_unload_queue()
             
@@ -490,7 +638,7 @@ class WorldManager(BaseComponent):
         """Обработка очереди выгрузки чанков"""
         try:
             while self.chunk_unload_queue:
-                chunk_id = self.chunk_unload_queue.pop(0)
+                chunk_id = self.chunk_unload_queue.popleft()
                 
                 if chunk_id in self.chunks:
                     chunk = self.chunks[chunk_id]
@@ -520,7 +668,15 @@ class WorldManager(BaseComponent):
             # Сохраняем состояние
             self.save_world_state()
             
-            # Останавливаем executor
+            # Отменяем ожидающие этапы и останавливаем executor
+            for future in self._chunk_futures.values():
+                future.cancel()
+            self._chunk_futures.clear()
+            self._queued_priority.clear()
+            self.chunk_load_heap.clear()
+            self._completed_stages.clear()
+            self._load_started.clear()
+            self._loaded_chunk_count = 0
             if self.executor:
                 self.executor.shutdown(wait=True)
             